@@ -0,0 +1,287 @@
+import time
+import asyncio
+
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Union
+
+from ibw.batch import BatchResult
+from ibw.batch import run_call_async
+from ibw.client import IBClientBase
+from ibw.client import SNAPSHOT_MAX_CONIDS
+from ibw.client import SNAPSHOT_MAX_FIELDS
+from ibw.metrics import RequestEvent
+from ibw.metrics import body_size
+from ibw.transport import AsyncIBTransport
+
+
+class AsyncIBClient(IBClientBase):
+
+    def __init__(self, username: str, account: str, client_gateway_path: str = None,
+                 pool_size: int = 100, transport: AsyncIBTransport = None, decoder: Callable[[bytes], object] = None) -> None:
+        """Initalizes a new instance of the AsyncIBClient Object.
+
+        The asyncio version of the `IBClient`. Every endpoint method of the
+        `IBClient` is available and returns an awaitable, all of them share
+        one `aiohttp` connection pool so a single event loop can drive
+        thousands of in-flight gateway calls.
+
+        The async client does not start the Client Portal Gateway, it expects
+        one to already be running and logged in, so it has none of the gateway
+        methods of the `IBClient`, like `connect` or `close_session`.
+
+        Arguments:
+        ----
+        username {str} -- Your IB account username for either your paper or regular account.
+
+        account {str} -- Your IB account number for either your paper or regular account.
+
+        Keyword Arguments:
+        ----
+        client_gateway_path {str} -- The folder of the Client Portal Gateway. (default:{None})
+
+        pool_size {int} -- The maximum number of connections open to the gateway. (default:{100})
+
+        transport {AsyncIBTransport} -- A preconfigured transport to send requests over, if not
+            provided one is created using `pool_size`. (default:{None})
+
+        decoder {Callable[[bytes], object]} -- Decodes the raw response bodies, if not provided
+            the fastest JSON library installed is used, see `ibw.decoders`. (default:{None})
+
+        Usage:
+        ----
+            >>> async with AsyncIBClient(username='IB_PAPER_USERNAME', account='IB_PAPER_ACCOUNT') as ib_client:
+                    await ib_client.create_session()
+                    quotes = await asyncio.gather(*[
+                        ib_client.market_data_history(conid=conid, period='1d', bar='5min')
+                        for conid in conids
+                    ])
+        """
+
+        if transport is None:
+            transport = AsyncIBTransport(pool_size=pool_size)
+
+        super().__init__(
+            username=username,
+            account=account,
+            client_gateway_path=client_gateway_path,
+            is_server_running=True,
+            transport=transport,
+            decoder=decoder
+        )
+
+    async def _make_request(self, endpoint: str, req_type: str, headers: str = 'json', params: dict = None, data: dict = None, json: dict = None,
+                            decoder: Callable[[bytes], object] = None, cache: bool = True) -> Dict:
+        """Handles the request to the client.
+
+        Same as `IBClient._make_request`, but awaits the async transport. As
+        every endpoint method returns the result of this method, they all
+        return an awaitable on the `AsyncIBClient`.
+
+        Arguments:
+        ----
+        endpoint {str} -- The endpoint we wish to request.
+
+        req_type {str} --  Defines the type of request to be made. Can be one of four
+            possible values ['GET','POST','DELETE','PUT']
+
+        params {dict} -- Any arguments that are to be sent along in the request.
+
+        decoder {Callable[[bytes], object]} -- Decodes the raw response body, if not
+            provided the client's decoder is used. (default: {None})
+
+        cache {bool} -- If `False`, the transport's response cache is bypassed. (default: {True})
+
+        Returns:
+        ----
+        {Dict} -- A response dictionary.
+        """
+
+        # First build the url.
+        url = self._build_url(endpoint=endpoint)
+
+        # Define the headers.
+        headers = self._headers(mode=headers)
+
+        # Time the request only when someone is listening.
+        if self._request_hooks:
+            return await self._observed_request(
+                endpoint=endpoint,
+                req_type=req_type,
+                url=url,
+                headers=headers,
+                params=params,
+                json=json,
+                decoder=decoder,
+                cache=cache
+            )
+
+        # Make the request over the pooled session.
+        response = await self.transport.request(
+            method=req_type,
+            url=url,
+            headers=headers,
+            params=params,
+            json=json,
+            cache=cache
+        )
+
+        return self._handle_response(response=response, url=url, decoder=decoder)
+
+    async def _observed_request(self, endpoint: str, req_type: str, url: str, headers: Dict, params: dict,
+                                json: dict, decoder: Callable[[bytes], object], cache: bool = True) -> Dict:
+        """Makes a request like `_make_request`, timing it for the request hooks."""
+
+        event = RequestEvent(method=req_type, endpoint=endpoint, url=url)
+        event.request_bytes = body_size(payload=json)
+        event.start_ns = time.time_ns()
+
+        start = time.perf_counter()
+        received = None
+        response = None
+
+        try:
+            response = await self.transport.request(
+                method=req_type,
+                url=url,
+                headers=headers,
+                params=params,
+                json=json,
+                cache=cache
+            )
+            received = time.perf_counter()
+
+            return self._handle_response(response=response, url=url, decoder=decoder)
+
+        except Exception as error:
+            event.error = error
+            raise
+
+        finally:
+            self._emit_request_event(event=event, response=response, start=start, received=received)
+
+    async def map(self, method: Union[str, Callable], conids: List[str], max_concurrency: int = 100, key: str = 'conid', **kwargs) -> Dict[str, BatchResult]:
+        """Calls a single-conid endpoint for many conids at once.
+
+        The asyncio version of `IBClient.map`, at most `max_concurrency` calls
+        are in flight on the event loop at once.
+
+        Arguments:
+        ----
+        method {Union[str, Callable]} -- The endpoint method, or its name.
+
+        conids {List[str]} -- The contract IDs to call the endpoint for.
+
+        max_concurrency {int} -- The most calls in flight at once. (default: {100})
+
+        key {str} -- The name of the argument the conid is passed as. (default: {'conid'})
+
+        kwargs -- Any other arguments passed to every call.
+
+        Returns:
+        ----
+        Dict[str, BatchResult] -- The outcome of every call, keyed by conid.
+        """
+
+        method = self._resolve_method(method=method)
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def bounded_call(conid: str) -> BatchResult:
+            async with semaphore:
+                return await run_call_async(func=lambda: method(**{key: conid}, **kwargs), key=conid)
+
+        results = await asyncio.gather(*[bounded_call(conid) for conid in conids])
+
+        return {result.key: result for result in results}
+
+    async def market_data(self, conids: List[str], since: str, fields: List[str], max_conids: int = SNAPSHOT_MAX_CONIDS,
+                          max_fields: int = SNAPSHOT_MAX_FIELDS, max_concurrency: int = 10) -> Dict:
+        """Get Market Data for the given conid(s).
+
+        The asyncio version of `IBClient.market_data`, the chunks are requested
+        concurrently on the event loop and merged into one response.
+
+        Arguments:
+        ----
+        conids {List[str]} -- The list of contract IDs you wish to pull current quotes for.
+
+        since {str} -- Time period since which updates are required, in epoch milliseconds.
+
+        fields {List[str]} -- List of fields you wish to retrieve for each quote.
+
+        max_conids {int} -- The most conids sent in a single request. (default: {SNAPSHOT_MAX_CONIDS})
+
+        max_fields {int} -- The most fields sent in a single request. (default: {SNAPSHOT_MAX_FIELDS})
+
+        max_concurrency {int} -- The most chunks requested at once. (default: {10})
+
+        Returns:
+        ----
+        {Dict} -- The snapshot, one entry per conid.
+        """
+
+        # Serve from the streamed quotes when they cover the whole request.
+        if self.quote_cache is not None:
+            cached = self.quote_cache.snapshot(conids=conids, fields=fields)
+            if cached is not None:
+                return cached
+
+        chunks = self._market_data_chunks(
+            conids=conids,
+            since=since,
+            fields=fields,
+            max_conids=max_conids,
+            max_fields=max_fields
+        )
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def request_chunk(params: dict) -> Dict:
+            async with semaphore:
+                return await self._make_request(
+                    endpoint='iserver/marketdata/snapshot',
+                    req_type='GET',
+                    params=params
+                )
+
+        if len(chunks) == 1:
+            return await request_chunk(params=chunks[0])
+
+        responses = await asyncio.gather(*[request_chunk(params=params) for params in chunks])
+
+        return self._merge_snapshots(responses=responses)
+
+    async def create_session(self) -> bool:
+        """Checks the running gateway session is authenticated.
+
+        Unlike `IBClient.create_session` this will not start the gateway or
+        prompt the user to log in.
+
+        Returns:
+        ----
+        bool -- True if the session is authenticated, False otherwise.
+        """
+
+        # Grab the Auth Response Flag.
+        auth_response = await self.is_authenticated(check=True)
+
+        if auth_response and auth_response.get('authenticated', False):
+
+            # The accounts endpoint must be called before other `iserver` endpoints.
+            await self.server_accounts()
+            self.authenticated = True
+        else:
+            self.authenticated = False
+
+        return self.authenticated
+
+    async def close(self) -> None:
+        """Closes the transport and every pooled connection."""
+
+        await self.transport.close()
+
+    async def __aenter__(self) -> 'AsyncIBClient':
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
@@ -0,0 +1,339 @@
+import re
+import time
+import pathlib
+import sqlite3
+import datetime
+import threading
+
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+from ibw.bars import BAR_FIELDS
+from ibw.bars import bar_dtype
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# The length of the period and bar units in milliseconds.
+UNITS: Dict[str, int] = {
+    'min': 60 * 1000,
+    'h': 60 * 60 * 1000,
+    'd': 24 * 60 * 60 * 1000,
+    'w': 7 * 24 * 60 * 60 * 1000,
+    'm': 30 * 24 * 60 * 60 * 1000,
+    'y': 365 * 24 * 60 * 60 * 1000
+}
+
+# The largest value the gateway accepts for each period unit, smallest unit first.
+PERIOD_LIMITS: List[Tuple[str, int]] = [
+    ('min', 30),
+    ('h', 8),
+    ('d', 1000),
+    ('w', 792),
+    ('y', 15)
+]
+
+# The most bars the gateway returns for one history request, longer ranges are split.
+MAX_BARS = 1000
+
+_DURATION = re.compile(r'^(\d+)(min|h|d|w|m|y)$')
+
+
+def duration_ms(duration: str) -> int:
+    """Converts a period or bar size like `5min` or `1y` to milliseconds.
+
+    Arguments:
+    ----
+    duration {str} -- The period or bar size.
+
+    Returns:
+    ----
+    int -- The length in milliseconds.
+    """
+
+    match = _DURATION.match(duration)
+    if match is None:
+        raise ValueError('Unknown period or bar size {!r}.'.format(duration))
+
+    return int(match.group(1)) * UNITS[match.group(2)]
+
+
+def period_for(milliseconds: int) -> str:
+    """Returns the shortest gateway period that covers a length of time.
+
+    Arguments:
+    ----
+    milliseconds {int} -- The length of time to cover.
+
+    Returns:
+    ----
+    str -- A period like `20min`, `3d` or `2y`.
+    """
+
+    for unit, limit in PERIOD_LIMITS:
+        count = -(-milliseconds // UNITS[unit])
+        if count <= limit:
+            return '{count}{unit}'.format(count=max(count, 1), unit=unit)
+
+    return '{count}y'.format(count=PERIOD_LIMITS[-1][1])
+
+
+def merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Merges overlapping or touching `(start, end)` ranges."""
+
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+
+    return merged
+
+
+def missing_ranges(start: int, end: int, covered: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Returns the parts of `[start, end]` not inside any covered range.
+
+    Arguments:
+    ----
+    start {int} -- The start of the range wanted.
+
+    end {int} -- The end of the range wanted.
+
+    covered {List[Tuple[int, int]]} -- The merged, sorted ranges already held.
+
+    Returns:
+    ----
+    List[Tuple[int, int]] -- The gaps, sorted.
+    """
+
+    gaps = []
+    cursor = start
+
+    for covered_start, covered_end in covered:
+        if covered_end < cursor:
+            continue
+        if covered_start > end:
+            break
+        if covered_start > cursor:
+            gaps.append((cursor, covered_start - 1))
+        cursor = max(cursor, covered_end + 1)
+
+    if cursor <= end:
+        gaps.append((cursor, end))
+
+    return gaps
+
+
+class BarStore():
+
+    def __init__(self, folder: str, clock: Callable[[], float] = time.time) -> None:
+        """Initalizes a new instance of the BarStore Object.
+
+        A persistent cache of historical bars. Every conid and bar size gets a
+        SQLite file holding the bars and a coverage index of the time ranges
+        already downloaded, so a request only fetches the ranges that are
+        missing and reads everything else from disk.
+
+        Arguments:
+        ----
+        folder {str} -- The folder the SQLite files are kept in, created if needed.
+
+        clock {Callable[[], float]} -- Returns the current epoch time in seconds. (default: {time.time})
+
+        Usage:
+        ----
+            >>> store = BarStore(folder='data/bars')
+            >>> bars = store.history(client=ib_client, conid='265598', bar='5min', period='1w')
+        """
+
+        if np is None:
+            raise ImportError(
+                "The bar store requires `numpy`, install it with "
+                "`pip install interactive-broker-python-web-api[numpy]`."
+            )
+
+        self.folder = pathlib.Path(folder).resolve()
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.clock = clock
+
+        self._connections: Dict[Tuple[str, str], sqlite3.Connection] = {}
+        self._lock = threading.RLock()
+
+    def path(self, conid: str, bar: str) -> pathlib.Path:
+        """The SQLite file of a conid and bar size."""
+
+        return self.folder.joinpath('{conid}_{bar}.sqlite'.format(conid=conid, bar=bar))
+
+    def _connection(self, conid: str, bar: str) -> sqlite3.Connection:
+        """Opens, and creates if needed, the database of a conid and bar size."""
+
+        key = (str(conid), bar)
+        connection = self._connections.get(key)
+
+        if connection is None:
+            connection = sqlite3.connect(str(self.path(conid=conid, bar=bar)), check_same_thread=False)
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS bars (t INTEGER PRIMARY KEY, o REAL, h REAL, l REAL, c REAL, v REAL)'
+            )
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS coverage (start INTEGER NOT NULL, end INTEGER NOT NULL)'
+            )
+            connection.commit()
+            self._connections[key] = connection
+
+        return connection
+
+    def coverage(self, conid: str, bar: str) -> List[Tuple[int, int]]:
+        """Returns the time ranges already downloaded, in epoch milliseconds."""
+
+        with self._lock:
+            rows = self._connection(conid=conid, bar=bar).execute(
+                'SELECT start, end FROM coverage ORDER BY start'
+            ).fetchall()
+
+        return [(start, end) for start, end in rows]
+
+    def missing(self, conid: str, bar: str, start: int, end: int) -> List[Tuple[int, int]]:
+        """Returns the time ranges between `start` and `end` that still need downloading."""
+
+        return missing_ranges(start=start, end=end, covered=self.coverage(conid=conid, bar=bar))
+
+    def write(self, conid: str, bar: str, bars: 'np.ndarray', start: int, end: int) -> None:
+        """Stores bars and marks `[start, end]` as covered.
+
+        Arguments:
+        ----
+        conid {str} -- The contract ID.
+
+        bar {str} -- The bar size.
+
+        bars {np.ndarray} -- A structured bar array.
+
+        start {int} -- The start of the range the bars cover, in epoch milliseconds.
+
+        end {int} -- The end of the range the bars cover, in epoch milliseconds.
+        """
+
+        with self._lock:
+
+            connection = self._connection(conid=conid, bar=bar)
+            connection.executemany(
+                'INSERT OR REPLACE INTO bars (t, o, h, l, c, v) VALUES (?, ?, ?, ?, ?, ?)',
+                bars[BAR_FIELDS].tolist()
+            )
+
+            if start <= end:
+                covered = merge_ranges(self.coverage(conid=conid, bar=bar) + [(start, end)])
+                connection.execute('DELETE FROM coverage')
+                connection.executemany('INSERT INTO coverage (start, end) VALUES (?, ?)', covered)
+
+            connection.commit()
+
+    def read(self, conid: str, bar: str, start: int, end: int) -> 'np.ndarray':
+        """Reads the stored bars between `start` and `end`, in epoch milliseconds.
+
+        Returns:
+        ----
+        np.ndarray -- A structured bar array sorted by time.
+        """
+
+        with self._lock:
+            rows = self._connection(conid=conid, bar=bar).execute(
+                'SELECT t, o, h, l, c, v FROM bars WHERE t BETWEEN ? AND ? ORDER BY t',
+                (start, end)
+            ).fetchall()
+
+        return np.array(rows, dtype=bar_dtype())
+
+    def _fetch(self, client, conid: str, bar: str, start: int, end: int, now: int) -> None:
+        """Downloads a missing range and stores it.
+
+        Ranges reaching the present are requested as a plain look back, older
+        ranges look back from their end using `start_time`. The newest bar of
+        a range reaching the present may still be forming, so it isn't marked
+        as covered and is fetched again next time. A response holding `MAX_BARS`
+        bars may have been cut short, so only the range its bars span is marked.
+        """
+
+        bar_length = duration_ms(duration=bar)
+        reaches_now = end >= now - bar_length
+
+        if reaches_now:
+            start_time = None
+        else:
+            start_time = datetime.datetime.fromtimestamp(
+                end / 1000,
+                tz=datetime.timezone.utc
+            ).strftime('%Y%m%d-%H:%M:%S')
+
+        bars = client.market_data_history(
+            conid=conid,
+            period=period_for(milliseconds=end - start),
+            bar=bar,
+            output='numpy',
+            start_time=start_time
+        )
+
+        if reaches_now:
+            end = int(bars['t'].max()) - 1 if len(bars) else start - 1
+
+        if len(bars) >= MAX_BARS:
+            start = max(start, int(bars['t'].min()))
+
+        self.write(conid=conid, bar=bar, bars=bars, start=start, end=end)
+
+    def history(self, client, conid: str, bar: str, period: str = None, start: int = None, end: int = None) -> 'np.ndarray':
+        """Returns bars for a range, only downloading the parts not on disk.
+
+        Arguments:
+        ----
+        client {IBClient} -- The client to download missing bars with.
+
+        conid {str} -- The contract ID.
+
+        bar {str} -- The bar size, for example '5min' or '1d'.
+
+        Keyword Arguments:
+        ----
+        period {str} -- How far to look back from `end`, for example '1w'. Either
+            `period` or `start` must be given. (default: {None})
+
+        start {int} -- The start of the range in epoch milliseconds. (default: {None})
+
+        end {int} -- The end of the range in epoch milliseconds, now if not given. (default: {None})
+
+        Returns:
+        ----
+        np.ndarray -- A structured bar array sorted by time.
+        """
+
+        now = int(self.clock() * 1000)
+        end = now if end is None else end
+
+        if start is None:
+            if period is None:
+                raise ValueError('Either `period` or `start` is required.')
+            start = end - duration_ms(duration=period)
+
+        # A request returns at most `MAX_BARS` bars, so long gaps are fetched in pieces.
+        span = MAX_BARS * duration_ms(duration=bar)
+
+        for gap_start, gap_end in self.missing(conid=conid, bar=bar, start=start, end=end):
+            for piece_start in range(gap_start, gap_end + 1, span):
+                piece_end = min(piece_start + span - 1, gap_end)
+                self._fetch(client=client, conid=conid, bar=bar, start=piece_start, end=piece_end, now=now)
+
+        return self.read(conid=conid, bar=bar, start=start, end=end)
+
+    def close(self) -> None:
+        """Closes every open database."""
+
+        with self._lock:
+            for connection in self._connections.values():
+                connection.close()
+            self._connections.clear()
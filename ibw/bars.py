@@ -0,0 +1,200 @@
+import re
+import json
+
+from typing import Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# The columns of a bar array, timestamps are epoch milliseconds.
+BAR_FIELDS = ['t', 'o', 'h', 'l', 'c', 'v']
+
+_DATA_START = re.compile(rb'"data"\s*:\s*\[')
+_KEY = re.compile(rb'"([a-zA-Z]+)"\s*:')
+
+# The bytes deleted to leave only the numbers, or only the structure.
+_STRUCTURE_BYTES = b'{}":' + ''.join(BAR_FIELDS).encode('ascii')
+_NUMBER_BYTES = b'0123456789.-+eE'
+
+
+def bar_dtype() -> 'np.dtype':
+    """The structured dtype of a bar array."""
+
+    return np.dtype([('t', '<i8')] + [(field, '<f8') for field in BAR_FIELDS[1:]])
+
+
+def _empty() -> 'np.ndarray':
+    return np.empty(0, dtype=bar_dtype())
+
+
+def _decode_bars_with_json(content: bytes) -> 'np.ndarray':
+    """Decodes bars with the `json` module, for payloads the fast path can't read.
+
+    The bar objects are turned into columns as they are parsed, so no
+    dictionary is kept per bar.
+    """
+
+    columns = {field: [] for field in BAR_FIELDS}
+    count = [0]
+
+    def collect(pairs: list) -> Union[dict, None]:
+
+        keys = [key for key, _ in pairs]
+        if keys and set(keys) <= set(BAR_FIELDS):
+            values = dict(pairs)
+            for field in BAR_FIELDS:
+                columns[field].append(values.get(field))
+            count[0] += 1
+            return None
+
+        return dict(pairs)
+
+    json.loads(content, object_pairs_hook=collect)
+
+    bars = np.empty(count[0], dtype=bar_dtype())
+    for field in BAR_FIELDS:
+        column = np.array(columns[field], dtype=np.float64)
+        bars[field] = column if field != 't' else np.nan_to_num(column).astype(np.int64)
+
+    return bars
+
+
+def decode_bars(content: bytes) -> 'np.ndarray':
+    """Decodes a `market_data_history` response into a structured bar array.
+
+    The `data` section is read straight from the raw bytes: the keys and
+    braces are deleted and the numbers are parsed in one `numpy` pass, so
+    no object is created per bar. Payloads where the bars don't all share
+    the same keys fall back to the `json` module.
+
+    Arguments:
+    ----
+    content {bytes} -- The raw response body.
+
+    Returns:
+    ----
+    np.ndarray -- A structured array with the `t`, `o`, `h`, `l`, `c` and `v`
+        columns, `t` is `int64` epoch milliseconds.
+    """
+
+    if np is None:
+        raise ImportError(
+            "Bar arrays require `numpy`, install it with "
+            "`pip install interactive-broker-python-web-api[numpy]`."
+        )
+
+    match = _DATA_START.search(content)
+    if match is None:
+        return _empty()
+
+    section = content[match.end():content.index(b']', match.end())]
+    if any(space in section for space in (b' ', b'\n', b'\r', b'\t')):
+        section = re.sub(rb'\s+', b'', section)
+
+    count = section.count(b'{')
+    if count == 0:
+        return _empty()
+
+    # Every bar must have the same keys in the same order as the first one.
+    first = section[:section.index(b'}') + 1]
+    keys = [key.decode('ascii') for key in _KEY.findall(first)]
+    if not keys or not set(keys) <= set(BAR_FIELDS):
+        return _decode_bars_with_json(content=content)
+
+    template = first.translate(None, _NUMBER_BYTES)
+    structure = section.translate(None, _NUMBER_BYTES)
+    if structure.count(template) != count or len(structure) != count * (len(template) + 1) - 1:
+        return _decode_bars_with_json(content=content)
+
+    numbers = np.fromstring(section.translate(None, _STRUCTURE_BYTES).decode('ascii'), dtype=np.float64, sep=',')
+    if numbers.size != count * len(keys):
+        return _decode_bars_with_json(content=content)
+
+    matrix = numbers.reshape(count, len(keys))
+    bars = np.empty(count, dtype=bar_dtype())
+
+    for field in BAR_FIELDS:
+        if field in keys:
+            column = matrix[:, keys.index(field)]
+        else:
+            column = np.full(count, np.nan)
+
+        bars[field] = column if field != 't' else np.nan_to_num(column).astype(np.int64)
+
+    return bars
+
+
+def to_pandas(bars: 'np.ndarray') -> 'pd.DataFrame':
+    """Converts a bar array into a `pandas.DataFrame` indexed by bar time.
+
+    Arguments:
+    ----
+    bars {np.ndarray} -- The structured bar array.
+
+    Returns:
+    ----
+    pd.DataFrame -- The bars, with the open, high, low, close and volume columns.
+    """
+
+    if pd is None:
+        raise ImportError("Converting bars to a DataFrame requires `pandas`.")
+
+    return pd.DataFrame(
+        data={field: bars[field] for field in BAR_FIELDS[1:]},
+        index=pd.to_datetime(bars['t'], unit='ms', utc=True).rename('t')
+    )
+
+
+def to_arrow(bars: 'np.ndarray') -> 'pa.Table':
+    """Converts a bar array into a `pyarrow.Table`.
+
+    Arguments:
+    ----
+    bars {np.ndarray} -- The structured bar array.
+
+    Returns:
+    ----
+    pa.Table -- The bars, `t` is a millisecond timestamp column.
+    """
+
+    if pa is None:
+        raise ImportError("Converting bars to an Arrow table requires `pyarrow`.")
+
+    columns = {'t': pa.array(bars['t'], type=pa.timestamp('ms', tz='UTC'))}
+    columns.update({field: pa.array(bars[field]) for field in BAR_FIELDS[1:]})
+
+    return pa.table(columns)
+
+
+def bars_decoder(output: str):
+    """Returns a function decoding raw history bytes into the requested output.
+
+    Arguments:
+    ----
+    output {str} -- One of ['numpy', 'pandas', 'arrow'].
+
+    Returns:
+    ----
+    Callable[[bytes], object] -- The decoder.
+    """
+
+    if output == 'numpy':
+        return decode_bars
+    elif output == 'pandas':
+        return lambda content: to_pandas(bars=decode_bars(content=content))
+    elif output == 'arrow':
+        return lambda content: to_arrow(bars=decode_bars(content=content))
+
+    raise ValueError("The output must be one of ['json', 'numpy', 'pandas', 'arrow'], not {!r}.".format(output))
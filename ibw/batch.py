@@ -0,0 +1,116 @@
+import time
+
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BatchResult():
+
+    def __init__(self, key: str, result: Any = None, error: Exception = None, elapsed: float = 0.0) -> None:
+        """The outcome of one call in a batch.
+
+        Arguments:
+        ----
+        key {str} -- The item the call was made for, usually a conid.
+
+        result {Any} -- The content returned by the call, `None` if it failed. (default: {None})
+
+        error {Exception} -- The exception raised by the call, `None` if it succeeded. (default: {None})
+
+        elapsed {float} -- How long the call took in seconds. (default: {0.0})
+        """
+
+        self.key = key
+        self.result = result
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        """`True` if the call succeeded."""
+
+        return self.error is None
+
+    def __repr__(self) -> str:
+        return '<BatchResult key={key!r} ok={ok} elapsed={elapsed:.4f}>'.format(
+            key=self.key,
+            ok=self.ok,
+            elapsed=self.elapsed
+        )
+
+
+def run_call(func: Callable, key: str) -> BatchResult:
+    """Runs a single call, capturing its result or error.
+
+    Arguments:
+    ----
+    func {Callable} -- A callable taking no arguments.
+
+    key {str} -- The key the result is stored under.
+
+    Returns:
+    ----
+    BatchResult -- The outcome of the call.
+    """
+
+    start = time.perf_counter()
+
+    try:
+        return BatchResult(key=key, result=func(), elapsed=time.perf_counter() - start)
+    except Exception as error:
+        return BatchResult(key=key, error=error, elapsed=time.perf_counter() - start)
+
+
+async def run_call_async(func: Callable, key: str) -> BatchResult:
+    """Awaits a single call, capturing its result or error.
+
+    Arguments:
+    ----
+    func {Callable} -- A callable taking no arguments and returning an awaitable.
+
+    key {str} -- The key the result is stored under.
+
+    Returns:
+    ----
+    BatchResult -- The outcome of the call.
+    """
+
+    start = time.perf_counter()
+
+    try:
+        return BatchResult(key=key, result=await func(), elapsed=time.perf_counter() - start)
+    except Exception as error:
+        return BatchResult(key=key, error=error, elapsed=time.perf_counter() - start)
+
+
+def map_concurrently(func: Callable, keys: Iterable[str], max_concurrency: int = 10) -> Dict[str, BatchResult]:
+    """Calls `func(key)` for every key on a bounded thread pool.
+
+    Arguments:
+    ----
+    func {Callable} -- A callable taking a single key.
+
+    keys {Iterable[str]} -- The keys to call `func` with.
+
+    max_concurrency {int} -- The most calls running at once. (default: {10})
+
+    Returns:
+    ----
+    Dict[str, BatchResult] -- The outcome of every call, keyed and ordered like `keys`.
+    """
+
+    keys = list(keys)
+    if not keys:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=min(max_concurrency, len(keys))) as executor:
+        futures = [
+            executor.submit(run_call, lambda key=key: func(key), key)
+            for key in keys
+        ]
+
+        return {future.result().key: future.result() for future in futures}
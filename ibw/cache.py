@@ -0,0 +1,329 @@
+import re
+import json
+import time
+import sqlite3
+import pathlib
+import threading
+
+from collections import OrderedDict
+from typing import Callable
+from typing import Dict
+from typing import Union
+
+# Reference endpoints that change at most daily, as `{pattern: seconds to keep}`.
+# The patterns are searched for in the request URL.
+CACHE_POLICIES: Dict[str, float] = {
+    r'/iserver/contract/\d+/info': 24 * 60 * 60,
+    r'/iserver/secdef/search': 24 * 60 * 60,
+    r'/trsrv/secdef': 24 * 60 * 60,
+    r'/trsrv/futures': 24 * 60 * 60,
+    r'/trsrv/stocks': 24 * 60 * 60,
+    r'/iserver/scanner/params': 24 * 60 * 60,
+    r'/iserver/fundamentals/': 24 * 60 * 60,
+    r'/tws\.proxy/fundamentals/': 24 * 60 * 60,
+    r'/fundamentals/': 24 * 60 * 60,
+}
+
+# The default memory budget of the cache, 64 MB.
+MAX_BYTES = 64 * 1024 * 1024
+
+
+class CacheStats():
+
+    def __init__(self) -> None:
+        """Counters describing how a cache policy was used."""
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """The share of lookups served from the cache."""
+
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> Dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_rate': self.hit_rate
+        }
+
+
+class CacheEntry():
+
+    __slots__ = ('pattern', 'expires', 'status_code', 'headers', 'url', 'content', 'size')
+
+    def __init__(self, pattern: str, expires: float, status_code: int, headers: Dict, url: str, content: bytes) -> None:
+        """A cached response body and the parts of the response needed to replay it."""
+
+        self.pattern = pattern
+        self.expires = expires
+        self.status_code = status_code
+        self.headers = headers
+        self.url = url
+        self.content = content
+        self.size = len(content) + len(url)
+
+
+class ResponseCache():
+
+    def __init__(self, policies: Dict[str, float] = None, max_bytes: int = MAX_BYTES, max_entries: int = None,
+                 path: str = None, clock: Callable[[], float] = time.time) -> None:
+        """Initalizes a new instance of the ResponseCache Object.
+
+        Keeps successful responses of slow changing endpoints in memory, keyed
+        by the method, URL, query and body of the request. Every endpoint
+        pattern has its own time to live, and the least recently used entries
+        are evicted once the memory budget is used up. Entries can also be
+        written to a SQLite file, so they survive a restart.
+
+        Arguments:
+        ----
+        policies {Dict[str, float]} -- The seconds to keep responses for each URL
+            pattern, requests matching no pattern are never cached. (default: {CACHE_POLICIES})
+
+        max_bytes {int} -- The memory budget for cached bodies. (default: {MAX_BYTES})
+
+        max_entries {int} -- The maximum number of entries, `None` only limits by size. (default: {None})
+
+        path {str} -- A SQLite file to persist entries to, `None` keeps them in memory only. (default: {None})
+
+        clock {Callable[[], float]} -- Returns the current epoch time in seconds. (default: {time.time})
+
+        Usage:
+        ----
+            >>> cache = ResponseCache(
+                policies={r'/iserver/contract/\\d+/info': 3600},
+                path='data/responses.sqlite'
+            )
+            >>> transport = IBTransport(cache=cache)
+            >>> cache.stats()[r'/iserver/contract/\\d+/info']['hits']
+        """
+
+        if policies is None:
+            policies = CACHE_POLICIES
+
+        self.policies = dict(policies)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.clock = clock
+        self.size = 0
+
+        self._patterns = [(re.compile(pattern), pattern) for pattern in self.policies]
+        self._stats: Dict[str, CacheStats] = {pattern: CacheStats() for pattern in self.policies}
+        self._entries: 'OrderedDict[str, CacheEntry]' = OrderedDict()
+        self._lock = threading.RLock()
+
+        self.path = pathlib.Path(path).resolve() if path else None
+        self._database = None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._database = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._database.execute(
+                'CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, pattern TEXT, expires REAL, '
+                'status_code INTEGER, headers TEXT, url TEXT, content BLOB)'
+            )
+            self._database.commit()
+
+    def policy(self, method: str, url: str) -> Union[str, None]:
+        """Returns the pattern a request is cached under, `None` if it isn't cached."""
+
+        if method not in ('GET', 'POST'):
+            return None
+
+        for regex, pattern in self._patterns:
+            if regex.search(url):
+                return pattern
+
+        return None
+
+    def key(self, method: str, url: str, params: dict = None, json_body: Union[dict, list] = None) -> str:
+        """Builds the cache key of a request."""
+
+        params = {name: value for name, value in (params or {}).items() if value is not None}
+
+        return '{method} {url}?{params}#{body}'.format(
+            method=method,
+            url=url,
+            params=json.dumps(params, sort_keys=True, default=str),
+            body=json.dumps(json_body, sort_keys=True, default=str) if json_body is not None else ''
+        )
+
+    def get(self, key: str, pattern: str) -> Union[CacheEntry, None]:
+        """Returns a live entry and marks it as recently used, `None` on a miss.
+
+        Arguments:
+        ----
+        key {str} -- The cache key of the request.
+
+        pattern {str} -- The policy pattern the request matched.
+
+        Returns:
+        ----
+        Union[CacheEntry, None] -- The cached entry.
+        """
+
+        with self._lock:
+
+            stats = self._stats[pattern]
+            now = self.clock()
+
+            entry = self._entries.get(key)
+            if entry is None and self._database is not None:
+                entry = self._load(key=key)
+                if entry is not None:
+                    self._insert(key=key, entry=entry)
+
+            if entry is not None and entry.expires <= now:
+                self._remove(key=key)
+                stats.expirations += 1
+                entry = None
+
+            if entry is None:
+                stats.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            stats.hits += 1
+
+            return entry
+
+    def put(self, key: str, pattern: str, status_code: int, headers: Dict, url: str, content: bytes) -> None:
+        """Stores a response under its policy's time to live.
+
+        Arguments:
+        ----
+        key {str} -- The cache key of the request.
+
+        pattern {str} -- The policy pattern the request matched.
+
+        status_code {int} -- The HTTP status code.
+
+        headers {Dict} -- The response headers.
+
+        url {str} -- The final URL of the request.
+
+        content {bytes} -- The raw response body.
+        """
+
+        entry = CacheEntry(
+            pattern=pattern,
+            expires=self.clock() + self.policies[pattern],
+            status_code=status_code,
+            headers=dict(headers),
+            url=url,
+            content=content
+        )
+
+        # Bodies bigger than the whole budget would only evict everything else.
+        if entry.size > self.max_bytes:
+            return
+
+        with self._lock:
+
+            self._remove(key=key)
+            self._insert(key=key, entry=entry)
+            self._stats[pattern].stores += 1
+
+            if self._database is not None:
+                self._database.execute(
+                    'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (key, pattern, entry.expires, status_code, json.dumps(entry.headers), url, content)
+                )
+                self._database.commit()
+
+    def _insert(self, key: str, entry: CacheEntry) -> None:
+        """Adds an entry to memory and evicts the least recently used ones over budget."""
+
+        self._entries[key] = entry
+        self.size += entry.size
+
+        while self._entries and (
+            self.size > self.max_bytes or (self.max_entries is not None and len(self._entries) > self.max_entries)
+        ):
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= evicted.size
+            self._stats[evicted.pattern].evictions += 1
+
+    def _remove(self, key: str) -> None:
+        """Drops an entry from memory and disk."""
+
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
+
+        if self._database is not None:
+            self._database.execute('DELETE FROM responses WHERE key = ?', (key,))
+            self._database.commit()
+
+    def _load(self, key: str) -> Union[CacheEntry, None]:
+        """Reads an entry from disk."""
+
+        row = self._database.execute(
+            'SELECT pattern, expires, status_code, headers, url, content FROM responses WHERE key = ?',
+            (key,)
+        ).fetchone()
+
+        if row is None or row[0] not in self.policies:
+            return None
+
+        pattern, expires, status_code, headers, url, content = row
+
+        return CacheEntry(
+            pattern=pattern,
+            expires=expires,
+            status_code=status_code,
+            headers=json.loads(headers),
+            url=url,
+            content=bytes(content)
+        )
+
+    def clear(self, pattern: str = None) -> None:
+        """Drops every entry, or only the entries of one policy pattern."""
+
+        with self._lock:
+
+            keys = [
+                key for key, entry in self._entries.items()
+                if pattern is None or entry.pattern == pattern
+            ]
+            for key in keys:
+                self._remove(key=key)
+
+            if self._database is not None:
+                if pattern is None:
+                    self._database.execute('DELETE FROM responses')
+                else:
+                    self._database.execute('DELETE FROM responses WHERE pattern = ?', (pattern,))
+                self._database.commit()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Dict]:
+        """Returns the cache counters of every policy.
+
+        Returns:
+        ----
+        Dict[str, Dict] -- The counters keyed by policy pattern.
+        """
+
+        with self._lock:
+            return {pattern: stats.as_dict() for pattern, stats in self._stats.items()}
+
+    def close(self) -> None:
+        """Closes the SQLite file, if the cache is persisted."""
+
+        with self._lock:
+            if self._database is not None:
+                self._database.close()
+                self._database = None
+
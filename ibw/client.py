@@ -15,9 +15,19 @@ import subprocess
 from typing import Union
 from typing import List
 from typing import Dict
+from typing import Callable
+
+from ibw.bars import bars_decoder
+from ibw.batch import BatchResult
+from ibw.batch import map_concurrently
+from ibw.decoders import json_decoder
+from ibw.logs import Payload
+from ibw.metrics import RequestEvent
+from ibw.metrics import body_size
 
 from urllib3.exceptions import InsecureRequestWarning
 from ibw.clientportal import ClientPortal
+from ibw.transport import IBTransport
 
 urllib3.disable_warnings(category=InsecureRequestWarning)
 # http = urllib3.PoolManager(cert_reqs='CERT_REQUIRED', ca_certs=certifi.where())
@@ -31,101 +41,21 @@ else:
     # Handle target environment that doesn't support HTTPS verification
     ssl._create_default_https_context = _create_unverified_https_context
 
-logging.basicConfig(
-    filename='app.log',
-    format='%(levelname)s - %(name)s - %(message)s',
-    level=logging.DEBUG
-)
-
-
-class IBClient():
-
-    def __init__(self, username: str, account: str, client_gateway_path: str = None, is_server_running: bool = True) -> None:
-        """Initalizes a new instance of the IBClient Object.
-
-        Arguments:
-        ----
-        username {str} -- Your IB account username for either your paper or regular account.
-
-        account {str} -- Your IB account number for either your paper or regular account.
-
-        Keyword Arguments:
-        ----
-        password {str} -- Your IB account password for either your paper or regular account. (default:{""})
-
-        Usage:
-        ----
-            >>> ib_paper_session = IBClient(
-                username='IB_PAPER_USERNAME',
-                account='IB_PAPER_ACCOUNT',
-            )
-            >>> ib_paper_session
-            >>> ib_regular_session = IBClient(
-                username='IB_REGULAR_USERNAME',
-                account='IB_REGULAR_ACCOUNT',
-            )
-            >>> ib_regular_session
-        """
-
-        self.account = account
-        self.username = username
-        self.client_portal_client = ClientPortal()
-
-        self.api_version = 'v1/'
-        self._operating_system = sys.platform
-        self.session_state_path: pathlib.Path = pathlib.Path(__file__).parent.joinpath('server_session.json').resolve()
-        self.authenticated = False
-        self._is_server_running = is_server_running
-
-        # Define URL Components
-        ib_gateway_host = r"https://localhost"
-        ib_gateway_port = r"5000"
-        self.ib_gateway_path = ib_gateway_host + ":" + ib_gateway_port
-        self.backup_gateway_path = r"https://cdcdyn.interactivebrokers.com/portal.proxy"
-        self.login_gateway_path = self.ib_gateway_path + "/sso/Login?forwardTo=22&RL=1&ip2loc=on"
-
+logger = logging.getLogger(__name__)
 
-        if client_gateway_path is None:
+# The most conids and fields sent in a single snapshot request, larger
+# requests are split into chunks.
+SNAPSHOT_MAX_CONIDS = 100
+SNAPSHOT_MAX_FIELDS = 50
 
-            # Grab the Client Portal Path.
-            self.client_portal_folder: pathlib.Path = pathlib.Path(__file__).parents[1].joinpath(
-                'resources/clientportal.beta.gw'
-            ).resolve()
 
-            # See if it exists.
-            if not self.client_portal_folder.exists() and not self._is_server_running:
-                print("The Client Portal Gateway doesn't exist. You need to download it before using the Library.")
-                print("Downloading the Client Portal file...")
-                self.client_portal_client.download_and_extract()
-                        
-        else:
+class GatewaySession():
 
-            self.client_portal_folder = client_gateway_path
-
-        if not self._is_server_running:
-
-            # Load the Server State.
-            self.server_process = self._server_state(action='load')
-
-            # Log the initial Info.
-            logging.info(textwrap.dedent('''
-            =================
-            Initialize Client:
-            =================
-            Server Process: {serv_proc}
-            Operating System: {op_sys}
-            Session State Path: {state_path}
-            Client Portal Folder: {client_path}
-            ''').format(
-                    serv_proc=self.server_process,
-                    op_sys=self._operating_system,
-                    state_path=self.session_state_path,
-                    client_path=self.client_portal_folder
-                )
-            )
-        else:
-            self.server_process = None
+    """Starts, logs in to and closes the Client Portal Gateway for the `IBClient`.
 
+    Kept apart from the endpoint methods so the `AsyncIBClient`, which expects a
+    gateway that is already running and logged in, doesn't inherit them.
+    """
 
     def create_session(self, set_server=True) -> bool:
         """Creates a new session.
@@ -167,7 +97,7 @@ class IBClient():
         auth_response = self.is_authenticated()
 
         # Log the initial Info.
-        logging.info(textwrap.dedent('''
+        logger.info(textwrap.dedent('''
         =================
         Create Session:
         =================
@@ -211,7 +141,7 @@ class IBClient():
             if self.account in accounts:
 
                 # Log the response.
-                logging.debug(textwrap.dedent('''
+                logger.debug(textwrap.dedent('''
                 =================
                 Set Server:
                 =================
@@ -235,7 +165,7 @@ class IBClient():
             server_account_content = self.server_accounts()
 
             # Log the response.
-            logging.debug(textwrap.dedent('''
+            logger.debug(textwrap.dedent('''
             =================
             Set Server:
             =================
@@ -293,7 +223,7 @@ class IBClient():
         file_exists = self.session_state_path.exists()
 
         # Log the response.
-        logging.debug(textwrap.dedent('''
+        logger.debug(textwrap.dedent('''
         =================
         Server State:
         =================
@@ -366,7 +296,7 @@ class IBClient():
                     if str(process_id) in process:
 
                         # Log the response.
-                        logging.debug(textwrap.dedent('''
+                        logger.debug(textwrap.dedent('''
                             =================
                             Server Process:
                             =================
@@ -410,7 +340,7 @@ class IBClient():
                 auth_response = self.is_authenticated(check=True)
 
             # Log the Auth Response.
-            logging.debug('Check User Auth Inital: {auth_resp}'.format(
+            logger.debug('Check User Auth Inital: {auth_resp}'.format(
                     auth_resp=auth_response
                 )
             )
@@ -434,7 +364,7 @@ class IBClient():
                         self.authenticated = True
 
                         # Log the response.
-                        logging.debug('Had to do Server Account Request: {auth_resp}'.format(
+                        logger.debug('Had to do Server Account Request: {auth_resp}'.format(
                                 auth_resp=serv_resp
                             )
                         )
@@ -442,7 +372,7 @@ class IBClient():
                 except:
                     pass
 
-                logging.debug(
+                logger.debug(
                     '''
                     Validate Response: {valid_resp}
                     Reauth Response: {reauth_resp}
@@ -468,7 +398,7 @@ class IBClient():
         auth_response = self.is_authenticated(check=True)
 
         # Log the Auth response.
-        logging.debug('Check Non-User Auth Inital: {auth_resp}'.format(
+        logger.debug('Check Non-User Auth Inital: {auth_resp}'.format(
                 auth_resp=auth_response
             )
         )
@@ -546,7 +476,7 @@ class IBClient():
         bool -- `True` if it was connected.
         """
 
-        logging.debug('Running Client Folder at: {file_path}'.format(
+        logger.debug('Running Client Folder at: {file_path}'.format(
             file_path=self.client_portal_folder))
 
         # If needed, start the server and save the State.
@@ -596,9 +526,126 @@ class IBClient():
         # Delete the state
         self._server_state(action='delete')
 
+        # Release the pooled connections.
+        self.transport.close()
+
         # and exit.
         sys.exit()
 
+
+class IBClientBase():
+
+    def __init__(self, username: str, account: str, client_gateway_path: str = None, is_server_running: bool = True,
+                 pool_size: int = 10, transport: IBTransport = None, decoder: Callable[[bytes], object] = None) -> None:
+        """Initalizes a new instance of the IBClient Object.
+
+        Arguments:
+        ----
+        username {str} -- Your IB account username for either your paper or regular account.
+
+        account {str} -- Your IB account number for either your paper or regular account.
+
+        Keyword Arguments:
+        ----
+        password {str} -- Your IB account password for either your paper or regular account. (default:{""})
+
+        pool_size {int} -- The number of keep-alive connections the client holds open to
+            the gateway. (default:{10})
+
+        transport {IBTransport} -- A preconfigured transport to send requests over, if not
+            provided one is created using `pool_size`. (default:{None})
+
+        decoder {Callable[[bytes], object]} -- Decodes the raw response bodies, if not provided
+            the fastest JSON library installed is used, see `ibw.decoders`. (default:{None})
+
+        Usage:
+        ----
+            >>> ib_paper_session = IBClient(
+                username='IB_PAPER_USERNAME',
+                account='IB_PAPER_ACCOUNT',
+            )
+            >>> ib_paper_session
+            >>> ib_regular_session = IBClient(
+                username='IB_REGULAR_USERNAME',
+                account='IB_REGULAR_ACCOUNT',
+            )
+            >>> ib_regular_session
+        """
+
+        self.account = account
+        self.username = username
+        self.client_portal_client = ClientPortal()
+
+        self.api_version = 'v1/'
+        self._operating_system = sys.platform
+        self.session_state_path: pathlib.Path = pathlib.Path(__file__).parent.joinpath('server_session.json').resolve()
+        self.authenticated = False
+        self._is_server_running = is_server_running
+
+        # Every request goes over the same pooled session.
+        if transport is None:
+            transport = IBTransport(pool_size=pool_size)
+
+        self.transport = transport
+
+        # Response bodies are decoded once, straight from the raw bytes.
+        self.decoder = decoder or json_decoder()
+
+        # Set by a `MarketDataStream`, `market_data` is served from it when possible.
+        self.quote_cache = None
+
+        # Called with a `RequestEvent` after every request, see `add_request_hook`.
+        self._request_hooks: List[Callable[[RequestEvent], None]] = []
+
+        # Define URL Components
+        ib_gateway_host = r"https://localhost"
+        ib_gateway_port = r"5000"
+        self.ib_gateway_path = ib_gateway_host + ":" + ib_gateway_port
+        self.backup_gateway_path = r"https://cdcdyn.interactivebrokers.com/portal.proxy"
+        self.login_gateway_path = self.ib_gateway_path + "/sso/Login?forwardTo=22&RL=1&ip2loc=on"
+
+
+        if client_gateway_path is None:
+
+            # Grab the Client Portal Path.
+            self.client_portal_folder: pathlib.Path = pathlib.Path(__file__).parents[1].joinpath(
+                'resources/clientportal.beta.gw'
+            ).resolve()
+
+            # See if it exists.
+            if not self.client_portal_folder.exists() and not self._is_server_running:
+                print("The Client Portal Gateway doesn't exist. You need to download it before using the Library.")
+                print("Downloading the Client Portal file...")
+                self.client_portal_client.download_and_extract()
+                        
+        else:
+
+            self.client_portal_folder = client_gateway_path
+
+        if not self._is_server_running:
+
+            # Load the Server State.
+            self.server_process = self._server_state(action='load')
+
+            # Log the initial Info.
+            logger.info(textwrap.dedent('''
+            =================
+            Initialize Client:
+            =================
+            Server Process: {serv_proc}
+            Operating System: {op_sys}
+            Session State Path: {state_path}
+            Client Portal Folder: {client_path}
+            ''').format(
+                    serv_proc=self.server_process,
+                    op_sys=self._operating_system,
+                    state_path=self.session_state_path,
+                    client_path=self.client_portal_folder
+                )
+            )
+        else:
+            self.server_process = None
+
     def _headers(self, mode: str = 'json') -> Dict:
         """Builds the headers.
 
@@ -649,7 +696,8 @@ class IBClient():
             ) + r'portal/' + endpoint
         )
 
-    def _make_request(self, endpoint: str, req_type: str, headers: str = 'json', params: dict = None, data: dict = None, json: dict = None) -> Dict:
+    def _make_request(self, endpoint: str, req_type: str, headers: str = 'json', params: dict = None, data: dict = None, json: dict = None,
+                      decoder: Callable[[bytes], object] = None, cache: bool = True) -> Dict:
         """Handles the request to the client.
 
         Handles all the requests made by the client and correctly organizes
@@ -667,6 +715,11 @@ class IBClient():
             could be parameters of a 'GET' request, or a data payload of a
             'POST' request.
 
+        decoder {Callable[[bytes], object]} -- Decodes the raw response body, if not
+            provided the client's decoder is used. (default: {None})
+
+        cache {bool} -- If `False`, the transport's response cache is bypassed. (default: {True})
+
         Returns:
         ----
         {Dict} -- A response dictionary.
@@ -678,50 +731,183 @@ class IBClient():
         # Define the headers.
         headers = self._headers(mode=headers)
 
-        # Make the request.
-        if req_type == 'POST':
-            response = requests.post(url=url, headers=headers, params=params, json=json, verify=False)
-        elif req_type == 'GET':
-            response = requests.get(url=url, headers=headers, params=params, json=json, verify=False)
-        elif req_type == 'DELETE':
-            response = requests.delete(url=url, headers=headers, params=params, json=json, verify=False)
+        # Time the request only when someone is listening.
+        if self._request_hooks:
+            return self._observed_request(
+                endpoint=endpoint,
+                req_type=req_type,
+                url=url,
+                headers=headers,
+                params=params,
+                json=json,
+                decoder=decoder,
+                cache=cache
+            )
+
+        # Make the request over the pooled session.
+        response = self.transport.request(
+            method=req_type,
+            url=url,
+            headers=headers,
+            params=params,
+            json=json,
+            cache=cache
+        )
+
+        return self._handle_response(response=response, url=url, decoder=decoder)
+
+    def add_request_hook(self, hook: Callable[[RequestEvent], None]) -> None:
+        """Registers a function called with a `RequestEvent` after every request.
+
+        Requests are only timed while at least one hook is registered.
+
+        Arguments:
+        ----
+        hook {Callable[[RequestEvent], None]} -- The function, for example a `PrometheusExporter`.
+
+        Usage:
+        ----
+            >>> exporter = PrometheusExporter()
+            >>> ib_client.add_request_hook(exporter)
+        """
+
+        self._request_hooks.append(hook)
+
+    def remove_request_hook(self, hook: Callable[[RequestEvent], None]) -> None:
+        """Removes a function registered with `add_request_hook`."""
+
+        self._request_hooks.remove(hook)
+
+    def _observed_request(self, endpoint: str, req_type: str, url: str, headers: Dict, params: dict,
+                          json: dict, decoder: Callable[[bytes], object], cache: bool = True) -> Dict:
+        """Makes a request like `_make_request`, timing it for the request hooks."""
+
+        event = RequestEvent(method=req_type, endpoint=endpoint, url=url)
+        event.request_bytes = body_size(payload=json)
+        event.start_ns = time.time_ns()
+
+        start = time.perf_counter()
+        received = None
+        response = None
+
+        try:
+            response = self.transport.request(
+                method=req_type,
+                url=url,
+                headers=headers,
+                params=params,
+                json=json,
+                cache=cache
+            )
+            received = time.perf_counter()
+
+            return self._handle_response(response=response, url=url, decoder=decoder)
+
+        except Exception as error:
+            event.error = error
+            raise
+
+        finally:
+            self._emit_request_event(event=event, response=response, start=start, received=received)
+
+    def _emit_request_event(self, event: RequestEvent, response: requests.Response, start: float, received: float) -> None:
+        """Fills in the timings and the response details of an event and passes it to the hooks."""
+
+        done = time.perf_counter()
+        event.elapsed = done - start
+        event.end_ns = event.start_ns + int(event.elapsed * 1e9)
+
+        if received is not None:
+            event.decode = done - received
+            network = received - start
+        else:
+            network = event.elapsed
+
+        if response is not None:
+            event.status_code = response.status_code
+            event.response_bytes = len(response.content)
+            event.cache_hit = getattr(response, 'from_cache', False)
+            event.retries = getattr(response, 'retries', 0)
+            event.wait = getattr(response, 'pacing_wait', 0.0)
+
+            # `requests` times the round trip up to the response headers.
+            elapsed = getattr(response, 'elapsed', None)
+            if elapsed is not None and not event.cache_hit:
+                event.server = elapsed.total_seconds()
+
+        event.transfer = max(network - event.wait - (event.server or 0.0), 0.0)
+
+        for hook in list(self._request_hooks):
+            try:
+                hook(event)
+            except Exception:
+                logger.exception('Request hook failed.')
+
+    def _handle_response(self, response: requests.Response, url: str, decoder: Callable[[bytes], object] = None) -> Dict:
+        """Handles the response from the gateway.
+
+        Arguments:
+        ----
+        response {requests.Response} -- The response returned by the transport.
+
+        url {str} -- The URL the request was sent to.
+
+        decoder {Callable[[bytes], object]} -- Decodes the raw response body, if not
+            provided the client's decoder is used. (default: {None})
+
+        Returns:
+        ----
+        {Dict} -- A response dictionary.
+        """
 
         # grab the status code
         status_code = response.status_code
 
-        # grab the response headers.
-        response_headers = response.headers
-        
         # Check to see if it was successful
         if response.ok:
 
-            if response_headers.get('Content-Type','null') == 'application/json;charset=utf-8':
-                data = response.json()
-            else:
-                data = response.json()
-
-            # Log it.
-            logging.debug('''
-            Response Text: {resp_text}
-            Response URL: {resp_url}
-            Response Code: {resp_code}
-            Response JSON: {resp_json}
-            Response Headers: {resp_headers}
-            '''.format(
-                    resp_text=response.text,
-                    resp_url=response.url,
-                    resp_code=status_code,
-                    resp_json=data,
-                    resp_headers=response_headers
+            data = self._decode(response=response, decoder=decoder or self.decoder)
+
+            # Log it, the body is only read if the record is written.
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    'Response %s %s %s',
+                    status_code,
+                    response.url,
+                    Payload(content=response.content),
+                    extra={'status_code': status_code, 'url': str(response.url), 'size': len(response.content)}
                 )
-            )
 
             return data
 
         # if it was a bad request print it out.
         elif not response.ok and url != 'https://localhost:5000/v1/portal/iserver/account':
             print(url)
-            raise requests.HTTPError()
+            raise requests.HTTPError(
+                '{status_code} error from {url}: {body}'.format(
+                    status_code=status_code,
+                    url=url,
+                    body=Payload(content=response.content, limit=200)
+                ),
+                response=response
+            )
+
+    def _decode(self, response: requests.Response, decoder: Callable[[bytes], object]) -> object:
+        """Decodes a response body once per decoder.
+
+        The transport hands the same response to every caller sharing a
+        request in flight, so they share the decoded result too, and should
+        treat it as read only.
+        """
+
+        decoded = getattr(response, 'decoded', None)
+        if decoded is not None and decoded[0] is decoder:
+            return decoded[1]
+
+        data = decoder(response.content)
+        response.decoded = (decoder, data)
+
+        return data
 
     def _prepare_arguments_list(self, parameter_list: List[str]) -> str:
         """Prepares the arguments for the request.
@@ -754,6 +940,59 @@ class IBClient():
 
         return parameter_list
 
+    def _resolve_method(self, method: Union[str, Callable]) -> Callable:
+        """Returns the client method for a method name, or the callable itself."""
+
+        if isinstance(method, str):
+            return getattr(self, method)
+
+        return method
+
+    def map(self, method: Union[str, Callable], conids: List[str], max_concurrency: int = 10, key: str = 'conid', **kwargs) -> Dict[str, BatchResult]:
+        """Calls a single-conid endpoint for many conids at once.
+
+        Runs `method(conid=conid, **kwargs)` for every conid on a bounded
+        thread pool, all sharing the client's connection pool. A failed call
+        doesn't stop the batch, its error is kept on its `BatchResult`.
+
+        Arguments:
+        ----
+        method {Union[str, Callable]} -- The endpoint method, or its name, for
+            example `market_data_history` or `client.contract_details`.
+
+        conids {List[str]} -- The contract IDs to call the endpoint for.
+
+        max_concurrency {int} -- The most calls in flight at once, keep it at or
+            below the transport `pool_size`. (default: {10})
+
+        key {str} -- The name of the argument the conid is passed as. (default: {'conid'})
+
+        kwargs -- Any other arguments passed to every call.
+
+        Usage:
+        ----
+            >>> results = ib_client.map(
+                method='market_data_history',
+                conids=['265598', '8314'],
+                max_concurrency=8,
+                period='1d',
+                bar='5min'
+            )
+            >>> results['265598'].result
+
+        Returns:
+        ----
+        Dict[str, BatchResult] -- The outcome of every call, keyed by conid.
+        """
+
+        method = self._resolve_method(method=method)
+
+        return map_concurrently(
+            func=lambda conid: method(**{key: conid}, **kwargs),
+            keys=conids,
+            max_concurrency=max_concurrency
+        )
+
     """
         SESSION ENDPOINTS
     """
@@ -1160,7 +1399,8 @@ class IBClient():
 
         return content
 
-    def market_data(self, conids: List[str], since: str, fields: List[str]) -> Dict:
+    def market_data(self, conids: List[str], since: str, fields: List[str], max_conids: int = SNAPSHOT_MAX_CONIDS,
+                    max_fields: int = SNAPSHOT_MAX_FIELDS, max_concurrency: int = 10) -> Dict:
         """
             Get Market Data for the given conid(s). The end-point will return by 
             default bid, ask, last, change, change pct, close, listing exchange. 
@@ -1169,6 +1409,11 @@ class IBClient():
             prior to /iserver/marketdata/snapshot. To receive all available fields 
             the /snapshot endpoint will need to be called several times.
 
+            Large requests are split into chunks of at most `max_conids` conids and
+            `max_fields` fields, sent concurrently and merged back into a single
+            response with one entry per conid. If a `MarketDataStream` is attached
+            and its quote cache has every conid and field, no request is made.
+
             NAME: conid
             DESC: The list of contract IDs you wish to pull current quotes for.
             TYPE: List<String>
@@ -1181,42 +1426,145 @@ class IBClient():
             NAME: fields
             DESC: List of fields you wish to retrieve for each quote.
             TYPE: List<String>
+
+            NAME: max_conids
+            DESC: The most conids sent in a single request.
+            TYPE: Integer
+
+            NAME: max_fields
+            DESC: The most fields sent in a single request.
+            TYPE: Integer
+
+            NAME: max_concurrency
+            DESC: The most chunks requested at once.
+            TYPE: Integer
         """
 
+        # Serve from the streamed quotes when they cover the whole request.
+        if self.quote_cache is not None:
+            cached = self.quote_cache.snapshot(conids=conids, fields=fields)
+            if cached is not None:
+                return cached
+
         # define request components
         endpoint = 'iserver/marketdata/snapshot'
         req_type = 'GET'
 
-        # join the two list arguments so they are both a single string.
-        conids_joined = self._prepare_arguments_list(parameter_list=conids)
+        chunks = self._market_data_chunks(
+            conids=conids,
+            since=since,
+            fields=fields,
+            max_conids=max_conids,
+            max_fields=max_fields
+        )
 
-        if fields is not None:
-            fields_joined = ",".join(str(n) for n in fields)
-        else:
-            fields_joined = ""
+        # Small requests go out as they are.
+        if len(chunks) == 1:
+            return self._make_request(
+                endpoint=endpoint,
+                req_type=req_type,
+                params=chunks[0]
+            )
 
-        # define the parameters
-        if since is None:
-            params = {
-                'conids': conids_joined,
-                'fields': fields_joined
-            }
-        else:
-            params = {
-                'conids': conids_joined,
-                'since': since,
-                'fields': fields_joined
-            }
+        results = map_concurrently(
+            func=lambda index: self._make_request(
+                endpoint=endpoint,
+                req_type=req_type,
+                params=chunks[index]
+            ),
+            keys=range(len(chunks)),
+            max_concurrency=max_concurrency
+        )
 
-        content = self._make_request(
-            endpoint=endpoint,
-            req_type=req_type,
-            params=params
+        for result in results.values():
+            if not result.ok:
+                raise result.error
+
+        content = self._merge_snapshots(
+            responses=[result.result for result in results.values()]
         )
 
         return content
 
-    def market_data_history(self, conid: str, period: str, bar: str) -> Dict:
+    def _market_data_chunks(self, conids: List[str], since: str, fields: List[str], max_conids: int, max_fields: int) -> List[dict]:
+        """Splits a snapshot request into gateway sized chunks.
+
+        Arguments:
+        ----
+        conids {List[str]} -- The contract IDs, either a list or a comma separated string.
+
+        since {str} -- The epoch time in milliseconds updates are required since.
+
+        fields {List[str]} -- The fields to request, `None` for the default fields.
+
+        max_conids {int} -- The most conids in one chunk.
+
+        max_fields {int} -- The most fields in one chunk.
+
+        Returns:
+        ----
+        List[dict] -- The query parameters of every chunk.
+        """
+
+        if isinstance(conids, str):
+            conids = conids.split(',')
+
+        conids = [str(conid) for conid in conids]
+        conid_chunks = [
+            conids[index:index + max_conids] for index in range(0, len(conids), max_conids)
+        ] or [[]]
+
+        if fields is not None:
+            fields = [str(field) for field in fields]
+            field_chunks = [
+                fields[index:index + max_fields] for index in range(0, len(fields), max_fields)
+            ] or [[]]
+        else:
+            field_chunks = [[]]
+
+        chunks = []
+        for conid_chunk in conid_chunks:
+            for field_chunk in field_chunks:
+
+                # define the parameters
+                params = {
+                    'conids': ','.join(conid_chunk),
+                    'fields': ','.join(field_chunk)
+                }
+
+                if since is not None:
+                    params['since'] = since
+
+                chunks.append(params)
+
+        return chunks
+
+    def _merge_snapshots(self, responses: List[List[dict]]) -> List[dict]:
+        """Merges chunked snapshot responses into one entry per conid.
+
+        Arguments:
+        ----
+        responses {List[List[dict]]} -- The responses of every chunk.
+
+        Returns:
+        ----
+        List[dict] -- The merged snapshot, in the order the conids were first seen.
+        """
+
+        merged: Dict[str, dict] = {}
+
+        for response in responses:
+            for quote in response or []:
+                conid = str(quote.get('conid', quote.get('conidEx')))
+
+                if conid in merged:
+                    merged[conid].update(quote)
+                else:
+                    merged[conid] = dict(quote)
+
+        return list(merged.values())
+
+    def market_data_history(self, conid: str, period: str, bar: str, output: str = 'json', start_time: str = None) -> Dict:
         """
             Get history of market Data for the given conid, length of data is controlled by period and 
             bar. e.g. 1y period with bar=1w returns 52 data points.
@@ -1235,6 +1583,19 @@ class IBClient():
             DESC: Specifies granularity of data. For example, if bar = '1h' the data will be at an hourly level.
                   Possible values are ['5min','1h','1w']
             TYPE: String
+
+            NAME: output
+            DESC: The format of the bars. 'json' returns the response as is, 'numpy'
+                  returns a structured array with the `t`, `o`, `h`, `l`, `c` and `v`
+                  columns, 'pandas' a DataFrame and 'arrow' a pyarrow Table. The array
+                  formats are decoded straight from the raw bytes.
+                  Possible values are ['json','numpy','pandas','arrow']
+            TYPE: String
+
+            NAME: start_time
+            DESC: The time the period looks back from instead of now, in UTC using the
+                  format 'YYYYMMDD-HH:mm:ss'. Sent to the gateway as `startTime`.
+            TYPE: String
         """
 
         # define request components
@@ -1246,10 +1607,14 @@ class IBClient():
             'bar': bar
         }
 
+        if start_time is not None:
+            params['startTime'] = start_time
+
         content = self._make_request(
             endpoint=endpoint,
             req_type=req_type,
-            params=params
+            params=params,
+            decoder=None if output == 'json' else bars_decoder(output=output)
         )
 
         return content
@@ -1358,7 +1723,7 @@ class IBClient():
 
         return content
 
-    def contracts_definitions(self, conids: List[str]) -> Dict:
+    def contracts_definitions(self, conids: List[str], cache: bool = True) -> Dict:
         """
             Returns a list of security definitions for the given conids.
 
@@ -1366,6 +1731,10 @@ class IBClient():
             DESC: A list of contract IDs you wish to get details for.
             TYPE: List<Integer>
 
+            NAME: cache
+            DESC: If `False`, the response cache is bypassed and the gateway is asked again.
+            TYPE: Boolean
+
             RTYPE: Dictionary
         """
 
@@ -1379,12 +1748,13 @@ class IBClient():
         content = self._make_request(
             endpoint=endpoint,
             req_type=req_type,
-            json=payload
+            json=payload,
+            cache=cache
         )
 
         return content
 
-    def futures_search(self, symbols: List[str]) -> Dict:
+    def futures_search(self, symbols: List[str], cache: bool = True) -> Dict:
         """
             Returns a list of non-expired future contracts for given symbol(s).
 
@@ -1392,6 +1762,10 @@ class IBClient():
             DESC: List of case-sensitive symbols separated by comma.
             TYPE: List<String>
 
+            NAME: cache
+            DESC: If `False`, the response cache is bypassed and the gateway is asked again.
+            TYPE: Boolean
+
             RTYPE: Dictionary
         """
 
@@ -1405,12 +1779,13 @@ class IBClient():
         content = self._make_request(
             endpoint=endpoint,
             req_type=req_type,
-            params=params
+            params=params,
+            cache=cache
         )
 
         return content
 
-    def symbols_search_list(self, symbols: List[str]) -> Dict:
+    def symbols_search_list(self, symbols: List[str], cache: bool = True) -> Dict:
         """
             Returns a list of non-expired future contracts for given symbol(s).
 
@@ -1418,6 +1793,10 @@ class IBClient():
             DESC: List of case-sensitive symbols separated by comma.
             TYPE: List<String>
 
+            NAME: cache
+            DESC: If `False`, the response cache is bypassed and the gateway is asked again.
+            TYPE: Boolean
+
             RTYPE: Dictionary
         """
 
@@ -1428,7 +1807,8 @@ class IBClient():
         content = self._make_request(
             endpoint=endpoint,
             req_type=req_type,
-            params=params
+            params=params,
+            cache=cache
         )
 
         return content
@@ -1463,7 +1843,7 @@ class IBClient():
         """
 
         # define request components
-        endpoint = r'​portfolio/subaccounts'
+        endpoint = r'portfolio/subaccounts'
         req_type = 'GET'
         content = self._make_request(
             endpoint=endpoint,
@@ -1755,11 +2135,11 @@ class IBClient():
             TYPE: List<IBOrder Object> or List<Dictionary>
         """
 
-        # EXTENDED THIS
+        # The gateway expects the list under an `orders` key.
         if type(orders) is list:
-            orders = orders
-        else:
-            orders = orders
+            orders = {
+                'orders': [order if type(order) is dict else order.create_order() for order in orders]
+            }
 
         # define request components
         endpoint = r'iserver/account/{}/orders'.format(account_id)
@@ -2142,3 +2522,8 @@ class IBClient():
         )
 
         return content
+
+
+class IBClient(GatewaySession, IBClientBase):
+
+    """The client of the Client Portal Gateway, starting it and logging in when needed."""
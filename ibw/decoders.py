@@ -0,0 +1,121 @@
+import json
+
+from typing import Callable
+from typing import List
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# The JSON backends, fastest first.
+BACKENDS = ['orjson', 'msgspec', 'json']
+
+
+def available_backends() -> List[str]:
+    """Returns the JSON backends installed, fastest first."""
+
+    installed = {'orjson': orjson is not None, 'msgspec': msgspec is not None, 'json': True}
+
+    return [backend for backend in BACKENDS if installed[backend]]
+
+
+def _msgspec_decoder() -> Callable[[bytes], object]:
+    """Returns the `msgspec` decoder, raising `json.JSONDecodeError` like the other backends."""
+
+    decode = msgspec.json.Decoder().decode
+
+    def decoder(content: bytes) -> object:
+        try:
+            return decode(content)
+        except msgspec.DecodeError as error:
+            # `msgspec.DecodeError` isn't a `ValueError`, callers catching the `json` errors would miss it.
+            if isinstance(content, (bytes, bytearray, memoryview)):
+                content = bytes(content).decode('utf-8', errors='replace')
+            raise json.JSONDecodeError(str(error), content, 0) from error
+
+    return decoder
+
+
+def json_decoder(backend: str = None) -> Callable[[bytes], object]:
+    """Returns a function decoding a raw response body from bytes.
+
+    Arguments:
+    ----
+    backend {str} -- One of ['orjson', 'msgspec', 'json'], the fastest one
+        installed if not provided. (default: {None})
+
+    Usage:
+    ----
+        >>> decode = json_decoder()
+        >>> decode(b'{"authenticated": true}')
+        {'authenticated': True}
+
+    Returns:
+    ----
+    Callable[[bytes], object] -- The decoder, every backend raises a
+        `json.JSONDecodeError` on a malformed body.
+    """
+
+    if backend is None:
+        backend = available_backends()[0]
+
+    if backend == 'orjson':
+        if orjson is None:
+            raise ImportError(
+                "The `orjson` decoder requires `orjson`, install it with "
+                "`pip install interactive-broker-python-web-api[orjson]`."
+            )
+        return orjson.loads
+    elif backend == 'msgspec':
+        if msgspec is None:
+            raise ImportError(
+                "The `msgspec` decoder requires `msgspec`, install it with "
+                "`pip install interactive-broker-python-web-api[msgspec]`."
+            )
+        return _msgspec_decoder()
+    elif backend == 'json':
+        return json.loads
+
+    raise ValueError('The backend must be one of {}, not {!r}.'.format(BACKENDS, backend))
+
+
+def struct_decoder(type: type) -> Callable[[bytes], object]:
+    """Returns a function decoding a raw response body straight into typed structs.
+
+    The body is validated against `type` as it's parsed, and only the fields
+    the struct declares are kept, so nothing else is allocated.
+
+    Arguments:
+    ----
+    type {type} -- A `msgspec.Struct`, or any type `msgspec` can decode into,
+        like `List[Struct]`.
+
+    Usage:
+    ----
+        >>> class Account(msgspec.Struct):
+                id: str
+                currency: str
+        >>> ib_client._make_request(
+                endpoint='portfolio/accounts',
+                req_type='GET',
+                decoder=struct_decoder(type=List[Account])
+            )
+
+    Returns:
+    ----
+    Callable[[bytes], object] -- The decoder.
+    """
+
+    if msgspec is None:
+        raise ImportError(
+            "Decoding into structs requires `msgspec`, install it with "
+            "`pip install interactive-broker-python-web-api[msgspec]`."
+        )
+
+    return msgspec.json.Decoder(type).decode
@@ -0,0 +1,194 @@
+import json
+import asyncio
+import threading
+
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import Union
+
+# Only requests without side effects are shared, two identical orders are two orders.
+FLIGHT_METHODS = frozenset(['GET'])
+
+
+class _LeaderCancelled(Exception):
+    """Set on a shared request whose leader was cancelled, so a follower takes over."""
+
+
+class _Call():
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self) -> None:
+        """A request in flight, and the outcome its followers wait for."""
+
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException = None
+
+
+class SingleFlight():
+
+    def __init__(self, methods: Iterable[str] = FLIGHT_METHODS) -> None:
+        """Initalizes a new instance of the SingleFlight Object.
+
+        Collapses identical requests made at the same time into one. The
+        first caller, the leader, sends the request, and every caller asking
+        for the same method, URL, parameters and body before it's answered
+        waits for it and gets the same response, or the same error. Nothing
+        is kept once the leader is answered, so there is no TTL to tune.
+
+        Arguments:
+        ----
+        methods {Iterable[str]} -- The HTTP methods shared. (default: {FLIGHT_METHODS})
+
+        Usage:
+        ----
+            >>> flights = SingleFlight()
+            >>> key = flights.key(method='GET', url=url)
+            >>> response = flights.do(key=key, func=lambda: session.get(url))
+        """
+
+        self.methods = frozenset(method.upper() for method in methods)
+
+        # The requests sent, and the ones answered by a request already in flight.
+        self.calls = 0
+        self.shared = 0
+
+        self._calls: Dict[tuple, Union[_Call, asyncio.Future]] = {}
+        self._lock = threading.Lock()
+
+    def key(self, method: str, url: str, params: dict = None, json_body: dict = None) -> Union[tuple, None]:
+        """Returns the key identical requests share, `None` if the request must be sent on its own.
+
+        Arguments:
+        ----
+        method {str} -- The HTTP method.
+
+        url {str} -- The full URL.
+
+        params {dict} -- The query string parameters. (default: {None})
+
+        json_body {dict} -- The JSON body. (default: {None})
+
+        Returns:
+        ----
+        Union[tuple, None] -- The key.
+        """
+
+        if method.upper() not in self.methods:
+            return None
+
+        return (
+            method.upper(),
+            url,
+            json.dumps(params, sort_keys=True, default=str) if params else None,
+            json.dumps(json_body, sort_keys=True, default=str) if json_body is not None else None
+        )
+
+    @property
+    def in_flight(self) -> int:
+        """The requests in flight."""
+
+        return len(self._calls)
+
+    def do(self, key: tuple, func: Callable[[], object]) -> object:
+        """Calls `func`, unless a call with the same key is in flight, then waits for that one.
+
+        Arguments:
+        ----
+        key {tuple} -- The key, see `key`.
+
+        func {Callable[[], object]} -- Sends the request.
+
+        Returns:
+        ----
+        object -- The return value of `func`, shared by every caller.
+        """
+
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+                leader = True
+            else:
+                self.shared += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key: tuple, func: Callable[[], Awaitable]) -> object:
+        """Awaits `func()`, unless a call with the same key is in flight, then waits for that one.
+
+        If the leader is cancelled its followers aren't, one of them sends the
+        request again instead.
+
+        Arguments:
+        ----
+        key {tuple} -- The key, see `key`.
+
+        func {Callable[[], Awaitable]} -- Returns the coroutine sending the request.
+
+        Returns:
+        ----
+        object -- The result of the coroutine, shared by every caller.
+        """
+
+        while True:
+
+            future = self._calls.get(key)
+            if future is None:
+                break
+
+            try:
+                # Shielded, so a follower cancelled doesn't cancel the leader's request.
+                result = await asyncio.shield(future)
+            except _LeaderCancelled:
+                # The first follower to wake up sends the request again, the others follow it.
+                continue
+            except BaseException:
+                # The leader's error is shared too, unless this follower was cancelled itself.
+                if future.done():
+                    self.shared += 1
+                raise
+
+            self.shared += 1
+            return result
+
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        self.calls += 1
+
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            # Only this caller was cancelled, the followers must not be.
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except BaseException as error:
+            future.set_exception(error)
+            # Marks the error as seen, a leader without followers raises it on its own.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
@@ -0,0 +1,348 @@
+import time
+import bisect
+import datetime
+import threading
+
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Union
+
+from ibw.batch import map_concurrently
+
+# The most roots sent in one `trsrv/futures` request.
+FUTURES_BATCH_SIZE = 20
+
+# How long a chain is kept before it is requested again, one day.
+MAX_AGE = 24 * 60 * 60
+
+# How many business days before the last trading day positions are rolled.
+ROLL_DAYS = 5
+
+
+def _as_date(value: Union[int, str, datetime.date]) -> datetime.date:
+    """Converts a `YYYYMMDD` integer or string into a date."""
+
+    if isinstance(value, datetime.date):
+        return value
+
+    return datetime.datetime.strptime(str(value), '%Y%m%d').date()
+
+
+def _as_number(value: Union[int, str, datetime.date]) -> int:
+    """Converts a date into a `YYYYMMDD` integer, which sorts like the date."""
+
+    if isinstance(value, datetime.date):
+        return value.year * 10000 + value.month * 100 + value.day
+
+    return int(value)
+
+
+def roll_date(last_trading_day: Union[int, datetime.date], roll_days: int = ROLL_DAYS) -> int:
+    """Returns the date `roll_days` business days before the last trading day.
+
+    Arguments:
+    ----
+    last_trading_day {Union[int, datetime.date]} -- The last trading day, as a date or `YYYYMMDD`.
+
+    roll_days {int} -- The business days to roll ahead of it. (default: {ROLL_DAYS})
+
+    Returns:
+    ----
+    int -- The roll date as `YYYYMMDD`.
+    """
+
+    day = _as_date(last_trading_day)
+    remaining = roll_days
+
+    while remaining > 0:
+        day -= datetime.timedelta(days=1)
+        if day.weekday() < 5:
+            remaining -= 1
+
+    return _as_number(day)
+
+
+class FuturesContract():
+
+    __slots__ = ('symbol', 'conid', 'underlying_conid', 'expiry', 'last_trading_day', 'roll_date')
+
+    def __init__(self, symbol: str, conid: int, expiry: int, last_trading_day: int = None,
+                 underlying_conid: int = None, roll_days: int = ROLL_DAYS) -> None:
+        """A single contract of a futures chain.
+
+        Arguments:
+        ----
+        symbol {str} -- The root symbol, for example 'ES'.
+
+        conid {int} -- The contract ID.
+
+        expiry {int} -- The expiration date as `YYYYMMDD`.
+
+        last_trading_day {int} -- The last trading day as `YYYYMMDD`, the expiry if
+            not provided. (default: {None})
+
+        underlying_conid {int} -- The contract ID of the underlying. (default: {None})
+
+        roll_days {int} -- The business days ahead of the last trading day to roll. (default: {ROLL_DAYS})
+        """
+
+        self.symbol = symbol
+        self.conid = int(conid)
+        self.underlying_conid = underlying_conid
+        self.expiry = int(expiry)
+        self.last_trading_day = int(last_trading_day or expiry)
+        self.roll_date = roll_date(last_trading_day=self.last_trading_day, roll_days=roll_days)
+
+    def __repr__(self) -> str:
+        return '<FuturesContract symbol={symbol!r} conid={conid} expiry={expiry} roll_date={roll_date}>'.format(
+            symbol=self.symbol,
+            conid=self.conid,
+            expiry=self.expiry,
+            roll_date=self.roll_date
+        )
+
+
+class FuturesChain():
+
+    def __init__(self, symbol: str, contracts: Iterable[FuturesContract], fetched: float = 0.0) -> None:
+        """Initalizes a new instance of the FuturesChain Object.
+
+        The contracts of one root, sorted by expiry. The last trading days and
+        roll dates are kept in sorted lists of `YYYYMMDD` integers, so the
+        front month or the contract to hold on a given day is found with a
+        binary search instead of a scan.
+
+        Arguments:
+        ----
+        symbol {str} -- The root symbol, for example 'ES'.
+
+        contracts {Iterable[FuturesContract]} -- The contracts of the chain, in any order.
+
+        fetched {float} -- The epoch time in seconds the chain was requested. (default: {0.0})
+
+        Usage:
+        ----
+            >>> chain = FuturesChain.from_response(symbol='ES', content=ib_client.futures_search(symbols=['ES'])['ES'])
+            >>> chain.front(on=datetime.date.today()).conid
+        """
+
+        self.symbol = symbol
+        self.fetched = fetched
+        self.contracts: List[FuturesContract] = sorted(
+            contracts,
+            key=lambda contract: (contract.expiry, contract.last_trading_day)
+        )
+
+        self._last_trading_days = [contract.last_trading_day for contract in self.contracts]
+        self._roll_dates = [contract.roll_date for contract in self.contracts]
+        self._by_conid = {contract.conid: contract for contract in self.contracts}
+
+    @classmethod
+    def from_response(cls, symbol: str, content: List[dict], roll_days: int = ROLL_DAYS, fetched: float = 0.0) -> 'FuturesChain':
+        """Builds a chain from the contract list `futures_search` returns for a root.
+
+        Arguments:
+        ----
+        symbol {str} -- The root symbol.
+
+        content {List[dict]} -- The contracts of the root from `trsrv/futures`.
+
+        roll_days {int} -- The business days ahead of the last trading day to roll. (default: {ROLL_DAYS})
+
+        fetched {float} -- The epoch time in seconds the chain was requested. (default: {0.0})
+
+        Returns:
+        ----
+        FuturesChain -- The chain.
+        """
+
+        contracts = [
+            FuturesContract(
+                symbol=contract.get('symbol', symbol),
+                conid=contract['conid'],
+                expiry=contract['expirationDate'],
+                last_trading_day=contract.get('ltd'),
+                underlying_conid=contract.get('underlyingConid'),
+                roll_days=roll_days
+            )
+            for contract in content or []
+        ]
+
+        return cls(symbol=symbol, contracts=contracts, fetched=fetched)
+
+    def __len__(self) -> int:
+        return len(self.contracts)
+
+    def __iter__(self):
+        return iter(self.contracts)
+
+    def front(self, on: Union[int, datetime.date] = None) -> Union[FuturesContract, None]:
+        """Returns the nearest contract still trading on a day.
+
+        Arguments:
+        ----
+        on {Union[int, datetime.date]} -- The day, as a date or `YYYYMMDD`, today if
+            not provided. (default: {None})
+
+        Returns:
+        ----
+        Union[FuturesContract, None] -- The front month, `None` if every contract has expired.
+        """
+
+        day = _as_number(on if on is not None else datetime.date.today())
+        index = bisect.bisect_left(self._last_trading_days, day)
+
+        return self.contracts[index] if index < len(self.contracts) else None
+
+    def active(self, on: Union[int, datetime.date] = None) -> Union[FuturesContract, None]:
+        """Returns the contract to hold on a day, moving to the next one on its roll date.
+
+        Arguments:
+        ----
+        on {Union[int, datetime.date]} -- The day, as a date or `YYYYMMDD`, today if
+            not provided. (default: {None})
+
+        Returns:
+        ----
+        Union[FuturesContract, None] -- The contract to hold, `None` if every contract is past its roll date.
+        """
+
+        day = _as_number(on if on is not None else datetime.date.today())
+        index = bisect.bisect_right(self._roll_dates, day)
+
+        return self.contracts[index] if index < len(self.contracts) else None
+
+    def next_roll(self, on: Union[int, datetime.date] = None) -> Union[int, None]:
+        """Returns the next roll date after a day as `YYYYMMDD`, `None` if there is none."""
+
+        contract = self.active(on=on)
+
+        return contract.roll_date if contract is not None else None
+
+    def get(self, conid: int) -> Union[FuturesContract, None]:
+        """Returns a contract of the chain by conid."""
+
+        return self._by_conid.get(int(conid))
+
+
+class FuturesChains():
+
+    def __init__(self, max_age: float = MAX_AGE, roll_days: int = ROLL_DAYS, max_concurrency: int = 5,
+                 clock: Callable[[], float] = time.time) -> None:
+        """Initalizes a new instance of the FuturesChains Object.
+
+        Keeps the futures chains of many roots, requesting each at most once
+        per `max_age`. Refreshes are sent in batches of roots, and the batches
+        run concurrently.
+
+        Arguments:
+        ----
+        max_age {float} -- The seconds a chain is kept before it is requested again. (default: {MAX_AGE})
+
+        roll_days {int} -- The business days ahead of the last trading day to roll. (default: {ROLL_DAYS})
+
+        max_concurrency {int} -- The most batch requests running at once. (default: {5})
+
+        clock {Callable[[], float]} -- Returns the current epoch time in seconds. (default: {time.time})
+
+        Usage:
+        ----
+            >>> chains = FuturesChains()
+            >>> chains.refresh(client=ib_client, symbols=['ES', 'NQ', 'CL', 'GC'])
+            >>> chains.get(client=ib_client, symbol='ES').active().conid
+        """
+
+        self.max_age = max_age
+        self.roll_days = roll_days
+        self.max_concurrency = max_concurrency
+        self.clock = clock
+
+        self._chains: Dict[str, FuturesChain] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._chains
+
+    def _is_fresh(self, chain: FuturesChain, now: float) -> bool:
+        return chain is not None and now - chain.fetched < self.max_age
+
+    def refresh(self, client, symbols: Iterable[str], force: bool = False) -> Dict[str, FuturesChain]:
+        """Requests the chains of every root that is missing or older than `max_age`.
+
+        The chains are requested straight from the gateway, never from the
+        transport's response cache, so a chain past `max_age` is never
+        replaced by the same expired contracts.
+
+        Arguments:
+        ----
+        client {IBClient} -- The client to make the requests with.
+
+        symbols {Iterable[str]} -- The root symbols.
+
+        force {bool} -- If `True`, fresh chains are requested again too. (default: {False})
+
+        Returns:
+        ----
+        Dict[str, FuturesChain] -- The chains that were requested, keyed by root.
+        """
+
+        now = self.clock()
+        symbols = [
+            symbol for symbol in dict.fromkeys(symbols)
+            if force or not self._is_fresh(chain=self._chains.get(symbol), now=now)
+        ]
+
+        if not symbols:
+            return {}
+
+        batches = [
+            symbols[index:index + FUTURES_BATCH_SIZE]
+            for index in range(0, len(symbols), FUTURES_BATCH_SIZE)
+        ]
+
+        # The chains are the cache, a chain requested again must come from the gateway.
+        results = map_concurrently(
+            func=lambda index: client.futures_search(symbols=batches[index], cache=False),
+            keys=range(len(batches)),
+            max_concurrency=self.max_concurrency
+        )
+
+        for result in results.values():
+            if not result.ok:
+                raise result.error
+
+        chains = {}
+        for result in results.values():
+            for symbol, content in (result.result or {}).items():
+                chains[symbol] = FuturesChain.from_response(
+                    symbol=symbol,
+                    content=content,
+                    roll_days=self.roll_days,
+                    fetched=now
+                )
+
+        with self._lock:
+            self._chains.update(chains)
+
+        return chains
+
+    def get(self, client, symbol: str) -> Union[FuturesChain, None]:
+        """Returns the chain of a root, requesting it first if it's missing or stale.
+
+        Arguments:
+        ----
+        client {IBClient} -- The client to make the request with.
+
+        symbol {str} -- The root symbol.
+
+        Returns:
+        ----
+        Union[FuturesChain, None] -- The chain, `None` if the gateway doesn't know the root.
+        """
+
+        if not self._is_fresh(chain=self._chains.get(symbol), now=self.clock()):
+            self.refresh(client=client, symbols=[symbol])
+
+        return self._chains.get(symbol)
@@ -0,0 +1,219 @@
+import json
+import queue
+import logging
+import itertools
+import logging.handlers
+
+from typing import Union
+
+# The library logs to `ibw` and its children, and never configures the root logger.
+logging.getLogger('ibw').addHandler(logging.NullHandler())
+
+# The most bytes of a response body put in a log record.
+MAX_PAYLOAD = 2048
+
+# The most records waiting to be written before new ones are dropped.
+MAX_QUEUE = 10000
+
+# The attributes every `LogRecord` has, anything else was passed in `extra`.
+_RECORD_ATTRIBUTES = frozenset(logging.LogRecord('', 0, '', 0, '', (), None).__dict__) | {'message', 'asctime'}
+
+
+class Payload():
+
+    __slots__ = ('head', 'size')
+
+    def __init__(self, content: Union[bytes, str], limit: int = MAX_PAYLOAD) -> None:
+        """A response body cut to `limit` bytes, and only decoded if the record is written.
+
+        Only the first `limit` bytes are kept, so a record waiting in the queue
+        doesn't hold on to the whole body.
+
+        Arguments:
+        ----
+        content {Union[bytes, str]} -- The body.
+
+        limit {int} -- The most bytes written. (default: {MAX_PAYLOAD})
+        """
+
+        if isinstance(content, str):
+            content = content.encode('utf-8', errors='replace')
+
+        self.head = content[:limit]
+        self.size = len(content)
+
+    def __str__(self) -> str:
+
+        if len(self.head) == self.size:
+            return self.head.decode('utf-8', errors='replace')
+
+        return '{head}... ({size} bytes)'.format(
+            head=self.head.decode('utf-8', errors='ignore'),
+            size=self.size
+        )
+
+
+class SamplingFilter(logging.Filter):
+
+    def __init__(self, every: int = 1, level: int = logging.DEBUG) -> None:
+        """Keeps one in `every` records at or below `level`, records above it always pass.
+
+        Arguments:
+        ----
+        every {int} -- Keep one record in this many. (default: {1})
+
+        level {int} -- The highest level sampled. (default: {logging.DEBUG})
+        """
+
+        super().__init__()
+        self.every = every
+        self.level = level
+        self.dropped = 0
+        self._counter = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+
+        if record.levelno > self.level or self.every <= 1:
+            return True
+
+        if next(self._counter) % self.every == 0:
+            return True
+
+        self.dropped += 1
+        return False
+
+
+class StructuredFormatter(logging.Formatter):
+
+    def __init__(self, max_length: int = None) -> None:
+        """Formats records as one JSON object per line, with the fields passed in `extra`.
+
+        Arguments:
+        ----
+        max_length {int} -- The most characters of the message written. (default: {None})
+        """
+
+        super().__init__()
+        self.max_length = max_length
+
+    def format(self, record: logging.LogRecord) -> str:
+
+        message = record.getMessage()
+        if self.max_length is not None and len(message) > self.max_length:
+            message = message[:self.max_length] + '...'
+
+        entry = {
+            'time': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+            'message': message
+        }
+        entry.update(
+            (key, value) for key, value in record.__dict__.items()
+            if key not in _RECORD_ATTRIBUTES
+        )
+
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, default=str)
+
+
+class _QueueListener(logging.handlers.QueueListener):
+
+    def enqueue_sentinel(self) -> None:
+        # Wait for room, a full queue must not stop the listener from stopping.
+        self.queue.put(self._sentinel)
+
+
+class QueueLogHandler(logging.handlers.QueueHandler):
+
+    def __init__(self, *handlers: logging.Handler, max_queue: int = MAX_QUEUE, sample_every: int = 1) -> None:
+        """Initalizes a new instance of the QueueLogHandler Object.
+
+        Puts records on a bounded queue and writes them to `handlers` on a
+        background thread, so logging never waits on disk. Records are not
+        formatted until that thread writes them, and when the queue is full
+        new records are dropped and counted instead of blocking.
+
+        Arguments:
+        ----
+        *handlers {logging.Handler} -- The handlers writing the records.
+
+        max_queue {int} -- The most records waiting to be written. (default: {MAX_QUEUE})
+
+        sample_every {int} -- Keep one debug record in this many. (default: {1})
+
+        Usage:
+        ----
+            >>> handler = QueueLogHandler(logging.FileHandler('ibw.log'), sample_every=10)
+            >>> logging.getLogger('ibw').addHandler(handler)
+            >>> handler.close()
+        """
+
+        super().__init__(queue.Queue(maxsize=max_queue))
+
+        self.dropped = 0
+        self.addFilter(SamplingFilter(every=sample_every))
+
+        self.listener = _QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue stays in this process, so the record is passed as is and formatted by the listener.
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self) -> None:
+        """Writes the records still queued and stops the background thread."""
+
+        if self.listener is not None:
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.close()
+            self.listener = None
+
+        super().close()
+
+
+def configure_logging(path: str = 'ibw.log', level: int = logging.DEBUG, sample_every: int = 1,
+                      max_length: int = None, max_queue: int = MAX_QUEUE) -> QueueLogHandler:
+    """Writes the library's logs to a file as JSON lines, without blocking the caller.
+
+    Arguments:
+    ----
+    path {str} -- The log file. (default: {'ibw.log'})
+
+    level {int} -- The lowest level written. (default: {logging.DEBUG})
+
+    sample_every {int} -- Keep one debug record in this many. (default: {1})
+
+    max_length {int} -- The most characters of a message written. (default: {None})
+
+    max_queue {int} -- The most records waiting to be written. (default: {MAX_QUEUE})
+
+    Usage:
+    ----
+        >>> handler = configure_logging(path='app.log', sample_every=10)
+
+    Returns:
+    ----
+    QueueLogHandler -- The handler added to the `ibw` logger, close it to flush the file.
+    """
+
+    file_handler = logging.FileHandler(path)
+    file_handler.setFormatter(StructuredFormatter(max_length=max_length))
+
+    handler = QueueLogHandler(file_handler, max_queue=max_queue, sample_every=sample_every)
+
+    logger = logging.getLogger('ibw')
+    logger.setLevel(level)
+    logger.addHandler(handler)
+
+    return handler
@@ -0,0 +1,280 @@
+import re
+import json
+import bisect
+import threading
+
+from typing import Dict
+from typing import Tuple
+
+try:
+    from opentelemetry import trace
+except ImportError:
+    trace = None
+
+# The upper bounds of the latency histogram buckets in seconds.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# The request phases timed, see `RequestEvent`.
+PHASES = ('wait', 'server', 'transfer', 'decode')
+
+# A path segment holding an ID, like a conid, an account or an order ID.
+_ID_SEGMENT = re.compile(r'^(?=.*\d)[^/]+$')
+
+
+def endpoint_group(endpoint: str) -> str:
+    """Returns the endpoint with its IDs replaced, so every account or conid shares one group.
+
+    Arguments:
+    ----
+    endpoint {str} -- The endpoint, for example 'portfolio/DU123456/positions/0'.
+
+    Returns:
+    ----
+    str -- The group, for example 'portfolio/{id}/positions/{id}'.
+    """
+
+    return '/'.join(
+        '{id}' if _ID_SEGMENT.match(segment) else segment
+        for segment in endpoint.strip('/').split('/')
+    )
+
+
+class RequestEvent():
+
+    __slots__ = (
+        'method', 'endpoint', 'group', 'url', 'status_code', 'request_bytes', 'response_bytes', 'cache_hit',
+        'retries', 'wait', 'server', 'transfer', 'decode', 'elapsed', 'start_ns', 'end_ns', 'error'
+    )
+
+    def __init__(self, method: str, endpoint: str, url: str) -> None:
+        """What happened during one `_make_request` call, passed to the request hooks.
+
+        The time is split into `wait`, the time spent in the pacing queue,
+        `server`, the time until the response headers arrived (connecting,
+        the gateway's own work, and reading the headers), `transfer`, the
+        time spent reading the body, and `decode`, the time spent decoding
+        it. `server` is `None` when the transport doesn't report it, in which
+        case `transfer` holds the whole round trip.
+
+        Arguments:
+        ----
+        method {str} -- The HTTP method.
+
+        endpoint {str} -- The endpoint, relative to `/v1/portal/`.
+
+        url {str} -- The full URL.
+        """
+
+        self.method = method
+        self.endpoint = endpoint
+        self.group = endpoint_group(endpoint=endpoint)
+        self.url = url
+        self.status_code: int = None
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.cache_hit = False
+        self.retries = 0
+        self.wait = 0.0
+        self.server: float = None
+        self.transfer = 0.0
+        self.decode = 0.0
+        self.elapsed = 0.0
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error: Exception = None
+
+    @property
+    def ok(self) -> bool:
+        """`True` if the request succeeded."""
+
+        return self.error is None
+
+    def __repr__(self) -> str:
+        return '<RequestEvent method={method} group={group!r} status_code={status_code} elapsed={elapsed:.4f}>'.format(
+            method=self.method,
+            group=self.group,
+            status_code=self.status_code,
+            elapsed=self.elapsed
+        )
+
+
+def body_size(payload: object) -> int:
+    """Returns the size in bytes of a JSON request body, `0` if there is none."""
+
+    return len(json.dumps(payload).encode('utf-8')) if payload is not None else 0
+
+
+def _labels(**labels) -> str:
+    return ','.join('{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"')) for key, value in labels.items())
+
+
+class PrometheusExporter():
+
+    def __init__(self, buckets: Tuple[float] = LATENCY_BUCKETS) -> None:
+        """Initalizes a new instance of the PrometheusExporter Object.
+
+        A request hook adding every request up per method and endpoint group,
+        and rendering the totals in the Prometheus text format.
+
+        Arguments:
+        ----
+        buckets {Tuple[float]} -- The upper bounds of the latency buckets in seconds. (default: {LATENCY_BUCKETS})
+
+        Usage:
+        ----
+            >>> exporter = PrometheusExporter()
+            >>> ib_client.add_request_hook(exporter)
+            >>> print(exporter.render())
+        """
+
+        self.buckets = tuple(sorted(buckets))
+
+        self._histograms: Dict[tuple, list] = {}
+        self._requests: Dict[tuple, int] = {}
+        self._phases: Dict[tuple, float] = {}
+        self._bytes: Dict[tuple, int] = {}
+        self._retries: Dict[tuple, int] = {}
+        self._cache_hits: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: RequestEvent) -> None:
+
+        series = (event.method, event.group)
+        status = str(event.status_code) if event.status_code is not None else type(event.error).__name__
+
+        with self._lock:
+
+            histogram = self._histograms.get(series)
+            if histogram is None:
+                # One count per bucket, plus the sum and count of every observation.
+                histogram = self._histograms[series] = [0] * len(self.buckets) + [0.0, 0]
+
+            index = bisect.bisect_left(self.buckets, event.elapsed)
+            if index < len(self.buckets):
+                histogram[index] += 1
+            histogram[-2] += event.elapsed
+            histogram[-1] += 1
+
+            self._requests[series + (status,)] = self._requests.get(series + (status,), 0) + 1
+
+            for phase in PHASES:
+                value = getattr(event, phase)
+                if value:
+                    self._phases[series + (phase,)] = self._phases.get(series + (phase,), 0.0) + value
+
+            self._bytes[series + ('sent',)] = self._bytes.get(series + ('sent',), 0) + event.request_bytes
+            self._bytes[series + ('received',)] = self._bytes.get(series + ('received',), 0) + event.response_bytes
+
+            if event.retries:
+                self._retries[series] = self._retries.get(series, 0) + event.retries
+
+            if event.cache_hit:
+                self._cache_hits[series] = self._cache_hits.get(series, 0) + 1
+
+    def render(self) -> str:
+        """Returns every metric in the Prometheus text exposition format.
+
+        Returns:
+        ----
+        str -- The metrics, ready to be served on a `/metrics` endpoint.
+        """
+
+        lines = []
+
+        with self._lock:
+
+            lines.append('# HELP ibw_request_duration_seconds The time taken by gateway requests.')
+            lines.append('# TYPE ibw_request_duration_seconds histogram')
+            for (method, group), histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, histogram):
+                    cumulative += count
+                    lines.append('ibw_request_duration_seconds_bucket{{{labels}}} {count}'.format(
+                        labels=_labels(method=method, endpoint=group, le=repr(bound)),
+                        count=cumulative
+                    ))
+                labels = _labels(method=method, endpoint=group)
+                lines.append('ibw_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count}'.format(labels=labels, count=histogram[-1]))
+                lines.append('ibw_request_duration_seconds_sum{{{labels}}} {sum}'.format(labels=labels, sum=repr(histogram[-2])))
+                lines.append('ibw_request_duration_seconds_count{{{labels}}} {count}'.format(labels=labels, count=histogram[-1]))
+
+            counters = [
+                ('ibw_requests_total', 'Gateway requests by status code, or by exception.', self._requests, ('status',)),
+                ('ibw_request_phase_seconds_total', 'The time gateway requests spent in each phase.', self._phases, ('phase',)),
+                ('ibw_request_bytes_total', 'The bytes sent and received.', self._bytes, ('direction',)),
+                ('ibw_request_retries_total', 'The retries made by the transport.', self._retries, ()),
+                ('ibw_cache_hits_total', 'The requests served by the response cache.', self._cache_hits, ())
+            ]
+
+            for name, description, values, extra in counters:
+                lines.append('# HELP {name} {description}'.format(name=name, description=description))
+                lines.append('# TYPE {name} counter'.format(name=name))
+                for key, value in sorted(values.items()):
+                    labels = dict(zip(('method', 'endpoint') + extra, key))
+                    lines.append('{name}{{{labels}}} {value}'.format(name=name, labels=_labels(**labels), value=repr(value)))
+
+        return '\n'.join(lines) + '\n'
+
+
+class OpenTelemetryExporter():
+
+    def __init__(self, tracer=None) -> None:
+        """Initalizes a new instance of the OpenTelemetryExporter Object.
+
+        A request hook recording every request as an OpenTelemetry span, with
+        the phase timings, byte counts, retries and cache hits as attributes.
+        Spans are recorded once the request is done, as children of the span
+        active at the time.
+
+        Arguments:
+        ----
+        tracer {opentelemetry.trace.Tracer} -- The tracer to record with, if not provided
+            the tracer of the `ibw` instrumentation is used. (default: {None})
+
+        Usage:
+        ----
+            >>> ib_client.add_request_hook(OpenTelemetryExporter())
+        """
+
+        if tracer is None:
+            if trace is None:
+                raise ImportError(
+                    "The OpenTelemetry exporter requires `opentelemetry-api`, install it with "
+                    "`pip install interactive-broker-python-web-api[otel]`."
+                )
+            tracer = trace.get_tracer('ibw')
+
+        self.tracer = tracer
+
+    def __call__(self, event: RequestEvent) -> None:
+
+        attributes = {
+            'http.method': event.method,
+            'http.url': event.url,
+            'http.route': event.group,
+            'http.request_content_length': event.request_bytes,
+            'http.response_content_length': event.response_bytes,
+            'ibw.cache_hit': event.cache_hit,
+            'ibw.retries': event.retries
+        }
+        if event.status_code is not None:
+            attributes['http.status_code'] = event.status_code
+
+        for phase in PHASES:
+            value = getattr(event, phase)
+            if value is not None:
+                attributes['ibw.{}_seconds'.format(phase)] = value
+
+        span = self.tracer.start_span(
+            name='{method} {group}'.format(method=event.method, group=event.group),
+            start_time=event.start_ns,
+            attributes=attributes
+        )
+
+        if event.error is not None:
+            span.record_exception(event.error)
+            if trace is not None:
+                span.set_status(trace.Status(trace.StatusCode.ERROR))
+
+        span.end(end_time=event.end_ns)
+
@@ -0,0 +1,526 @@
+import time
+import logging
+import threading
+
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Set
+from typing import Union
+
+logger = logging.getLogger(__name__)
+
+# The states an order moves through, the last three are final.
+SUBMITTED = 'submitted'
+PARTIALLY_FILLED = 'partially_filled'
+FILLED = 'filled'
+CANCELLED = 'cancelled'
+INACTIVE = 'inactive'
+
+FINAL_STATES = frozenset([FILLED, CANCELLED, INACTIVE])
+
+# The gateway allows one `iserver/account/orders` request every 5 seconds.
+FAST_INTERVAL = 5.0
+SLOW_INTERVAL = 30.0
+
+
+def _number(value: Union[str, float, None]) -> float:
+    """Converts a quantity or price the gateway may send as a string."""
+
+    if value is None or value == '':
+        return 0.0
+
+    return float(str(value).replace(',', ''))
+
+
+def order_state(status: str, filled_quantity: float) -> str:
+    """Maps a gateway order status to one of the order book states.
+
+    Arguments:
+    ----
+    status {str} -- The gateway status, for example 'PreSubmitted' or 'Filled'.
+
+    filled_quantity {float} -- The quantity filled so far.
+
+    Returns:
+    ----
+    str -- One of ['submitted', 'partially_filled', 'filled', 'cancelled', 'inactive'].
+    """
+
+    if status == 'Filled':
+        return FILLED
+    elif status in ('Cancelled', 'ApiCancelled'):
+        return CANCELLED
+    elif status == 'Inactive':
+        return INACTIVE
+
+    return PARTIALLY_FILLED if filled_quantity > 0 else SUBMITTED
+
+
+class Fill():
+
+    __slots__ = ('execution_id', 'customer_order_id', 'order_id', 'conid', 'side', 'size', 'price', 'time')
+
+    def __init__(self, execution_id: str, customer_order_id: str = None, order_id: int = None, conid: int = None,
+                 side: str = None, size: float = 0.0, price: float = 0.0, time: int = None) -> None:
+        """One execution reported by `trades`.
+
+        Arguments:
+        ----
+        execution_id {str} -- The execution ID.
+
+        customer_order_id {str} -- The cOID of the order. (default: {None})
+
+        order_id {int} -- The order ID. (default: {None})
+
+        conid {int} -- The contract ID. (default: {None})
+
+        side {str} -- 'B' or 'S'. (default: {None})
+
+        size {float} -- The quantity executed. (default: {0.0})
+
+        price {float} -- The execution price. (default: {0.0})
+
+        time {int} -- The execution time in epoch milliseconds. (default: {None})
+        """
+
+        self.execution_id = execution_id
+        self.customer_order_id = customer_order_id
+        self.order_id = order_id
+        self.conid = conid
+        self.side = side
+        self.size = size
+        self.price = price
+        self.time = time
+
+    @classmethod
+    def from_response(cls, content: dict) -> 'Fill':
+        """Builds a fill from one entry of a `trades` response."""
+
+        conid = content.get('conid', content.get('conidex'))
+
+        return cls(
+            execution_id=content['execution_id'],
+            customer_order_id=content.get('order_ref'),
+            order_id=content.get('order_id'),
+            conid=int(conid) if conid not in (None, '') and str(conid).isdigit() else None,
+            side=content.get('side'),
+            size=_number(content.get('size')),
+            price=_number(content.get('price')),
+            time=content.get('trade_time_r')
+        )
+
+
+class Order():
+
+    __slots__ = (
+        'order_id', 'customer_order_id', 'account', 'conid', 'ticker', 'side', 'order_type', 'price',
+        'status', 'state', 'filled_quantity', 'remaining_quantity', 'average_price', 'updated', 'fills'
+    )
+
+    def __init__(self, order_id: int, customer_order_id: str = None) -> None:
+        """The latest known state of one order in the `OrderBook`.
+
+        Arguments:
+        ----
+        order_id {int} -- The order ID.
+
+        customer_order_id {str} -- The cOID the order was placed with. (default: {None})
+        """
+
+        self.order_id = order_id
+        self.customer_order_id = customer_order_id
+        self.account = None
+        self.conid = None
+        self.ticker = None
+        self.side = None
+        self.order_type = None
+        self.price = None
+        self.status = None
+        self.state = None
+        self.filled_quantity = 0.0
+        self.remaining_quantity = 0.0
+        self.average_price = None
+        self.updated = None
+        self.fills: List[Fill] = []
+
+    @property
+    def is_working(self) -> bool:
+        """`True` while the order can still fill."""
+
+        return self.state not in FINAL_STATES
+
+    def __repr__(self) -> str:
+        return '<Order order_id={order_id} cOID={cOID!r} state={state!r} filled={filled}>'.format(
+            order_id=self.order_id,
+            cOID=self.customer_order_id,
+            state=self.state,
+            filled=self.filled_quantity
+        )
+
+
+class OrderEvent():
+
+    STATE = 'state'
+    FILL = 'fill'
+
+    __slots__ = ('kind', 'order', 'old_state', 'new_state', 'fill')
+
+    def __init__(self, kind: str, order: Order, old_state: str = None, new_state: str = None, fill: Fill = None) -> None:
+        """A state transition or a new fill of an order.
+
+        Arguments:
+        ----
+        kind {str} -- Either 'state' or 'fill'.
+
+        order {Order} -- The order, `None` for fills of orders the book doesn't know.
+
+        old_state {str} -- The state before a transition, `None` for new orders. (default: {None})
+
+        new_state {str} -- The state after a transition. (default: {None})
+
+        fill {Fill} -- The new fill. (default: {None})
+        """
+
+        self.kind = kind
+        self.order = order
+        self.old_state = old_state
+        self.new_state = new_state
+        self.fill = fill
+
+    def __repr__(self) -> str:
+        if self.kind == OrderEvent.FILL:
+            return '<OrderEvent kind=fill execution_id={!r}>'.format(self.fill.execution_id)
+
+        return '<OrderEvent kind=state order_id={order_id} {old} -> {new}>'.format(
+            order_id=self.order.order_id,
+            old=self.old_state,
+            new=self.new_state
+        )
+
+
+class OrderBook():
+
+    def __init__(self, client, fast_interval: float = FAST_INTERVAL, slow_interval: float = SLOW_INTERVAL,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """Initalizes a new instance of the OrderBook Object.
+
+        Tracks orders from `get_live_orders` and fills from `trades`, indexed
+        by order ID and cOID. Each poll only does work for orders whose
+        status or quantities changed and for executions not seen before, and
+        every state transition and new fill is passed to the callbacks.
+        Polling is fast while orders are working and slows down when none are.
+
+        Arguments:
+        ----
+        client {IBClient} -- The client to poll with, `poll_async` requires an `AsyncIBClient`.
+
+        fast_interval {float} -- Seconds between polls while orders are working. (default: {FAST_INTERVAL})
+
+        slow_interval {float} -- Seconds between polls when no order is working. (default: {SLOW_INTERVAL})
+
+        clock {Callable[[], float]} -- The monotonic clock used for scheduling. (default: {time.monotonic})
+
+        Usage:
+        ----
+            >>> book = OrderBook(client=ib_client)
+            >>> book.add_callback(lambda event: print(event))
+            >>> book.start()
+            >>> book.by_customer_order_id('limit-buy-order-1').state
+            'partially_filled'
+        """
+
+        self.client = client
+        self.fast_interval = fast_interval
+        self.slow_interval = slow_interval
+        self.clock = clock
+        self.polls = 0
+
+        self._by_order_id: Dict[int, Order] = {}
+        self._by_customer_order_id: Dict[str, Order] = {}
+        self._versions: Dict[int, tuple] = {}
+        self._executions: Set[str] = set()
+        self._working: Set[int] = set()
+        self._pending: Set[str] = set()
+        # The orders whose filled quantity grew past the executions seen for them.
+        self._unmatched: Set[int] = set()
+        # The fills reported before their order, attached once it shows up.
+        self._orphans: List[Fill] = []
+        self._callbacks: List[Callable[[OrderEvent], None]] = []
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread = None
+
+    def __len__(self) -> int:
+        return len(self._by_order_id)
+
+    def add_callback(self, callback: Callable[[OrderEvent], None]) -> None:
+        """Registers a function called with every `OrderEvent`."""
+
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback: Callable[[OrderEvent], None]) -> None:
+        """Removes a function registered with `add_callback`."""
+
+        self._callbacks.remove(callback)
+
+    def get(self, order_id: int) -> Union[Order, None]:
+        """Returns an order by order ID."""
+
+        return self._by_order_id.get(int(order_id))
+
+    def by_customer_order_id(self, customer_order_id: str) -> Union[Order, None]:
+        """Returns an order by the cOID it was placed with."""
+
+        return self._by_customer_order_id.get(customer_order_id)
+
+    @property
+    def working(self) -> List[Order]:
+        """The orders that can still fill."""
+
+        with self._lock:
+            return [self._by_order_id[order_id] for order_id in self._working]
+
+    @property
+    def interval(self) -> float:
+        """The seconds to wait before the next poll."""
+
+        return self.fast_interval if self._working or self._pending else self.slow_interval
+
+    def _emit(self, events: List[OrderEvent]) -> None:
+
+        for event in events:
+            for callback in list(self._callbacks):
+                try:
+                    callback(event)
+                except Exception:
+                    logger.exception('Order callback failed.')
+
+    def _is_matched(self, order: Order) -> bool:
+        """Returns whether the fills seen for an order add up to its filled quantity."""
+
+        return sum(fill.size for fill in order.fills) >= order.filled_quantity - 1e-9
+
+    def _adopt_orphans(self, order: Order) -> None:
+        """Attaches the fills reported before an order was seen."""
+
+        orphans = []
+        for fill in self._orphans:
+            by_order_id = fill.order_id is not None and int(fill.order_id) == order.order_id
+            by_customer_order_id = bool(fill.customer_order_id) and fill.customer_order_id == order.customer_order_id
+            if by_order_id or by_customer_order_id:
+                order.fills.append(fill)
+            else:
+                orphans.append(fill)
+
+        self._orphans = orphans
+
+    def reconcile_orders(self, content: Union[dict, List[dict]]) -> List[OrderEvent]:
+        """Applies a `get_live_orders` response to the book.
+
+        Orders whose status, quantities and last execution time are the same
+        as last time are skipped before anything else is read from them.
+
+        Arguments:
+        ----
+        content {Union[dict, List[dict]]} -- The `get_live_orders` response, or its `orders` list.
+
+        Returns:
+        ----
+        List[OrderEvent] -- The state transitions, in the order they were found.
+        """
+
+        if isinstance(content, dict):
+            content = content.get('orders')
+
+        events = []
+
+        with self._lock:
+            for entry in content or []:
+
+                order_id = entry.get('orderId')
+                if order_id is None:
+                    continue
+
+                version = (
+                    entry.get('status'),
+                    entry.get('filledQuantity'),
+                    entry.get('remainingQuantity'),
+                    entry.get('lastExecutionTime_r')
+                )
+                if self._versions.get(order_id) == version:
+                    continue
+                self._versions[order_id] = version
+
+                order = self._by_order_id.get(order_id)
+                if order is None:
+                    order = self._by_order_id[order_id] = Order(order_id=order_id, customer_order_id=entry.get('order_ref'))
+                    if order.customer_order_id:
+                        self._by_customer_order_id[order.customer_order_id] = order
+                        self._pending.discard(order.customer_order_id)
+                    self._adopt_orphans(order=order)
+
+                order.account = entry.get('acct', order.account)
+                order.conid = entry.get('conid', order.conid)
+                order.ticker = entry.get('ticker', order.ticker)
+                order.side = entry.get('side', order.side)
+                order.order_type = entry.get('orderType', order.order_type)
+                order.price = entry.get('price', order.price)
+                filled_before = order.filled_quantity
+                order.status = entry.get('status')
+                order.filled_quantity = _number(entry.get('filledQuantity'))
+                order.remaining_quantity = _number(entry.get('remainingQuantity'))
+                order.average_price = entry.get('avgPrice', order.average_price)
+                order.updated = entry.get('lastExecutionTime_r', order.updated)
+
+                old_state = order.state
+                order.state = order_state(status=order.status, filled_quantity=order.filled_quantity)
+
+                if order.is_working:
+                    self._working.add(order_id)
+                else:
+                    self._working.discard(order_id)
+
+                if order.filled_quantity > filled_before and not self._is_matched(order=order):
+                    self._unmatched.add(order_id)
+
+                if order.state != old_state:
+                    events.append(
+                        OrderEvent(kind=OrderEvent.STATE, order=order, old_state=old_state, new_state=order.state)
+                    )
+
+        self._emit(events=events)
+
+        return events
+
+    def reconcile_trades(self, content: List[dict]) -> List[OrderEvent]:
+        """Applies a `trades` response to the book, only reading executions not seen before.
+
+        Arguments:
+        ----
+        content {List[dict]} -- The `trades` response.
+
+        Returns:
+        ----
+        List[OrderEvent] -- A fill event for every new execution.
+        """
+
+        events = []
+
+        with self._lock:
+            for entry in content or []:
+
+                execution_id = entry.get('execution_id')
+                if execution_id is None or execution_id in self._executions:
+                    continue
+                self._executions.add(execution_id)
+
+                fill = Fill.from_response(content=entry)
+
+                order = None
+                if fill.order_id is not None:
+                    order = self._by_order_id.get(int(fill.order_id))
+                if order is None and fill.customer_order_id:
+                    order = self._by_customer_order_id.get(fill.customer_order_id)
+                if order is not None:
+                    order.fills.append(fill)
+                else:
+                    self._orphans.append(fill)
+
+                events.append(OrderEvent(kind=OrderEvent.FILL, order=order, fill=fill))
+
+            for order_id in list(self._unmatched):
+                if self._is_matched(order=self._by_order_id[order_id]):
+                    self._unmatched.discard(order_id)
+
+        self._emit(events=events)
+
+        return events
+
+    def poll(self, trades: bool = None) -> List[OrderEvent]:
+        """Polls the live orders, and the trades when they can have changed.
+
+        Arguments:
+        ----
+        trades {bool} -- Whether to poll `trades` too. By default they are only
+            polled while a filled quantity isn't matched by the executions seen,
+            so a failed `trades` call is made again on the next poll. (default: {None})
+
+        Returns:
+        ----
+        List[OrderEvent] -- The state transitions and new fills.
+        """
+
+        events = self.reconcile_orders(content=self.client.get_live_orders())
+
+        if trades is None:
+            trades = bool(self._unmatched)
+
+        if trades:
+            events.extend(self.reconcile_trades(content=self.client.trades()))
+
+        self.polls += 1
+
+        return events
+
+    async def poll_async(self, trades: bool = None) -> List[OrderEvent]:
+        """Polls like `poll`, with an `AsyncIBClient`.
+
+        Returns:
+        ----
+        List[OrderEvent] -- The state transitions and new fills.
+        """
+
+        events = self.reconcile_orders(content=await self.client.get_live_orders())
+
+        if trades is None:
+            trades = bool(self._unmatched)
+
+        if trades:
+            events.extend(self.reconcile_trades(content=await self.client.trades()))
+
+        self.polls += 1
+
+        return events
+
+    def track(self, customer_order_ids: Iterable[str]) -> None:
+        """Polls fast for orders that were just placed and aren't in `get_live_orders` yet.
+
+        Arguments:
+        ----
+        customer_order_ids {Iterable[str]} -- The cOIDs the orders were placed with.
+        """
+
+        with self._lock:
+            self._pending.update(
+                customer_order_id for customer_order_id in customer_order_ids
+                if customer_order_id not in self._by_customer_order_id
+            )
+
+    def run(self) -> None:
+        """Polls until `stop` is called, waiting `interval` seconds between polls."""
+
+        while not self._stop.is_set():
+
+            try:
+                self.poll()
+            except Exception:
+                logger.exception('Order book poll failed.')
+
+            self._stop.wait(timeout=self.interval)
+
+    def start(self) -> None:
+        """Polls on a background thread."""
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops the background thread."""
+
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,378 @@
+import re
+import time
+import asyncio
+
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Union
+
+from ibw.batch import map_concurrently
+
+# The most prompts answered for one order before giving up.
+MAX_REPLIES = 5
+
+ACKNOWLEDGED = 'acknowledged'
+DECLINED = 'declined'
+FAILED = 'failed'
+
+
+class OrderRejected(Exception):
+    """Raised when the gateway answers an order with an error instead of an acknowledgement."""
+
+
+class ReplyPolicy():
+
+    def __init__(self, message_ids: Iterable[str] = (), patterns: Iterable[str] = ()) -> None:
+        """Initalizes a new instance of the ReplyPolicy Object.
+
+        Decides which order prompts are confirmed without asking. A prompt is
+        confirmed when every one of its message IDs is whitelisted, or when
+        every one of its messages matches a whitelisted pattern. Anything
+        else is declined.
+
+        Arguments:
+        ----
+        message_ids {Iterable[str]} -- The prompt message IDs to confirm, for example 'o163'. (default: {()})
+
+        patterns {Iterable[str]} -- Regular expressions matched against the prompt messages. (default: {()})
+
+        Usage:
+        ----
+            >>> policy = ReplyPolicy(message_ids=['o163', 'o354'], patterns=[r'market data'])
+            >>> policy.allows({'id': 'a1b2', 'messageIds': ['o354'], 'message': ['...']})
+            True
+        """
+
+        self.message_ids = frozenset(message_ids)
+        self.patterns = [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+
+    def allows(self, prompt: dict) -> bool:
+        """Returns `True` if the prompt should be confirmed.
+
+        Arguments:
+        ----
+        prompt {dict} -- A prompt returned by `place_order`, with `id`, `message` and `messageIds`.
+
+        Returns:
+        ----
+        bool -- Whether to confirm it.
+        """
+
+        message_ids = prompt.get('messageIds') or []
+        if message_ids and all(message_id in self.message_ids for message_id in message_ids):
+            return True
+
+        messages = prompt.get('message') or []
+        if isinstance(messages, str):
+            messages = [messages]
+
+        return bool(messages) and bool(self.patterns) and all(
+            any(pattern.search(message) for pattern in self.patterns)
+            for message in messages
+        )
+
+
+class SubmissionResult():
+
+    __slots__ = ('key', 'customer_order_ids', 'order_ids', 'status', 'confirmed', 'declined', 'error', 'round_trips', 'elapsed')
+
+    def __init__(self, key: Any, customer_order_ids: List[str]) -> None:
+        """The outcome of submitting one order, or one bracket.
+
+        Arguments:
+        ----
+        key {Any} -- The position of the order in the batch.
+
+        customer_order_ids {List[str]} -- The cOIDs of the orders sent.
+        """
+
+        self.key = key
+        self.customer_order_ids = customer_order_ids
+        self.order_ids: List[str] = []
+        self.status: str = None
+        self.confirmed: List[str] = []
+        self.declined: List[str] = []
+        self.error: Exception = None
+        self.round_trips = 0
+        self.elapsed = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """`True` if the gateway acknowledged the order."""
+
+        return self.status == ACKNOWLEDGED
+
+    @property
+    def order_id(self) -> Union[str, None]:
+        """The order ID of the order, or of the parent of a bracket."""
+
+        return self.order_ids[0] if self.order_ids else None
+
+    def __repr__(self) -> str:
+        return '<SubmissionResult key={key!r} status={status!r} order_ids={order_ids} round_trips={round_trips} elapsed={elapsed:.4f}>'.format(
+            key=self.key,
+            status=self.status,
+            order_ids=self.order_ids,
+            round_trips=self.round_trips,
+            elapsed=self.elapsed
+        )
+
+
+def _payload(order: Union[dict, Any]) -> dict:
+    """Returns the request payload of a dictionary or an `IBOrder`."""
+
+    return order if isinstance(order, dict) else order.create_order()
+
+
+def _entries(content: Union[dict, List[dict]]) -> List[dict]:
+    """Normalizes a `place_order` or `place_order_reply` response to a list."""
+
+    if content is None:
+        return []
+
+    return content if isinstance(content, list) else [content]
+
+
+def latency_summary(results: Iterable[SubmissionResult]) -> Dict[str, float]:
+    """Summarizes the order-to-ack latency of a batch.
+
+    Arguments:
+    ----
+    results {Iterable[SubmissionResult]} -- The results returned by `OrderPipeline.submit`.
+
+    Returns:
+    ----
+    Dict[str, float] -- The count, acknowledged count, mean, median, p95 and max latency in
+        seconds, and the mean round trips per order.
+    """
+
+    results = list(results)
+    elapsed = sorted(result.elapsed for result in results if result.ok)
+
+    if not elapsed:
+        return {'count': len(results), 'acknowledged': 0}
+
+    return {
+        'count': len(results),
+        'acknowledged': len(elapsed),
+        'mean': sum(elapsed) / len(elapsed),
+        'median': elapsed[len(elapsed) // 2],
+        'p95': elapsed[min(len(elapsed) - 1, int(len(elapsed) * 0.95))],
+        'max': elapsed[-1],
+        'round_trips': sum(result.round_trips for result in results) / len(results)
+    }
+
+
+class OrderPipeline():
+
+    def __init__(self, client, account_id: str, policy: ReplyPolicy = None, max_concurrency: int = 5,
+                 max_replies: int = MAX_REPLIES, book=None) -> None:
+        """Initalizes a new instance of the OrderPipeline Object.
+
+        Submits a batch of orders concurrently and answers the prompts the
+        gateway returns with `place_order_reply`, confirming the ones the
+        `ReplyPolicy` allows and declining the rest. Requests go through the
+        client's transport, so they stay within its pacing limits however
+        many run at once.
+
+        Arguments:
+        ----
+        client {IBClient} -- The client to submit with, `submit_async` requires an `AsyncIBClient`.
+
+        account_id {str} -- The account the orders are placed for.
+
+        policy {ReplyPolicy} -- Decides which prompts are confirmed, if not provided
+            every prompt is declined. (default: {None})
+
+        max_concurrency {int} -- The most orders in flight at once. (default: {5})
+
+        max_replies {int} -- The most prompts answered for one order. (default: {MAX_REPLIES})
+
+        book {OrderBook} -- An order book told about every order sent, so it polls fast
+            until they show up. (default: {None})
+
+        Usage:
+        ----
+            >>> pipeline = OrderPipeline(
+                client=ib_client,
+                account_id='DU123456',
+                policy=ReplyPolicy(message_ids=['o163', 'o354'])
+            )
+            >>> results = pipeline.submit(orders=[limit_order, market_order, [parent_order, stop_order]])
+            >>> [result.order_id for result in results]
+        """
+
+        self.client = client
+        self.account_id = account_id
+        self.policy = policy or ReplyPolicy()
+        self.max_concurrency = max_concurrency
+        self.max_replies = max_replies
+        self.book = book
+
+    def _start(self, key: Any, order: Union[dict, Any, List]) -> tuple:
+
+        if isinstance(order, (list, tuple)):
+            payload = [_payload(order=item) for item in order]
+            customer_order_ids = [item.get('cOID') for item in payload]
+        else:
+            payload = _payload(order=order)
+            customer_order_ids = [payload.get('cOID')]
+
+        if self.book is not None:
+            self.book.track(customer_order_ids=[cOID for cOID in customer_order_ids if cOID])
+
+        return payload, SubmissionResult(key=key, customer_order_ids=customer_order_ids)
+
+    def _next_prompt(self, result: SubmissionResult, content: Union[dict, List[dict]]) -> Union[dict, None]:
+        """Reads a response, returning the prompt to answer or `None` once the order is settled."""
+
+        result.round_trips += 1
+
+        prompt = None
+        for entry in _entries(content=content):
+            if 'error' in entry:
+                raise OrderRejected(entry['error'])
+            elif 'order_id' in entry:
+                result.order_ids.append(entry['order_id'])
+            elif 'id' in entry and prompt is None:
+                prompt = entry
+
+        if prompt is None:
+            result.status = ACKNOWLEDGED if result.order_ids else FAILED
+            if not result.order_ids:
+                result.error = OrderRejected('No order ID in the response.')
+            return None
+
+        if result.round_trips > self.max_replies:
+            raise OrderRejected('The order was still prompting after {} replies.'.format(self.max_replies))
+
+        return prompt
+
+    def _answer(self, result: SubmissionResult, prompt: dict) -> bool:
+        """Decides a prompt, recording it on the result."""
+
+        confirm = self.policy.allows(prompt=prompt)
+        message_ids = prompt.get('messageIds') or [prompt['id']]
+
+        if confirm:
+            result.confirmed.extend(message_ids)
+        else:
+            result.declined.extend(message_ids)
+
+        return confirm
+
+    def _decline(self, result: SubmissionResult) -> None:
+
+        result.round_trips += 1
+        result.status = DECLINED
+        result.error = OrderRejected('Declined prompts {}.'.format(result.declined))
+
+    def _submit_one(self, key: Any, order: Union[dict, Any, List]) -> SubmissionResult:
+
+        start = time.perf_counter()
+        payload, result = self._start(key=key, order=order)
+
+        try:
+            if isinstance(payload, list):
+                content = self.client.place_orders(account_id=self.account_id, orders=payload)
+            else:
+                content = self.client.place_order(account_id=self.account_id, order=payload)
+
+            prompt = self._next_prompt(result=result, content=content)
+            while prompt is not None:
+
+                confirm = self._answer(result=result, prompt=prompt)
+                content = self.client.place_order_reply(reply_id=prompt['id'], reply=confirm)
+
+                if not confirm:
+                    self._decline(result=result)
+                    break
+
+                prompt = self._next_prompt(result=result, content=content)
+
+        except Exception as error:
+            result.status = FAILED
+            result.error = error
+
+        result.elapsed = time.perf_counter() - start
+
+        return result
+
+    async def _submit_one_async(self, key: Any, order: Union[dict, Any, List]) -> SubmissionResult:
+
+        start = time.perf_counter()
+        payload, result = self._start(key=key, order=order)
+
+        try:
+            if isinstance(payload, list):
+                content = await self.client.place_orders(account_id=self.account_id, orders=payload)
+            else:
+                content = await self.client.place_order(account_id=self.account_id, order=payload)
+
+            prompt = self._next_prompt(result=result, content=content)
+            while prompt is not None:
+
+                confirm = self._answer(result=result, prompt=prompt)
+                content = await self.client.place_order_reply(reply_id=prompt['id'], reply=confirm)
+
+                if not confirm:
+                    self._decline(result=result)
+                    break
+
+                prompt = self._next_prompt(result=result, content=content)
+
+        except Exception as error:
+            result.status = FAILED
+            result.error = error
+
+        result.elapsed = time.perf_counter() - start
+
+        return result
+
+    def submit(self, orders: Iterable[Union[dict, Any, List]]) -> List[SubmissionResult]:
+        """Submits a batch of orders concurrently.
+
+        Arguments:
+        ----
+        orders {Iterable[Union[dict, IBOrder, List]]} -- The orders, as dictionaries or `IBOrder`
+            objects. A list inside the batch is sent in one `place_orders` request, for brackets.
+
+        Returns:
+        ----
+        List[SubmissionResult] -- The outcome of every order, in the order they were given.
+        """
+
+        orders = list(orders)
+
+        results = map_concurrently(
+            func=lambda index: self._submit_one(key=index, order=orders[index]),
+            keys=range(len(orders)),
+            max_concurrency=self.max_concurrency
+        )
+
+        return [batch.result for batch in results.values()]
+
+    async def submit_async(self, orders: Iterable[Union[dict, Any, List]]) -> List[SubmissionResult]:
+        """Submits a batch of orders concurrently with an `AsyncIBClient`.
+
+        Arguments:
+        ----
+        orders {Iterable[Union[dict, IBOrder, List]]} -- The orders, see `submit`.
+
+        Returns:
+        ----
+        List[SubmissionResult] -- The outcome of every order, in the order they were given.
+        """
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def bounded_submit(index: int, order: Union[dict, Any, List]) -> SubmissionResult:
+            async with semaphore:
+                return await self._submit_one_async(key=index, order=order)
+
+        return list(await asyncio.gather(*[
+            bounded_submit(index=index, order=order)
+            for index, order in enumerate(orders)
+        ]))
@@ -0,0 +1,435 @@
+import re
+import json
+import time
+import pathlib
+import operator
+import itertools
+
+from typing import Dict
+from typing import List
+from typing import Union
+
+# The attributes of an `IBOrder` and the payload keys they are sent as, in payload order.
+FIELDS = (
+    ('account_id', 'acctId'),
+    ('conid', 'conid'),
+    ('sec_type', 'secType'),
+    ('customer_order_id', 'cOID'),
+    ('parent_id', 'parentId'),
+    ('order_type', 'orderType'),
+    ('listing_exchange', 'listingExchange'),
+    ('outside_rth', 'outsideRTH'),
+    ('price', 'price'),
+    ('aux_price', 'auxPrice'),
+    ('side', 'side'),
+    ('ticker', 'ticker'),
+    ('tif', 'tif'),
+    ('referrer', 'referrer'),
+    ('quantity', 'quantity'),
+    ('use_adaptive', 'useAdaptive'),
+    ('is_close', 'isClose'),
+    ('trailing_amount', 'trailingAmt'),
+    ('trailing_type', 'trailingType')
+)
+
+ATTRIBUTES = tuple(name for name, key in FIELDS)
+KEYS = tuple(key for name, key in FIELDS)
+ATTRIBUTE_FOR_KEY = {key: name for name, key in FIELDS}
+
+# The order types and the attributes each of them requires.
+ORDER_TYPES: Dict[str, tuple] = {
+    'MKT': (),
+    'LMT': ('price',),
+    'STP': ('price',),
+    'STOP_LIMIT': ('price', 'aux_price'),
+    'TRAIL': ('trailing_amount', 'trailing_type'),
+    'TRAILLMT': ('price', 'trailing_amount', 'trailing_type')
+}
+
+SIDES = frozenset(['BUY', 'SELL'])
+TIME_IN_FORCE = frozenset(['DAY', 'GTC', 'IOC', 'OPG', 'FOK'])
+TRAILING_TYPES = frozenset(['amt', '%'])
+
+# Read every attribute in one call when serializing.
+_read_fields = operator.attrgetter(*ATTRIBUTES)
+
+# Keeps the generated cOIDs unique within the process.
+_sequence = itertools.count(1)
+
+# The attributes every order is checked for, before the ones its type requires.
+_CHECKED = ('conid', 'side', 'quantity', 'tif')
+
+# The attributes of an `IBOrder` built without any.
+_BLANK = {**dict.fromkeys(ATTRIBUTES), 'order_type': 'MKT', 'tif': 'DAY'}
+
+
+def _check_attribute(order_type: str, name: str, value: object) -> None:
+    """Raises a `ValueError` if an attribute of an order of the given type is invalid."""
+
+    if name == 'conid' and value is None:
+        raise ValueError('The `conid` is required.')
+
+    if name == 'side' and value not in SIDES:
+        raise ValueError("The side must be either 'BUY' or 'SELL', not {!r}.".format(value))
+
+    if name == 'quantity' and (value is None or value <= 0):
+        raise ValueError('The quantity must be positive, not {!r}.'.format(value))
+
+    if name == 'tif' and value not in TIME_IN_FORCE:
+        raise ValueError('The time in force must be one of {}, not {!r}.'.format(sorted(TIME_IN_FORCE), value))
+
+    if value is None and name in ORDER_TYPES[order_type]:
+        raise ValueError('A {} order requires `{}`.'.format(order_type, name))
+
+    if name == 'trailing_type' and value is not None and value not in TRAILING_TYPES:
+        raise ValueError("The trailing type must be either 'amt' or '%', not {!r}.".format(value))
+
+
+def new_customer_order_id(prefix: str = 'ibw') -> str:
+    """Returns a cOID unique to this process, for orders that need one to be linked to.
+
+    Arguments:
+    ----
+    prefix {str} -- Starts the cOID. (default: {'ibw'})
+
+    Returns:
+    ----
+    str -- The cOID, for example 'ibw-18f3a2c41b0-1'.
+    """
+
+    return '{prefix}-{millis:x}-{sequence}'.format(
+        prefix=prefix,
+        millis=int(time.time() * 1000),
+        sequence=next(_sequence)
+    )
+
+
+class IBOrder():
+
+    __slots__ = ATTRIBUTES
+
+    def __init__(self, conid: int = None, side: str = None, quantity: float = None, order_type: str = 'MKT',
+                 price: float = None, aux_price: float = None, tif: str = 'DAY', sec_type: str = None,
+                 customer_order_id: str = None, parent_id: str = None, account_id: str = None,
+                 listing_exchange: str = None, outside_rth: bool = None, ticker: str = None, referrer: str = None,
+                 use_adaptive: bool = None, is_close: bool = None, trailing_amount: float = None,
+                 trailing_type: str = None) -> None:
+        """Initalizes a new instance of the IBOrder Object.
+
+        An order checked once when it's built, and serialized by `create_order`
+        straight to the payload `place_order`, `place_orders` and
+        `place_order_scenario` send. Attributes left as `None` are not sent.
+
+        Arguments:
+        ----
+        conid {int} -- The contract ID. (default: {None})
+
+        side {str} -- Either 'BUY' or 'SELL'. (default: {None})
+
+        quantity {float} -- The quantity, must be positive. (default: {None})
+
+        order_type {str} -- One of ['MKT', 'LMT', 'STP', 'STOP_LIMIT', 'TRAIL', 'TRAILLMT']. (default: {'MKT'})
+
+        price {float} -- The limit price, or the stop price of a stop order. (default: {None})
+
+        aux_price {float} -- The stop price of a stop limit order. (default: {None})
+
+        tif {str} -- The time in force, one of ['DAY', 'GTC', 'IOC', 'OPG', 'FOK']. (default: {'DAY'})
+
+        sec_type {str} -- The security type as `conid:type`, for example '265598:STK'. (default: {None})
+
+        customer_order_id {str} -- The cOID, required to be the parent of other orders. (default: {None})
+
+        parent_id {str} -- The cOID of the parent order. (default: {None})
+
+        account_id {str} -- The account. (default: {None})
+
+        listing_exchange {str} -- The exchange to route to. (default: {None})
+
+        outside_rth {bool} -- Whether the order may fill outside regular trading hours. (default: {None})
+
+        ticker {str} -- The symbol. (default: {None})
+
+        referrer {str} -- A free form tag. (default: {None})
+
+        use_adaptive {bool} -- Whether to use the Price Management Algo. (default: {None})
+
+        is_close {bool} -- Whether the order closes a position. (default: {None})
+
+        trailing_amount {float} -- The trailing amount of a trailing order. (default: {None})
+
+        trailing_type {str} -- Either 'amt' or '%'. (default: {None})
+
+        Usage:
+        ----
+            >>> order = IBOrder(conid=265598, side='BUY', quantity=10, order_type='LMT', price=150.0)
+            >>> ib_client.place_order(account_id='DU123456', order=order)
+        """
+
+        self.account_id = account_id
+        self.conid = conid
+        self.sec_type = sec_type
+        self.customer_order_id = customer_order_id
+        self.parent_id = parent_id
+        self.order_type = order_type
+        self.listing_exchange = listing_exchange
+        self.outside_rth = outside_rth
+        self.price = price
+        self.aux_price = aux_price
+        self.side = side
+        self.ticker = ticker
+        self.tif = tif
+        self.referrer = referrer
+        self.quantity = quantity
+        self.use_adaptive = use_adaptive
+        self.is_close = is_close
+        self.trailing_amount = trailing_amount
+        self.trailing_type = trailing_type
+
+        self.validate()
+
+    def validate(self) -> None:
+        """Checks the order, raising a `ValueError` naming the first invalid attribute."""
+
+        if self.order_type not in ORDER_TYPES:
+            raise ValueError('The order type must be one of {}, not {!r}.'.format(sorted(ORDER_TYPES), self.order_type))
+
+        for name in _CHECKED + ORDER_TYPES[self.order_type] + ('trailing_type',):
+            _check_attribute(order_type=self.order_type, name=name, value=getattr(self, name))
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> 'IBOrder':
+        """Builds an order from a payload dictionary, like the ones in `samples/orders`.
+
+        Arguments:
+        ----
+        payload {dict} -- The order payload, keyed like the gateway expects.
+
+        Returns:
+        ----
+        IBOrder -- The validated order.
+        """
+
+        fields = {}
+        for key, value in payload.items():
+
+            if key == 'trailingPercent':
+                fields['trailing_amount'] = value
+                fields['trailing_type'] = '%'
+            elif key in ATTRIBUTE_FOR_KEY:
+                fields[ATTRIBUTE_FOR_KEY[key]] = value
+            else:
+                raise ValueError('Unknown order field {!r}.'.format(key))
+
+        return cls(**fields)
+
+    def create_order(self) -> dict:
+        """Returns the payload of the order.
+
+        Returns:
+        ----
+        dict -- The order keyed like the gateway expects, without the attributes left as `None`.
+        """
+
+        return {key: value for key, value in zip(KEYS, _read_fields(self)) if value is not None}
+
+    def __repr__(self) -> str:
+        return '<IBOrder conid={conid} side={side} quantity={quantity} order_type={order_type} cOID={cOID!r}>'.format(
+            conid=self.conid,
+            side=self.side,
+            quantity=self.quantity,
+            order_type=self.order_type,
+            cOID=self.customer_order_id
+        )
+
+
+class OrderTemplate():
+
+    __slots__ = ('name', 'defaults', 'required', '_values')
+
+    def __init__(self, name: str, **defaults) -> None:
+        """Initalizes a new instance of the OrderTemplate Object.
+
+        The attributes shared by many orders, checked once when the template
+        is built. `create` fills in the rest of an order, and only checks the
+        attributes it's given and the ones the template left `required`.
+
+        Arguments:
+        ----
+        name {str} -- The name of the template.
+
+        **defaults -- The `IBOrder` attributes every order of the template starts with.
+
+        Usage:
+        ----
+            >>> TEMPLATES['limit'].create(conid=265598, side='BUY', quantity=10, price=150.0)
+        """
+
+        unknown = set(defaults) - set(ATTRIBUTES)
+        if unknown:
+            raise ValueError('Unknown order attributes {}.'.format(sorted(unknown)))
+
+        order_type = defaults.setdefault('order_type', 'MKT')
+        if order_type not in ORDER_TYPES:
+            raise ValueError('The order type must be one of {}, not {!r}.'.format(sorted(ORDER_TYPES), order_type))
+
+        self.name = name
+        self.defaults = defaults
+        self.required = tuple(
+            attribute for attribute in ('conid', 'side', 'quantity') + ORDER_TYPES[order_type]
+            if defaults.get(attribute) is None
+        )
+
+        self._values = {**_BLANK, **defaults}
+        for attribute in _CHECKED + ('trailing_type',):
+            if attribute not in self.required:
+                _check_attribute(order_type=order_type, name=attribute, value=self._values[attribute])
+
+    def create(self, **fields) -> IBOrder:
+        """Returns a new order of the template.
+
+        Arguments:
+        ----
+        **fields -- The `IBOrder` attributes of the order, they override the template's.
+
+        Returns:
+        ----
+        IBOrder -- The order.
+        """
+
+        # Another order type requires other attributes, so the order is checked in full.
+        if 'order_type' in fields:
+            return IBOrder(**{**self.defaults, **fields})
+
+        unknown = set(fields) - set(ATTRIBUTES)
+        if unknown:
+            raise ValueError('Unknown order attributes {}.'.format(sorted(unknown)))
+
+        values = {**self._values, **fields}
+        for name in self.required + tuple(fields):
+            _check_attribute(order_type=values['order_type'], name=name, value=values[name])
+
+        order = IBOrder.__new__(IBOrder)
+        for name in ATTRIBUTES:
+            setattr(order, name, values[name])
+
+        return order
+
+    def __repr__(self) -> str:
+        return '<OrderTemplate name={name!r} order_type={order_type!r} required={required}>'.format(
+            name=self.name,
+            order_type=self.defaults['order_type'],
+            required=self.required
+        )
+
+
+# The templates of `samples/orders`.
+TEMPLATES: Dict[str, OrderTemplate] = {
+    'market': OrderTemplate(name='market', order_type='MKT', tif='DAY'),
+    'limit': OrderTemplate(name='limit', order_type='LMT', tif='DAY'),
+    'stop': OrderTemplate(name='stop', order_type='STP', tif='DAY'),
+    'stop_limit': OrderTemplate(
+        name='stop_limit',
+        order_type='STOP_LIMIT',
+        tif='DAY',
+        outside_rth=False,
+        use_adaptive=False,
+        is_close=False
+    ),
+    'trailing_stop': OrderTemplate(name='trailing_stop', order_type='TRAIL', tif='DAY', trailing_type='%')
+}
+
+
+def load_templates(path: Union[str, pathlib.Path]) -> List[OrderTemplate]:
+    """Compiles the templates of a JSONC order file, like the ones in `samples/orders`.
+
+    Values set to `null` are left for `create`, and the cOID and parent ID
+    are dropped since every order needs its own.
+
+    Arguments:
+    ----
+    path {Union[str, pathlib.Path]} -- The file, holding an order, a list of orders or `{"orders": [...]}`.
+
+    Returns:
+    ----
+    List[OrderTemplate] -- A template for every order in the file.
+    """
+
+    path = pathlib.Path(path)
+    content = json.loads(re.sub(r'^\s*//.*$', '', path.read_text(), flags=re.MULTILINE))
+
+    if isinstance(content, dict):
+        content = content.get('orders', [content])
+
+    templates = []
+    for index, payload in enumerate(content):
+
+        defaults = {}
+        for key, value in payload.items():
+
+            if value is None or key in ('cOID', 'parentId'):
+                continue
+            elif key == 'trailingPercent':
+                defaults['trailing_amount'] = value
+                defaults['trailing_type'] = '%'
+            elif key in ATTRIBUTE_FOR_KEY:
+                defaults[ATTRIBUTE_FOR_KEY[key]] = value
+            else:
+                raise ValueError('Unknown order field {!r} in {}.'.format(key, path.name))
+
+        templates.append(OrderTemplate(name='{}[{}]'.format(path.stem, index), **defaults))
+
+    return templates
+
+
+def bracket(parent: IBOrder, take_profit: float = None, stop_loss: float = None) -> List[IBOrder]:
+    """Links a take profit and a stop loss order to a parent order.
+
+    The children close the parent: they are on the other side, for the same
+    contract and quantity, and their `parent_id` is the parent's cOID, which
+    is generated if the parent has none.
+
+    Arguments:
+    ----
+    parent {IBOrder} -- The order opening the position.
+
+    take_profit {float} -- The limit price of the take profit order. (default: {None})
+
+    stop_loss {float} -- The stop price of the stop loss order. (default: {None})
+
+    Usage:
+    ----
+        >>> entry = TEMPLATES['limit'].create(conid=265598, side='BUY', quantity=10, price=150.0)
+        >>> ib_client.place_orders(account_id='DU123456', orders=bracket(parent=entry, take_profit=160.0, stop_loss=145.0))
+
+    Returns:
+    ----
+    List[IBOrder] -- The parent followed by its children, to be placed together.
+    """
+
+    if parent.customer_order_id is None:
+        parent.customer_order_id = new_customer_order_id()
+
+    exits = []
+    if take_profit is not None:
+        exits.append(('tp', 'LMT', take_profit))
+    if stop_loss is not None:
+        exits.append(('sl', 'STP', stop_loss))
+
+    children = [
+        IBOrder(
+            conid=parent.conid,
+            sec_type=parent.sec_type,
+            account_id=parent.account_id,
+            side='SELL' if parent.side == 'BUY' else 'BUY',
+            quantity=parent.quantity,
+            order_type=order_type,
+            price=price,
+            tif=parent.tif,
+            customer_order_id='{}-{}'.format(parent.customer_order_id, suffix),
+            parent_id=parent.customer_order_id
+        )
+        for suffix, order_type, price in exits
+    ]
+
+    return [parent] + children
@@ -0,0 +1,301 @@
+import re
+import time
+import asyncio
+import threading
+
+from typing import Callable
+from typing import Dict
+from typing import Tuple
+
+# The gateway limits every session to 10 requests a second.
+GLOBAL_LIMIT: Tuple[float, int] = (10.0, 10)
+
+# Endpoints with stricter limits, as `{pattern: (requests per second, burst)}`. The
+# patterns are searched for in the request URL.
+ENDPOINT_LIMITS: Dict[str, Tuple[float, int]] = {
+    r'/iserver/marketdata/history': (1.0, 5),
+    r'/iserver/marketdata/snapshot': (10.0, 10),
+    r'/iserver/scanner/params': (1 / 900, 1),
+    r'/iserver/scanner/run': (1.0, 1),
+    r'/iserver/account/trades': (1 / 5, 1),
+    r'/iserver/account/orders': (1 / 5, 1),
+    r'/iserver/account/pnl/partitioned': (1 / 5, 1),
+    r'/portfolio/accounts': (1 / 5, 1),
+    r'/portfolio/subaccounts': (1 / 5, 1),
+    r'/sso/validate': (1 / 60, 1),
+    r'/tickle': (1.0, 1),
+    r'/fyi/': (1.0, 1),
+}
+
+
+class PacingTimeout(Exception):
+    """Raised when a request would have to wait longer than the scheduler allows."""
+
+
+class PacingStats():
+
+    def __init__(self) -> None:
+        """Counters describing how requests were paced by a bucket."""
+
+        self.requests = 0
+        self.delayed = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def mean_wait(self) -> float:
+        """The average wait in seconds across every request."""
+
+        return self.total_wait / self.requests if self.requests else 0.0
+
+    def as_dict(self) -> Dict:
+        return {
+            'requests': self.requests,
+            'delayed': self.delayed,
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'total_wait': self.total_wait,
+            'mean_wait': self.mean_wait,
+            'max_wait': self.max_wait
+        }
+
+
+class TokenBucket():
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        """Initalizes a new instance of the TokenBucket Object.
+
+        The bucket hands out send times instead of rejecting callers, every
+        reservation is scheduled at the earliest time the bucket allows, so
+        a burst is spread out at `rate` once the first `burst` requests
+        have gone through.
+
+        Arguments:
+        ----
+        rate {float} -- The number of requests allowed per second.
+
+        burst {int} -- The number of requests that can go out back to back. (default: {1})
+        """
+
+        self.rate = rate
+        self.burst = burst
+        self.stats = PacingStats()
+
+        self._interval = 1.0 / rate
+        self._tolerance = (burst - 1) * self._interval
+        self._theoretical_arrival = 0.0
+
+    def next_slot(self, at: float) -> float:
+        """Returns the earliest time a request made at `at` could be sent, without reserving it."""
+
+        return max(at, self._theoretical_arrival - self._tolerance)
+
+    def reserve(self, at: float) -> float:
+        """Reserves the earliest slot at or after `at`.
+
+        Arguments:
+        ----
+        at {float} -- The earliest time the request could be sent.
+
+        Returns:
+        ----
+        float -- The time the request is allowed to be sent.
+        """
+
+        slot = self.next_slot(at=at)
+        self._theoretical_arrival = max(self._theoretical_arrival, slot) + self._interval
+
+        return slot
+
+
+class RequestScheduler():
+
+    def __init__(self, global_limit: Tuple[float, int] = GLOBAL_LIMIT, endpoint_limits: Dict[str, Tuple[float, int]] = None,
+                 max_wait: float = None, clock: Callable[[], float] = time.monotonic) -> None:
+        """Initalizes a new instance of the RequestScheduler Object.
+
+        Paces requests to match the gateway limits. Every request takes a
+        slot from the global bucket and from the bucket of the first endpoint
+        pattern its URL matches. Callers over the limit are queued and sleep
+        until their slot comes up instead of being rejected by the gateway.
+
+        Arguments:
+        ----
+        global_limit {Tuple[float, int]} -- The `(requests per second, burst)` shared by
+            every request, `None` to only pace the listed endpoints. (default: {GLOBAL_LIMIT})
+
+        endpoint_limits {Dict[str, Tuple[float, int]]} -- The `(requests per second, burst)`
+            for each URL pattern. (default: {ENDPOINT_LIMITS})
+
+        max_wait {float} -- The longest a request may be queued in seconds, requests
+            that would wait longer raise `PacingTimeout` without taking a slot. `None`
+            always waits, however long the endpoint's limit makes it, for example up
+            to 15 minutes for a second `/iserver/scanner/params` call. (default: {None})
+
+        clock {Callable[[], float]} -- The monotonic clock used for scheduling. (default: {time.monotonic})
+
+        Usage:
+        ----
+            >>> scheduler = RequestScheduler(
+                global_limit=(10.0, 10),
+                endpoint_limits={r'/iserver/marketdata/history': (1.0, 5)}
+            )
+            >>> transport = IBTransport(scheduler=scheduler)
+            >>> scheduler.stats()['/iserver/marketdata/history']['max_wait']
+        """
+
+        if endpoint_limits is None:
+            endpoint_limits = ENDPOINT_LIMITS
+
+        self.max_wait = max_wait
+        self.clock = clock
+
+        self.global_bucket = TokenBucket(*global_limit) if global_limit else None
+        self.endpoint_buckets: Dict[str, TokenBucket] = {
+            pattern: TokenBucket(*limit) for pattern, limit in endpoint_limits.items()
+        }
+        self._patterns = [(re.compile(pattern), pattern) for pattern in endpoint_limits]
+        self._lock = threading.Lock()
+
+    def _buckets(self, url: str) -> list:
+        """Returns the buckets a request to `url` draws from."""
+
+        buckets = []
+        for regex, pattern in self._patterns:
+            if regex.search(url):
+                buckets.append(self.endpoint_buckets[pattern])
+                break
+
+        if self.global_bucket is not None:
+            buckets.append(self.global_bucket)
+
+        return buckets
+
+    def reserve(self, url: str) -> Tuple[float, list]:
+        """Reserves a send slot for a request.
+
+        Arguments:
+        ----
+        url {str} -- The URL of the request.
+
+        Returns:
+        ----
+        Tuple[float, list] -- The seconds to wait before sending, and the
+            buckets the request was charged to.
+        """
+
+        with self._lock:
+
+            now = self.clock()
+            buckets = self._buckets(url=url)
+
+            # Work out the slot first, so a request over `max_wait` takes nothing.
+            slot = now
+            for bucket in buckets:
+                slot = bucket.next_slot(at=slot)
+
+            wait = slot - now
+            if self.max_wait is not None and wait > self.max_wait:
+                raise PacingTimeout(
+                    'Request to {url} would wait {wait:.2f}s, over the {max_wait:.2f}s allowed.'.format(
+                        url=url,
+                        wait=wait,
+                        max_wait=self.max_wait
+                    )
+                )
+
+            for bucket in buckets:
+                bucket.reserve(at=slot)
+
+                stats = bucket.stats
+                stats.requests += 1
+                stats.total_wait += wait
+                stats.max_wait = max(stats.max_wait, wait)
+                if wait > 0:
+                    stats.delayed += 1
+                    stats.queue_depth += 1
+                    stats.max_queue_depth = max(stats.max_queue_depth, stats.queue_depth)
+
+        return wait, buckets
+
+    def _release(self, buckets: list) -> None:
+        """Takes a request that finished waiting off the queue."""
+
+        with self._lock:
+            for bucket in buckets:
+                bucket.stats.queue_depth -= 1
+
+    def acquire(self, url: str) -> float:
+        """Blocks until a request to `url` may be sent.
+
+        Arguments:
+        ----
+        url {str} -- The URL of the request.
+
+        Returns:
+        ----
+        float -- The seconds spent waiting.
+        """
+
+        wait, buckets = self.reserve(url=url)
+
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            finally:
+                self._release(buckets=buckets)
+
+        return wait
+
+    async def acquire_async(self, url: str) -> float:
+        """Waits on the event loop until a request to `url` may be sent.
+
+        Arguments:
+        ----
+        url {str} -- The URL of the request.
+
+        Returns:
+        ----
+        float -- The seconds spent waiting.
+        """
+
+        wait, buckets = self.reserve(url=url)
+
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._release(buckets=buckets)
+
+        return wait
+
+    @property
+    def queue_depth(self) -> int:
+        """The number of requests currently waiting for a slot."""
+
+        if self.global_bucket is not None:
+            return self.global_bucket.stats.queue_depth
+
+        return sum(bucket.stats.queue_depth for bucket in self.endpoint_buckets.values())
+
+    def stats(self) -> Dict[str, Dict]:
+        """Returns the pacing counters of every bucket.
+
+        Returns:
+        ----
+        Dict[str, Dict] -- The counters keyed by `global` or the endpoint pattern.
+        """
+
+        with self._lock:
+
+            stats = {
+                pattern: bucket.stats.as_dict()
+                for pattern, bucket in self.endpoint_buckets.items()
+            }
+
+            if self.global_bucket is not None:
+                stats['global'] = self.global_bucket.stats.as_dict()
+
+        return stats
@@ -0,0 +1,175 @@
+import threading
+
+from typing import Dict
+from typing import Iterable
+from typing import List
+
+
+class SnapshotPoller():
+
+    def __init__(self, client, conids: List[str], fields: List[str]) -> None:
+        """Initalizes a new instance of the SnapshotPoller Object.
+
+        Polls `market_data` incrementally. The poller remembers the last update
+        time of every conid and only asks the gateway for what changed since
+        then, using the `since` parameter, and merges the deltas into a local
+        table of the latest values.
+
+        Arguments:
+        ----
+        client {IBClient} -- The client to poll with, `poll_async` requires an `AsyncIBClient`.
+
+        conids {List[str]} -- The contract IDs to poll.
+
+        fields {List[str]} -- The field IDs to poll.
+
+        Usage:
+        ----
+            >>> poller = SnapshotPoller(client=ib_client, conids=['265598', '8314'], fields=['31', '84', '86'])
+            >>> while True:
+                    changes = poller.poll()
+                    for conid, fields in changes.items():
+                        print(conid, fields)
+        """
+
+        self.client = client
+        self.fields = [str(field) for field in fields]
+        self.polls = 0
+
+        self._table: Dict[str, dict] = {}
+        self._updated: Dict[str, int] = {}
+        self._conids: List[str] = []
+        self._lock = threading.Lock()
+
+        self.add(conids=conids)
+
+    @property
+    def conids(self) -> List[str]:
+        """The contract IDs being polled."""
+
+        return list(self._conids)
+
+    def add(self, conids: Iterable[str]) -> None:
+        """Starts polling more conids, their first poll is a full snapshot."""
+
+        with self._lock:
+            for conid in conids:
+                conid = str(conid)
+                if conid not in self._table:
+                    self._conids.append(conid)
+                    self._table[conid] = {}
+
+    def remove(self, conids: Iterable[str]) -> None:
+        """Stops polling conids and drops their rows from the table."""
+
+        with self._lock:
+            for conid in conids:
+                conid = str(conid)
+                if conid in self._table:
+                    self._conids.remove(conid)
+                    del self._table[conid]
+                    self._updated.pop(conid, None)
+
+    def get(self, conid: str) -> dict:
+        """Returns a copy of the latest values of a conid."""
+
+        with self._lock:
+            return dict(self._table[str(conid)])
+
+    @property
+    def table(self) -> Dict[str, dict]:
+        """A copy of the latest values of every conid, keyed by conid."""
+
+        with self._lock:
+            return {conid: dict(row) for conid, row in self._table.items()}
+
+    def _requests(self) -> List[tuple]:
+        """Groups the conids into the `(conids, since)` requests of the next poll.
+
+        Conids that were never seen get a full snapshot, the rest are asked
+        for updates since the oldest of their last update times.
+        """
+
+        with self._lock:
+            fresh = [conid for conid in self._conids if conid not in self._updated]
+            known = [conid for conid in self._conids if conid in self._updated]
+
+            requests = []
+            if fresh:
+                requests.append((fresh, None))
+            if known:
+                requests.append((known, str(min(self._updated[conid] for conid in known))))
+
+        return requests
+
+    def _merge(self, content: List[dict]) -> Dict[str, Dict[str, str]]:
+        """Merges a snapshot into the table.
+
+        Arguments:
+        ----
+        content {List[dict]} -- The `market_data` response.
+
+        Returns:
+        ----
+        Dict[str, Dict[str, str]] -- The fields whose value changed, keyed by conid.
+        """
+
+        changes = {}
+
+        with self._lock:
+            for quote in content or []:
+
+                conid = str(quote.get('conid'))
+                row = self._table.get(conid)
+                if row is None:
+                    continue
+
+                changed = {
+                    key: value for key, value in quote.items()
+                    if key[:1].isdigit() and row.get(key) != value
+                }
+
+                if changed:
+                    row.update(changed)
+                    changes[conid] = changed
+
+                updated = quote.get('_updated')
+                if updated is not None:
+                    self._updated[conid] = max(int(updated), self._updated.get(conid, 0))
+
+            self.polls += 1
+
+        return changes
+
+    def poll(self) -> Dict[str, Dict[str, str]]:
+        """Polls the gateway and applies the updates.
+
+        Returns:
+        ----
+        Dict[str, Dict[str, str]] -- Only the fields whose value changed, keyed
+            by conid. Conids with no changes are left out.
+        """
+
+        changes = {}
+
+        for conids, since in self._requests():
+            content = self.client.market_data(conids=conids, since=since, fields=self.fields)
+            changes.update(self._merge(content=content))
+
+        return changes
+
+    async def poll_async(self) -> Dict[str, Dict[str, str]]:
+        """Polls the gateway with an `AsyncIBClient` and applies the updates.
+
+        Returns:
+        ----
+        Dict[str, Dict[str, str]] -- Only the fields whose value changed, keyed by conid.
+        """
+
+        changes = {}
+
+        for conids, since in self._requests():
+            content = await self.client.market_data(conids=conids, since=since, fields=self.fields)
+            changes.update(self._merge(content=content))
+
+        return changes
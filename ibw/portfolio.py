@@ -0,0 +1,772 @@
+import json
+import time
+import asyncio
+import logging
+import threading
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Set
+from typing import Tuple
+from typing import Union
+
+from ibw.batch import map_concurrently
+
+logger = logging.getLogger(__name__)
+
+# The number of positions the gateway returns per page.
+POSITIONS_PAGE_SIZE = 30
+
+
+class Position():
+
+    __slots__ = (
+        'account_id', 'conid', 'description', 'asset_class', 'currency', 'position',
+        'market_price', 'market_value', 'average_cost', 'unrealized_pnl', 'realized_pnl'
+    )
+
+    def __init__(self, account_id: str, conid: int, description: str = None, asset_class: str = None,
+                 currency: str = None, position: float = 0.0, market_price: float = None, market_value: float = None,
+                 average_cost: float = None, unrealized_pnl: float = None, realized_pnl: float = None) -> None:
+        """A compact position record, holding only the fields most callers use.
+
+        Arguments:
+        ----
+        account_id {str} -- The account holding the position.
+
+        conid {int} -- The contract ID.
+
+        description {str} -- The contract description, for example 'AAPL'. (default: {None})
+
+        asset_class {str} -- The asset class, for example 'STK'. (default: {None})
+
+        currency {str} -- The position currency. (default: {None})
+
+        position {float} -- The signed quantity held. (default: {0.0})
+
+        market_price {float} -- The last market price. (default: {None})
+
+        market_value {float} -- The market value of the position. (default: {None})
+
+        average_cost {float} -- The average cost per unit. (default: {None})
+
+        unrealized_pnl {float} -- The unrealized profit and loss. (default: {None})
+
+        realized_pnl {float} -- The realized profit and loss. (default: {None})
+        """
+
+        self.account_id = account_id
+        self.conid = int(conid)
+        self.description = description
+        self.asset_class = asset_class
+        self.currency = currency
+        self.position = position
+        self.market_price = market_price
+        self.market_value = market_value
+        self.average_cost = average_cost
+        self.unrealized_pnl = unrealized_pnl
+        self.realized_pnl = realized_pnl
+
+    @classmethod
+    def from_response(cls, content: dict, account_id: str = None) -> 'Position':
+        """Builds a record from one entry of a positions response."""
+
+        return cls(
+            account_id=content.get('acctId', account_id),
+            conid=content['conid'],
+            description=content.get('contractDesc'),
+            asset_class=content.get('assetClass'),
+            currency=content.get('currency'),
+            position=content.get('position', 0.0),
+            market_price=content.get('mktPrice'),
+            market_value=content.get('mktValue'),
+            average_cost=content.get('avgCost'),
+            unrealized_pnl=content.get('unrealizedPnl'),
+            realized_pnl=content.get('realizedPnl')
+        )
+
+    @property
+    def key(self) -> tuple:
+        """The `(account_id, conid)` the position is indexed by."""
+
+        return (self.account_id, self.conid)
+
+    def as_tuple(self) -> tuple:
+        return tuple(getattr(self, field) for field in self.__slots__)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Position) and self.as_tuple() == other.as_tuple()
+
+    def __repr__(self) -> str:
+        return '<Position account_id={account_id!r} conid={conid} position={position}>'.format(
+            account_id=self.account_id,
+            conid=self.conid,
+            position=self.position
+        )
+
+
+def _records(content: List[dict], account_id: str, compact: bool) -> List[Union[Position, dict]]:
+    """Turns a positions page into the records handed to the caller."""
+
+    if not compact:
+        return list(content or [])
+
+    return [Position.from_response(content=entry, account_id=account_id) for entry in content or []]
+
+
+def iter_positions(client, account_id: str, prefetch: int = 2, compact: bool = True,
+                   page_size: int = POSITIONS_PAGE_SIZE) -> Iterator[Union[Position, dict]]:
+    """Yields every position of an account, fetching the next pages in the background.
+
+    Once the first page comes back full, up to `prefetch` of the following
+    pages are requested while the caller works through the current one, so
+    the first position arrives after one round trip and at most
+    `prefetch + 1` pages are held in memory. The iteration stops at the first
+    page shorter than `page_size`, so small accounts cost a single request.
+
+    Arguments:
+    ----
+    client {IBClient} -- The client to request the pages with.
+
+    account_id {str} -- The account to list the positions of.
+
+    prefetch {int} -- The pages requested ahead of the one being read. (default: {2})
+
+    compact {bool} -- If `True`, positions are yielded as `Position` records,
+        otherwise as the raw dictionaries. (default: {True})
+
+    page_size {int} -- The number of positions in a full page. (default: {POSITIONS_PAGE_SIZE})
+
+    Usage:
+    ----
+        >>> for position in iter_positions(client=ib_client, account_id='DU123456'):
+                print(position.conid, position.position)
+    """
+
+    executor = ThreadPoolExecutor(max_workers=max(prefetch, 1))
+    pending = deque()
+    next_page = 0
+
+    def request_next() -> None:
+        nonlocal next_page
+        pending.append(executor.submit(client.portfolio_account_positions, account_id=account_id, page_id=next_page))
+        next_page += 1
+
+    try:
+        request_next()
+
+        while pending:
+
+            content = pending.popleft().result()
+            full = bool(content) and len(content) >= page_size
+
+            # Only read ahead once a full page shows there is more to come.
+            while full and len(pending) < max(prefetch, 1):
+                request_next()
+
+            yield from _records(content=content, account_id=account_id, compact=compact)
+
+            if not full:
+                break
+
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+async def aiter_positions(client, account_id: str, prefetch: int = 2, compact: bool = True,
+                          page_size: int = POSITIONS_PAGE_SIZE) -> AsyncIterator[Union[Position, dict]]:
+    """Yields every position of an account with an `AsyncIBClient`, prefetching the next pages.
+
+    Arguments:
+    ----
+    client {AsyncIBClient} -- The client to request the pages with.
+
+    account_id {str} -- The account to list the positions of.
+
+    prefetch {int} -- The pages requested ahead of the one being read. (default: {2})
+
+    compact {bool} -- If `True`, positions are yielded as `Position` records,
+        otherwise as the raw dictionaries. (default: {True})
+
+    page_size {int} -- The number of positions in a full page. (default: {POSITIONS_PAGE_SIZE})
+
+    Usage:
+    ----
+        >>> async for position in aiter_positions(client=ib_client, account_id='DU123456'):
+                print(position.conid, position.position)
+    """
+
+    pending = deque()
+    next_page = 0
+
+    def request_next() -> None:
+        nonlocal next_page
+        pending.append(asyncio.ensure_future(client.portfolio_account_positions(account_id=account_id, page_id=next_page)))
+        next_page += 1
+
+    try:
+        request_next()
+
+        while pending:
+
+            content = await pending.popleft()
+            full = bool(content) and len(content) >= page_size
+
+            # Only read ahead once a full page shows there is more to come.
+            while full and len(pending) < max(prefetch, 1):
+                request_next()
+
+            for record in _records(content=content, account_id=account_id, compact=compact):
+                yield record
+
+            if not full:
+                break
+
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+class AccountSnapshot():
+
+    __slots__ = ('account_id', 'summary', 'ledger', 'allocation', 'positions', 'fingerprint', 'updated')
+
+    def __init__(self, account_id: str, summary: dict, ledger: dict, allocation: dict, positions: List[Position],
+                 fingerprint: str, updated: float) -> None:
+        """The portfolio data of one account, as of its last refresh.
+
+        Arguments:
+        ----
+        account_id {str} -- The account ID.
+
+        summary {dict} -- The `portfolio_account_summary` response.
+
+        ledger {dict} -- The `portfolio_account_ledger` response.
+
+        allocation {dict} -- The `portfolio_account_allocation` response.
+
+        positions {List[Position]} -- Every position of the account.
+
+        fingerprint {str} -- Identifies the positions held, to tell if the account changed.
+
+        updated {float} -- The epoch time in seconds the account was refreshed.
+        """
+
+        self.account_id = account_id
+        self.summary = summary
+        self.ledger = ledger
+        self.allocation = allocation
+        self.positions = positions
+        self.fingerprint = fingerprint
+        self.updated = updated
+
+
+class PortfolioView():
+
+    def __init__(self, accounts: Dict[str, AccountSnapshot]) -> None:
+        """A consolidated view across accounts.
+
+        Amounts are added up as reported, in the base currency of each account,
+        so the totals are only meaningful for accounts sharing a base currency.
+
+        Arguments:
+        ----
+        accounts {Dict[str, AccountSnapshot]} -- The accounts to consolidate, keyed by account ID.
+        """
+
+        self.accounts = accounts
+        self.totals: Dict[str, float] = {}
+        self.cash: Dict[str, Dict[str, float]] = {}
+        self.allocation: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self.positions: Dict[int, Dict] = {}
+
+        for snapshot in accounts.values():
+            self._add_summary(summary=snapshot.summary)
+            self._add_ledger(ledger=snapshot.ledger)
+            self._add_allocation(allocation=snapshot.allocation)
+            self._add_positions(positions=snapshot.positions)
+
+    def _add_summary(self, summary: dict) -> None:
+
+        for key, value in (summary or {}).items():
+            amount = value.get('amount') if isinstance(value, dict) else None
+            if isinstance(amount, (int, float)) and not isinstance(amount, bool):
+                self.totals[key] = self.totals.get(key, 0.0) + amount
+
+    def _add_ledger(self, ledger: dict) -> None:
+
+        for currency, values in (ledger or {}).items():
+            if currency == 'BASE' or not isinstance(values, dict):
+                continue
+
+            balances = self.cash.setdefault(currency, {})
+            for key, amount in values.items():
+                if isinstance(amount, (int, float)) and not isinstance(amount, bool) and key != 'timestamp':
+                    balances[key] = balances.get(key, 0.0) + amount
+
+    def _add_allocation(self, allocation: dict) -> None:
+
+        for group, sides in (allocation or {}).items():
+            for side, weights in (sides or {}).items():
+                totals = self.allocation.setdefault(group, {}).setdefault(side, {})
+                for name, amount in (weights or {}).items():
+                    totals[name] = totals.get(name, 0.0) + amount
+
+    def _add_positions(self, positions: List[Position]) -> None:
+
+        for position in positions:
+
+            total = self.positions.get(position.conid)
+            if total is None:
+                total = self.positions[position.conid] = {
+                    'conid': position.conid,
+                    'description': position.description,
+                    'position': 0.0,
+                    'market_value': 0.0,
+                    'unrealized_pnl': 0.0,
+                    'accounts': []
+                }
+
+            total['position'] += position.position or 0.0
+            total['market_value'] += position.market_value or 0.0
+            total['unrealized_pnl'] += position.unrealized_pnl or 0.0
+            total['accounts'].append(position.account_id)
+
+
+def _fingerprint(positions: List[Position]) -> str:
+    """Identifies the positions held, ignoring values that move with the market."""
+
+    held = sorted(
+        [position.conid, position.position, position.average_cost]
+        for position in positions
+    )
+
+    return json.dumps(held, default=str)
+
+
+class PortfolioAggregator():
+
+    def __init__(self, client, include_sub_accounts: bool = True, max_concurrency: int = 10, prefetch: int = 2,
+                 clock: Callable[[], float] = time.time) -> None:
+        """Initalizes a new instance of the PortfolioAggregator Object.
+
+        Keeps a consolidated view of many accounts. A refresh reads the
+        summary and positions of every account concurrently, and only the
+        accounts whose positions changed have their ledger and allocation
+        requested again, also concurrently. The transport's pacing keeps the
+        whole refresh inside the gateway rate limits, however many accounts
+        there are.
+
+        Arguments:
+        ----
+        client {IBClient} -- The client to make the requests with.
+
+        include_sub_accounts {bool} -- If `True`, the accounts from `portfolio_sub_accounts`
+            are included along with `portfolio_accounts`. (default: {True})
+
+        max_concurrency {int} -- The most requests in flight at once. (default: {10})
+
+        prefetch {int} -- The position pages requested ahead per account. (default: {2})
+
+        clock {Callable[[], float]} -- Returns the current epoch time in seconds. (default: {time.time})
+
+        Usage:
+        ----
+            >>> aggregator = PortfolioAggregator(client=ib_client)
+            >>> changed = aggregator.refresh()
+            >>> aggregator.view.totals['netliquidation']
+        """
+
+        self.client = client
+        self.include_sub_accounts = include_sub_accounts
+        self.max_concurrency = max_concurrency
+        self.prefetch = prefetch
+        self.clock = clock
+
+        self.account_ids: List[str] = []
+        self.snapshots: Dict[str, AccountSnapshot] = {}
+        self.view = PortfolioView(accounts={})
+        self._lock = threading.Lock()
+
+    def _run(self, func: Callable, keys: Iterable) -> Dict:
+        """Runs calls concurrently and returns their results, raising the first error."""
+
+        results = map_concurrently(func=func, keys=keys, max_concurrency=self.max_concurrency)
+
+        for result in results.values():
+            if not result.ok:
+                raise result.error
+
+        return {key: result.result for key, result in results.items()}
+
+    def discover(self) -> List[str]:
+        """Lists the accounts, along with the sub accounts of tiered structures.
+
+        Returns:
+        ----
+        List[str] -- The account IDs.
+        """
+
+        requests = {'accounts': self.client.portfolio_accounts}
+        if self.include_sub_accounts:
+            requests['sub_accounts'] = self.client.portfolio_sub_accounts
+
+        results = map_concurrently(func=lambda name: requests[name](), keys=requests, max_concurrency=2)
+
+        if not results['accounts'].ok:
+            raise results['accounts'].error
+
+        account_ids = []
+        for name, result in results.items():
+
+            # Accounts that aren't tiered have no sub accounts to list.
+            if not result.ok or not isinstance(result.result, list):
+                continue
+
+            for account in result.result:
+                account_id = account.get('id') or account.get('accountId')
+                if account_id and account_id not in account_ids:
+                    account_ids.append(account_id)
+
+        self.account_ids = account_ids
+
+        return account_ids
+
+    def _fetch(self, account_id: str, kind: str) -> Union[dict, List[Position]]:
+        """Requests one kind of data for an account."""
+
+        if kind == 'summary':
+            return self.client.portfolio_account_summary(account_id=account_id)
+        elif kind == 'ledger':
+            return self.client.portfolio_account_ledger(account_id=account_id)
+        elif kind == 'allocation':
+            return self.client.portfolio_account_allocation(account_id=account_id)
+
+        return list(iter_positions(client=self.client, account_id=account_id, prefetch=self.prefetch))
+
+    def refresh(self, account_ids: Iterable[str] = None, force: bool = False) -> List[str]:
+        """Brings the view up to date, only requesting the details of accounts that changed.
+
+        An account changed when a position was opened, closed or resized, the
+        prices and values of the positions it already holds don't count. The
+        summary and positions of every account are still updated.
+
+        Arguments:
+        ----
+        account_ids {Iterable[str]} -- The accounts to refresh, every discovered account
+            if not provided. (default: {None})
+
+        force {bool} -- If `True`, every account's details are requested again. (default: {False})
+
+        Returns:
+        ----
+        List[str] -- The accounts whose positions changed.
+        """
+
+        if account_ids is None:
+            account_ids = self.account_ids or self.discover()
+        account_ids = list(account_ids)
+
+        current = self._run(
+            func=lambda key: self._fetch(account_id=key[0], kind=key[1]),
+            keys=[(account_id, kind) for account_id in account_ids for kind in ('summary', 'positions')]
+        )
+
+        changed = []
+        fingerprints = {}
+        for account_id in account_ids:
+            snapshot = self.snapshots.get(account_id)
+            fingerprints[account_id] = _fingerprint(positions=current[(account_id, 'positions')])
+            if force or snapshot is None or snapshot.fingerprint != fingerprints[account_id]:
+                changed.append(account_id)
+
+        details = self._run(
+            func=lambda key: self._fetch(account_id=key[0], kind=key[1]),
+            keys=[(account_id, kind) for account_id in changed for kind in ('ledger', 'allocation')]
+        )
+
+        now = self.clock()
+        with self._lock:
+
+            for account_id in account_ids:
+
+                # Unchanged accounts keep the ledger and allocation they were last read with.
+                snapshot = self.snapshots.get(account_id)
+                if account_id in changed:
+                    ledger = details[(account_id, 'ledger')]
+                    allocation = details[(account_id, 'allocation')]
+                else:
+                    ledger = snapshot.ledger
+                    allocation = snapshot.allocation
+
+                self.snapshots[account_id] = AccountSnapshot(
+                    account_id=account_id,
+                    summary=current[(account_id, 'summary')],
+                    ledger=ledger,
+                    allocation=allocation,
+                    positions=current[(account_id, 'positions')],
+                    fingerprint=fingerprints[account_id],
+                    updated=now
+                )
+
+            self.view = PortfolioView(accounts=dict(self.snapshots))
+
+        return changed
+
+
+class PositionEvent():
+
+    ADDED = 'added'
+    CHANGED = 'changed'
+    REMOVED = 'removed'
+
+    __slots__ = ('kind', 'key', 'old', 'new')
+
+    def __init__(self, kind: str, key: Tuple[str, int], old: Position = None, new: Position = None) -> None:
+        """A change to one position of the book.
+
+        Arguments:
+        ----
+        kind {str} -- One of ['added', 'changed', 'removed'].
+
+        key {Tuple[str, int]} -- The `(account_id, conid)` of the position.
+
+        old {Position} -- The position before the change, `None` when added. (default: {None})
+
+        new {Position} -- The position after the change, `None` when removed. (default: {None})
+        """
+
+        self.kind = kind
+        self.key = key
+        self.old = old
+        self.new = new
+
+    def __repr__(self) -> str:
+        return '<PositionEvent kind={kind!r} key={key!r}>'.format(kind=self.kind, key=self.key)
+
+
+class PositionTracker():
+
+    def __init__(self, client, account_ids: Iterable[str], max_age: float = None, prefetch: int = 2,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """Initalizes a new instance of the PositionTracker Object.
+
+        Keeps a book of positions keyed by `(account_id, conid)` and reports
+        what changed between refreshes as `PositionEvent` objects. Accounts
+        are only fetched again when they were marked with `invalidate`, or
+        when they are older than `max_age`, and the gateway's own position
+        cache is invalidated first so the fetch sees the latest state. When
+        the conid that changed is known, `refresh_position` updates just that
+        position with a single request.
+
+        Arguments:
+        ----
+        client {IBClient} -- The client to make the requests with.
+
+        account_ids {Iterable[str]} -- The accounts to track.
+
+        max_age {float} -- Seconds after which an account is fetched again even if it
+            wasn't invalidated, `None` only fetches invalidated accounts. (default: {None})
+
+        prefetch {int} -- The position pages requested ahead. (default: {2})
+
+        clock {Callable[[], float]} -- The monotonic clock used for `max_age`. (default: {time.monotonic})
+
+        Usage:
+        ----
+            >>> tracker = PositionTracker(client=ib_client, account_ids=['DU123456'])
+            >>> tracker.add_callback(lambda event: print(event.kind, event.key))
+            >>> tracker.refresh()
+            >>> tracker.invalidate(account_id='DU123456')
+            >>> tracker.refresh()
+        """
+
+        self.client = client
+        self.max_age = max_age
+        self.prefetch = prefetch
+        self.clock = clock
+
+        self.account_ids = list(dict.fromkeys(account_ids))
+
+        self._book: Dict[str, Dict[int, Position]] = {account_id: {} for account_id in self.account_ids}
+        self._dirty: Set[str] = set(self.account_ids)
+        self._refreshed: Dict[str, float] = {}
+        self._callbacks: List[Callable[[PositionEvent], None]] = []
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return sum(len(positions) for positions in self._book.values())
+
+    def add_callback(self, callback: Callable[[PositionEvent], None]) -> None:
+        """Registers a function called with every `PositionEvent`."""
+
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback: Callable[[PositionEvent], None]) -> None:
+        """Removes a function registered with `add_callback`."""
+
+        self._callbacks.remove(callback)
+
+    def get(self, account_id: str, conid: int) -> Union[Position, None]:
+        """Returns a position of the book, `None` if it isn't held."""
+
+        return self._book.get(account_id, {}).get(int(conid))
+
+    def positions(self, account_id: str = None) -> List[Position]:
+        """Returns the positions of one account, or of every account."""
+
+        with self._lock:
+
+            if account_id is not None:
+                return list(self._book.get(account_id, {}).values())
+
+            return [position for positions in self._book.values() for position in positions.values()]
+
+    def invalidate(self, account_id: str = None) -> None:
+        """Marks an account, or every account, to be fetched on the next refresh."""
+
+        with self._lock:
+            self._dirty.update([account_id] if account_id is not None else self.account_ids)
+
+    def _stale(self) -> List[str]:
+        """Returns the accounts the next refresh has to fetch."""
+
+        now = self.clock()
+
+        with self._lock:
+            return [
+                account_id for account_id in self.account_ids
+                if account_id in self._dirty or (
+                    self.max_age is not None and now - self._refreshed.get(account_id, now) >= self.max_age
+                )
+            ]
+
+    def _apply(self, account_id: str, positions: Dict[int, Position], conids: Iterable[int] = None) -> List[PositionEvent]:
+        """Replaces positions of an account and works out the events.
+
+        Arguments:
+        ----
+        account_id {str} -- The account the positions belong to.
+
+        positions {Dict[int, Position]} -- The open positions fetched, keyed by conid.
+
+        conids {Iterable[int]} -- The conids that were fetched, every conid of the
+            account if not provided. (default: {None})
+
+        Returns:
+        ----
+        List[PositionEvent] -- The positions that were added, changed or removed.
+        """
+
+        events = []
+
+        with self._lock:
+
+            book = self._book.setdefault(account_id, {})
+            fetched = set(book) | set(positions) if conids is None else set(conids)
+
+            for conid in fetched:
+
+                old = book.get(conid)
+                new = positions.get(conid)
+
+                if old is None and new is not None:
+                    events.append(PositionEvent(kind=PositionEvent.ADDED, key=(account_id, conid), new=new))
+                    book[conid] = new
+                elif old is not None and new is None:
+                    events.append(PositionEvent(kind=PositionEvent.REMOVED, key=(account_id, conid), old=old))
+                    del book[conid]
+                elif old is not None and old.as_tuple() != new.as_tuple():
+                    events.append(PositionEvent(kind=PositionEvent.CHANGED, key=(account_id, conid), old=old, new=new))
+                    book[conid] = new
+
+        for event in events:
+            for callback in list(self._callbacks):
+                try:
+                    callback(event)
+                except Exception:
+                    logger.exception('Position callback failed.')
+
+        return events
+
+    def _open_positions(self, account_id: str, records: Iterable[Position]) -> Dict[int, Position]:
+        """Keys fetched positions by conid, dropping the closed ones the gateway still lists."""
+
+        return {
+            record.conid: record for record in records
+            if record.position and (record.account_id or account_id) == account_id
+        }
+
+    def refresh(self, force: bool = False) -> List[PositionEvent]:
+        """Fetches the accounts that were invalidated or are too old.
+
+        Arguments:
+        ----
+        force {bool} -- If `True`, every account is fetched. (default: {False})
+
+        Returns:
+        ----
+        List[PositionEvent] -- The positions that were added, changed or removed.
+        """
+
+        account_ids = list(self.account_ids) if force else self._stale()
+        events = []
+
+        for account_id in account_ids:
+
+            # Cleared first, so an invalidation arriving during the fetch isn't lost.
+            with self._lock:
+                self._dirty.discard(account_id)
+
+            try:
+                self.client.portfolio_positions_invalidate(account_id=account_id)
+                records = iter_positions(client=self.client, account_id=account_id, prefetch=self.prefetch)
+
+                events.extend(
+                    self._apply(account_id=account_id, positions=self._open_positions(account_id=account_id, records=records))
+                )
+            except Exception:
+                # Fetch the account again next time.
+                with self._lock:
+                    self._dirty.add(account_id)
+                raise
+
+            self._refreshed[account_id] = self.clock()
+
+        return events
+
+    def refresh_position(self, account_id: str, conid: int) -> List[PositionEvent]:
+        """Fetches a single position, for when the conid that changed is known.
+
+        Arguments:
+        ----
+        account_id {str} -- The account holding the position.
+
+        conid {int} -- The contract ID.
+
+        Returns:
+        ----
+        List[PositionEvent] -- The event for the position, empty if it didn't change.
+        """
+
+        content = self.client.portfolio_account_position(account_id=account_id, conid=conid)
+        if isinstance(content, dict):
+            content = [content]
+
+        records = [Position.from_response(content=entry, account_id=account_id) for entry in content or []]
+
+        return self._apply(
+            account_id=account_id,
+            positions=self._open_positions(account_id=account_id, records=records),
+            conids=[int(conid)]
+        )
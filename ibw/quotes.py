@@ -0,0 +1,179 @@
+from typing import Dict
+from typing import List
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Multipliers for the abbreviated values the gateway returns, like volume `1.2M`.
+SUFFIXES: Dict[str, float] = {
+    'K': 1e3,
+    'M': 1e6,
+    'B': 1e9
+}
+
+
+def parse_numbers(values: List[str]) -> tuple:
+    """Converts snapshot strings to floats in one vectorized pass.
+
+    Handles the `C` (previous close, market closed) and `H` (halted) prefixes,
+    thousands separators, percent signs and `K`/`M`/`B` suffixes. Anything
+    else that isn't a number becomes `NaN`.
+
+    Arguments:
+    ----
+    values {List[str]} -- The raw field values.
+
+    Returns:
+    ----
+    tuple -- The `float64` values, the closing flags and the halted flags.
+    """
+
+    raw = np.asarray(values, dtype=str)
+
+    closing = np.char.startswith(raw, 'C')
+    halted = np.char.startswith(raw, 'H')
+    cleaned = np.char.replace(np.char.replace(np.char.lstrip(raw, 'CH'), ',', ''), '%', '')
+
+    multiplier = np.ones(len(raw))
+    for suffix, factor in SUFFIXES.items():
+        has_suffix = np.char.endswith(cleaned, suffix)
+        if has_suffix.any():
+            multiplier[has_suffix] = factor
+            cleaned = np.where(has_suffix, np.char.rstrip(cleaned, suffix), cleaned)
+
+    try:
+        numbers = cleaned.astype(np.float64)
+    except ValueError:
+
+        # Some values aren't numbers, fall back to converting them one by one.
+        numbers = np.full(len(raw), np.nan)
+        for index, value in enumerate(cleaned):
+            try:
+                numbers[index] = float(value)
+            except ValueError:
+                pass
+
+    return numbers * multiplier, closing, halted
+
+
+class QuoteTable():
+
+    def __init__(self, conids: List[str], fields: List[str]) -> None:
+        """Initalizes a new instance of the QuoteTable Object.
+
+        A columnar table of numeric quote fields, backed by preallocated NumPy
+        arrays with one row per conid and one column per field. Snapshot
+        responses are written straight into the arrays, so signals can be
+        computed across the whole universe with vectorized math.
+
+        Arguments:
+        ----
+        conids {List[str]} -- The contract IDs, one row each.
+
+        fields {List[str]} -- The numeric field IDs, one column each.
+
+        Usage:
+        ----
+            >>> table = QuoteTable(conids=['265598', '8314'], fields=['31', '84', '86'])
+            >>> table.update(ib_client.market_data(conids=table.conids, since=None, fields=table.fields))
+            >>> spread = table['86'] - table['84']
+        """
+
+        if np is None:
+            raise ImportError(
+                "The quote table requires `numpy`, install it with "
+                "`pip install interactive-broker-python-web-api[numpy]`."
+            )
+
+        self.conids = [str(conid) for conid in conids]
+        self.fields = [str(field) for field in fields]
+
+        self._rows: Dict[str, int] = {conid: row for row, conid in enumerate(self.conids)}
+        self._columns: Dict[str, int] = {field: column for column, field in enumerate(self.fields)}
+
+        shape = (len(self.conids), len(self.fields))
+        self.values = np.full(shape, np.nan)
+        self.closing = np.zeros(shape, dtype=bool)
+        self.halted = np.zeros(shape, dtype=bool)
+        self.updated = np.zeros(len(self.conids), dtype=np.int64)
+
+    def __getitem__(self, field: str) -> 'np.ndarray':
+        """Returns the column of a field, as a view into the table."""
+
+        return self.values[:, self._columns[str(field)]]
+
+    def __len__(self) -> int:
+        return len(self.conids)
+
+    def row(self, conid: str) -> 'np.ndarray':
+        """Returns the row of a conid, as a view into the table."""
+
+        return self.values[self._rows[str(conid)]]
+
+    def update(self, content: List[dict]) -> 'np.ndarray':
+        """Writes a `market_data` response into the table.
+
+        Values are gathered per column and converted in one vectorized pass
+        per field, conids or fields that aren't in the table are ignored.
+
+        Arguments:
+        ----
+        content {List[dict]} -- The `market_data` response.
+
+        Returns:
+        ----
+        np.ndarray -- The row numbers that were updated.
+        """
+
+        rows_by_column = [[] for _ in self.fields]
+        values_by_column = [[] for _ in self.fields]
+        updated_rows = []
+        updated_times = []
+
+        for quote in content or []:
+
+            row = self._rows.get(str(quote.get('conid')))
+            if row is None:
+                continue
+
+            updated_rows.append(row)
+            updated_times.append(quote.get('_updated', 0))
+
+            for field, column in self._columns.items():
+                value = quote.get(field)
+                if value is not None:
+                    rows_by_column[column].append(row)
+                    values_by_column[column].append(value)
+
+        for column, rows in enumerate(rows_by_column):
+            if rows:
+                numbers, closing, halted = parse_numbers(values=values_by_column[column])
+                self.values[rows, column] = numbers
+                self.closing[rows, column] = closing
+                self.halted[rows, column] = halted
+
+        rows = np.asarray(updated_rows, dtype=np.intp)
+        if len(rows):
+            self.updated[rows] = np.asarray(updated_times, dtype=np.int64)
+
+        return rows
+
+    def refresh(self, client, since: str = None) -> 'np.ndarray':
+        """Requests a snapshot of every conid and field and writes it into the table.
+
+        Arguments:
+        ----
+        client {IBClient} -- The client to request the snapshot with.
+
+        since {str} -- Only request updates since this epoch time in milliseconds. (default: {None})
+
+        Returns:
+        ----
+        np.ndarray -- The row numbers that were updated.
+        """
+
+        content = client.market_data(conids=self.conids, since=since, fields=self.fields)
+
+        return self.update(content=content)
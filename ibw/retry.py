@@ -0,0 +1,378 @@
+import time
+import random
+import threading
+import email.utils
+import urllib.parse
+
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Union
+
+from ibw.metrics import endpoint_group
+
+# The status codes worth another try, the gateway is busy or restarting.
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+# Only requests that can be sent twice without side effects are retried.
+RETRY_METHODS = frozenset(['GET'])
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpen(Exception):
+    """Raised instead of sending a request to an endpoint group that keeps failing."""
+
+    def __init__(self, group: str, retry_in: float) -> None:
+        super().__init__(
+            'The circuit of {group!r} is open after repeated failures, retry in {retry_in:.1f} seconds.'.format(
+                group=group,
+                retry_in=retry_in
+            )
+        )
+        self.group = group
+        self.retry_in = retry_in
+
+
+def breaker_group(url: str) -> str:
+    """Returns the endpoint group a request's circuit breaker is keyed by.
+
+    Arguments:
+    ----
+    url {str} -- The full URL of the request.
+
+    Returns:
+    ----
+    str -- The first two segments of the endpoint group, for example
+        'iserver/marketdata' or 'portfolio/{id}'.
+    """
+
+    path = urllib.parse.urlsplit(url).path
+    if '/portal/' in path:
+        path = path.split('/portal/', 1)[1]
+
+    return '/'.join(endpoint_group(endpoint=path).split('/')[:2])
+
+
+def retry_after(value: Union[str, None], now: float = None) -> Union[float, None]:
+    """Reads a `Retry-After` header, given either in seconds or as an HTTP date.
+
+    Arguments:
+    ----
+    value {Union[str, None]} -- The header value.
+
+    now {float} -- The current epoch time in seconds, used for dates. (default: {None})
+
+    Returns:
+    ----
+    Union[float, None] -- The seconds to wait, `None` if the header is missing or unreadable.
+    """
+
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    return max(date.timestamp() - (now if now is not None else time.time()), 0.0)
+
+
+class RetryStats():
+
+    def __init__(self) -> None:
+        """Counters describing the retries and the circuit breakers of a transport."""
+
+        self.requests = 0
+        self.retries = 0
+        self.recovered = 0
+        self.exhausted = 0
+        self.short_circuited = 0
+        self.circuits_opened = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            'requests': self.requests,
+            'retries': self.retries,
+            'recovered': self.recovered,
+            'exhausted': self.exhausted,
+            'short_circuited': self.short_circuited,
+            'circuits_opened': self.circuits_opened
+        }
+
+    def __repr__(self) -> str:
+        return '<RetryStats {}>'.format(' '.join('{}={}'.format(key, value) for key, value in self.as_dict().items()))
+
+
+class CircuitBreaker():
+
+    __slots__ = ('group', 'state', 'failures', 'opened_at', 'trial')
+
+    def __init__(self, group: str) -> None:
+        """The health of one endpoint group.
+
+        Arguments:
+        ----
+        group {str} -- The endpoint group, see `breaker_group`.
+        """
+
+        self.group = group
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial = False
+
+    def __repr__(self) -> str:
+        return '<CircuitBreaker group={group!r} state={state!r} failures={failures}>'.format(
+            group=self.group,
+            state=self.state,
+            failures=self.failures
+        )
+
+
+class RetryPolicy():
+
+    def __init__(self, max_retries: int = 3, backoff: float = 0.1, max_backoff: float = 2.0, max_elapsed: float = 10.0,
+                 statuses: Iterable[int] = RETRY_STATUSES, methods: Iterable[str] = RETRY_METHODS,
+                 failure_threshold: int = 5, recovery_time: float = 30.0, clock: Callable[[], float] = time.monotonic,
+                 jitter: Callable[[], float] = random.random) -> None:
+        """Initalizes a new instance of the RetryPolicy Object.
+
+        Decides when the transport retries a request and how long it waits
+        first, and keeps a circuit breaker per endpoint group. Waits grow
+        exponentially with full jitter, so clients retrying together spread
+        out, and a `Retry-After` header from the gateway is honored instead.
+        No request spends more than `max_elapsed` seconds retrying.
+
+        After `failure_threshold` failures in a row, 5xx responses or
+        connection errors, the group's circuit opens and its requests raise
+        `CircuitOpen` without being sent. After `recovery_time` seconds one
+        request is let through, and its outcome closes the circuit or opens
+        it again.
+
+        Arguments:
+        ----
+        max_retries {int} -- The most retries of one request. (default: {3})
+
+        backoff {float} -- The wait before the first retry in seconds, doubled each time. (default: {0.1})
+
+        max_backoff {float} -- The longest wait between two tries in seconds. (default: {2.0})
+
+        max_elapsed {float} -- The longest a request may spend retrying in seconds. (default: {10.0})
+
+        statuses {Iterable[int]} -- The status codes that are retried. (default: {RETRY_STATUSES})
+
+        methods {Iterable[str]} -- The HTTP methods that are retried. (default: {RETRY_METHODS})
+
+        failure_threshold {int} -- The failures in a row opening a circuit, `0` disables the breakers. (default: {5})
+
+        recovery_time {float} -- The seconds a circuit stays open. (default: {30.0})
+
+        clock {Callable[[], float]} -- The monotonic clock the circuits are timed with. (default: {time.monotonic})
+
+        jitter {Callable[[], float]} -- Returns a random number in `[0, 1)`. (default: {random.random})
+
+        Usage:
+        ----
+            >>> transport = IBTransport(retry_policy=RetryPolicy(max_retries=5, recovery_time=60.0))
+            >>> ib_client = IBClient(username='IB_PAPER_USERNAME', account='IB_PAPER_ACCOUNT', transport=transport)
+            >>> transport.retry_policy.stats.as_dict()
+        """
+
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_elapsed = max_elapsed
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(method.upper() for method in methods)
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.clock = clock
+        self.jitter = jitter
+
+        self.stats = RetryStats()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        """Returns the circuit breaker of a request's endpoint group."""
+
+        group = breaker_group(url=url)
+
+        breaker = self._breakers.get(group)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(group, CircuitBreaker(group=group))
+
+        return breaker
+
+    @property
+    def open_circuits(self) -> List[str]:
+        """The endpoint groups whose circuit is open."""
+
+        return [group for group, breaker in self._breakers.items() if breaker.state != CLOSED]
+
+    def before(self, breaker: CircuitBreaker) -> None:
+        """Raises `CircuitOpen` if a request to the breaker's group must not be sent."""
+
+        if self.failure_threshold <= 0 or breaker.state == CLOSED:
+            return
+
+        with self._lock:
+
+            now = self.clock()
+            retry_in = breaker.opened_at + self.recovery_time - now
+
+            # Let a single request through once the circuit has rested.
+            if breaker.state == OPEN and retry_in <= 0:
+                breaker.state = HALF_OPEN
+                breaker.trial = True
+                return
+
+            if breaker.state == HALF_OPEN and not breaker.trial:
+                breaker.trial = True
+                return
+
+            self.stats.short_circuited += 1
+
+        raise CircuitOpen(group=breaker.group, retry_in=max(retry_in, 0.0))
+
+    def after(self, breaker: CircuitBreaker, failed: bool) -> None:
+        """Records the outcome of a request on its group's breaker.
+
+        Arguments:
+        ----
+        breaker {CircuitBreaker} -- The breaker of the request.
+
+        failed {bool} -- Whether the gateway failed, with a 5xx or a connection error.
+        """
+
+        if self.failure_threshold <= 0:
+            return
+
+        with self._lock:
+
+            breaker.trial = False
+
+            if not failed:
+                breaker.state = CLOSED
+                breaker.failures = 0
+                return
+
+            breaker.failures += 1
+            if breaker.state == HALF_OPEN or (breaker.state == CLOSED and breaker.failures >= self.failure_threshold):
+                breaker.state = OPEN
+                breaker.opened_at = self.clock()
+                self.stats.circuits_opened += 1
+
+    def abandon(self, breaker: CircuitBreaker, failed: bool) -> None:
+        """Records a request that ended with an error the policy doesn't handle.
+
+        Arguments:
+        ----
+        breaker {CircuitBreaker} -- The breaker of the request.
+
+        failed {bool} -- Whether the error counts as a failure, `False` for a
+            cancellation, which only frees the trial of a half open circuit.
+        """
+
+        if failed:
+            self.after(breaker=breaker, failed=True)
+            return
+
+        with self._lock:
+            breaker.trial = False
+
+    def next_delay(self, method: str, attempt: int, elapsed: float, status_code: int = None,
+                   retry_after_header: str = None) -> Union[float, None]:
+        """Returns the seconds to wait before retrying a failed try, `None` if it must not be retried.
+
+        Arguments:
+        ----
+        method {str} -- The HTTP method.
+
+        attempt {int} -- The retries already made.
+
+        elapsed {float} -- The seconds since the first try was sent.
+
+        status_code {int} -- The status code of the try, `None` after a connection error. (default: {None})
+
+        retry_after_header {str} -- The `Retry-After` header of the response. (default: {None})
+
+        Returns:
+        ----
+        Union[float, None] -- The wait.
+        """
+
+        if method.upper() not in self.methods or attempt >= self.max_retries:
+            return None
+
+        if status_code is not None and status_code not in self.statuses:
+            return None
+
+        delay = retry_after(value=retry_after_header)
+        if delay is None:
+            delay = self.jitter() * min(self.max_backoff, self.backoff * 2 ** attempt)
+
+        # Give up rather than let the tail latency grow past the budget.
+        if elapsed + delay > self.max_elapsed:
+            return None
+
+        return delay
+
+    def record(self, breaker: CircuitBreaker, method: str, attempt: int, elapsed: float, status_code: int = None,
+               headers: Dict = None) -> Union[float, None]:
+        """Records the outcome of one try, and returns the seconds to wait before retrying it.
+
+        Arguments:
+        ----
+        breaker {CircuitBreaker} -- The breaker of the request.
+
+        method {str} -- The HTTP method.
+
+        attempt {int} -- The retries already made.
+
+        elapsed {float} -- The seconds since the first try was sent.
+
+        status_code {int} -- The status code of the try, `None` after a connection error. (default: {None})
+
+        headers {Dict} -- The response headers. (default: {None})
+
+        Returns:
+        ----
+        Union[float, None] -- The wait, `None` if the response or the error is final.
+        """
+
+        self.after(breaker=breaker, failed=status_code is None or status_code >= 500)
+
+        # A try that opened the circuit is the last one.
+        delay = None if breaker.state == OPEN else self.next_delay(
+            method=method,
+            attempt=attempt,
+            elapsed=elapsed,
+            status_code=status_code,
+            retry_after_header=headers.get('Retry-After') if headers is not None else None
+        )
+
+        with self._lock:
+
+            if attempt == 0:
+                self.stats.requests += 1
+
+            if delay is not None:
+                self.stats.retries += 1
+            elif status_code is None or status_code in self.statuses:
+                if method.upper() in self.methods:
+                    self.stats.exhausted += 1
+            elif attempt > 0:
+                self.stats.recovered += 1
+
+        return delay
@@ -0,0 +1,449 @@
+import time
+import sqlite3
+import pathlib
+import threading
+
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Set
+from typing import Union
+
+from ibw.batch import map_concurrently
+
+# The most symbols sent in one `trsrv/stocks` request, and conids in one `trsrv/secdef` request.
+STOCKS_BATCH_SIZE = 50
+SECDEF_BATCH_SIZE = 200
+
+# How long a definition is trusted before a refresh asks for it again, one day.
+MAX_AGE = 24 * 60 * 60
+
+_COLUMNS = ('conid', 'symbol', 'name', 'sec_type', 'exchange', 'listing_exchange', 'currency', 'is_us', 'updated')
+
+
+def _chunks(items: List, size: int) -> List[List]:
+    return [items[index:index + size] for index in range(0, len(items), size)]
+
+
+class Security():
+
+    __slots__ = _COLUMNS
+
+    def __init__(self, conid: int, symbol: str, name: str = None, sec_type: str = None, exchange: str = None,
+                 listing_exchange: str = None, currency: str = None, is_us: bool = None, updated: float = 0.0) -> None:
+        """A security definition held by the `SecurityMaster`.
+
+        Arguments:
+        ----
+        conid {int} -- The contract ID.
+
+        symbol {str} -- The ticker symbol.
+
+        name {str} -- The company or contract name. (default: {None})
+
+        sec_type {str} -- The asset class, for example 'STK'. (default: {None})
+
+        exchange {str} -- The exchange the contract was listed under in `trsrv/stocks`. (default: {None})
+
+        listing_exchange {str} -- The primary listing exchange from `trsrv/secdef`. (default: {None})
+
+        currency {str} -- The trading currency. (default: {None})
+
+        is_us {bool} -- Whether the contract is a US listing. (default: {None})
+
+        updated {float} -- The epoch time in seconds the definition was last fetched. (default: {0.0})
+        """
+
+        self.conid = int(conid)
+        self.symbol = symbol
+        self.name = name
+        self.sec_type = sec_type
+        self.exchange = exchange
+        self.listing_exchange = listing_exchange
+        self.currency = currency
+        self.is_us = is_us
+        self.updated = updated
+
+    def as_tuple(self) -> tuple:
+        return tuple(getattr(self, column) for column in _COLUMNS)
+
+    def __repr__(self) -> str:
+        return '<Security conid={conid} symbol={symbol!r} sec_type={sec_type!r} exchange={exchange!r}>'.format(
+            conid=self.conid,
+            symbol=self.symbol,
+            sec_type=self.sec_type,
+            exchange=self.exchange
+        )
+
+
+class SecurityMaster():
+
+    def __init__(self, path: str = None, max_age: float = MAX_AGE, max_concurrency: int = 5,
+                 clock: Callable[[], float] = time.time) -> None:
+        """Initalizes a new instance of the SecurityMaster Object.
+
+        A local index of security definitions, built from `trsrv/stocks` and
+        `trsrv/secdef`, so symbols can be resolved to conids without a
+        search call each time. Definitions are held in hash indexes by
+        conid, symbol, exchange and asset class, and can be persisted to a
+        SQLite file so the next start needs no network calls at all.
+
+        Arguments:
+        ----
+        path {str} -- A SQLite file to persist the index to, `None` keeps it in memory only. (default: {None})
+
+        max_age {float} -- The seconds a definition is trusted before `refresh` asks for it again. (default: {MAX_AGE})
+
+        max_concurrency {int} -- The most batch requests running at once. (default: {5})
+
+        clock {Callable[[], float]} -- Returns the current epoch time in seconds. (default: {time.time})
+
+        Usage:
+        ----
+            >>> master = SecurityMaster(path='data/secmaster.sqlite')
+            >>> master.load(client=ib_client, symbols=['AAPL', 'MSFT', 'IBM'])
+            >>> master.resolve(symbol='AAPL')
+            265598
+        """
+
+        self.max_age = max_age
+        self.max_concurrency = max_concurrency
+        self.clock = clock
+
+        self._by_conid: Dict[int, Security] = {}
+        self._by_symbol: Dict[str, List[int]] = {}
+        self._by_exchange: Dict[str, Set[int]] = {}
+        self._by_sec_type: Dict[str, Set[int]] = {}
+        self._not_found: Set[str] = set()
+        self._lock = threading.RLock()
+
+        self.path = pathlib.Path(path).resolve() if path else None
+        self._database = None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._database = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._database.execute(
+                'CREATE TABLE IF NOT EXISTS securities (conid INTEGER PRIMARY KEY, symbol TEXT, name TEXT, '
+                'sec_type TEXT, exchange TEXT, listing_exchange TEXT, currency TEXT, is_us INTEGER, updated REAL)'
+            )
+            self._database.commit()
+
+            for row in self._database.execute('SELECT {} FROM securities'.format(', '.join(_COLUMNS))):
+                self._index(security=Security(*row))
+
+    def __len__(self) -> int:
+        return len(self._by_conid)
+
+    def __contains__(self, conid: int) -> bool:
+        return int(conid) in self._by_conid
+
+    def _index(self, security: Security) -> None:
+        """Adds a definition to every index, replacing any older one."""
+
+        self._unindex(conid=security.conid)
+        self._by_conid[security.conid] = security
+
+        if security.symbol:
+            self._by_symbol.setdefault(security.symbol.upper(), []).append(security.conid)
+        for exchange in {security.exchange, security.listing_exchange}:
+            if exchange:
+                self._by_exchange.setdefault(exchange, set()).add(security.conid)
+        if security.sec_type:
+            self._by_sec_type.setdefault(security.sec_type, set()).add(security.conid)
+
+    def _unindex(self, conid: int) -> None:
+        """Removes a definition from every index."""
+
+        security = self._by_conid.pop(conid, None)
+        if security is None:
+            return
+
+        if security.symbol:
+            self._by_symbol[security.symbol.upper()].remove(conid)
+        for exchange in {security.exchange, security.listing_exchange}:
+            if exchange:
+                self._by_exchange[exchange].discard(conid)
+        if security.sec_type:
+            self._by_sec_type[security.sec_type].discard(conid)
+
+    def add(self, securities: Iterable[Security]) -> None:
+        """Adds or replaces definitions, and writes them to disk when persisted."""
+
+        securities = list(securities)
+
+        with self._lock:
+
+            for security in securities:
+                self._index(security=security)
+
+            if self._database is not None and securities:
+                self._database.executemany(
+                    'INSERT OR REPLACE INTO securities VALUES ({})'.format(', '.join('?' * len(_COLUMNS))),
+                    [security.as_tuple() for security in securities]
+                )
+                self._database.commit()
+
+    def get(self, conid: int) -> Union[Security, None]:
+        """Returns the definition of a conid, `None` if it isn't indexed."""
+
+        return self._by_conid.get(int(conid))
+
+    def lookup(self, symbol: str, exchange: str = None, sec_type: str = None) -> List[Security]:
+        """Returns every indexed definition of a symbol.
+
+        Arguments:
+        ----
+        symbol {str} -- The ticker symbol, case insensitive.
+
+        exchange {str} -- Only return listings on this exchange. (default: {None})
+
+        sec_type {str} -- Only return this asset class, for example 'STK'. (default: {None})
+
+        Returns:
+        ----
+        List[Security] -- The matching definitions, in the order they were indexed.
+        """
+
+        with self._lock:
+
+            securities = [self._by_conid[conid] for conid in self._by_symbol.get(symbol.upper(), [])]
+
+        return [
+            security for security in securities
+            if (exchange is None or exchange in (security.exchange, security.listing_exchange))
+            and (sec_type is None or security.sec_type == sec_type)
+        ]
+
+    def resolve(self, symbol: str, exchange: str = None, sec_type: str = 'STK') -> Union[int, None]:
+        """Resolves a symbol to a conid without any network call.
+
+        US listings are preferred when a symbol has several, as they are the
+        ones `symbol_search` returns first.
+
+        Arguments:
+        ----
+        symbol {str} -- The ticker symbol, case insensitive.
+
+        exchange {str} -- Only consider listings on this exchange. (default: {None})
+
+        sec_type {str} -- Only consider this asset class, `None` for any. (default: {'STK'})
+
+        Returns:
+        ----
+        Union[int, None] -- The conid, `None` if the symbol isn't indexed.
+        """
+
+        securities = self.lookup(symbol=symbol, exchange=exchange, sec_type=sec_type)
+        if not securities:
+            return None
+
+        us_listings = [security for security in securities if security.is_us]
+
+        return (us_listings or securities)[0].conid
+
+    def by_exchange(self, exchange: str) -> List[Security]:
+        """Returns every indexed definition listed on an exchange."""
+
+        with self._lock:
+            return [self._by_conid[conid] for conid in self._by_exchange.get(exchange, ())]
+
+    def by_sec_type(self, sec_type: str) -> List[Security]:
+        """Returns every indexed definition of an asset class."""
+
+        with self._lock:
+            return [self._by_conid[conid] for conid in self._by_sec_type.get(sec_type, ())]
+
+    def _batches(self, func: Callable, batches: List[List]) -> List:
+        """Runs one request per batch concurrently and returns the responses in order."""
+
+        results = map_concurrently(
+            func=lambda index: func(batches[index]),
+            keys=range(len(batches)),
+            max_concurrency=self.max_concurrency
+        )
+
+        for result in results.values():
+            if not result.ok:
+                raise result.error
+
+        return [result.result for result in results.values()]
+
+    def _stocks(self, client, symbols: List[str], cache: bool = True) -> List[Security]:
+        """Fetches the listings of symbols from `trsrv/stocks`, past the response cache if `cache` is `False`."""
+
+        now = self.clock()
+        securities = []
+
+        responses = self._batches(
+            func=lambda batch: client.symbols_search_list(symbols=batch, cache=cache),
+            batches=_chunks(symbols, STOCKS_BATCH_SIZE)
+        )
+
+        for content in responses:
+            for symbol, groups in (content or {}).items():
+                for group in groups or []:
+                    for contract in group.get('contracts', []):
+                        securities.append(
+                            Security(
+                                conid=contract['conid'],
+                                symbol=symbol,
+                                name=group.get('name'),
+                                sec_type=group.get('assetClass'),
+                                exchange=contract.get('exchange'),
+                                is_us=contract.get('isUS'),
+                                updated=now
+                            )
+                        )
+
+        return securities
+
+    def _secdef(self, client, conids: List[int], cache: bool = True) -> Dict[int, dict]:
+        """Fetches the definitions of conids from `trsrv/secdef`, past the response cache if `cache` is `False`."""
+
+        responses = self._batches(
+            func=lambda batch: client.contracts_definitions(conids=batch, cache=cache),
+            batches=_chunks(conids, SECDEF_BATCH_SIZE)
+        )
+
+        return {
+            int(definition['conid']): definition
+            for content in responses
+            for definition in (content or {}).get('secdef', [])
+        }
+
+    def _merge_secdef(self, security: Security, definition: dict, now: float) -> Security:
+        """Fills a definition in from a `trsrv/secdef` entry."""
+
+        return Security(
+            conid=security.conid,
+            symbol=definition.get('ticker') or security.symbol,
+            name=definition.get('name') or security.name,
+            sec_type=definition.get('assetClass') or security.sec_type,
+            exchange=security.exchange or definition.get('listingExchange'),
+            listing_exchange=definition.get('listingExchange') or security.listing_exchange,
+            currency=definition.get('currency') or security.currency,
+            is_us=definition.get('isUS', security.is_us),
+            updated=now
+        )
+
+    def load(self, client, symbols: Iterable[str], force: bool = False) -> int:
+        """Fills the index in bulk for symbols it doesn't know yet.
+
+        Unknown symbols are looked up with batched `trsrv/stocks` requests,
+        then every listing found is completed with batched `trsrv/secdef`
+        requests. Symbols already indexed, or that the gateway didn't know
+        the last time they were asked for, cost nothing.
+
+        Arguments:
+        ----
+        client {IBClient} -- The client to make the requests with.
+
+        symbols {Iterable[str]} -- The ticker symbols.
+
+        force {bool} -- If `True`, known symbols are fetched again too, straight
+            from the gateway rather than the response cache. (default: {False})
+
+        Returns:
+        ----
+        int -- The number of definitions added or replaced.
+        """
+
+        symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+        if not force:
+            symbols = [
+                symbol for symbol in symbols
+                if not self._by_symbol.get(symbol) and symbol not in self._not_found
+            ]
+
+        if not symbols:
+            return 0
+
+        securities = self._stocks(client=client, symbols=symbols, cache=not force)
+
+        found = {security.symbol.upper() for security in securities}
+        self._not_found.update(symbol for symbol in symbols if symbol not in found)
+        definitions = self._secdef(client=client, conids=[security.conid for security in securities], cache=not force)
+
+        now = self.clock()
+        securities = [
+            self._merge_secdef(security=security, definition=definitions[security.conid], now=now)
+            if security.conid in definitions else security
+            for security in securities
+        ]
+
+        self.add(securities=securities)
+
+        return len(securities)
+
+    def refresh(self, client, conids: Iterable[int] = None) -> int:
+        """Fetches the definitions older than `max_age` again, past the response cache.
+
+        Arguments:
+        ----
+        client {IBClient} -- The client to make the requests with.
+
+        conids {Iterable[int]} -- Only consider these conids, all of them if not
+            provided. (default: {None})
+
+        Returns:
+        ----
+        int -- The number of definitions refreshed.
+        """
+
+        now = self.clock()
+
+        with self._lock:
+            candidates = self._by_conid.values() if conids is None else [
+                self._by_conid[int(conid)] for conid in conids if int(conid) in self._by_conid
+            ]
+            stale = [security for security in candidates if now - security.updated >= self.max_age]
+
+        if not stale:
+            return 0
+
+        definitions = self._secdef(client=client, conids=[security.conid for security in stale], cache=False)
+
+        refreshed = [
+            self._merge_secdef(security=security, definition=definitions[security.conid], now=now)
+            for security in stale
+            if security.conid in definitions
+        ]
+
+        self.add(securities=refreshed)
+
+        return len(refreshed)
+
+    def resolve_many(self, client, symbols: Iterable[str], exchange: str = None, sec_type: str = 'STK') -> Dict[str, int]:
+        """Resolves many symbols, loading the unknown ones in one bulk pass first.
+
+        Arguments:
+        ----
+        client {IBClient} -- The client to load unknown symbols with.
+
+        symbols {Iterable[str]} -- The ticker symbols.
+
+        exchange {str} -- Only consider listings on this exchange. (default: {None})
+
+        sec_type {str} -- Only consider this asset class, `None` for any. (default: {'STK'})
+
+        Returns:
+        ----
+        Dict[str, int] -- The conid of every symbol, `None` for symbols that weren't found.
+        """
+
+        symbols = list(symbols)
+        self.load(client=client, symbols=symbols)
+
+        return {
+            symbol: self.resolve(symbol=symbol, exchange=exchange, sec_type=sec_type)
+            for symbol in symbols
+        }
+
+    def close(self) -> None:
+        """Closes the SQLite file, if the index is persisted."""
+
+        with self._lock:
+            if self._database is not None:
+                self._database.close()
+                self._database = None
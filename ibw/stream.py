@@ -0,0 +1,512 @@
+import json
+import time
+import asyncio
+import logging
+import threading
+
+from typing import AsyncIterator
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import Union
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+# The seconds a streamed quote is served for after its last update.
+MAX_QUOTE_AGE = 5.0
+
+
+class Tick():
+
+    def __init__(self, conid: str, fields: Dict[str, str], updated: int = None) -> None:
+        """A market data update received from the websocket.
+
+        Arguments:
+        ----
+        conid {str} -- The contract ID the update is for.
+
+        fields {Dict[str, str]} -- The field values that changed, keyed by field ID.
+
+        updated {int} -- The epoch time of the update in milliseconds. (default: {None})
+        """
+
+        self.conid = conid
+        self.fields = fields
+        self.updated = updated
+
+    def __repr__(self) -> str:
+        return '<Tick conid={conid} fields={fields}>'.format(conid=self.conid, fields=self.fields)
+
+
+class QuoteCache():
+
+    def __init__(self, max_age: float = MAX_QUOTE_AGE) -> None:
+        """Initalizes a new instance of the QuoteCache Object.
+
+        Keeps the latest value of every field for every streamed conid. An
+        `IBClient` with a quote cache serves `market_data` calls from it when
+        it holds every requested conid and field. The stream clears the cache
+        whenever its connection drops.
+
+        Arguments:
+        ----
+        max_age {float} -- Quotes not updated for this many seconds are not served,
+            `None` serves quotes of any age. (default: {MAX_QUOTE_AGE})
+        """
+
+        self.max_age = max_age
+        self._quotes: Dict[str, dict] = {}
+        self._received: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def update(self, tick: Tick) -> None:
+        """Merges a tick into the cached quote for its conid.
+
+        Arguments:
+        ----
+        tick {Tick} -- The update to apply.
+        """
+
+        with self._lock:
+
+            quote = self._quotes.get(tick.conid)
+            if quote is None:
+                quote = self._quotes[tick.conid] = {'conid': int(tick.conid) if tick.conid.isdigit() else tick.conid}
+
+            quote.update(tick.fields)
+            if tick.updated is not None:
+                quote['_updated'] = tick.updated
+
+            self._received[tick.conid] = time.monotonic()
+
+    def get(self, conid: str) -> dict:
+        """Returns a copy of the cached quote for a conid, `None` if there isn't one."""
+
+        with self._lock:
+            quote = self._quotes.get(str(conid))
+            return dict(quote) if quote is not None else None
+
+    def discard(self, conid: str) -> None:
+        """Drops the cached quote for a conid."""
+
+        with self._lock:
+            self._quotes.pop(str(conid), None)
+            self._received.pop(str(conid), None)
+
+    def clear(self) -> None:
+        """Drops every cached quote."""
+
+        with self._lock:
+            self._quotes.clear()
+            self._received.clear()
+
+    def snapshot(self, conids: Union[List[str], str], fields: List[str] = None) -> List[dict]:
+        """Builds a `market_data` style response from the cache.
+
+        Arguments:
+        ----
+        conids {Union[List[str], str]} -- The contract IDs, a list or a comma separated string.
+
+        fields {List[str]} -- The fields every quote must have. (default: {None})
+
+        Returns:
+        ----
+        List[dict] -- One quote per conid, or `None` if any conid or field
+            is missing or stale, or no fields were asked for.
+        """
+
+        # Without fields the gateway returns its defaults, which the stream may not carry.
+        if not fields:
+            return None
+
+        if isinstance(conids, str):
+            conids = conids.split(',')
+
+        fields = [str(field) for field in fields]
+        now = time.monotonic()
+        snapshot = []
+
+        with self._lock:
+            for conid in conids:
+
+                conid = str(conid)
+                quote = self._quotes.get(conid)
+                if quote is None or any(field not in quote for field in fields):
+                    return None
+
+                if self.max_age is not None and now - self._received[conid] > self.max_age:
+                    return None
+
+                snapshot.append(dict(quote))
+
+        return snapshot
+
+    def __len__(self) -> int:
+        return len(self._quotes)
+
+
+class MarketDataStream():
+
+    def __init__(self, url: str, quote_cache: QuoteCache = None, session_token: str = None, verify: bool = False,
+                 heartbeat: float = 25.0, reconnect_delay: float = 1.0, max_reconnect_delay: float = 30.0) -> None:
+        """Initalizes a new instance of the MarketDataStream Object.
+
+        Streams market data from the gateway websocket. Subscriptions are kept
+        across reconnects, and every tick is passed to the callbacks, queued
+        for `ticks()` and written to the quote cache.
+
+        Arguments:
+        ----
+        url {str} -- The websocket URL, for example `wss://localhost:5000/v1/api/ws`.
+
+        Keyword Arguments:
+        ----
+        quote_cache {QuoteCache} -- The cache to keep the latest quotes in, one
+            is created if not provided. (default: {None})
+
+        session_token {str} -- The `session` value returned by `tickle`, sent
+            when connecting if provided. (default: {None})
+
+        verify {bool} -- Whether to verify the gateway certificate. (default: {False})
+
+        heartbeat {float} -- Seconds between `tic` messages keeping the session alive. (default: {25.0})
+
+        reconnect_delay {float} -- The first delay before reconnecting, doubled on
+            every failed attempt. (default: {1.0})
+
+        max_reconnect_delay {float} -- The longest delay between reconnects. (default: {30.0})
+
+        Usage:
+        ----
+            >>> stream = MarketDataStream.from_client(ib_client)
+            >>> stream.subscribe(conid='265598', fields=['31', '84', '86'])
+            >>> stream.start()
+            >>> ib_client.market_data(conids=['265598'], since=None, fields=['31'])
+        """
+
+        if aiohttp is None:
+            raise ImportError(
+                "Streaming requires `aiohttp`, install it with "
+                "`pip install interactive-broker-python-web-api[async]`."
+            )
+
+        self.url = url
+        self.quote_cache = quote_cache if quote_cache is not None else QuoteCache()
+        self.session_token = session_token
+        self.verify = verify
+        self.heartbeat = heartbeat
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self.connected = False
+        self.reconnects = 0
+
+        self._subscriptions: Dict[str, List[str]] = {}
+        self._callbacks: List[Callable[[Tick], None]] = []
+        self._queues: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+        self._client = None
+        self._websocket = None
+        self._loop: asyncio.AbstractEventLoop = None
+        self._thread: threading.Thread = None
+        self._closed = None
+        self._running = threading.Event()
+
+    @classmethod
+    def from_client(cls, client, **kwargs) -> 'MarketDataStream':
+        """Creates a stream for a client's gateway and attaches its quote cache.
+
+        Arguments:
+        ----
+        client {IBClient} -- The client whose gateway to stream from, its
+            `market_data` calls are served from the stream's cache afterwards.
+
+        Returns:
+        ----
+        MarketDataStream -- The new stream.
+        """
+
+        url = client.ib_gateway_path.replace('https://', 'wss://').replace('http://', 'ws://')
+        url = url.rstrip('/') + '/' + client.api_version + 'api/ws'
+
+        stream = cls(url=url, **kwargs)
+        stream._client = client
+        client.quote_cache = stream.quote_cache
+
+        return stream
+
+    def add_callback(self, callback: Callable[[Tick], None]) -> None:
+        """Registers a function called with every `Tick`."""
+
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback: Callable[[Tick], None]) -> None:
+        """Removes a function registered with `add_callback`."""
+
+        self._callbacks.remove(callback)
+
+    def subscribe(self, conid: str, fields: List[str]) -> None:
+        """Subscribes to market data for a conid.
+
+        Arguments:
+        ----
+        conid {str} -- The contract ID to stream.
+
+        fields {List[str]} -- The field IDs to stream, for example `['31', '84', '86']`.
+        """
+
+        conid = str(conid)
+        self._subscriptions[conid] = [str(field) for field in fields]
+        self._send_threadsafe(message=self._subscribe_message(conid=conid))
+
+    def unsubscribe(self, conid: str) -> None:
+        """Stops streaming a conid and drops its cached quote.
+
+        Arguments:
+        ----
+        conid {str} -- The contract ID to stop streaming.
+        """
+
+        conid = str(conid)
+        self._subscriptions.pop(conid, None)
+        self.quote_cache.discard(conid=conid)
+        self._send_threadsafe(message='umd+{conid}+{{}}'.format(conid=conid))
+
+    @property
+    def subscriptions(self) -> Dict[str, List[str]]:
+        """The fields subscribed to, keyed by conid."""
+
+        return dict(self._subscriptions)
+
+    def _subscribe_message(self, conid: str) -> str:
+        return 'smd+{conid}+{fields}'.format(
+            conid=conid,
+            fields=json.dumps({'fields': self._subscriptions[conid]})
+        )
+
+    def _send_threadsafe(self, message: str) -> None:
+        """Sends a message if connected, from the loop's thread or any other one."""
+
+        if not self.connected or self._loop is None:
+            return
+
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is self._loop:
+            self._loop.create_task(self._send(message=message))
+        else:
+            asyncio.run_coroutine_threadsafe(self._send(message=message), self._loop)
+
+    async def _send(self, message: str) -> None:
+        if self._websocket is not None and not self._websocket.closed:
+            await self._websocket.send_str(message)
+
+    def _parse(self, message: str) -> Tick:
+        """Parses a websocket message into a `Tick`, `None` for anything that isn't market data.
+
+        Arguments:
+        ----
+        message {str} -- The raw message.
+
+        Returns:
+        ----
+        Tick -- The parsed tick.
+        """
+
+        try:
+            payload = json.loads(message)
+        except ValueError:
+            return None
+
+        if not isinstance(payload, dict) or not str(payload.get('topic', '')).startswith('smd+'):
+            return None
+
+        conid = str(payload.get('conid', payload['topic'][4:]))
+        fields = {
+            key: value for key, value in payload.items()
+            if key[:1].isdigit()
+        }
+
+        if not fields:
+            return None
+
+        return Tick(conid=conid, fields=fields, updated=payload.get('_updated'))
+
+    def _dispatch(self, tick: Tick) -> None:
+        """Hands a tick to the cache, the callbacks and the iterators."""
+
+        self.quote_cache.update(tick=tick)
+
+        for callback in list(self._callbacks):
+            try:
+                callback(tick)
+            except Exception:
+                logger.exception('Market data callback failed.')
+
+        for loop, queue in list(self._queues):
+            if loop is self._loop:
+                queue.put_nowait(tick)
+                continue
+
+            # The iterator runs on another thread's loop, which must do the put itself.
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, tick)
+            except RuntimeError:
+                pass
+
+    async def ticks(self) -> AsyncIterator[Tick]:
+        """Yields every tick received from now on.
+
+        The iterator can run on any event loop, including one on another
+        thread than a stream started with `start`.
+
+        Usage:
+        ----
+            >>> async for tick in stream.ticks():
+                    print(tick.conid, tick.fields)
+        """
+
+        entry = (asyncio.get_running_loop(), asyncio.Queue())
+        self._queues.append(entry)
+
+        try:
+            while True:
+                yield await entry[1].get()
+        finally:
+            self._queues.remove(entry)
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            await self._send(message='tic')
+
+    async def _connect_once(self, session: 'aiohttp.ClientSession') -> None:
+        """Connects, replays the subscriptions and reads until the socket closes."""
+
+        async with session.ws_connect(self.url, ssl=None if self.verify else False) as websocket:
+
+            # `close` ran while connecting, before there was a socket to close.
+            if self._closed.is_set():
+                return
+
+            self._websocket = websocket
+            self.connected = True
+
+            if self.session_token is not None:
+                await websocket.send_str(json.dumps({'session': self.session_token}))
+
+            for conid in list(self._subscriptions):
+                await websocket.send_str(self._subscribe_message(conid=conid))
+
+            heartbeat = asyncio.ensure_future(self._heartbeat())
+
+            try:
+                async for message in websocket:
+
+                    if message.type == aiohttp.WSMsgType.TEXT:
+                        data = message.data
+                    elif message.type == aiohttp.WSMsgType.BINARY:
+                        data = message.data.decode('utf-8')
+                    else:
+                        break
+
+                    tick = self._parse(message=data)
+                    if tick is not None:
+                        self._dispatch(tick=tick)
+            finally:
+                heartbeat.cancel()
+                self.connected = False
+                self._websocket = None
+
+                # Nothing updates the quotes while disconnected, so stop serving them.
+                self.quote_cache.clear()
+
+    async def run(self) -> None:
+        """Streams until `close` is called, reconnecting whenever the connection drops."""
+
+        self._loop = asyncio.get_running_loop()
+        self._closed = asyncio.Event()
+        self._running.set()
+        delay = self.reconnect_delay
+
+        async with aiohttp.ClientSession() as session:
+
+            while not self._closed.is_set():
+
+                try:
+                    await self._connect_once(session=session)
+                    delay = self.reconnect_delay
+                except (aiohttp.ClientError, OSError, asyncio.TimeoutError) as error:
+                    logger.warning('Market data stream disconnected: {error}'.format(error=error))
+
+                if self._closed.is_set():
+                    break
+
+                # Back off before reconnecting.
+                self.reconnects += 1
+                try:
+                    await asyncio.wait_for(self._closed.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def close(self) -> None:
+        """Stops streaming, closes the websocket and detaches the quote cache from the client."""
+
+        if self._closed is not None:
+            self._closed.set()
+
+        if self._websocket is not None:
+            await self._websocket.close()
+
+        self._detach()
+
+    def _detach(self) -> None:
+        """Stops the client serving `market_data` from the quote cache, and empties it."""
+
+        if self._client is not None and self._client.quote_cache is self.quote_cache:
+            self._client.quote_cache = None
+
+        self.quote_cache.clear()
+
+    def start(self) -> 'MarketDataStream':
+        """Runs the stream on its own event loop in a background thread.
+
+        Returns:
+        ----
+        MarketDataStream -- The running stream.
+        """
+
+        self._running.clear()
+        self._thread = threading.Thread(target=asyncio.run, args=(self.run(),), daemon=True)
+        self._thread.start()
+
+        # Wait for the loop, so a `stop` right away has something to stop.
+        self._running.wait(timeout=5.0)
+
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stops a stream started with `start` and waits for its thread.
+
+        Arguments:
+        ----
+        timeout {float} -- The most seconds to wait for the thread. (default: {5.0})
+        """
+
+        if self._loop is not None and not self._loop.is_closed():
+            asyncio.run_coroutine_threadsafe(self.close(), self._loop).result(timeout=timeout)
+
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+        self._detach()
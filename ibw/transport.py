@@ -0,0 +1,585 @@
+import time
+import asyncio
+import json as json_lib
+import requests
+
+from typing import Dict
+from typing import Union
+
+from requests.adapters import HTTPAdapter
+from ibw.cache import CacheEntry
+from ibw.cache import ResponseCache
+from ibw.flight import SingleFlight
+from ibw.pacing import RequestScheduler
+from ibw.retry import RetryPolicy
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+def _create_scheduler(pacing: bool, scheduler: RequestScheduler) -> RequestScheduler:
+    """Returns the scheduler to pace requests with, `None` if pacing is off."""
+
+    if not pacing:
+        return None
+
+    return scheduler if scheduler is not None else RequestScheduler()
+
+
+def _create_cache(caching: bool, cache: ResponseCache) -> ResponseCache:
+    """Returns the response cache to use, `None` if caching is off."""
+
+    if not caching:
+        return None
+
+    return cache if cache is not None else ResponseCache()
+
+
+def _create_retry_policy(retrying: bool, retry_policy: RetryPolicy) -> RetryPolicy:
+    """Returns the policy to retry requests with, `None` if retrying is off."""
+
+    if not retrying:
+        return None
+
+    return retry_policy if retry_policy is not None else RetryPolicy()
+
+
+def _cache_lookup(cache: ResponseCache, method: str, url: str, params: dict, json: dict, read: bool = True) -> tuple:
+    """Looks a request up in the response cache, or only works out its key if `read` is `False`.
+
+    Returns:
+    ----
+    tuple -- The policy pattern and cache key of the request, both `None` if it
+        isn't cacheable, and the cached response or `None` on a miss.
+    """
+
+    if cache is None:
+        return None, None, None
+
+    pattern = cache.policy(method=method, url=url)
+    if pattern is None:
+        return None, None, None
+
+    key = cache.key(method=method, url=url, params=params, json_body=json)
+    entry = cache.get(key=key, pattern=pattern) if read else None
+
+    return pattern, key, CachedResponse.from_entry(entry=entry) if entry is not None else None
+
+
+class IBTransport():
+
+    def __init__(self, pool_size: int = 10, pool_block: bool = False, verify: bool = False, timeout: float = None,
+                 pacing: bool = True, scheduler: RequestScheduler = None, caching: bool = True,
+                 cache: ResponseCache = None, retrying: bool = True, retry_policy: RetryPolicy = None,
+                 single_flight: bool = True) -> None:
+        """Initalizes a new instance of the IBTransport Object.
+
+        The transport owns a single `requests.Session` for the lifetime of the
+        client. The session keeps connections to the gateway alive, so the
+        TCP handshake (and TLS handshake, as the pooled connection is reused)
+        is only paid once per pooled connection instead of once per call.
+
+        Arguments:
+        ----
+        pool_size {int} -- The maximum number of connections kept alive per
+            host. Should be at least the number of threads making requests
+            at the same time. (default: {10})
+
+        pool_block {bool} -- If `True`, callers wait for a free connection when
+            the pool is exhausted instead of opening a throw-away one. (default: {False})
+
+        verify {bool} -- Whether to verify the gateway certificate. The local
+            Client Portal Gateway uses a self-signed certificate. (default: {False})
+
+        timeout {float} -- The request timeout in seconds, `None` waits
+            forever. (default: {None})
+
+        pacing {bool} -- If `True`, requests are paced to the gateway limits
+            instead of being sent straight away. (default: {True})
+
+        scheduler {RequestScheduler} -- The scheduler used for pacing, if not provided
+            one with the default gateway limits is created. (default: {None})
+
+        caching {bool} -- If `True`, responses of slow changing reference endpoints
+            are served from a cache instead of the gateway. (default: {True})
+
+        cache {ResponseCache} -- The response cache, if not provided one with the
+            default policies is created. (default: {None})
+
+        retrying {bool} -- If `True`, GET requests failing with a 5xx, a 429 or a connection
+            error are retried, and endpoint groups that keep failing are short circuited. (default: {True})
+
+        retry_policy {RetryPolicy} -- The retry policy, if not provided one with the
+            default limits is created. (default: {None})
+
+        single_flight {bool} -- If `True`, identical GET requests made while one is
+            already in flight wait for it and share its response. (default: {True})
+
+        Usage:
+        ----
+            >>> transport = IBTransport(pool_size=20)
+            >>> response = transport.request(
+                method='GET',
+                url='https://localhost:5000/v1/portal/iserver/accounts'
+            )
+        """
+
+        self.pool_size = pool_size
+        self.pool_block = pool_block
+        self.verify = verify
+        self.timeout = timeout
+        self.scheduler = _create_scheduler(pacing=pacing, scheduler=scheduler)
+        self.cache = _create_cache(caching=caching, cache=cache)
+        self.retry_policy = _create_retry_policy(retrying=retrying, retry_policy=retry_policy)
+        self.flights = SingleFlight() if single_flight else None
+        self.session = self._create_session()
+
+    def _create_session(self) -> requests.Session:
+        """Creates the pooled session.
+
+        Returns:
+        ----
+        requests.Session -- A session with a sized connection pool mounted
+            for both `http` and `https`.
+        """
+
+        session = requests.Session()
+        session.verify = self.verify
+        session.headers.update({'Connection': 'keep-alive'})
+
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            pool_block=self.pool_block
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+        return session
+
+    def request(self, method: str, url: str, headers: Dict = None, params: dict = None, json: dict = None,
+                cache: bool = True) -> requests.Response:
+        """Sends a request over the pooled session.
+
+        Arguments:
+        ----
+        method {str} -- The HTTP method, one of ['GET','POST','DELETE','PUT'].
+
+        url {str} -- The full URL of the request.
+
+        headers {Dict} -- Any extra headers for this request. (default: {None})
+
+        params {dict} -- The query string parameters. (default: {None})
+
+        json {dict} -- A JSON payload for the request body. (default: {None})
+
+        cache {bool} -- If `False`, the response cache isn't read, so the gateway is
+            asked even for a cached endpoint. A fresh response still replaces the
+            cached one. (default: {True})
+
+        Returns:
+        ----
+        requests.Response -- The raw response object.
+        """
+
+        # Serve reference data from the cache when we can.
+        pattern, key, cached = _cache_lookup(cache=self.cache, method=method, url=url, params=params, json=json, read=cache)
+        if cached is not None:
+            return cached
+
+        # Identical requests in flight share one network call.
+        flight_key = self.flights.key(method=method, url=url, params=params, json_body=json) if self.flights is not None else None
+        if flight_key is not None:
+            return self.flights.do(
+                key=flight_key,
+                func=lambda: self._fetch(method=method, url=url, headers=headers, params=params, json=json, pattern=pattern, key=key)
+            )
+
+        return self._fetch(method=method, url=url, headers=headers, params=params, json=json, pattern=pattern, key=key)
+
+    def _fetch(self, method: str, url: str, headers: Dict, params: dict, json: dict, pattern: str, key: str) -> requests.Response:
+        """Sends a request, retrying it under the retry policy, and caches the response if it's cacheable."""
+
+        policy = self.retry_policy
+        breaker = policy.breaker(url=url) if policy is not None else None
+
+        wait = 0.0
+        retries = 0
+        start = time.monotonic()
+
+        while True:
+
+            # Wait for a slot if we are over the gateway limits.
+            if self.scheduler is not None:
+                wait += self.scheduler.acquire(url=url)
+
+            # Don't send anything to an endpoint group that keeps failing.
+            if breaker is not None:
+                policy.before(breaker=breaker)
+
+            try:
+                response = self.session.request(
+                    method=method,
+                    url=url,
+                    headers=headers,
+                    params=params,
+                    json=json,
+                    verify=self.verify,
+                    timeout=self.timeout
+                )
+            except (requests.ConnectionError, requests.Timeout):
+                if policy is None:
+                    raise
+                delay = policy.record(breaker=breaker, method=method, attempt=retries, elapsed=time.monotonic() - start)
+                if delay is None:
+                    raise
+            except BaseException as error:
+                # Any other error ends the request, and must not leave a trial pending.
+                if breaker is not None:
+                    policy.abandon(breaker=breaker, failed=isinstance(error, Exception))
+                raise
+            else:
+                if policy is None:
+                    break
+                delay = policy.record(
+                    breaker=breaker,
+                    method=method,
+                    attempt=retries,
+                    elapsed=time.monotonic() - start,
+                    status_code=response.status_code,
+                    headers=response.headers
+                )
+                if delay is None:
+                    break
+                response.close()
+
+            time.sleep(delay)
+            retries += 1
+
+        response.pacing_wait = wait
+        response.retries = retries
+
+        if key is not None and response.ok:
+            self.cache.put(
+                key=key,
+                pattern=pattern,
+                status_code=response.status_code,
+                headers=response.headers,
+                url=response.url,
+                content=response.content
+            )
+
+        return response
+
+    def close(self) -> None:
+        """Closes the session and every pooled connection."""
+
+        self.session.close()
+
+        if self.cache is not None:
+            self.cache.close()
+
+    def __enter__(self) -> 'IBTransport':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class AsyncResponse():
+
+    # The seconds the request waited for the pacing scheduler.
+    pacing_wait = 0.0
+
+    # The times the request was retried by the transport.
+    retries = 0
+
+    def __init__(self, status_code: int, headers: Dict, url: str, content: bytes) -> None:
+        """A fully read response from the `AsyncIBTransport`.
+
+        Mirrors the parts of `requests.Response` the client relies on, so the
+        same response handling works for both transports.
+
+        Arguments:
+        ----
+        status_code {int} -- The HTTP status code.
+
+        headers {Dict} -- The response headers.
+
+        url {str} -- The final URL of the request.
+
+        content {bytes} -- The raw response body.
+        """
+
+        self.status_code = status_code
+        self.headers = headers
+        self.url = url
+        self.content = content
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self) -> Union[Dict, list]:
+        return json_lib.loads(self.content)
+
+
+class CachedResponse(AsyncResponse):
+
+    """A response replayed from the `ResponseCache`."""
+
+    from_cache = True
+
+    @classmethod
+    def from_entry(cls, entry: CacheEntry) -> 'CachedResponse':
+        return cls(
+            status_code=entry.status_code,
+            headers=entry.headers,
+            url=entry.url,
+            content=entry.content
+        )
+
+
+class AsyncIBTransport():
+
+    def __init__(self, pool_size: int = 100, verify: bool = False, timeout: float = None,
+                 pacing: bool = True, scheduler: RequestScheduler = None, caching: bool = True,
+                 cache: ResponseCache = None, retrying: bool = True, retry_policy: RetryPolicy = None,
+                 single_flight: bool = True) -> None:
+        """Initalizes a new instance of the AsyncIBTransport Object.
+
+        The asyncio counterpart of `IBTransport`, built on `aiohttp`. A single
+        `aiohttp.ClientSession` is shared by every coroutine using the
+        transport, so one event loop can keep many gateway calls in flight
+        over a bounded set of keep-alive connections.
+
+        Arguments:
+        ----
+        pool_size {int} -- The maximum number of open connections, requests
+            beyond that wait for a free connection. (default: {100})
+
+        verify {bool} -- Whether to verify the gateway certificate. (default: {False})
+
+        timeout {float} -- The total request timeout in seconds, `None` waits
+            forever. (default: {None})
+
+        pacing {bool} -- If `True`, requests are paced to the gateway limits
+            instead of being sent straight away. (default: {True})
+
+        scheduler {RequestScheduler} -- The scheduler used for pacing, if not provided
+            one with the default gateway limits is created. (default: {None})
+
+        caching {bool} -- If `True`, responses of slow changing reference endpoints
+            are served from a cache instead of the gateway. (default: {True})
+
+        cache {ResponseCache} -- The response cache, if not provided one with the
+            default policies is created. (default: {None})
+
+        retrying {bool} -- If `True`, GET requests failing with a 5xx, a 429 or a connection
+            error are retried, and endpoint groups that keep failing are short circuited. (default: {True})
+
+        retry_policy {RetryPolicy} -- The retry policy, if not provided one with the
+            default limits is created. (default: {None})
+
+        single_flight {bool} -- If `True`, identical GET requests made while one is
+            already in flight wait for it and share its response. (default: {True})
+
+        Usage:
+        ----
+            >>> transport = AsyncIBTransport(pool_size=200)
+            >>> response = await transport.request(
+                method='GET',
+                url='https://localhost:5000/v1/portal/iserver/accounts'
+            )
+        """
+
+        if aiohttp is None:
+            raise ImportError(
+                "The async transport requires `aiohttp`, install it with "
+                "`pip install interactive-broker-python-web-api[async]`."
+            )
+
+        self.pool_size = pool_size
+        self.verify = verify
+        self.timeout = timeout
+        self.scheduler = _create_scheduler(pacing=pacing, scheduler=scheduler)
+        self.cache = _create_cache(caching=caching, cache=cache)
+        self.retry_policy = _create_retry_policy(retrying=retrying, retry_policy=retry_policy)
+        self.flights = SingleFlight() if single_flight else None
+        self.session = None
+
+    def _create_session(self) -> 'aiohttp.ClientSession':
+        """Creates the pooled session, this must run inside the event loop.
+
+        Returns:
+        ----
+        aiohttp.ClientSession -- A session with a connector sized to `pool_size`.
+        """
+
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            limit_per_host=self.pool_size,
+            ssl=None if self.verify else False
+        )
+
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+
+    def _prepare_params(self, params: dict) -> dict:
+        """Drops empty parameters and converts values to strings, matching `requests`."""
+
+        if params is None:
+            return None
+
+        return {key: str(value) for key, value in params.items() if value is not None}
+
+    async def _send(self, method: str, url: str, headers: Dict, params: dict, json: dict) -> AsyncResponse:
+        """Sends one try of a request and reads the whole response."""
+
+        async with self.session.request(
+            method=method,
+            url=url,
+            headers=headers,
+            params=self._prepare_params(params=params),
+            json=json
+        ) as response:
+
+            content = await response.read()
+
+            return AsyncResponse(
+                status_code=response.status,
+                headers=response.headers,
+                url=str(response.url),
+                content=content
+            )
+
+    async def request(self, method: str, url: str, headers: Dict = None, params: dict = None, json: dict = None,
+                      cache: bool = True) -> AsyncResponse:
+        """Sends a request over the pooled session.
+
+        Arguments:
+        ----
+        method {str} -- The HTTP method, one of ['GET','POST','DELETE','PUT'].
+
+        url {str} -- The full URL of the request.
+
+        headers {Dict} -- Any extra headers for this request. (default: {None})
+
+        params {dict} -- The query string parameters. (default: {None})
+
+        json {dict} -- A JSON payload for the request body. (default: {None})
+
+        cache {bool} -- If `False`, the response cache isn't read, so the gateway is
+            asked even for a cached endpoint. A fresh response still replaces the
+            cached one. (default: {True})
+
+        Returns:
+        ----
+        AsyncResponse -- The fully read response.
+        """
+
+        # Serve reference data from the cache when we can.
+        pattern, key, cached = _cache_lookup(cache=self.cache, method=method, url=url, params=params, json=json, read=cache)
+        if cached is not None:
+            return cached
+
+        # Identical requests in flight share one network call.
+        flight_key = self.flights.key(method=method, url=url, params=params, json_body=json) if self.flights is not None else None
+        if flight_key is not None:
+            return await self.flights.do_async(
+                key=flight_key,
+                func=lambda: self._fetch(method=method, url=url, headers=headers, params=params, json=json, pattern=pattern, key=key)
+            )
+
+        return await self._fetch(method=method, url=url, headers=headers, params=params, json=json, pattern=pattern, key=key)
+
+    async def _fetch(self, method: str, url: str, headers: Dict, params: dict, json: dict, pattern: str, key: str) -> AsyncResponse:
+        """Sends a request, retrying it under the retry policy, and caches the response if it's cacheable."""
+
+        if self.session is None or self.session.closed:
+            self.session = self._create_session()
+
+        policy = self.retry_policy
+        breaker = policy.breaker(url=url) if policy is not None else None
+
+        wait = 0.0
+        retries = 0
+        start = time.monotonic()
+
+        while True:
+
+            # Wait for a slot if we are over the gateway limits.
+            if self.scheduler is not None:
+                wait += await self.scheduler.acquire_async(url=url)
+
+            # Don't send anything to an endpoint group that keeps failing.
+            if breaker is not None:
+                policy.before(breaker=breaker)
+
+            try:
+                result = await self._send(method=method, url=url, headers=headers, params=params, json=json)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if policy is None:
+                    raise
+                delay = policy.record(breaker=breaker, method=method, attempt=retries, elapsed=time.monotonic() - start)
+                if delay is None:
+                    raise
+            except BaseException as error:
+                # Any other error ends the request, and must not leave a trial pending.
+                if breaker is not None:
+                    policy.abandon(breaker=breaker, failed=isinstance(error, Exception))
+                raise
+            else:
+                if policy is None:
+                    break
+                delay = policy.record(
+                    breaker=breaker,
+                    method=method,
+                    attempt=retries,
+                    elapsed=time.monotonic() - start,
+                    status_code=result.status_code,
+                    headers=result.headers
+                )
+                if delay is None:
+                    break
+
+            await asyncio.sleep(delay)
+            retries += 1
+
+        result.pacing_wait = wait
+        result.retries = retries
+
+        if key is not None and result.ok:
+            self.cache.put(
+                key=key,
+                pattern=pattern,
+                status_code=result.status_code,
+                headers=result.headers,
+                url=result.url,
+                content=result.content
+            )
+
+        return result
+
+    async def close(self) -> None:
+        """Closes the session and every pooled connection."""
+
+        if self.session is not None:
+            await self.session.close()
+
+        if self.cache is not None:
+            self.cache.close()
+
+    async def __aenter__(self) -> 'AsyncIBTransport':
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
@@ -0,0 +1,381 @@
+import re
+import json
+import time
+import asyncio
+import hashlib
+import threading
+
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Union
+
+from ibw.batch import map_concurrently
+
+# How long a what-if result is reused, margin and commission move with the market.
+TTL = 5.0
+
+# The payload keys that don't change what an order costs.
+IGNORED_KEYS = frozenset(['cOID', 'parentId', 'referrer', 'acctId'])
+
+COLUMNS = (
+    'conid', 'side', 'quantity', 'commission', 'initial_change', 'maintenance_change',
+    'equity_change', 'initial_after', 'maintenance_after', 'warning', 'error'
+)
+
+_number = re.compile(r'-?[\d,]*\.?\d+')
+
+
+def _amount(value: Union[str, float, None]) -> Union[float, None]:
+    """Reads the number in an amount like '1,234.56 USD', `None` if there is none."""
+
+    if value is None or isinstance(value, (int, float)):
+        return value
+
+    match = _number.search(value)
+
+    return float(match.group().replace(',', '')) if match else None
+
+
+def order_hash(account_id: str, order: Union[dict, Any]) -> str:
+    """Returns a key identifying what an order costs, whatever its cOID or key order.
+
+    Arguments:
+    ----
+    account_id {str} -- The account the order is evaluated for.
+
+    order {Union[dict, IBOrder]} -- The order.
+
+    Returns:
+    ----
+    str -- The hex digest of the normalized order.
+    """
+
+    payload = order if isinstance(order, dict) else order.create_order()
+    normalized = {
+        key: float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else value
+        for key, value in payload.items()
+        if key not in IGNORED_KEYS and value is not None
+    }
+
+    return hashlib.sha1(
+        json.dumps([account_id, normalized], sort_keys=True, separators=(',', ':')).encode()
+    ).hexdigest()
+
+
+class WhatIfResult():
+
+    __slots__ = COLUMNS + ('cached',)
+
+    def __init__(self, conid: int = None, side: str = None, quantity: float = None, commission: float = None,
+                 initial_change: float = None, maintenance_change: float = None, equity_change: float = None,
+                 initial_after: float = None, maintenance_after: float = None, warning: str = None,
+                 error: str = None, cached: bool = False) -> None:
+        """The margin and commission impact of one order.
+
+        Arguments:
+        ----
+        conid {int} -- The contract ID. (default: {None})
+
+        side {str} -- 'BUY' or 'SELL'. (default: {None})
+
+        quantity {float} -- The quantity. (default: {None})
+
+        commission {float} -- The commission. (default: {None})
+
+        initial_change {float} -- The change of the initial margin. (default: {None})
+
+        maintenance_change {float} -- The change of the maintenance margin. (default: {None})
+
+        equity_change {float} -- The change of the equity with loan value. (default: {None})
+
+        initial_after {float} -- The initial margin after the order. (default: {None})
+
+        maintenance_after {float} -- The maintenance margin after the order. (default: {None})
+
+        warning {str} -- A warning returned by the gateway. (default: {None})
+
+        error {str} -- The error returned by the gateway, or raised by the request. (default: {None})
+
+        cached {bool} -- Whether the result was reused from an earlier evaluation. (default: {False})
+        """
+
+        self.conid = conid
+        self.side = side
+        self.quantity = quantity
+        self.commission = commission
+        self.initial_change = initial_change
+        self.maintenance_change = maintenance_change
+        self.equity_change = equity_change
+        self.initial_after = initial_after
+        self.maintenance_after = maintenance_after
+        self.warning = warning
+        self.error = error
+        self.cached = cached
+
+    @classmethod
+    def from_response(cls, payload: dict, content: dict) -> 'WhatIfResult':
+        """Builds a result from an order payload and its `place_order_scenario` response."""
+
+        content = content or {}
+        amount = content.get('amount') or {}
+        initial = content.get('initial') or {}
+        maintenance = content.get('maintenance') or {}
+        equity = content.get('equity') or {}
+
+        return cls(
+            conid=payload.get('conid'),
+            side=payload.get('side'),
+            quantity=payload.get('quantity'),
+            commission=_amount(amount.get('commission')),
+            initial_change=_amount(initial.get('change')),
+            maintenance_change=_amount(maintenance.get('change')),
+            equity_change=_amount(equity.get('change')),
+            initial_after=_amount(initial.get('after')),
+            maintenance_after=_amount(maintenance.get('after')),
+            warning=content.get('warn') or None,
+            error=content.get('error') or None
+        )
+
+    @property
+    def ok(self) -> bool:
+        """`True` if the order was evaluated."""
+
+        return self.error is None
+
+    def as_tuple(self) -> tuple:
+        """Returns the result as a row of `COLUMNS`."""
+
+        return tuple(getattr(self, column) for column in COLUMNS)
+
+    def copy(self, cached: bool) -> 'WhatIfResult':
+        """Returns a copy of the result, marked as reused or not."""
+
+        return WhatIfResult(*self.as_tuple(), cached=cached)
+
+    def __repr__(self) -> str:
+        return '<WhatIfResult conid={conid} side={side} quantity={quantity} commission={commission} initial_change={initial_change} cached={cached}>'.format(
+            conid=self.conid,
+            side=self.side,
+            quantity=self.quantity,
+            commission=self.commission,
+            initial_change=self.initial_change,
+            cached=self.cached
+        )
+
+
+class WhatIfTable():
+
+    def __init__(self, results: List[WhatIfResult]) -> None:
+        """Initalizes a new instance of the WhatIfTable Object.
+
+        The what-if results of a batch of orders, one row per order in the
+        order they were given.
+
+        Arguments:
+        ----
+        results {List[WhatIfResult]} -- The results.
+        """
+
+        self.results = results
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __getitem__(self, index: int) -> WhatIfResult:
+        return self.results[index]
+
+    @property
+    def rows(self) -> List[tuple]:
+        """The results as rows of `COLUMNS`."""
+
+        return [result.as_tuple() for result in self.results]
+
+    @property
+    def errors(self) -> List[WhatIfResult]:
+        """The results of the orders that couldn't be evaluated."""
+
+        return [result for result in self.results if not result.ok]
+
+    def columns(self) -> Dict[str, list]:
+        """Returns the table as one list per column, keyed by the names in `COLUMNS`."""
+
+        return {column: [getattr(result, column) for result in self.results] for column in COLUMNS}
+
+    def totals(self) -> Dict[str, float]:
+        """Adds up the commissions and margin changes of the orders that were evaluated."""
+
+        totals = dict.fromkeys(['commission', 'initial_change', 'maintenance_change', 'equity_change'], 0.0)
+
+        for result in self.results:
+            for column in totals:
+                value = getattr(result, column)
+                if value is not None:
+                    totals[column] += value
+
+        return totals
+
+
+class WhatIfEvaluator():
+
+    def __init__(self, client, account_id: str, ttl: float = TTL, max_concurrency: int = 10,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """Initalizes a new instance of the WhatIfEvaluator Object.
+
+        Runs `place_order_scenario` for a batch of orders concurrently. Each
+        result is kept for `ttl` seconds keyed by `order_hash`, so orders that
+        appear twice in a batch, or are checked again shortly after, are only
+        sent once.
+
+        Arguments:
+        ----
+        client {IBClient} -- The client to evaluate with, `evaluate_async` requires an `AsyncIBClient`.
+
+        account_id {str} -- The account the orders are evaluated for.
+
+        ttl {float} -- The seconds a result is reused, `0` disables caching. (default: {TTL})
+
+        max_concurrency {int} -- The most requests running at once. (default: {10})
+
+        clock {Callable[[], float]} -- The monotonic clock the results expire by. (default: {time.monotonic})
+
+        Usage:
+        ----
+            >>> evaluator = WhatIfEvaluator(client=ib_client, account_id='DU123456')
+            >>> table = evaluator.evaluate(orders=rebalance_orders)
+            >>> table.totals()
+            {'commission': 212.5, 'initial_change': 18250.0, 'maintenance_change': 16600.0, 'equity_change': -212.5}
+        """
+
+        self.client = client
+        self.account_id = account_id
+        self.ttl = ttl
+        self.max_concurrency = max_concurrency
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+
+        self._results: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def clear(self) -> None:
+        """Forgets every cached result."""
+
+        with self._lock:
+            self._results.clear()
+
+    def _prepare(self, orders: Iterable[Union[dict, Any]]) -> tuple:
+        """Splits a batch into cached results and the unique orders to request."""
+
+        now = self.clock()
+        payloads = [order if isinstance(order, dict) else order.create_order() for order in orders]
+        keys = [order_hash(account_id=self.account_id, order=payload) for payload in payloads]
+
+        cached = {}
+        missing = {}
+
+        with self._lock:
+            for key, payload in zip(keys, payloads):
+
+                if key in cached or key in missing:
+                    continue
+
+                entry = self._results.get(key)
+                if entry is not None and entry[0] > now:
+                    cached[key] = entry[1]
+                else:
+                    missing[key] = payload
+
+        return keys, cached, missing
+
+    def _finish(self, keys: List[str], cached: Dict[str, WhatIfResult], fresh: Dict[str, WhatIfResult]) -> WhatIfTable:
+        """Stores the fresh results and builds the table in the order of the batch."""
+
+        expires = self.clock() + self.ttl
+
+        with self._lock:
+            for key, result in fresh.items():
+                if self.ttl > 0 and result.ok:
+                    self._results[key] = (expires, result)
+
+            self.hits += len(keys) - len(fresh)
+            self.misses += len(fresh)
+
+        results = []
+        seen = set()
+        for key in keys:
+            if key in fresh and key not in seen:
+                results.append(fresh[key])
+            else:
+                results.append((fresh.get(key) or cached[key]).copy(cached=True))
+            seen.add(key)
+
+        return WhatIfTable(results=results)
+
+    def _evaluate_one(self, payload: dict) -> WhatIfResult:
+
+        try:
+            content = self.client.place_order_scenario(account_id=self.account_id, order=payload)
+        except Exception as error:
+            return WhatIfResult(conid=payload.get('conid'), side=payload.get('side'), quantity=payload.get('quantity'), error=str(error))
+
+        return WhatIfResult.from_response(payload=payload, content=content)
+
+    async def _evaluate_one_async(self, payload: dict) -> WhatIfResult:
+
+        try:
+            content = await self.client.place_order_scenario(account_id=self.account_id, order=payload)
+        except Exception as error:
+            return WhatIfResult(conid=payload.get('conid'), side=payload.get('side'), quantity=payload.get('quantity'), error=str(error))
+
+        return WhatIfResult.from_response(payload=payload, content=content)
+
+    def evaluate(self, orders: Iterable[Union[dict, Any]]) -> WhatIfTable:
+        """Evaluates a batch of orders concurrently.
+
+        Arguments:
+        ----
+        orders {Iterable[Union[dict, IBOrder]]} -- The orders.
+
+        Returns:
+        ----
+        WhatIfTable -- A row per order, in the order they were given.
+        """
+
+        keys, cached, missing = self._prepare(orders=orders)
+
+        results = map_concurrently(
+            func=lambda key: self._evaluate_one(payload=missing[key]),
+            keys=list(missing),
+            max_concurrency=self.max_concurrency
+        )
+
+        return self._finish(keys=keys, cached=cached, fresh={key: batch.result for key, batch in results.items()})
+
+    async def evaluate_async(self, orders: Iterable[Union[dict, Any]]) -> WhatIfTable:
+        """Evaluates a batch of orders concurrently with an `AsyncIBClient`.
+
+        Arguments:
+        ----
+        orders {Iterable[Union[dict, IBOrder]]} -- The orders.
+
+        Returns:
+        ----
+        WhatIfTable -- A row per order, in the order they were given.
+        """
+
+        keys, cached, missing = self._prepare(orders=orders)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def bounded_evaluate(payload: dict) -> WhatIfResult:
+            async with semaphore:
+                return await self._evaluate_one_async(payload=payload)
+
+        fresh = await asyncio.gather(*[bounded_evaluate(payload=payload) for payload in missing.values()])
+
+        return self._finish(keys=keys, cached=cached, fresh=dict(zip(missing, fresh)))
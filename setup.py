@@ -36,6 +36,15 @@ setup(
         'urllib3>=1.25.3'
     ],
 
+    # optional dependencies, for the extra features.
+    extras_require={
+        'async': ['aiohttp>=3.6.0'],
+        'numpy': ['numpy>=1.17.0'],
+        'orjson': ['orjson>=3.0.0'],
+        'msgspec': ['msgspec>=0.9.0'],
+        'otel': ['opentelemetry-api>=1.0.0']
+    },
+
     # here are the packages I want "build."
     packages=find_packages(include=['ibw']),
 
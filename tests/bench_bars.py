@@ -0,0 +1,102 @@
+"""Benchmarks decoding `market_data_history` bars into arrays.
+
+Builds a synthetic response and compares decoding it with `json.loads`
+(one dictionary per bar) against `decode_bars` (a structured array read
+straight from the bytes), for time and peak memory.
+
+Usage:
+----
+    python tests/bench_bars.py --bars 100000
+"""
+
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+import numpy as np
+
+from ibw.bars import BAR_FIELDS
+from ibw.bars import bar_dtype
+from ibw.bars import decode_bars
+
+
+def _history(bars: int) -> bytes:
+
+    start = 1594820400000
+    price = 100.0
+    data = []
+
+    for index in range(bars):
+        price += random.uniform(-0.5, 0.5)
+        data.append({
+            'o': round(price, 2),
+            'c': round(price + random.uniform(-0.2, 0.2), 2),
+            'h': round(price + 0.3, 2),
+            'l': round(price - 0.3, 2),
+            'v': float(random.randint(100, 100000)),
+            't': start + index * 60000
+        })
+
+    history = {'symbol': 'AAPL', 'text': 'APPLE INC', 'barLength': 60, 'data': data, 'points': bars}
+
+    return json.dumps(history, separators=(',', ':')).encode('utf-8')
+
+
+def _json_to_array(content: bytes) -> np.ndarray:
+    """The path without `decode_bars`, decode to dictionaries then copy into an array."""
+
+    data = json.loads(content)['data']
+    bars = np.empty(len(data), dtype=bar_dtype())
+    for field in BAR_FIELDS:
+        bars[field] = [bar[field] for bar in data]
+
+    return bars
+
+
+def _measure(func, content: bytes, repeat: int) -> tuple:
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(content)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = func(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return best, peak, result
+
+
+def main() -> None:
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bars', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    content = _history(bars=args.bars)
+    print('payload: {size:.1f} MB, {bars} bars'.format(size=len(content) / 1e6, bars=args.bars))
+
+    json_time, json_peak, _ = _measure(json.loads, content, args.repeat)
+    convert_time, convert_peak, _ = _measure(_json_to_array, content, args.repeat)
+    array_time, array_peak, bars = _measure(decode_bars, content, args.repeat)
+
+    print('json.loads           {time:8.1f} ms   peak {peak:8.1f} MB'.format(time=json_time * 1000, peak=json_peak / 1e6))
+    print('json.loads + array   {time:8.1f} ms   peak {peak:8.1f} MB'.format(time=convert_time * 1000, peak=convert_peak / 1e6))
+    print('decode_bars          {time:8.1f} ms   peak {peak:8.1f} MB   result {size:.1f} MB'.format(
+        time=array_time * 1000,
+        peak=array_peak / 1e6,
+        size=bars.nbytes / 1e6
+    ))
+    print('speedup: {:.2f}x, memory: {:.2f}x less (against json.loads + array)'.format(
+        convert_time / array_time,
+        convert_peak / array_peak
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Benchmarks the response decoders over the bundled sample responses.
+
+Decodes every file in `samples/responses` the way the client used to, with
+`requests.Response.json` (which guesses the encoding, builds the text and
+then parses it), and then from the raw bytes with every JSON backend
+installed.
+
+Usage:
+----
+    python tests/bench_decoders.py --rounds 50
+"""
+
+import time
+import pathlib
+import argparse
+import requests
+
+from ibw.decoders import available_backends
+from ibw.decoders import json_decoder
+
+RESPONSES = pathlib.Path(__file__).parents[1].joinpath('samples/responses')
+
+
+def _response(content: bytes) -> requests.Response:
+    """Builds a response like the transport returns, without a charset in its headers."""
+
+    response = requests.Response()
+    response._content = content
+    response.status_code = 200
+    response.headers['Content-Type'] = 'application/json'
+
+    return response
+
+
+def _time(func, bodies: list, rounds: int) -> float:
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for body in bodies:
+            func(body)
+
+    return (time.perf_counter() - start) / rounds
+
+
+def main() -> None:
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=50)
+    args = parser.parse_args()
+
+    bodies = [path.read_bytes() for path in sorted(RESPONSES.glob('*.json'))]
+    size = sum(len(body) for body in bodies) / 1024
+
+    print('{files} files, {size:.0f} KB per round'.format(files=len(bodies), size=size))
+
+    baseline = _time(lambda body: _response(content=body).json(), bodies=bodies, rounds=args.rounds)
+    print('{name:<16} {elapsed:8.3f} ms'.format(name='response.json', elapsed=baseline * 1000))
+
+    for backend in available_backends():
+        elapsed = _time(json_decoder(backend=backend), bodies=bodies, rounds=args.rounds)
+        print('{name:<16} {elapsed:8.3f} ms   {speedup:6.2f}x'.format(
+            name=backend,
+            elapsed=elapsed * 1000,
+            speedup=baseline / elapsed
+        ))
+
+
+if __name__ == '__main__':
+    main()
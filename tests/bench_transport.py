@@ -0,0 +1,75 @@
+"""Benchmarks cold requests against the pooled transport.
+
+Sends the same request to a local fake gateway, first with a brand new
+connection per call (the way `requests.get` works) and then over the
+client's pooled, keep-alive transport.
+
+Usage:
+----
+    python tests/bench_transport.py --calls 500
+    python tests/bench_transport.py --calls 500 --certfile cert.pem --keyfile key.pem
+"""
+
+import time
+import argparse
+import statistics
+import requests
+import urllib3
+
+from ibw.client import IBClient
+from fake_gateway import FakeGateway
+
+urllib3.disable_warnings()
+
+
+def _percentiles(samples: list) -> str:
+
+    samples = sorted(samples)
+    return 'mean {mean:8.3f} ms   p50 {p50:8.3f} ms   p99 {p99:8.3f} ms'.format(
+        mean=statistics.mean(samples) * 1000,
+        p50=samples[len(samples) // 2] * 1000,
+        p99=samples[int(len(samples) * 0.99) - 1] * 1000
+    )
+
+
+def main() -> None:
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=500)
+    parser.add_argument('--certfile', default=None)
+    parser.add_argument('--keyfile', default=None)
+    args = parser.parse_args()
+
+    with FakeGateway(certfile=args.certfile, keyfile=args.keyfile) as gateway:
+
+        gateway.route('GET', 'iserver/accounts', {'accounts': ['DU123456']})
+
+        ib_client = IBClient(username='PAPER_USERNAME', account='DU123456')
+        ib_client.ib_gateway_path = gateway.url
+        url = ib_client._build_url(endpoint='iserver/accounts')
+
+        # Cold: a new TCP (and TLS) handshake on every call.
+        cold = []
+        for _ in range(args.calls):
+            start = time.perf_counter()
+            requests.get(url=url, verify=False)
+            cold.append(time.perf_counter() - start)
+        cold_connections = gateway.connections
+
+        # Pooled: the client's keep-alive session.
+        pooled = []
+        for _ in range(args.calls):
+            start = time.perf_counter()
+            ib_client.server_accounts()
+            pooled.append(time.perf_counter() - start)
+        pooled_connections = gateway.connections - cold_connections
+
+        ib_client.transport.close()
+
+    print('cold   ({conns:>4} connections): {stats}'.format(conns=cold_connections, stats=_percentiles(cold)))
+    print('pooled ({conns:>4} connections): {stats}'.format(conns=pooled_connections, stats=_percentiles(pooled)))
+    print('speedup: {:.2f}x'.format(statistics.mean(cold) / statistics.mean(pooled)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Benchmarks batch what-if evaluation against sequential calls.
+
+Evaluates the orders of a rebalance against a local fake gateway, first
+one `place_order_scenario` call at a time and then with the concurrent
+`WhatIfEvaluator`, and finally again while its results are cached.
+
+Usage:
+----
+    python tests/bench_whatif.py --orders 200 --latency 0.02
+"""
+
+import time
+import argparse
+
+from ibw.client import IBClient
+from ibw.orders import TEMPLATES
+from ibw.transport import IBTransport
+from ibw.whatif import WhatIfEvaluator
+from fake_gateway import FakeGateway
+
+WHATIF = {
+    'amount': {'amount': '10,000 USD', 'commission': '1.00 USD', 'total': '10,001.00 USD'},
+    'equity': {'current': '100,000', 'change': '-1', 'after': '99,999'},
+    'initial': {'current': '10,000', 'change': '2,500', 'after': '12,500'},
+    'maintenance': {'current': '8,000', 'change': '2,000', 'after': '10,000'},
+    'warn': None,
+    'error': None
+}
+
+
+def main() -> None:
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--concurrency', type=int, default=10)
+    args = parser.parse_args()
+
+    orders = [
+        TEMPLATES['market'].create(conid=1000 + index, side='BUY', quantity=100)
+        for index in range(args.orders)
+    ]
+
+    with FakeGateway(latency=args.latency) as gateway:
+
+        gateway.route('POST', 'iserver/account/DU123456/order/whatif', WHATIF)
+
+        ib_client = IBClient(username='PAPER_USERNAME', account='DU123456', transport=IBTransport(pacing=False))
+        ib_client.ib_gateway_path = gateway.url
+
+        start = time.perf_counter()
+        for order in orders:
+            ib_client.place_order_scenario(account_id='DU123456', order=order)
+        sequential = time.perf_counter() - start
+
+        evaluator = WhatIfEvaluator(client=ib_client, account_id='DU123456', max_concurrency=args.concurrency)
+
+        start = time.perf_counter()
+        evaluator.evaluate(orders=orders)
+        concurrent = time.perf_counter() - start
+
+        start = time.perf_counter()
+        evaluator.evaluate(orders=orders)
+        cached = time.perf_counter() - start
+
+        ib_client.transport.close()
+
+    print('sequential  ({orders} orders): {elapsed:8.3f} s'.format(orders=args.orders, elapsed=sequential))
+    print('concurrent  ({orders} orders): {elapsed:8.3f} s'.format(orders=args.orders, elapsed=concurrent))
+    print('cached      ({orders} orders): {elapsed:8.3f} s'.format(orders=args.orders, elapsed=cached))
+    print('speedup: {:.2f}x'.format(sequential / concurrent))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+"""Makes the helpers in the `tests` folder, like `fake_gateway`, importable from the unit tests."""
@@ -0,0 +1,212 @@
+"""A local stand-in for the Client Portal Gateway.
+
+Used by the unit tests and the benchmark scripts so they can exercise the
+client end to end without a real gateway or an IB account.
+"""
+
+import ssl
+import json
+import time
+import threading
+import urllib.parse
+
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Union
+
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+
+class FakeRequest():
+
+    def __init__(self, method: str, path: str, query: Dict, body: bytes, headers: Dict) -> None:
+        """A request received by the fake gateway.
+
+        Arguments:
+        ----
+        method {str} -- The HTTP method.
+
+        path {str} -- The path without the query string, relative to `/v1/portal/`.
+
+        query {Dict} -- The parsed query string, one value per key.
+
+        body {bytes} -- The raw request body.
+
+        headers {Dict} -- The request headers.
+        """
+
+        self.method = method
+        self.path = path
+        self.query = query
+        self.body = body
+        self.headers = headers
+
+    @property
+    def json(self) -> Union[Dict, List]:
+        """The request body decoded as JSON."""
+
+        return json.loads(self.body) if self.body else None
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _dispatch(self) -> None:
+
+        gateway: FakeGateway = self.server.gateway
+
+        parsed = urllib.parse.urlsplit(self.path)
+        path = parsed.path
+        if path.startswith(FakeGateway.PREFIX):
+            path = path[len(FakeGateway.PREFIX):]
+
+        query = dict(urllib.parse.parse_qsl(parsed.query, keep_blank_values=True))
+
+        length = int(self.headers.get('Content-Length', 0) or 0)
+        body = self.rfile.read(length) if length else b''
+
+        request = FakeRequest(
+            method=self.command,
+            path=path,
+            query=query,
+            body=body,
+            headers=dict(self.headers)
+        )
+        status, payload, headers = gateway._respond(request=request)
+
+        if isinstance(payload, (bytes, bytearray)):
+            content = bytes(payload)
+        else:
+            content = json.dumps(payload).encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json;charset=utf-8')
+        self.send_header('Content-Length', str(len(content)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = _dispatch
+    do_POST = _dispatch
+    do_PUT = _dispatch
+    do_DELETE = _dispatch
+
+
+class _Server(ThreadingHTTPServer):
+
+    daemon_threads = True
+
+    # The default backlog of 5 drops connections when many clients connect at once.
+    request_queue_size = 128
+
+    def process_request(self, request, client_address) -> None:
+        self.gateway.connections += 1
+        super().process_request(request, client_address)
+
+
+class FakeGateway():
+
+    PREFIX = '/v1/portal/'
+
+    def __init__(self, latency: float = 0.0, certfile: str = None, keyfile: str = None) -> None:
+        """Initalizes a new instance of the FakeGateway Object.
+
+        Arguments:
+        ----
+        latency {float} -- Seconds every response is delayed by, to simulate
+            server time. (default: {0.0})
+
+        certfile {str} -- A certificate, if passed the gateway serves HTTPS. (default: {None})
+
+        keyfile {str} -- The private key for `certfile`. (default: {None})
+
+        Usage:
+        ----
+            >>> with FakeGateway() as gateway:
+                    gateway.route('GET', 'iserver/accounts', {'accounts': ['DU1']})
+                    client.ib_gateway_path = gateway.url
+        """
+
+        self.latency = latency
+        self.routes: Dict[tuple, Callable] = {}
+        self.requests: List[FakeRequest] = []
+        self.connections = 0
+        self._lock = threading.Lock()
+
+        self._server = _Server(('127.0.0.1', 0), _Handler)
+        self._server.gateway = self
+
+        scheme = 'http'
+        if certfile:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile=certfile, keyfile=keyfile)
+            self._server.socket = context.wrap_socket(self._server.socket, server_side=True)
+            scheme = 'https'
+
+        self.url = '{scheme}://127.0.0.1:{port}'.format(
+            scheme=scheme,
+            port=self._server.server_address[1]
+        )
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def route(self, method: str, path: str, response: Union[Callable, Dict, List, bytes], status: int = 200) -> None:
+        """Registers a response for an endpoint.
+
+        Arguments:
+        ----
+        method {str} -- The HTTP method to match.
+
+        path {str} -- The endpoint path, for example `iserver/accounts`.
+
+        response {Union[Callable, Dict, List, bytes]} -- A static payload, or a callable
+            taking a `FakeRequest` and returning either a payload or a
+            `(status, payload, headers)` tuple.
+
+        status {int} -- The status code used with a static payload. (default: {200})
+        """
+
+        if callable(response):
+            self.routes[(method, path.lstrip('/'))] = response
+        else:
+            self.routes[(method, path.lstrip('/'))] = lambda request: (status, response, None)
+
+    def _respond(self, request: FakeRequest) -> tuple:
+
+        with self._lock:
+            self.requests.append(request)
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        handler = self.routes.get((request.method, request.path.lstrip('/')))
+        if handler is None:
+            return 404, {'error': 'no route for ' + request.path}, None
+
+        result = handler(request)
+        if isinstance(result, tuple):
+            return result
+
+        return 200, result, None
+
+    def start(self) -> 'FakeGateway':
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'FakeGateway':
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
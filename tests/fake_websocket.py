@@ -0,0 +1,126 @@
+"""A local stand-in for the Client Portal Gateway websocket.
+
+Answers market data subscriptions the way the gateway does, and lets the
+tests push ticks or drop connections on demand.
+"""
+
+import json
+import asyncio
+import threading
+
+from typing import Dict
+from typing import List
+
+from aiohttp import web
+
+
+class FakeWebsocket():
+
+    def __init__(self) -> None:
+        """Initalizes a new instance of the FakeWebsocket Object.
+
+        Runs an `aiohttp` server on its own event loop in a background thread,
+        so it works with both sync and async tests.
+
+        Usage:
+        ----
+            >>> with FakeWebsocket() as server:
+                    stream = MarketDataStream(url=server.url)
+        """
+
+        self.messages: List[str] = []
+        self.subscriptions: Dict[str, List[str]] = {}
+        self.connections = 0
+
+        self._sockets: List[web.WebSocketResponse] = []
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self.url = None
+
+    def _serve(self) -> None:
+
+        asyncio.set_event_loop(self._loop)
+
+        app = web.Application()
+        app.router.add_get('/v1/api/ws', self._handle)
+
+        self._runner = web.AppRunner(app)
+        self._loop.run_until_complete(self._runner.setup())
+
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        self._loop.run_until_complete(site.start())
+
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = 'ws://127.0.0.1:{port}/v1/api/ws'.format(port=port)
+        self.gateway_path = 'http://127.0.0.1:{port}'.format(port=port)
+
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _handle(self, request: web.Request) -> web.WebSocketResponse:
+
+        websocket = web.WebSocketResponse()
+        await websocket.prepare(request)
+
+        self.connections += 1
+        self._sockets.append(websocket)
+
+        async for message in websocket:
+
+            self.messages.append(message.data)
+
+            if message.data.startswith('smd+'):
+                _, conid, payload = message.data.split('+', 2)
+                fields = json.loads(payload)['fields']
+                self.subscriptions[conid] = fields
+
+                # The gateway answers a subscription with the current values.
+                await websocket.send_str(json.dumps(dict(
+                    {'topic': 'smd+' + conid, 'conid': int(conid), '_updated': 1000},
+                    **{field: '{}.{}'.format(conid, field) for field in fields}
+                )))
+
+            elif message.data.startswith('umd+'):
+                self.subscriptions.pop(message.data.split('+')[1], None)
+
+        self._sockets.remove(websocket)
+
+        return websocket
+
+    def _run(self, coroutine) -> None:
+        asyncio.run_coroutine_threadsafe(coroutine, self._loop).result(timeout=5)
+
+    def push(self, message: dict) -> None:
+        """Sends a message to every connected client."""
+
+        async def send():
+            for websocket in list(self._sockets):
+                await websocket.send_str(json.dumps(message))
+
+        self._run(send())
+
+    def drop(self) -> None:
+        """Closes every connection, as if the gateway restarted."""
+
+        async def close():
+            for websocket in list(self._sockets):
+                await websocket.close()
+
+        self._run(close())
+
+    def start(self) -> 'FakeWebsocket':
+        self._thread.start()
+        self._ready.wait(timeout=5)
+        return self
+
+    def stop(self) -> None:
+        self._run(self._runner.cleanup())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+    def __enter__(self) -> 'FakeWebsocket':
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
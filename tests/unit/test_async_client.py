@@ -0,0 +1,102 @@
+"""Unit test module for the asyncio client.
+
+Runs the async client against a local fake gateway to make sure endpoint
+methods are awaitable and run concurrently over one connection pool.
+"""
+
+import time
+import asyncio
+import unittest
+
+from unittest import IsolatedAsyncioTestCase
+from ibw.async_client import AsyncIBClient
+from ibw.transport import AsyncIBTransport
+from fake_gateway import FakeGateway
+
+
+class AsyncIBClientTest(IsolatedAsyncioTestCase):
+
+    """Will perform a unit test for the asyncio client."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway and the Client."""
+
+        self.gateway = FakeGateway(latency=0.05).start()
+        self.gateway.route('POST', 'iserver/auth/status', {'authenticated': True})
+        self.gateway.route('GET', 'iserver/auth/status', {'authenticated': True})
+        self.gateway.route('GET', 'iserver/accounts', {'accounts': ['DU123456']})
+        self.gateway.route(
+            'GET',
+            'iserver/marketdata/history',
+            lambda request: {'symbol': request.query['conid'], 'data': []}
+        )
+        self.gateway.route(
+            'GET',
+            'tws.proxy/fundamentals/financials/265598',
+            lambda request: request.query
+        )
+
+        self.ibw_client = AsyncIBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=AsyncIBTransport(pool_size=25, pacing=False)
+        )
+        self.ibw_client.ib_gateway_path = self.gateway.url
+
+    async def test_creates_async_transport(self):
+        """Ensure the client owns an async transport."""
+
+        self.assertIsInstance(self.ibw_client.transport, AsyncIBTransport)
+        self.assertEqual(self.ibw_client.transport.pool_size, 25)
+
+    async def test_create_session(self):
+        """Ensure the session check is awaitable."""
+
+        self.assertTrue(await self.ibw_client.create_session())
+        self.assertTrue(self.ibw_client.authenticated)
+
+    async def test_gateway_methods_are_not_inherited(self):
+        """Ensure the methods starting, logging in to or killing the gateway stay on the sync client."""
+
+        for name in ('connect', 'close_session', '_set_server', '_check_authentication_user_input'):
+            self.assertFalse(hasattr(self.ibw_client, name))
+
+    async def test_endpoints_are_awaitable(self):
+        """Ensure endpoint methods mirror the sync client."""
+
+        content = await self.ibw_client.server_accounts()
+        self.assertEqual(content, {'accounts': ['DU123456']})
+
+        # Booleans are sent the same way `requests` sends them.
+        content = await self.ibw_client._fundamentals_financials(conid='265598', financial_statement='income')
+        self.assertEqual(content, {'type': 'income', 'annual': 'True'})
+
+    async def test_requests_run_concurrently(self):
+        """Ensure many calls are in flight at once over a bounded pool."""
+
+        conids = [str(conid) for conid in range(50)]
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*[
+            self.ibw_client.market_data_history(conid=conid, period='1d', bar='5min')
+            for conid in conids
+        ])
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual([result['symbol'] for result in results], conids)
+        self.assertLess(elapsed, 50 * 0.05 / 2)
+        self.assertLessEqual(self.gateway.connections, 25)
+
+    async def asyncTearDown(self) -> None:
+        """Teardown the Client."""
+
+        await self.ibw_client.close()
+
+    def tearDown(self) -> None:
+        """Teardown the Fake Gateway."""
+
+        self.gateway.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+"""Unit test module for the on-disk historical bar store."""
+
+import calendar
+import datetime
+import tempfile
+import unittest
+
+from unittest import TestCase
+from ibw.client import IBClient
+from ibw.transport import IBTransport
+from fake_gateway import FakeGateway
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MINUTE = 60 * 1000
+NOW = 1594900800000
+
+
+def history(request) -> dict:
+    """Generates 5 minute bars for the window a history request asks for."""
+
+    from ibw.bar_store import duration_ms
+
+    if 'startTime' in request.query:
+        parsed = datetime.datetime.strptime(request.query['startTime'], '%Y%m%d-%H:%M:%S')
+        end = calendar.timegm(parsed.timetuple()) * 1000
+    else:
+        end = NOW
+
+    start = end - duration_ms(duration=request.query['period'])
+    first = -(-start // (5 * MINUTE)) * 5 * MINUTE
+
+    return {
+        'symbol': 'AAPL',
+        'data': [
+            {'o': 1.0, 'c': 2.0, 'h': 3.0, 'l': 0.5, 'v': 100.0, 't': t}
+            for t in range(first, end + 1, 5 * MINUTE)
+        ]
+    }
+
+
+def truncated_history(request) -> dict:
+    """Answers like `history`, keeping only the newest 1000 bars like the gateway."""
+
+    content = history(request)
+    content['data'] = content['data'][-1000:]
+
+    return content
+
+
+class FixedHistory():
+
+    """A client answering every history request with the same bars."""
+
+    def __init__(self, bars: 'np.ndarray') -> None:
+        self.bars = bars
+
+    def market_data_history(self, **kwargs) -> 'np.ndarray':
+        return self.bars
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class BarStoreTest(TestCase):
+
+    """Will perform a unit test for the BarStore object."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway, the Client and the Store."""
+
+        from ibw.bar_store import BarStore
+
+        self.gateway = FakeGateway().start()
+        self.gateway.route('GET', 'iserver/marketdata/history', history)
+
+        self.ibw_client = IBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=IBTransport(pacing=False)
+        )
+        self.ibw_client.ib_gateway_path = self.gateway.url
+
+        self.folder = tempfile.TemporaryDirectory()
+        self.store = BarStore(folder=self.folder.name, clock=lambda: NOW / 1000)
+
+    def history_requests(self) -> list:
+        return [request for request in self.gateway.requests if request.path == 'iserver/marketdata/history']
+
+    def test_first_request_downloads_everything(self):
+        """Ensure an empty store downloads the whole range and keeps it on disk."""
+
+        bars = self.store.history(client=self.ibw_client, conid='265598', bar='5min', period='1h')
+
+        self.assertEqual(len(bars), 13)
+        self.assertEqual(bars['t'][-1], NOW)
+        self.assertEqual(len(self.history_requests()), 1)
+        self.assertTrue(self.store.path(conid='265598', bar='5min').exists())
+
+    def test_repeat_request_reads_from_disk(self):
+        """Ensure a covered range only refetches the bar that may still be forming."""
+
+        from ibw.bar_store import BarStore
+
+        first = self.store.history(client=self.ibw_client, conid='265598', bar='5min', period='1h', end=NOW - 5 * MINUTE)
+        self.store.close()
+
+        reopened = BarStore(folder=self.folder.name, clock=lambda: NOW / 1000)
+        second = reopened.history(client=self.ibw_client, conid='265598', bar='5min', period='1h', end=NOW - 5 * MINUTE)
+        reopened.close()
+
+        self.assertEqual(len(self.history_requests()), 1)
+        np.testing.assert_array_equal(first, second)
+
+    def test_extended_range_fetches_only_the_gap(self):
+        """Ensure a longer look back only downloads the older missing range."""
+
+        self.store.history(client=self.ibw_client, conid='265598', bar='5min', period='1h')
+        bars = self.store.history(client=self.ibw_client, conid='265598', bar='5min', period='2h')
+
+        requests = self.history_requests()
+
+        self.assertEqual(len(bars), 25)
+        self.assertTrue(np.all(np.diff(bars['t']) == 5 * MINUTE))
+
+        # The older gap looks back from its end, the newest bar is refreshed.
+        gaps = [request.query for request in requests[1:]]
+        self.assertEqual(len(gaps), 2)
+        self.assertEqual(gaps[0]['startTime'], '20200716-10:59:59')
+        self.assertEqual(gaps[0]['period'], '1h')
+        self.assertNotIn('startTime', gaps[1])
+        self.assertEqual(gaps[1]['period'], '1min')
+
+    def test_long_ranges_are_split(self):
+        """Ensure a range longer than one response holds is fetched in pieces, leaving no hole."""
+
+        self.gateway.route('GET', 'iserver/marketdata/history', truncated_history)
+
+        bars = self.store.history(client=self.ibw_client, conid='265598', bar='5min', period='1w')
+
+        self.assertEqual(len(bars), 7 * 24 * 12 + 1)
+        self.assertTrue(np.all(np.diff(bars['t']) == 5 * MINUTE))
+        self.assertEqual(len(self.history_requests()), 3)
+
+    def test_truncated_response_is_not_covered(self):
+        """Ensure only the range a cut short response spans is marked as covered."""
+
+        from ibw.bar_store import bar_dtype
+
+        start = NOW - 2000 * 5 * MINUTE
+        bars = np.array([(t, 1.0, 3.0, 0.5, 2.0, 100.0) for t in range(NOW - 999 * 5 * MINUTE, NOW + 1, 5 * MINUTE)], dtype=bar_dtype())
+
+        self.store._fetch(client=FixedHistory(bars=bars), conid='265598', bar='5min', start=start, end=NOW - 10 * MINUTE, now=NOW + 60 * MINUTE)
+
+        self.assertEqual(self.store.coverage(conid='265598', bar='5min'), [(NOW - 999 * 5 * MINUTE, NOW - 10 * MINUTE)])
+
+    def test_missing_ranges(self):
+        """Ensure covered ranges are subtracted from the range wanted."""
+
+        from ibw.bar_store import missing_ranges
+        from ibw.bar_store import period_for
+
+        self.assertEqual(missing_ranges(start=0, end=100, covered=[(10, 20), (50, 200)]), [(0, 9), (21, 49)])
+        self.assertEqual(missing_ranges(start=0, end=100, covered=[]), [(0, 100)])
+        self.assertEqual(period_for(milliseconds=45 * MINUTE), '1h')
+        self.assertEqual(period_for(milliseconds=3 * 24 * 60 * MINUTE), '3d')
+
+    def tearDown(self) -> None:
+        """Teardown the Client, the Store and the Fake Gateway."""
+
+        self.store.close()
+        self.ibw_client.transport.close()
+        self.gateway.stop()
+        self.folder.cleanup()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+"""Unit test module for the bar array decoding of `market_data_history`."""
+
+import json
+import unittest
+
+from unittest import TestCase
+from ibw.client import IBClient
+from ibw.transport import IBTransport
+from fake_gateway import FakeGateway
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+HISTORY = {
+    'symbol': 'AAPL',
+    'text': 'APPLE INC',
+    'timePeriod': '1d',
+    'barLength': 300,
+    'data': [
+        {'o': 386.9, 'c': 387.95, 'h': 388.23, 'l': 385.6, 'v': 12345.0, 't': 1594820400000},
+        {'o': 387.95, 'c': 386.1, 'h': 388.0, 'l': -1.5e-2, 'v': 6789, 't': 1594820700000}
+    ],
+    'points': 2
+}
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class DecodeBarsTest(TestCase):
+
+    """Will perform a unit test for the bar decoder."""
+
+    def test_decode_bars(self):
+        """Ensure the fast path reads every column."""
+
+        from ibw.bars import decode_bars
+
+        bars = decode_bars(content=json.dumps(HISTORY, separators=(',', ':')).encode('utf-8'))
+
+        self.assertEqual(bars['t'].dtype, np.int64)
+        self.assertEqual(bars['t'].tolist(), [1594820400000, 1594820700000])
+        np.testing.assert_allclose(bars['o'], [386.9, 387.95])
+        np.testing.assert_allclose(bars['l'], [385.6, -0.015])
+        np.testing.assert_allclose(bars['v'], [12345.0, 6789.0])
+
+    def test_decode_bars_with_spaces_and_mixed_keys(self):
+        """Ensure payloads the fast path can't read give the same result."""
+
+        from ibw.bars import decode_bars
+
+        history = json.loads(json.dumps(HISTORY))
+        history['data'][1] = {'t': 1594820700000, 'v': 6789, 'o': 387.95, 'h': 388.0, 'l': -0.015, 'c': 386.1}
+
+        bars = decode_bars(content=json.dumps(history, indent=2).encode('utf-8'))
+
+        np.testing.assert_allclose(bars['c'], [387.95, 386.1])
+        self.assertEqual(bars['t'].tolist(), [1594820400000, 1594820700000])
+
+    def test_decode_empty_bars(self):
+        """Ensure a response without bars gives an empty array."""
+
+        from ibw.bars import decode_bars
+
+        self.assertEqual(len(decode_bars(content=b'{"symbol":"AAPL","data":[]}')), 0)
+        self.assertEqual(len(decode_bars(content=b'{"error":"no data"}')), 0)
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class MarketDataHistoryOutputTest(TestCase):
+
+    """Will perform a unit test for the `output` option of `market_data_history`."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway and the Client."""
+
+        self.gateway = FakeGateway().start()
+        self.gateway.route('GET', 'iserver/marketdata/history', HISTORY)
+
+        self.ibw_client = IBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=IBTransport(pacing=False)
+        )
+        self.ibw_client.ib_gateway_path = self.gateway.url
+
+    def test_json_output_is_unchanged(self):
+        """Ensure the default output is the raw response."""
+
+        content = self.ibw_client.market_data_history(conid='265598', period='1d', bar='5min')
+        self.assertEqual(content, HISTORY)
+
+    def test_numpy_output(self):
+        """Ensure the numpy output is a structured bar array."""
+
+        bars = self.ibw_client.market_data_history(conid='265598', period='1d', bar='5min', output='numpy')
+
+        self.assertEqual(bars.dtype.names, ('t', 'o', 'h', 'l', 'c', 'v'))
+        np.testing.assert_allclose(bars['h'], [388.23, 388.0])
+
+    @unittest.skipIf(pd is None, 'pandas is not installed')
+    def test_pandas_output(self):
+        """Ensure the pandas output is indexed by bar time."""
+
+        frame = self.ibw_client.market_data_history(conid='265598', period='1d', bar='5min', output='pandas')
+
+        self.assertEqual(list(frame.columns), ['o', 'h', 'l', 'c', 'v'])
+        self.assertEqual(frame.index[0], pd.Timestamp(1594820400000, unit='ms', tz='UTC'))
+
+    def test_unknown_output(self):
+        """Ensure an unknown output is rejected."""
+
+        with self.assertRaises(ValueError):
+            self.ibw_client.market_data_history(conid='265598', period='1d', bar='5min', output='csv')
+
+    def tearDown(self) -> None:
+        """Teardown the Client and the Fake Gateway."""
+
+        self.ibw_client.transport.close()
+        self.gateway.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
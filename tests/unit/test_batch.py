@@ -0,0 +1,119 @@
+"""Unit test module for the concurrent fan-out helpers.
+
+Checks `IBClient.map` and `AsyncIBClient.map` against a local fake gateway.
+"""
+
+import time
+import unittest
+import requests
+
+from unittest import TestCase
+from unittest import IsolatedAsyncioTestCase
+from ibw.client import IBClient
+from ibw.async_client import AsyncIBClient
+from ibw.transport import IBTransport
+from fake_gateway import FakeGateway
+
+
+def _contract_info(request):
+    """Fails for conid `0`, echoes the conid otherwise."""
+
+    conid = request.path.split('/')[-2]
+    if conid == '0':
+        return 500, {'error': 'unknown conid'}, None
+
+    return {'con_id': conid}
+
+
+class IBClientMapTest(TestCase):
+
+    """Will perform a unit test for the thread pool fan-out."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway and the Client."""
+
+        self.gateway = FakeGateway(latency=0.05).start()
+        self.gateway.route('GET', 'iserver/marketdata/history', lambda request: request.query)
+        for conid in range(20):
+            self.gateway.route('GET', 'iserver/contract/{}/info'.format(conid), _contract_info)
+
+        # Pacing is turned off, so the concurrency isn't capped by the rate limits.
+        self.ibw_client = IBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=IBTransport(pacing=False)
+        )
+        self.ibw_client.ib_gateway_path = self.gateway.url
+
+    def test_map_by_name_with_arguments(self):
+        """Ensure results are keyed by conid and extra arguments are passed on."""
+
+        conids = ['265598', '8314', '4815747']
+        results = self.ibw_client.map('market_data_history', conids, max_concurrency=3, period='1d', bar='5min')
+
+        self.assertEqual(list(results.keys()), conids)
+        self.assertEqual(results['8314'].result, {'conid': '8314', 'period': '1d', 'bar': '5min'})
+
+    def test_map_keeps_per_item_errors(self):
+        """Ensure a failed call doesn't stop the batch."""
+
+        results = self.ibw_client.map(self.ibw_client.contract_details, ['0', '1', '2'])
+
+        self.assertFalse(results['0'].ok)
+        self.assertIsInstance(results['0'].error, requests.HTTPError)
+        self.assertEqual(results['1'].result, {'con_id': '1'})
+        self.assertTrue(results['2'].ok)
+
+    def test_map_runs_concurrently(self):
+        """Ensure the calls overlap instead of running one after another."""
+
+        start = time.perf_counter()
+        results = self.ibw_client.map('contract_details', [str(conid) for conid in range(1, 20)], max_concurrency=10)
+        elapsed = time.perf_counter() - start
+
+        self.assertTrue(all(result.ok for result in results.values()))
+        self.assertLess(elapsed, 19 * 0.05 / 2)
+
+    def tearDown(self) -> None:
+        """Teardown the Client and the Fake Gateway."""
+
+        self.ibw_client.transport.close()
+        self.gateway.stop()
+
+
+class AsyncIBClientMapTest(IsolatedAsyncioTestCase):
+
+    """Will perform a unit test for the event loop fan-out."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway and the Client."""
+
+        self.gateway = FakeGateway().start()
+        for conid in range(5):
+            self.gateway.route('GET', 'iserver/contract/{}/info'.format(conid), _contract_info)
+
+        self.ibw_client = AsyncIBClient(username='PAPER_USERNAME', account='DU123456')
+        self.ibw_client.ib_gateway_path = self.gateway.url
+
+    async def test_map(self):
+        """Ensure the async map keys results by conid and keeps errors."""
+
+        results = await self.ibw_client.map('contract_details', ['0', '1', '2'], max_concurrency=2)
+
+        self.assertEqual(list(results.keys()), ['0', '1', '2'])
+        self.assertFalse(results['0'].ok)
+        self.assertEqual(results['2'].result, {'con_id': '2'})
+
+    async def asyncTearDown(self) -> None:
+        """Teardown the Client."""
+
+        await self.ibw_client.close()
+
+    def tearDown(self) -> None:
+        """Teardown the Fake Gateway."""
+
+        self.gateway.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,222 @@
+"""Unit test module for the response cache of the transports."""
+
+import tempfile
+import unittest
+
+from unittest import TestCase
+from unittest import IsolatedAsyncioTestCase
+from ibw.cache import ResponseCache
+from ibw.client import IBClient
+from ibw.async_client import AsyncIBClient
+from ibw.transport import AsyncIBTransport
+from ibw.transport import IBTransport
+from fake_gateway import FakeGateway
+
+CONTRACT_INFO = r'/iserver/contract/\d+/info'
+
+
+class Clock():
+
+    """A clock the tests move forward by hand."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ResponseCacheTest(TestCase):
+
+    """Will perform a unit test for the ResponseCache object."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway."""
+
+        self.gateway = FakeGateway().start()
+        self.gateway.route('GET', '/iserver/contract/265598/info', {'conid': 265598, 'symbol': 'AAPL'})
+        self.gateway.route('GET', '/iserver/contract/8314/info', {'conid': 8314, 'symbol': 'IBM'})
+        self.gateway.route('GET', '/iserver/contract/1/info', {'error': 'unknown conid'}, status=500)
+        self.gateway.route('POST', '/trsrv/secdef', lambda request: {'secdef': request.json['conids']})
+        self.gateway.route('GET', 'portfolio/accounts', [{'id': 'DU123456'}])
+
+        self.clock = Clock()
+        self.folder = tempfile.TemporaryDirectory()
+        self.clients = []
+
+    def client(self, cache: ResponseCache) -> IBClient:
+        """Creates a client using the cache."""
+
+        # The gateway requests are counted, so failed ones aren't retried.
+        ibw_client = IBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=IBTransport(pacing=False, cache=cache, retrying=False)
+        )
+        ibw_client.ib_gateway_path = self.gateway.url
+        self.clients.append(ibw_client)
+
+        return ibw_client
+
+    def paths(self) -> list:
+        return [request.path for request in self.gateway.requests]
+
+    def test_repeat_lookup_is_served_from_cache(self):
+        """Ensure a reference lookup only reaches the gateway once."""
+
+        cache = ResponseCache(clock=self.clock)
+        ibw_client = self.client(cache=cache)
+
+        first = ibw_client.contract_details(conid='265598')
+        second = ibw_client.contract_details(conid='265598')
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.paths(), ['/iserver/contract/265598/info'])
+        self.assertEqual(cache.stats()[CONTRACT_INFO]['hits'], 1)
+        self.assertEqual(cache.stats()[CONTRACT_INFO]['misses'], 1)
+
+    def test_post_bodies_are_part_of_the_key(self):
+        """Ensure requests with different bodies are cached separately."""
+
+        ibw_client = self.client(cache=ResponseCache(clock=self.clock))
+
+        self.assertEqual(ibw_client.contracts_definitions(conids=[265598]), {'secdef': [265598]})
+        self.assertEqual(ibw_client.contracts_definitions(conids=[8314]), {'secdef': [8314]})
+        self.assertEqual(ibw_client.contracts_definitions(conids=[265598]), {'secdef': [265598]})
+        self.assertEqual(len(self.gateway.requests), 2)
+
+    def test_entries_expire(self):
+        """Ensure entries are requested again after their time to live."""
+
+        cache = ResponseCache(policies={CONTRACT_INFO: 60}, clock=self.clock)
+        ibw_client = self.client(cache=cache)
+
+        ibw_client.contract_details(conid='265598')
+        self.clock.now += 59
+        ibw_client.contract_details(conid='265598')
+        self.clock.now += 2
+        ibw_client.contract_details(conid='265598')
+
+        self.assertEqual(len(self.gateway.requests), 2)
+        self.assertEqual(cache.stats()[CONTRACT_INFO]['expirations'], 1)
+
+    def test_least_recently_used_are_evicted(self):
+        """Ensure the oldest entries make room once the budget is used up."""
+
+        cache = ResponseCache(max_entries=1, clock=self.clock)
+        ibw_client = self.client(cache=cache)
+
+        ibw_client.contract_details(conid='265598')
+        ibw_client.contract_details(conid='8314')
+        ibw_client.contract_details(conid='265598')
+
+        self.assertEqual(len(self.gateway.requests), 3)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.stats()[CONTRACT_INFO]['evictions'], 2)
+
+    def test_memory_budget(self):
+        """Ensure the cached bodies stay inside the memory budget."""
+
+        cache = ResponseCache(max_bytes=150, clock=self.clock)
+        ibw_client = self.client(cache=cache)
+
+        ibw_client.contract_details(conid='265598')
+        ibw_client.contract_details(conid='8314')
+
+        self.assertLessEqual(cache.size, 150)
+        self.assertEqual(len(cache), 1)
+
+    def test_errors_and_other_endpoints_are_not_cached(self):
+        """Ensure only successful responses of cached endpoints are kept."""
+
+        ibw_client = self.client(cache=ResponseCache(clock=self.clock))
+
+        for _ in range(2):
+            ibw_client.portfolio_accounts()
+            with self.assertRaises(Exception):
+                ibw_client.contract_details(conid='1')
+
+        self.assertEqual(len(self.gateway.requests), 4)
+
+    def test_entries_persist_to_disk(self):
+        """Ensure a new cache on the same file starts warm."""
+
+        path = self.folder.name + '/responses.sqlite'
+
+        first = ResponseCache(path=path, clock=self.clock)
+        self.client(cache=first).contract_details(conid='265598')
+        first.close()
+
+        second = ResponseCache(path=path, clock=self.clock)
+        content = self.client(cache=second).contract_details(conid='265598')
+
+        self.assertEqual(content, {'conid': 265598, 'symbol': 'AAPL'})
+        self.assertEqual(len(self.gateway.requests), 1)
+        self.assertEqual(second.stats()[CONTRACT_INFO]['hits'], 1)
+
+    def test_caching_can_be_turned_off(self):
+        """Ensure a transport without caching always reaches the gateway."""
+
+        ibw_client = IBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=IBTransport(pacing=False, caching=False)
+        )
+        ibw_client.ib_gateway_path = self.gateway.url
+        self.clients.append(ibw_client)
+
+        ibw_client.contract_details(conid='265598')
+        ibw_client.contract_details(conid='265598')
+
+        self.assertIsNone(ibw_client.transport.cache)
+        self.assertEqual(len(self.gateway.requests), 2)
+
+    def tearDown(self) -> None:
+        """Teardown the Clients and the Fake Gateway."""
+
+        for ibw_client in self.clients:
+            ibw_client.transport.close()
+
+        self.gateway.stop()
+        self.folder.cleanup()
+
+
+class AsyncResponseCacheTest(IsolatedAsyncioTestCase):
+
+    """Will perform a unit test for the response cache of the async transport."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway and the Client."""
+
+        self.gateway = FakeGateway().start()
+        self.gateway.route('GET', '/iserver/contract/265598/info', {'conid': 265598, 'symbol': 'AAPL'})
+
+        self.ibw_client = AsyncIBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=AsyncIBTransport(pacing=False)
+        )
+        self.ibw_client.ib_gateway_path = self.gateway.url
+
+    async def test_repeat_lookup_is_served_from_cache(self):
+        """Ensure the async transport shares the same cache behaviour."""
+
+        first = await self.ibw_client.contract_details(conid='265598')
+        second = await self.ibw_client.contract_details(conid='265598')
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.gateway.requests), 1)
+
+    async def asyncTearDown(self) -> None:
+        """Teardown the Client."""
+
+        await self.ibw_client.close()
+
+    def tearDown(self) -> None:
+        """Teardown the Fake Gateway."""
+
+        self.gateway.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+"""Unit test module for the response decoders."""
+
+import json
+import pathlib
+import unittest
+
+from typing import List
+from unittest import TestCase
+from ibw.client import IBClient
+from ibw.decoders import available_backends
+from ibw.decoders import json_decoder
+from ibw.decoders import msgspec
+from ibw.decoders import orjson
+from ibw.decoders import struct_decoder
+from ibw.transport import IBTransport
+from fake_gateway import FakeGateway
+
+RESPONSES = pathlib.Path(__file__).parents[2].joinpath('samples/responses')
+
+
+class JsonDecoderTest(TestCase):
+
+    """Will perform a unit test for the JSON decoders."""
+
+    def test_fastest_backend_is_default(self):
+        """Ensure the default decoder is the fastest backend installed."""
+
+        self.assertEqual(available_backends()[-1], 'json')
+
+        if orjson is not None:
+            self.assertIs(json_decoder(), orjson.loads)
+        elif msgspec is None:
+            self.assertIs(json_decoder(), json.loads)
+
+    def test_backends_agree(self):
+        """Ensure every backend decodes the sample responses the same way."""
+
+        for path in RESPONSES.glob('*.json'):
+            content = path.read_bytes()
+            expected = json.loads(content)
+
+            for backend in available_backends():
+                self.assertEqual(json_decoder(backend=backend)(content), expected, msg='{} {}'.format(backend, path.name))
+
+    def test_malformed_bodies(self):
+        """Ensure every backend fails on a malformed body the way `json.loads` does."""
+
+        for backend in available_backends():
+            with self.assertRaises(json.JSONDecodeError, msg=backend):
+                json_decoder(backend=backend)(b'{"authenticated": tru')
+
+    def test_missing_backend(self):
+        """Ensure asking for a backend that isn't installed names the extra to install."""
+
+        if msgspec is None:
+            with self.assertRaisesRegex(ImportError, r'\[msgspec\]'):
+                json_decoder(backend='msgspec')
+
+            with self.assertRaisesRegex(ImportError, r'\[msgspec\]'):
+                struct_decoder(type=dict)
+
+        with self.assertRaises(ValueError):
+            json_decoder(backend='yaml')
+
+    @unittest.skipIf(msgspec is None, 'msgspec is not installed')
+    def test_struct_decoder(self):
+        """Ensure bodies decode straight into structs."""
+
+        class Account(msgspec.Struct):
+            id: str
+            currency: str
+
+        accounts = struct_decoder(type=List[Account])(b'[{"id": "DU123456", "currency": "USD", "type": "DEMO"}]')
+
+        self.assertEqual(accounts, [Account(id='DU123456', currency='USD')])
+
+
+class ClientDecoderTest(TestCase):
+
+    """Will perform a unit test for the decoder of the client."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway."""
+
+        self.gateway = FakeGateway().start()
+        self.gateway.route('GET', 'portfolio/accounts', [{'id': 'DU123456'}])
+
+    def test_body_is_decoded_once_from_bytes(self):
+        """Ensure the client hands the raw body to its decoder once."""
+
+        calls = []
+
+        def decoder(content: bytes) -> object:
+            calls.append(content)
+            return json.loads(content)
+
+        ibw_client = IBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=IBTransport(pacing=False, caching=False),
+            decoder=decoder
+        )
+        ibw_client.ib_gateway_path = self.gateway.url
+
+        self.assertEqual(ibw_client.portfolio_accounts(), [{'id': 'DU123456'}])
+        self.assertEqual(len(calls), 1)
+        self.assertIsInstance(calls[0], bytes)
+
+        ibw_client.transport.close()
+
+    def tearDown(self) -> None:
+        """Teardown the Fake Gateway."""
+
+        self.gateway.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
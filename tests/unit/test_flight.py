@@ -0,0 +1,197 @@
+"""Unit test module for sharing identical requests in flight."""
+
+import asyncio
+import unittest
+import requests
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from unittest import IsolatedAsyncioTestCase
+from ibw.client import IBClient
+from ibw.async_client import AsyncIBClient
+from ibw.flight import SingleFlight
+from ibw.transport import AsyncIBTransport
+from ibw.transport import IBTransport
+from fake_gateway import FakeGateway
+
+
+def history(request) -> dict:
+    """Answers a history request with the bar size asked for."""
+
+    return {'symbol': 'AAPL', 'bar': request.query['bar'], 'data': [{'o': 1.0, 'c': 2.0}]}
+
+
+class SingleFlightTest(TestCase):
+
+    """Will perform a unit test for the SingleFlight object with the IBTransport."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway and the Client."""
+
+        self.gateway = FakeGateway(latency=0.2).start()
+        self.gateway.route('GET', 'portfolio/DU123456/summary', {'netliquidation': {'amount': 1000.0}})
+        self.gateway.route('GET', 'iserver/marketdata/history', history)
+        self.gateway.route('POST', 'iserver/account/DU123456/order', [{'order_id': '1'}])
+
+        self.ibw_client = self.client(single_flight=True)
+        self.pool = ThreadPoolExecutor(max_workers=8)
+
+    def client(self, single_flight: bool) -> IBClient:
+        """Creates a client talking to the Fake Gateway."""
+
+        ibw_client = IBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=IBTransport(pacing=False, caching=False, retrying=False, single_flight=single_flight)
+        )
+        ibw_client.ib_gateway_path = self.gateway.url
+
+        return ibw_client
+
+    def at_once(self, func, count: int = 8) -> list:
+        """Calls `func` from `count` threads at the same time."""
+
+        futures = [self.pool.submit(func) for _ in range(count)]
+
+        return [future.result() for future in futures]
+
+    def test_identical_requests_are_shared(self):
+        """Ensure identical requests in flight make one gateway call and share its result."""
+
+        results = self.at_once(lambda: self.ibw_client.portfolio_account_summary(account_id='DU123456'))
+
+        self.assertEqual(len(self.gateway.requests), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual((self.ibw_client.transport.flights.calls, self.ibw_client.transport.flights.shared), (1, 7))
+        self.assertEqual(self.ibw_client.transport.flights.in_flight, 0)
+
+    def test_different_requests_are_not_shared(self):
+        """Ensure requests with other parameters, or with side effects, are sent on their own."""
+
+        self.at_once(lambda: self.ibw_client.market_data_history(conid='265598', period='1d', bar='5min'), count=2)
+        self.at_once(lambda: self.ibw_client.market_data_history(conid='265598', period='1d', bar='1h'), count=2)
+        self.assertEqual(len(self.gateway.requests), 2)
+
+        order = {'conid': 265598, 'side': 'BUY', 'quantity': 1}
+        self.at_once(lambda: self.ibw_client.place_order(account_id='DU123456', order=order), count=2)
+        self.assertEqual(len(self.gateway.requests), 4)
+
+    def test_nothing_is_kept(self):
+        """Ensure a request made after the first one is answered is sent again."""
+
+        self.ibw_client.portfolio_account_summary(account_id='DU123456')
+        self.ibw_client.portfolio_account_summary(account_id='DU123456')
+
+        self.assertEqual(len(self.gateway.requests), 2)
+
+    def test_errors_are_shared(self):
+        """Ensure every caller gets the error of the shared request."""
+
+        self.gateway.route('GET', 'portfolio/DU123456/summary', {'error': 'Account not found.'}, status=404)
+
+        futures = [self.pool.submit(self.ibw_client.portfolio_account_summary, account_id='DU123456') for _ in range(4)]
+
+        for future in futures:
+            self.assertIsInstance(future.exception(), requests.HTTPError)
+        self.assertEqual(len(self.gateway.requests), 1)
+
+    def test_turned_off(self):
+        """Ensure every caller makes its own request when single flight is off."""
+
+        ibw_client = self.client(single_flight=False)
+        self.at_once(lambda: ibw_client.portfolio_account_summary(account_id='DU123456'), count=4)
+        ibw_client.transport.close()
+
+        self.assertEqual(len(self.gateway.requests), 4)
+
+    def test_keys(self):
+        """Ensure the key ignores the order of the parameters and skips other methods."""
+
+        flights = SingleFlight()
+
+        self.assertEqual(
+            flights.key(method='GET', url='url', params={'a': 1, 'b': 2}),
+            flights.key(method='get', url='url', params={'b': 2, 'a': 1})
+        )
+        self.assertIsNone(flights.key(method='POST', url='url', json_body={'a': 1}))
+
+    def tearDown(self) -> None:
+        """Teardown the Client and the Fake Gateway."""
+
+        self.pool.shutdown()
+        self.ibw_client.transport.close()
+        self.gateway.stop()
+
+
+class AsyncSingleFlightTest(IsolatedAsyncioTestCase):
+
+    """Will perform a unit test for the SingleFlight object with the AsyncIBTransport."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway and the Client."""
+
+        self.gateway = FakeGateway(latency=0.1).start()
+        self.gateway.route('GET', 'iserver/marketdata/history', history)
+
+        self.ibw_client = AsyncIBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=AsyncIBTransport(pacing=False, caching=False)
+        )
+        self.ibw_client.ib_gateway_path = self.gateway.url
+
+    async def test_identical_requests_are_shared(self):
+        """Ensure concurrent coroutines share one gateway call."""
+
+        results = await asyncio.gather(*[
+            self.ibw_client.market_data_history(conid='265598', period='1d', bar='5min')
+            for _ in range(10)
+        ])
+
+        self.assertEqual(len(self.gateway.requests), 1)
+        self.assertEqual(results[9]['bar'], '5min')
+        self.assertEqual(self.ibw_client.transport.flights.shared, 9)
+
+    async def test_cancelled_follower(self):
+        """Ensure a cancelled follower doesn't cancel the request it was waiting for."""
+
+        leader = asyncio.ensure_future(self.ibw_client.market_data_history(conid='265598', period='1d', bar='5min'))
+        follower = asyncio.ensure_future(self.ibw_client.market_data_history(conid='265598', period='1d', bar='5min'))
+
+        await asyncio.sleep(0.02)
+        follower.cancel()
+
+        self.assertEqual((await leader)['bar'], '5min')
+        self.assertTrue(follower.cancelled())
+
+    async def test_cancelled_leader(self):
+        """Ensure cancelling the leader hands the request to a follower instead of cancelling it."""
+
+        calls = [
+            asyncio.ensure_future(self.ibw_client.market_data_history(conid='265598', period='1d', bar='5min'))
+            for _ in range(3)
+        ]
+
+        await asyncio.sleep(0.02)
+        calls[0].cancel()
+
+        results = await asyncio.gather(*calls[1:])
+
+        self.assertTrue(calls[0].cancelled())
+        self.assertEqual([result['bar'] for result in results], ['5min', '5min'])
+        self.assertEqual(len(self.gateway.requests), 2)
+        self.assertEqual(self.ibw_client.transport.flights.in_flight, 0)
+
+    async def asyncTearDown(self) -> None:
+        """Teardown the Client."""
+
+        await self.ibw_client.close()
+
+    def tearDown(self) -> None:
+        """Teardown the Fake Gateway."""
+
+        self.gateway.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
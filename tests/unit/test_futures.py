@@ -0,0 +1,168 @@
+"""Unit test module for the futures chain index."""
+
+import datetime
+import unittest
+
+from unittest import TestCase
+from ibw.client import IBClient
+from ibw.futures import FuturesChain
+from ibw.futures import FuturesChains
+from ibw.futures import roll_date
+from ibw.transport import IBTransport
+from fake_gateway import FakeGateway
+
+# Listed out of order, the way the gateway may return them.
+ES = [
+    {'symbol': 'ES', 'conid': 495512563, 'underlyingConid': 11004968, 'expirationDate': 20250321, 'ltd': 20250321},
+    {'symbol': 'ES', 'conid': 495512551, 'underlyingConid': 11004968, 'expirationDate': 20241220, 'ltd': 20241220},
+    {'symbol': 'ES', 'conid': 495512572, 'underlyingConid': 11004968, 'expirationDate': 20250620, 'ltd': 20250620}
+]
+
+
+class Clock():
+
+    """A clock the tests move forward by hand."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FuturesChainTest(TestCase):
+
+    """Will perform a unit test for the FuturesChain object."""
+
+    def setUp(self) -> None:
+        """Set up the Chain."""
+
+        self.chain = FuturesChain.from_response(symbol='ES', content=ES)
+
+    def test_contracts_are_sorted_by_expiry(self):
+        """Ensure the chain is ordered by expiry."""
+
+        self.assertEqual([contract.expiry for contract in self.chain], [20241220, 20250321, 20250620])
+
+    def test_roll_dates_skip_weekends(self):
+        """Ensure roll dates count business days."""
+
+        # Friday 2024-12-20, five business days back is Friday 2024-12-13.
+        self.assertEqual(roll_date(last_trading_day=20241220), 20241213)
+        self.assertEqual(self.chain.contracts[0].roll_date, 20241213)
+
+    def test_front_month(self):
+        """Ensure the front month is the nearest contract still trading."""
+
+        self.assertEqual(self.chain.front(on=20241101).conid, 495512551)
+        self.assertEqual(self.chain.front(on=20241220).conid, 495512551)
+        self.assertEqual(self.chain.front(on=datetime.date(2024, 12, 21)).conid, 495512563)
+        self.assertIsNone(self.chain.front(on=20250701))
+
+    def test_active_contract_rolls(self):
+        """Ensure the contract to hold moves on the roll date."""
+
+        self.assertEqual(self.chain.active(on=20241212).conid, 495512551)
+        self.assertEqual(self.chain.active(on=20241213).conid, 495512563)
+        self.assertEqual(self.chain.next_roll(on=20241213), 20250314)
+
+
+class FuturesChainsTest(TestCase):
+
+    """Will perform a unit test for the FuturesChains object."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway, the Client and the Chains."""
+
+        self.gateway = FakeGateway().start()
+        self.gateway.route(
+            'GET',
+            '/trsrv/futures',
+            lambda request: {
+                symbol: [dict(contract, symbol=symbol) for contract in ES]
+                for symbol in request.query['symbols'].split(',')
+            }
+        )
+
+        self.ibw_client = IBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=IBTransport(pacing=False, caching=False)
+        )
+        self.ibw_client.ib_gateway_path = self.gateway.url
+
+        self.clock = Clock()
+        self.chains = FuturesChains(clock=self.clock)
+
+    def test_batched_refresh(self):
+        """Ensure many roots are requested in batches."""
+
+        symbols = ['R{}'.format(index) for index in range(45)]
+        chains = self.chains.refresh(client=self.ibw_client, symbols=symbols)
+
+        self.assertEqual(len(chains), 45)
+        self.assertEqual(len(self.gateway.requests), 3)
+        self.assertEqual(self.chains.get(client=self.ibw_client, symbol='R44').front(on=20241101).conid, 495512551)
+        self.assertEqual(len(self.gateway.requests), 3)
+
+    def test_daily_expiry(self):
+        """Ensure chains are requested again once they are a day old."""
+
+        self.chains.get(client=self.ibw_client, symbol='ES')
+        self.clock.now += 60 * 60
+        self.chains.get(client=self.ibw_client, symbol='ES')
+        self.assertEqual(len(self.gateway.requests), 1)
+
+        self.clock.now += 24 * 60 * 60
+        self.chains.get(client=self.ibw_client, symbol='ES')
+        self.assertEqual(len(self.gateway.requests), 2)
+
+    def test_forced_refresh_skips_the_response_cache(self):
+        """Ensure a forced refresh reaches the gateway with the response cache on."""
+
+        ibw_client = IBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=IBTransport(pacing=False)
+        )
+        ibw_client.ib_gateway_path = self.gateway.url
+
+        self.chains.refresh(client=ibw_client, symbols=['ES'])
+        self.chains.refresh(client=ibw_client, symbols=['ES'], force=True)
+        ibw_client.transport.close()
+
+        self.assertEqual(len(self.gateway.requests), 2)
+
+    def test_stale_refresh_skips_the_response_cache(self):
+        """Ensure a stale chain is requested from the gateway and sees the contracts listed since."""
+
+        listed = [ES[:2]]
+        self.gateway.route('GET', '/trsrv/futures', lambda request: {'ES': listed[0]})
+
+        ibw_client = IBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=IBTransport(pacing=False)
+        )
+        ibw_client.ib_gateway_path = self.gateway.url
+
+        chains = FuturesChains(max_age=60 * 60, clock=self.clock)
+        self.assertEqual(len(chains.get(client=ibw_client, symbol='ES').contracts), 2)
+
+        listed[0] = ES
+        self.clock.now += 2 * 60 * 60
+        chain = chains.get(client=ibw_client, symbol='ES')
+        ibw_client.transport.close()
+
+        self.assertEqual(len(self.gateway.requests), 2)
+        self.assertEqual(chain.get(conid=495512572).expiry, 20250620)
+
+    def tearDown(self) -> None:
+        """Teardown the Client and the Fake Gateway."""
+
+        self.ibw_client.transport.close()
+        self.gateway.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+"""Unit test module for the logging helpers."""
+
+import json
+import logging
+import threading
+import unittest
+
+from unittest import TestCase
+from ibw.client import IBClient
+from ibw.logs import Payload
+from ibw.logs import QueueLogHandler
+from ibw.logs import StructuredFormatter
+from ibw.transport import IBTransport
+from fake_gateway import FakeGateway
+
+
+class ListHandler(logging.Handler):
+
+    """Keeps the formatted records, optionally waiting for an event before each one."""
+
+    def __init__(self, gate: threading.Event = None) -> None:
+        super().__init__()
+        self.gate = gate
+        self.lines = []
+        self.setFormatter(StructuredFormatter(max_length=200))
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self.gate is not None:
+            self.gate.wait()
+        self.lines.append(json.loads(self.format(record)))
+
+
+class LogsTest(TestCase):
+
+    """Will perform a unit test for the logging helpers."""
+
+    def setUp(self) -> None:
+        """Set up a logger of the library."""
+
+        self.logger = logging.getLogger('ibw.tests')
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.propagate = False
+
+    def test_import_leaves_root_logger_alone(self):
+        """Ensure importing the client doesn't configure logging."""
+
+        self.assertFalse([
+            handler for handler in logging.getLogger().handlers
+            if isinstance(handler, logging.FileHandler) and handler.baseFilename.endswith('app.log')
+        ])
+        self.assertFalse(logging.getLogger('ibw').isEnabledFor(logging.DEBUG))
+
+    def test_payload_is_truncated(self):
+        """Ensure large bodies are cut down as soon as they are logged."""
+
+        payload = Payload(content=b'x' * 5000, limit=10)
+
+        self.assertEqual(str(Payload(content=b'{"a": 1}')), '{"a": 1}')
+        self.assertEqual(str(payload), 'xxxxxxxxxx... (5000 bytes)')
+        self.assertEqual(payload.head, b'x' * 10)
+
+    def test_structured_records(self):
+        """Ensure records are written as JSON with their extra fields."""
+
+        target = ListHandler()
+        handler = QueueLogHandler(target)
+        self.logger.addHandler(handler)
+
+        self.logger.debug('Response %s', 200, extra={'url': 'portfolio/accounts', 'size': 12})
+        self.logger.debug('Long %s', 'y' * 500)
+        handler.close()
+
+        self.assertEqual(target.lines[0]['message'], 'Response 200')
+        self.assertEqual((target.lines[0]['url'], target.lines[0]['size']), ('portfolio/accounts', 12))
+        self.assertEqual(len(target.lines[1]['message']), 203)
+
+    def test_sampling(self):
+        """Ensure only some debug records are kept, and every warning is."""
+
+        target = ListHandler()
+        handler = QueueLogHandler(target, sample_every=3)
+        self.logger.addHandler(handler)
+
+        for index in range(9):
+            self.logger.debug('Debug %s', index)
+        self.logger.warning('Warning')
+        handler.close()
+
+        self.assertEqual([line['message'] for line in target.lines], ['Debug 0', 'Debug 3', 'Debug 6', 'Warning'])
+
+    def test_full_queue_drops_records(self):
+        """Ensure logging doesn't block when the writer falls behind."""
+
+        gate = threading.Event()
+        target = ListHandler(gate=gate)
+        handler = QueueLogHandler(target, max_queue=2)
+        self.logger.addHandler(handler)
+
+        for index in range(10):
+            self.logger.info('Info %s', index)
+
+        gate.set()
+        handler.close()
+
+        self.assertGreater(handler.dropped, 0)
+        self.assertEqual(len(target.lines) + handler.dropped, 10)
+
+    def test_client_logs_responses_lazily(self):
+        """Ensure the client only builds response records when debug is enabled."""
+
+        gateway = FakeGateway().start()
+        gateway.route('GET', 'portfolio/accounts', [{'id': 'DU123456'}])
+
+        ibw_client = IBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=IBTransport(pacing=False, caching=False)
+        )
+        ibw_client.ib_gateway_path = gateway.url
+
+        logger = logging.getLogger('ibw.client')
+        target = ListHandler()
+        handler = QueueLogHandler(target)
+        logger.addHandler(handler)
+
+        try:
+            ibw_client.portfolio_accounts()
+
+            logger.setLevel(logging.DEBUG)
+            ibw_client.portfolio_accounts()
+        finally:
+            logger.setLevel(logging.NOTSET)
+            logger.removeHandler(handler)
+            handler.close()
+            ibw_client.transport.close()
+            gateway.stop()
+
+        self.assertEqual(len(target.lines), 1)
+        self.assertEqual(target.lines[0]['status_code'], 200)
+        self.assertIn('DU123456', target.lines[0]['message'])
+
+    def tearDown(self) -> None:
+        """Remove the handlers added by the test."""
+
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+            handler.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
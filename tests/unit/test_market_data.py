@@ -0,0 +1,118 @@
+"""Unit test module for the market data snapshot endpoint.
+
+Checks large snapshot requests are split into chunks and merged back into
+one response, using a local fake gateway.
+"""
+
+import unittest
+
+from unittest import TestCase
+from unittest import IsolatedAsyncioTestCase
+from ibw.client import IBClient
+from ibw.async_client import AsyncIBClient
+from ibw.transport import IBTransport
+from ibw.transport import AsyncIBTransport
+from fake_gateway import FakeGateway
+
+
+def _snapshot(request):
+    """Returns one quote per conid, with a value for every requested field."""
+
+    fields = [field for field in request.query['fields'].split(',') if field]
+
+    return [
+        dict({'conid': int(conid), 'server_id': 'q0'}, **{field: '{}-{}'.format(conid, field) for field in fields})
+        for conid in request.query['conids'].split(',')
+    ]
+
+
+class MarketDataTest(TestCase):
+
+    """Will perform a unit test for the snapshot chunking."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway and the Client."""
+
+        self.gateway = FakeGateway().start()
+        self.gateway.route('GET', 'iserver/marketdata/snapshot', _snapshot)
+
+        self.ibw_client = IBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=IBTransport(pacing=False)
+        )
+        self.ibw_client.ib_gateway_path = self.gateway.url
+
+    def test_small_request_is_not_split(self):
+        """Ensure a request under the limits is sent as one call."""
+
+        content = self.ibw_client.market_data(conids=['265598', '8314'], since='1000', fields=[31, 84])
+
+        self.assertEqual(len(self.gateway.requests), 1)
+        self.assertEqual(self.gateway.requests[0].query, {'conids': '265598,8314', 'fields': '31,84', 'since': '1000'})
+        self.assertEqual(content[1]['84'], '8314-84')
+
+    def test_large_request_is_chunked_and_merged(self):
+        """Ensure conids and fields are split into chunks and merged per conid."""
+
+        conids = [str(conid) for conid in range(1, 251)]
+        fields = [str(field) for field in range(30, 100)]
+
+        content = self.ibw_client.market_data(conids=conids, since=None, fields=fields)
+
+        # 3 conid chunks times 2 field chunks.
+        self.assertEqual(len(self.gateway.requests), 6)
+        self.assertTrue(all(len(request.query['conids'].split(',')) <= 100 for request in self.gateway.requests))
+        self.assertTrue(all(len(request.query['fields'].split(',')) <= 50 for request in self.gateway.requests))
+
+        self.assertEqual([str(quote['conid']) for quote in content], conids)
+        self.assertEqual(content[249]['99'], '250-99')
+        self.assertEqual(content[0]['30'], '1-30')
+
+    def tearDown(self) -> None:
+        """Teardown the Client and the Fake Gateway."""
+
+        self.ibw_client.transport.close()
+        self.gateway.stop()
+
+
+class AsyncMarketDataTest(IsolatedAsyncioTestCase):
+
+    """Will perform a unit test for the async snapshot chunking."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway and the Client."""
+
+        self.gateway = FakeGateway().start()
+        self.gateway.route('GET', 'iserver/marketdata/snapshot', _snapshot)
+
+        self.ibw_client = AsyncIBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=AsyncIBTransport(pacing=False)
+        )
+        self.ibw_client.ib_gateway_path = self.gateway.url
+
+    async def test_large_request_is_chunked_and_merged(self):
+        """Ensure the async client chunks and merges the same way."""
+
+        conids = [str(conid) for conid in range(1, 11)]
+        content = await self.ibw_client.market_data(conids=conids, since=None, fields=[31, 84, 86], max_conids=4, max_fields=2)
+
+        self.assertEqual(len(self.gateway.requests), 6)
+        self.assertEqual([str(quote['conid']) for quote in content], conids)
+        self.assertEqual(content[9]['86'], '10-86')
+
+    async def asyncTearDown(self) -> None:
+        """Teardown the Client."""
+
+        await self.ibw_client.close()
+
+    def tearDown(self) -> None:
+        """Teardown the Fake Gateway."""
+
+        self.gateway.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
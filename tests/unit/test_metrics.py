@@ -0,0 +1,200 @@
+"""Unit test module for the request hooks and the metric exporters."""
+
+import unittest
+import requests
+
+from unittest import TestCase
+from unittest import IsolatedAsyncioTestCase
+from ibw.client import IBClient
+from ibw.async_client import AsyncIBClient
+from ibw.metrics import OpenTelemetryExporter
+from ibw.metrics import PrometheusExporter
+from ibw.metrics import endpoint_group
+from ibw.transport import AsyncIBTransport
+from ibw.transport import IBTransport
+from fake_gateway import FakeGateway
+
+
+class Span():
+
+    """Records what the exporter does with a span."""
+
+    def __init__(self, name: str, start_time: int, attributes: dict) -> None:
+        self.name = name
+        self.start_time = start_time
+        self.attributes = attributes
+        self.end_time = None
+        self.exceptions = []
+
+    def record_exception(self, exception: Exception) -> None:
+        self.exceptions.append(exception)
+
+    def set_status(self, status) -> None:
+        pass
+
+    def end(self, end_time: int) -> None:
+        self.end_time = end_time
+
+
+class Tracer():
+
+    """A tracer keeping every span it starts."""
+
+    def __init__(self) -> None:
+        self.spans = []
+
+    def start_span(self, name: str, start_time: int, attributes: dict) -> Span:
+        self.spans.append(Span(name=name, start_time=start_time, attributes=attributes))
+        return self.spans[-1]
+
+
+class RequestHooksTest(TestCase):
+
+    """Will perform a unit test for the request hooks of the client."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway and the Client."""
+
+        self.gateway = FakeGateway(latency=0.01).start()
+        self.gateway.route('GET', 'iserver/contract/265598/info', {'conid': 265598, 'symbol': 'AAPL'})
+        self.gateway.route('GET', 'portfolio/DU123456/summary', {'netliquidation': {'amount': 1000.0}})
+        self.gateway.route('GET', 'portfolio/DU654321/summary', {'error': 'down'}, status=503)
+        self.gateway.route('POST', 'iserver/account/DU123456/order', [{'order_id': '1'}])
+
+        self.ibw_client = IBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=IBTransport(pacing=False)
+        )
+        self.ibw_client.ib_gateway_path = self.gateway.url
+
+        self.events = []
+        self.ibw_client.add_request_hook(self.events.append)
+
+    def test_endpoint_groups(self):
+        """Ensure IDs are folded out of the endpoints."""
+
+        self.assertEqual(endpoint_group('portfolio/DU123456/positions/0'), 'portfolio/{id}/positions/{id}')
+        self.assertEqual(endpoint_group('/iserver/contract/265598/info'), 'iserver/contract/{id}/info')
+        self.assertEqual(endpoint_group('iserver/marketdata/snapshot'), 'iserver/marketdata/snapshot')
+
+    def test_events(self):
+        """Ensure every request is reported with its timings and sizes."""
+
+        self.ibw_client.contract_details(conid='265598')
+        self.ibw_client.contract_details(conid='265598')
+        self.ibw_client.place_order(account_id='DU123456', order={'conid': 265598, 'side': 'BUY', 'quantity': 1})
+
+        first, cached, order = self.events
+
+        self.assertEqual((first.group, first.status_code, first.cache_hit), ('iserver/contract/{id}/info', 200, False))
+        self.assertGreaterEqual(first.server, 0.01)
+        self.assertGreater(first.response_bytes, 0)
+        self.assertTrue(cached.cache_hit)
+        self.assertIsNone(cached.server)
+        self.assertGreater(order.request_bytes, 0)
+        self.assertGreaterEqual(first.end_ns - first.start_ns, first.elapsed * 1e9 - 1)
+
+    def test_errors_are_reported(self):
+        """Ensure failed requests are reported before the error is raised."""
+
+        with self.assertRaises(requests.HTTPError):
+            self.ibw_client.portfolio_account_summary(account_id='DU654321')
+
+        self.assertEqual(self.events[0].status_code, 503)
+        self.assertIsInstance(self.events[0].error, requests.HTTPError)
+
+    def test_removed_hook(self):
+        """Ensure removed hooks are no longer called."""
+
+        self.ibw_client.remove_request_hook(self.events.append)
+        self.ibw_client.portfolio_account_summary(account_id='DU123456')
+
+        self.assertEqual(self.events, [])
+
+    def test_prometheus(self):
+        """Ensure the exporter renders the Prometheus text format."""
+
+        exporter = PrometheusExporter(buckets=(0.001, 10.0))
+        self.ibw_client.add_request_hook(exporter)
+
+        self.ibw_client.contract_details(conid='265598')
+        self.ibw_client.contract_details(conid='265598')
+        with self.assertRaises(requests.HTTPError):
+            self.ibw_client.portfolio_account_summary(account_id='DU654321')
+
+        text = exporter.render()
+        labels = 'method="GET",endpoint="iserver/contract/{id}/info"'
+
+        self.assertIn('# TYPE ibw_request_duration_seconds histogram', text)
+        self.assertIn('ibw_request_duration_seconds_bucket{%s,le="10.0"} 2' % labels, text)
+        self.assertIn('ibw_request_duration_seconds_count{%s} 2' % labels, text)
+        self.assertIn('ibw_requests_total{%s,status="200"} 2' % labels, text)
+        self.assertIn('ibw_requests_total{method="GET",endpoint="portfolio/{id}/summary",status="503"} 1', text)
+        self.assertIn('ibw_cache_hits_total{%s} 1' % labels, text)
+        self.assertIn('ibw_request_phase_seconds_total{%s,phase="server"}' % labels, text)
+
+    def test_open_telemetry(self):
+        """Ensure every request is recorded as a span."""
+
+        tracer = Tracer()
+        self.ibw_client.add_request_hook(OpenTelemetryExporter(tracer=tracer))
+
+        self.ibw_client.contract_details(conid='265598')
+        with self.assertRaises(requests.HTTPError):
+            self.ibw_client.portfolio_account_summary(account_id='DU654321')
+
+        ok, failed = tracer.spans
+
+        self.assertEqual(ok.name, 'GET iserver/contract/{id}/info')
+        self.assertEqual(ok.attributes['http.status_code'], 200)
+        self.assertGreater(ok.end_time, ok.start_time)
+        self.assertEqual(len(failed.exceptions), 1)
+
+    def tearDown(self) -> None:
+        """Teardown the Client and the Fake Gateway."""
+
+        self.ibw_client.transport.close()
+        self.gateway.stop()
+
+
+class AsyncRequestHooksTest(IsolatedAsyncioTestCase):
+
+    """Will perform a unit test for the request hooks of the async client."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway and the Client."""
+
+        self.gateway = FakeGateway().start()
+        self.gateway.route('GET', 'portfolio/DU123456/summary', {'netliquidation': {'amount': 1000.0}})
+
+        self.ibw_client = AsyncIBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=AsyncIBTransport(pacing=False)
+        )
+        self.ibw_client.ib_gateway_path = self.gateway.url
+
+    async def test_events(self):
+        """Ensure the async client reports its requests."""
+
+        events = []
+        self.ibw_client.add_request_hook(events.append)
+        await self.ibw_client.portfolio_account_summary(account_id='DU123456')
+
+        self.assertEqual((events[0].group, events[0].status_code), ('portfolio/{id}/summary', 200))
+        self.assertGreater(events[0].transfer, 0.0)
+
+    async def asyncTearDown(self) -> None:
+        """Teardown the Client."""
+
+        await self.ibw_client.close()
+
+    def tearDown(self) -> None:
+        """Teardown the Fake Gateway."""
+
+        self.gateway.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
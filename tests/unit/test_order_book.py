@@ -0,0 +1,181 @@
+"""Unit test module for the order book."""
+
+import unittest
+import requests
+
+from unittest import TestCase
+from ibw.client import IBClient
+from ibw.order_book import CANCELLED
+from ibw.order_book import FILLED
+from ibw.order_book import PARTIALLY_FILLED
+from ibw.order_book import SUBMITTED
+from ibw.order_book import OrderBook
+from ibw.order_book import OrderEvent
+from ibw.transport import IBTransport
+from fake_gateway import FakeGateway
+
+
+def live_order(order_id: int, cOID: str, status: str, filled: float, remaining: float) -> dict:
+    """Builds one entry of a `get_live_orders` response."""
+
+    return {
+        'acct': 'DU123456',
+        'conid': 265598,
+        'ticker': 'AAPL',
+        'orderId': order_id,
+        'order_ref': cOID,
+        'side': 'BUY',
+        'orderType': 'LMT',
+        'price': '150.00',
+        'status': status,
+        'filledQuantity': filled,
+        'remainingQuantity': remaining
+    }
+
+
+class OrderBookTest(TestCase):
+
+    """Will perform a unit test for the OrderBook object."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway, the Client and the Book."""
+
+        self.orders = [live_order(1, 'limit-1', 'Submitted', 0, 10)]
+        self.trades = []
+
+        self.gateway = FakeGateway().start()
+        self.gateway.route('GET', 'iserver/account/orders', lambda request: {'orders': list(self.orders)})
+        self.gateway.route('GET', 'iserver/account/trades', lambda request: list(self.trades))
+
+        self.ibw_client = IBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=IBTransport(pacing=False)
+        )
+        self.ibw_client.ib_gateway_path = self.gateway.url
+
+        self.events = []
+        self.book = OrderBook(client=self.ibw_client, fast_interval=1.0, slow_interval=10.0)
+        self.book.add_callback(self.events.append)
+
+    def test_state_transitions(self):
+        """Ensure orders move from submitted to partially filled to filled."""
+
+        self.book.poll()
+        order = self.book.by_customer_order_id('limit-1')
+
+        self.assertEqual(order.state, SUBMITTED)
+        self.assertIs(self.book.get(1), order)
+
+        self.orders[0] = live_order(1, 'limit-1', 'Submitted', 4, 6)
+        self.trades.append({'execution_id': 'E1', 'order_ref': 'limit-1', 'size': '4', 'price': '150.00', 'side': 'B'})
+        self.book.poll()
+
+        self.orders[0] = live_order(1, 'limit-1', 'Filled', 10, 0)
+        self.trades.append({'execution_id': 'E2', 'order_ref': 'limit-1', 'size': '6', 'price': '149.90', 'side': 'B'})
+        self.book.poll()
+
+        states = [(event.old_state, event.new_state) for event in self.events if event.kind == OrderEvent.STATE]
+        fills = [event.fill.execution_id for event in self.events if event.kind == OrderEvent.FILL]
+
+        self.assertEqual(states, [(None, SUBMITTED), (SUBMITTED, PARTIALLY_FILLED), (PARTIALLY_FILLED, FILLED)])
+        self.assertEqual(fills, ['E1', 'E2'])
+        self.assertEqual([fill.size for fill in order.fills], [4.0, 6.0])
+        self.assertEqual(self.book.working, [])
+
+    def test_unchanged_polls_do_nothing(self):
+        """Ensure unchanged orders raise no events and don't poll trades."""
+
+        self.book.poll()
+        self.gateway.requests.clear()
+
+        self.assertEqual(self.book.poll(), [])
+        self.assertEqual([request.path for request in self.gateway.requests], ['iserver/account/orders'])
+
+    def test_cancelled_order(self):
+        """Ensure a cancel by the API is reported as cancelled."""
+
+        self.book.poll()
+        self.orders[0] = live_order(1, 'limit-1', 'ApiCancelled', 0, 10)
+        events = self.book.poll()
+
+        self.assertEqual([(event.old_state, event.new_state) for event in events], [(SUBMITTED, CANCELLED)])
+
+    def test_adaptive_interval(self):
+        """Ensure polling is fast while orders are working and slow otherwise."""
+
+        self.assertEqual(self.book.interval, 10.0)
+
+        self.book.track(customer_order_ids=['limit-1'])
+        self.assertEqual(self.book.interval, 1.0)
+
+        self.book.poll()
+        self.assertEqual(self.book.interval, 1.0)
+
+        self.orders[0] = live_order(1, 'limit-1', 'Filled', 10, 0)
+        self.book.poll()
+        self.assertEqual(self.book.interval, 10.0)
+
+    def test_failing_callback(self):
+        """Ensure a failing callback doesn't stop the others."""
+
+        self.book.add_callback(lambda event: 1 / 0)
+
+        with self.assertLogs(level='ERROR'):
+            self.book.poll()
+
+        self.assertEqual(len(self.events), 1)
+
+    def test_failed_trades_are_polled_again(self):
+        """Ensure executions missed by a failed `trades` call are fetched by the next polls."""
+
+        self.book.poll()
+
+        failures = [1]
+
+        def trades(request):
+            if failures:
+                failures.pop()
+                return 400, {'error': 'Bad Request'}, None
+            return list(self.trades)
+
+        self.gateway.route('GET', 'iserver/account/trades', trades)
+        self.orders[0] = live_order(1, 'limit-1', 'Filled', 10, 0)
+        self.trades.append({'execution_id': 'E1', 'order_ref': 'limit-1', 'size': '10', 'price': '150.00', 'side': 'B'})
+
+        with self.assertRaises(requests.HTTPError):
+            self.book.poll()
+
+        events = self.book.poll()
+        self.assertEqual([event.fill.execution_id for event in events if event.kind == OrderEvent.FILL], ['E1'])
+
+        self.gateway.requests.clear()
+        self.book.poll()
+        self.assertEqual([request.path for request in self.gateway.requests], ['iserver/account/orders'])
+
+    def test_fill_before_its_order(self):
+        """Ensure a fill reported before its order is attached to it once the order shows up."""
+
+        self.orders.clear()
+        self.trades.append({'execution_id': 'E1', 'order_ref': 'limit-1', 'size': '10', 'price': '150.00', 'side': 'B'})
+        self.book.poll(trades=True)
+
+        self.orders.append(live_order(1, 'limit-1', 'Filled', 10, 0))
+        self.book.poll()
+        order = self.book.get(1)
+
+        self.assertEqual([fill.execution_id for fill in order.fills], ['E1'])
+
+        self.gateway.requests.clear()
+        self.book.poll()
+        self.assertEqual([request.path for request in self.gateway.requests], ['iserver/account/orders'])
+
+    def tearDown(self) -> None:
+        """Teardown the Client and the Fake Gateway."""
+
+        self.ibw_client.transport.close()
+        self.gateway.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
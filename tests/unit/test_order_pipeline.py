@@ -0,0 +1,207 @@
+"""Unit test module for the order submission pipeline."""
+
+import time
+import itertools
+import unittest
+
+from unittest import TestCase
+from unittest import IsolatedAsyncioTestCase
+from ibw.client import IBClient
+from ibw.async_client import AsyncIBClient
+from ibw.order_book import OrderBook
+from ibw.order_pipeline import ACKNOWLEDGED
+from ibw.order_pipeline import DECLINED
+from ibw.order_pipeline import FAILED
+from ibw.order_pipeline import OrderPipeline
+from ibw.order_pipeline import ReplyPolicy
+from ibw.order_pipeline import latency_summary
+from ibw.transport import AsyncIBTransport
+from ibw.transport import IBTransport
+from fake_gateway import FakeGateway
+
+# Prompts the fake gateway asks, keyed by the order type that triggers them.
+PROMPTS = {
+    'MKT': {'messageIds': ['o354'], 'message': ['You are not subscribed to market data.']},
+    'STP': {'messageIds': ['o10153'], 'message': ['Stop orders may be triggered by a price gap.']}
+}
+
+
+def limit_order(cOID: str, order_type: str = 'LMT') -> dict:
+    """Builds a minimal order payload."""
+
+    return {'conid': 265598, 'cOID': cOID, 'orderType': order_type, 'side': 'BUY', 'quantity': 1, 'tif': 'DAY'}
+
+
+class Gateway():
+
+    """Answers order requests, asking a prompt first for some order types."""
+
+    def __init__(self, gateway: FakeGateway) -> None:
+        self.counter = itertools.count(1)
+        self.pending = {}
+        self.replies = []
+
+        gateway.route('POST', 'iserver/account/DU123456/order', self.place)
+        gateway.route('POST', 'iserver/account/DU123456/orders', self.place)
+
+        for reply_id in range(1, 20):
+            gateway.route('POST', 'iserver/reply/R{}'.format(reply_id), self.reply)
+
+    def _ack(self, orders: list) -> list:
+        return [{'order_id': str(1000 + index), 'order_status': 'Submitted'} for index, order in enumerate(orders)]
+
+    def place(self, request) -> list:
+        body = request.json
+        orders = body['orders'] if 'orders' in body else [body]
+
+        if orders[0]['orderType'] == 'REJ':
+            return {'error': 'Order rejected.'}
+
+        prompt = PROMPTS.get(orders[0]['orderType'])
+        if prompt is None:
+            return self._ack(orders=orders)
+
+        reply_id = 'R{}'.format(next(self.counter))
+        self.pending[reply_id] = orders
+        return [dict(prompt, id=reply_id)]
+
+    def reply(self, request) -> list:
+        reply_id = request.path.rsplit('/', 1)[-1]
+        self.replies.append((reply_id, request.json['confirmed']))
+
+        orders = self.pending.pop(reply_id)
+        if not request.json['confirmed']:
+            return {'error': 'Order cancelled.'}
+
+        return self._ack(orders=orders)
+
+
+class OrderPipelineTest(TestCase):
+
+    """Will perform a unit test for the OrderPipeline object."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway, the Client and the Pipeline."""
+
+        self.gateway = FakeGateway(latency=0.05).start()
+        self.fake = Gateway(gateway=self.gateway)
+
+        self.ibw_client = IBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=IBTransport(pacing=False)
+        )
+        self.ibw_client.ib_gateway_path = self.gateway.url
+
+        self.pipeline = OrderPipeline(
+            client=self.ibw_client,
+            account_id='DU123456',
+            policy=ReplyPolicy(message_ids=['o354'])
+        )
+
+    def test_whitelisted_prompts_are_confirmed(self):
+        """Ensure whitelisted prompts are confirmed and others declined."""
+
+        results = self.pipeline.submit(orders=[
+            limit_order('order-1'),
+            limit_order('order-2', order_type='MKT'),
+            limit_order('order-3', order_type='STP')
+        ])
+
+        self.assertEqual([result.status for result in results], [ACKNOWLEDGED, ACKNOWLEDGED, DECLINED])
+        self.assertEqual([result.round_trips for result in results], [1, 2, 2])
+        self.assertEqual(results[1].confirmed, ['o354'])
+        self.assertEqual(results[2].declined, ['o10153'])
+        self.assertEqual(results[0].order_id, '1000')
+        self.assertEqual(sorted(confirmed for reply_id, confirmed in self.fake.replies), [False, True])
+
+    def test_orders_are_sent_concurrently(self):
+        """Ensure a batch takes about as long as its slowest order."""
+
+        start = time.perf_counter()
+        results = self.pipeline.submit(orders=[limit_order('order-{}'.format(index)) for index in range(5)])
+
+        self.assertTrue(all(result.ok for result in results))
+        self.assertLess(time.perf_counter() - start, 0.2)
+
+        summary = latency_summary(results=results)
+        self.assertEqual(summary['acknowledged'], 5)
+        self.assertGreaterEqual(summary['median'], 0.05)
+
+    def test_brackets_are_sent_together(self):
+        """Ensure a list in the batch is placed with one `place_orders` request."""
+
+        results = self.pipeline.submit(orders=[[limit_order('parent'), dict(limit_order('child'), parentId='parent')]])
+        requests = [request for request in self.gateway.requests if request.path.endswith('/orders')]
+
+        self.assertEqual(results[0].order_ids, ['1000', '1001'])
+        self.assertEqual(results[0].customer_order_ids, ['parent', 'child'])
+        self.assertEqual(len(requests[0].json['orders']), 2)
+
+    def test_errors_are_reported(self):
+        """Ensure a rejected order doesn't fail the batch."""
+
+        results = self.pipeline.submit(orders=[limit_order('order-1', order_type='REJ'), limit_order('order-2')])
+
+        self.assertEqual(results[0].status, FAILED)
+        self.assertIn('rejected', str(results[0].error))
+        self.assertTrue(results[1].ok)
+
+    def test_book_tracks_new_orders(self):
+        """Ensure orders sent are tracked by the order book."""
+
+        book = OrderBook(client=self.ibw_client, fast_interval=1.0, slow_interval=10.0)
+        self.pipeline.book = book
+        self.pipeline.submit(orders=[limit_order('order-1')])
+
+        self.assertEqual(book.interval, 1.0)
+
+    def tearDown(self) -> None:
+        """Teardown the Client and the Fake Gateway."""
+
+        self.ibw_client.transport.close()
+        self.gateway.stop()
+
+
+class AsyncOrderPipelineTest(IsolatedAsyncioTestCase):
+
+    """Will perform a unit test for the OrderPipeline object with the async client."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway and the Client."""
+
+        self.gateway = FakeGateway(latency=0.05).start()
+        self.fake = Gateway(gateway=self.gateway)
+
+        self.ibw_client = AsyncIBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=AsyncIBTransport(pacing=False)
+        )
+        self.ibw_client.ib_gateway_path = self.gateway.url
+
+    async def test_submit_async(self):
+        """Ensure the async pipeline confirms prompts concurrently."""
+
+        pipeline = OrderPipeline(client=self.ibw_client, account_id='DU123456', policy=ReplyPolicy(patterns=[r'market data']))
+
+        start = time.perf_counter()
+        results = await pipeline.submit_async(orders=[limit_order('order-{}'.format(index), order_type='MKT') for index in range(5)])
+
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual([result.key for result in results], [0, 1, 2, 3, 4])
+        self.assertLess(time.perf_counter() - start, 0.3)
+
+    async def asyncTearDown(self) -> None:
+        """Teardown the Client."""
+
+        await self.ibw_client.close()
+
+    def tearDown(self) -> None:
+        """Teardown the Fake Gateway."""
+
+        self.gateway.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
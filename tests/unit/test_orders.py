@@ -0,0 +1,154 @@
+"""Unit test module for the order model."""
+
+import pathlib
+import unittest
+
+from unittest import TestCase
+from ibw.client import IBClient
+from ibw.orders import IBOrder
+from ibw.orders import TEMPLATES
+from ibw.orders import OrderTemplate
+from ibw.orders import bracket
+from ibw.orders import load_templates
+from ibw.transport import IBTransport
+from fake_gateway import FakeGateway
+
+SAMPLES = pathlib.Path(__file__).parents[2].joinpath('samples/orders')
+
+
+class IBOrderTest(TestCase):
+
+    """Will perform a unit test for the IBOrder object."""
+
+    def test_payload(self):
+        """Ensure the payload is keyed like the gateway expects and skips unset attributes."""
+
+        order = TEMPLATES['stop_limit'].create(conid=76792991, side='BUY', quantity=10, price=617.33, aux_price=617.35)
+
+        self.assertEqual(order.create_order(), {
+            'conid': 76792991,
+            'orderType': 'STOP_LIMIT',
+            'outsideRTH': False,
+            'price': 617.33,
+            'auxPrice': 617.35,
+            'side': 'BUY',
+            'tif': 'DAY',
+            'quantity': 10,
+            'useAdaptive': False,
+            'isClose': False
+        })
+
+    def test_validation(self):
+        """Ensure invalid orders are refused when they're built."""
+
+        with self.assertRaisesRegex(ValueError, 'requires `price`'):
+            TEMPLATES['limit'].create(conid=265598, side='BUY', quantity=1)
+
+        with self.assertRaisesRegex(ValueError, 'side'):
+            IBOrder(conid=265598, side='HOLD', quantity=1)
+
+        with self.assertRaisesRegex(ValueError, 'quantity'):
+            IBOrder(conid=265598, side='BUY', quantity=0)
+
+        with self.assertRaisesRegex(ValueError, 'Unknown order field'):
+            IBOrder.from_dict({'conid': 265598, 'side': 'BUY', 'quantity': 1, 'colour': 'red'})
+
+    def test_template_checks(self):
+        """Ensure a template is checked once, and its orders for the attributes they're given."""
+
+        with self.assertRaisesRegex(ValueError, 'time in force'):
+            OrderTemplate(name='limit', order_type='LMT', tif='NEVER')
+
+        order = TEMPLATES['limit'].create(conid=265598, side='BUY', quantity=10, price=150.0)
+        self.assertEqual(
+            order.create_order(),
+            IBOrder(conid=265598, side='BUY', quantity=10, order_type='LMT', price=150.0).create_order()
+        )
+
+        with self.assertRaisesRegex(ValueError, 'time in force'):
+            TEMPLATES['limit'].create(conid=265598, side='BUY', quantity=10, price=150.0, tif='NEVER')
+
+        with self.assertRaisesRegex(ValueError, 'requires `aux_price`'):
+            TEMPLATES['limit'].create(conid=265598, side='BUY', quantity=10, order_type='STOP_LIMIT', price=150.0)
+
+    def test_slots(self):
+        """Ensure orders don't take arbitrary attributes."""
+
+        order = IBOrder(conid=265598, side='BUY', quantity=1)
+
+        with self.assertRaises(AttributeError):
+            order.colour = 'red'
+
+    def test_samples_compile(self):
+        """Ensure every sample order file compiles to templates."""
+
+        limit = load_templates(path=SAMPLES.joinpath('limit_orders.jsonc'))
+        trailing = load_templates(path=SAMPLES.joinpath('trailing_stop_order.jsonc'))
+        brackets = load_templates(path=SAMPLES.joinpath('bracket_orders.jsonc'))
+
+        self.assertEqual(len(limit), 4)
+        self.assertEqual(limit[0].create().create_order()['price'], 5.00)
+        self.assertNotIn('cOID', limit[0].create().create_order())
+        self.assertEqual(trailing[0].create(conid=76792991).create_order()['trailingType'], '%')
+        self.assertEqual(brackets[0].required, ('conid', 'quantity', 'price', 'aux_price'))
+
+        for path in SAMPLES.glob('*.jsonc'):
+            self.assertTrue(load_templates(path=path))
+
+    def test_bracket_links(self):
+        """Ensure the children of a bracket close the parent and point to it."""
+
+        entry = TEMPLATES['limit'].create(conid=265598, side='BUY', quantity=10, price=150.0)
+        orders = bracket(parent=entry, take_profit=160.0, stop_loss=145.0)
+        parent, take_profit, stop_loss = [order.create_order() for order in orders]
+
+        self.assertIsNotNone(parent['cOID'])
+        self.assertEqual(take_profit['parentId'], parent['cOID'])
+        self.assertEqual(stop_loss['parentId'], parent['cOID'])
+        self.assertEqual((take_profit['side'], take_profit['orderType'], take_profit['price']), ('SELL', 'LMT', 160.0))
+        self.assertEqual((stop_loss['side'], stop_loss['orderType'], stop_loss['quantity']), ('SELL', 'STP', 10))
+
+
+class PlaceOrderTest(TestCase):
+
+    """Will perform a unit test for placing IBOrder objects with the client."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway and the Client."""
+
+        self.gateway = FakeGateway().start()
+        self.gateway.route('POST', 'iserver/account/DU123456/order', [{'order_id': '1', 'order_status': 'Submitted'}])
+        self.gateway.route('POST', 'iserver/account/DU123456/orders', [{'order_id': '1', 'order_status': 'Submitted'}])
+
+        self.ibw_client = IBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=IBTransport(pacing=False)
+        )
+        self.ibw_client.ib_gateway_path = self.gateway.url
+
+    def test_place_order(self):
+        """Ensure an IBOrder is sent as its payload."""
+
+        order = TEMPLATES['market'].create(conid=265598, side='SELL', quantity=3, customer_order_id='market-1')
+        self.ibw_client.place_order(account_id='DU123456', order=order)
+
+        self.assertEqual(self.gateway.requests[0].json, order.create_order())
+
+    def test_place_bracket(self):
+        """Ensure a bracket is sent in one `place_orders` request."""
+
+        entry = TEMPLATES['limit'].create(conid=265598, side='BUY', quantity=10, price=150.0)
+        self.ibw_client.place_orders(account_id='DU123456', orders=bracket(parent=entry, stop_loss=145.0))
+
+        self.assertEqual([order['orderType'] for order in self.gateway.requests[0].json['orders']], ['LMT', 'STP'])
+
+    def tearDown(self) -> None:
+        """Teardown the Client and the Fake Gateway."""
+
+        self.ibw_client.transport.close()
+        self.gateway.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
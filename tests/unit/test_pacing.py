@@ -0,0 +1,154 @@
+"""Unit test module for the request scheduler.
+
+Checks the token bucket math with a fake clock, and the pacing of real
+requests sent to a local fake gateway.
+"""
+
+import time
+import unittest
+
+from unittest import TestCase
+from ibw.client import IBClient
+from ibw.pacing import PacingTimeout
+from ibw.pacing import RequestScheduler
+from ibw.pacing import TokenBucket
+from ibw.transport import IBTransport
+from fake_gateway import FakeGateway
+
+
+class FakeClock():
+
+    """A clock that only moves when told to."""
+
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TokenBucketTest(TestCase):
+
+    """Will perform a unit test for the token bucket."""
+
+    def test_burst_then_rate(self):
+        """Ensure the burst goes out at once and the rest is spread at the rate."""
+
+        bucket = TokenBucket(rate=2.0, burst=3)
+        slots = [bucket.reserve(at=10.0) for _ in range(5)]
+
+        self.assertEqual(slots, [10.0, 10.0, 10.0, 10.5, 11.0])
+
+    def test_refills_over_time(self):
+        """Ensure an idle bucket allows a new burst."""
+
+        bucket = TokenBucket(rate=1.0, burst=2)
+        bucket.reserve(at=0.0)
+        bucket.reserve(at=0.0)
+
+        self.assertEqual(bucket.reserve(at=5.0), 5.0)
+
+
+class RequestSchedulerTest(TestCase):
+
+    """Will perform a unit test for the request scheduler."""
+
+    def setUp(self) -> None:
+        """Set up the Scheduler with a fake clock."""
+
+        self.clock = FakeClock()
+        self.scheduler = RequestScheduler(
+            global_limit=(10.0, 2),
+            endpoint_limits={r'/iserver/marketdata/history': (1.0, 1)},
+            clock=self.clock
+        )
+
+    def test_endpoint_bucket_is_stricter(self):
+        """Ensure a matching endpoint is paced by its own bucket."""
+
+        url = 'https://localhost:5000/v1/portal/iserver/marketdata/history'
+        waits = [self.scheduler.reserve(url=url)[0] for _ in range(3)]
+
+        self.assertEqual(waits, [0.0, 1.0, 2.0])
+        self.assertEqual(self.scheduler.stats()['/iserver/marketdata/history']['max_queue_depth'], 2)
+
+    def test_global_bucket(self):
+        """Ensure every other endpoint is paced by the global bucket."""
+
+        url = 'https://localhost:5000/v1/portal/iserver/accounts'
+        waits = [self.scheduler.reserve(url=url)[0] for _ in range(4)]
+
+        self.assertEqual(waits[:2], [0.0, 0.0])
+        self.assertAlmostEqual(waits[2], 0.1)
+        self.assertAlmostEqual(waits[3], 0.2)
+        self.assertEqual(self.scheduler.queue_depth, 2)
+        self.assertEqual(self.scheduler.stats()['global']['delayed'], 2)
+
+    def test_max_wait(self):
+        """Ensure a request over `max_wait` raises without taking a slot."""
+
+        self.scheduler.max_wait = 0.5
+        url = 'https://localhost:5000/v1/portal/iserver/marketdata/history'
+        self.scheduler.reserve(url=url)
+
+        with self.assertRaises(PacingTimeout):
+            self.scheduler.reserve(url=url)
+
+        self.clock.now += 1.0
+        self.assertEqual(self.scheduler.reserve(url=url)[0], 0.0)
+
+    def test_slow_endpoints(self):
+        """Ensure the slowest endpoints queue by default, and raise once `max_wait` is set."""
+
+        for path in ('iserver/scanner/params', 'sso/validate'):
+            url = 'https://localhost:5000/v1/portal/' + path
+
+            scheduler = RequestScheduler(clock=self.clock)
+            scheduler.reserve(url=url)
+            self.assertGreaterEqual(scheduler.reserve(url=url)[0], 60.0)
+
+            scheduler = RequestScheduler(max_wait=30.0, clock=self.clock)
+            scheduler.reserve(url=url)
+            with self.assertRaises(PacingTimeout):
+                scheduler.reserve(url=url)
+
+
+class TransportPacingTest(TestCase):
+
+    """Will perform a unit test for pacing through the transport."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway and the Client."""
+
+        self.gateway = FakeGateway().start()
+        self.gateway.route('GET', 'iserver/marketdata/history', {'data': []})
+
+        self.scheduler = RequestScheduler(endpoint_limits={r'/iserver/marketdata/history': (20.0, 1)})
+        self.ibw_client = IBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=IBTransport(scheduler=self.scheduler)
+        )
+        self.ibw_client.ib_gateway_path = self.gateway.url
+
+    def test_requests_are_smoothed(self):
+        """Ensure a burst is queued and sent at the endpoint rate instead of failing."""
+
+        start = time.perf_counter()
+        results = self.ibw_client.map('market_data_history', ['1', '2', '3', '4', '5'], period='1d', bar='5min')
+        elapsed = time.perf_counter() - start
+
+        self.assertTrue(all(result.ok for result in results.values()))
+        self.assertGreaterEqual(elapsed, 4 / 20.0)
+        self.assertEqual(self.scheduler.stats()['/iserver/marketdata/history']['requests'], 5)
+        self.assertEqual(self.scheduler.queue_depth, 0)
+
+    def tearDown(self) -> None:
+        """Teardown the Client and the Fake Gateway."""
+
+        self.ibw_client.transport.close()
+        self.gateway.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+"""Unit test module for the incremental snapshot poller.
+
+Runs the poller against a local fake gateway that honours the `since`
+parameter.
+"""
+
+import unittest
+
+from unittest import TestCase
+from ibw.client import IBClient
+from ibw.polling import SnapshotPoller
+from ibw.transport import IBTransport
+from fake_gateway import FakeGateway
+
+
+class SnapshotPollerTest(TestCase):
+
+    """Will perform a unit test for the snapshot poller."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway, the Client and the Poller."""
+
+        self.quotes = {
+            '265598': {'conid': 265598, '_updated': 1000, '31': '150.0', '84': '149.9'},
+            '8314': {'conid': 8314, '_updated': 1000, '31': '120.0', '84': '119.9'},
+        }
+
+        self.gateway = FakeGateway().start()
+        self.gateway.route('GET', 'iserver/marketdata/snapshot', self._snapshot)
+
+        self.ibw_client = IBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=IBTransport(pacing=False)
+        )
+        self.ibw_client.ib_gateway_path = self.gateway.url
+
+        self.poller = SnapshotPoller(client=self.ibw_client, conids=['265598', '8314'], fields=[31, 84])
+
+    def _snapshot(self, request):
+        """Returns only the quotes updated after `since`."""
+
+        since = int(request.query.get('since', 0))
+
+        return [
+            self.quotes[conid] for conid in request.query['conids'].split(',')
+            if self.quotes[conid]['_updated'] > since
+        ]
+
+    def test_first_poll_is_a_full_snapshot(self):
+        """Ensure unseen conids are requested without `since`."""
+
+        changes = self.poller.poll()
+
+        self.assertNotIn('since', self.gateway.requests[0].query)
+        self.assertEqual(changes['265598'], {'31': '150.0', '84': '149.9'})
+        self.assertEqual(self.poller.get('8314')['84'], '119.9')
+
+    def test_next_polls_only_return_changes(self):
+        """Ensure later polls send `since` and return just the changed fields."""
+
+        self.poller.poll()
+
+        # Nothing changed.
+        self.assertEqual(self.poller.poll(), {})
+        self.assertEqual(self.gateway.requests[-1].query['since'], '1000')
+
+        # Only one field of one conid changed.
+        self.quotes['8314'] = dict(self.quotes['8314'], _updated=2000, **{'31': '121.0'})
+        changes = self.poller.poll()
+
+        self.assertEqual(changes, {'8314': {'31': '121.0'}})
+        self.assertEqual(self.poller.table['8314'], {'31': '121.0', '84': '119.9'})
+
+    def test_added_conids_get_a_full_snapshot(self):
+        """Ensure a conid added later is fetched in full alongside the delta request."""
+
+        self.poller.poll()
+        self.quotes['4815747'] = {'conid': 4815747, '_updated': 500, '31': '10.0'}
+        self.poller.add(conids=['4815747'])
+
+        changes = self.poller.poll()
+
+        self.assertEqual(changes, {'4815747': {'31': '10.0'}})
+        self.assertEqual(self.gateway.requests[-2].query['conids'], '4815747')
+
+        self.poller.remove(conids=['265598'])
+        self.assertEqual(self.poller.conids, ['8314', '4815747'])
+
+    def tearDown(self) -> None:
+        """Teardown the Client and the Fake Gateway."""
+
+        self.ibw_client.transport.close()
+        self.gateway.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
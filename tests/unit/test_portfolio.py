@@ -0,0 +1,377 @@
+"""Unit test module for the portfolio helpers."""
+
+import time
+import unittest
+import requests
+
+from unittest import TestCase
+from unittest import IsolatedAsyncioTestCase
+from ibw.client import IBClient
+from ibw.async_client import AsyncIBClient
+from ibw.portfolio import Position
+from ibw.portfolio import PortfolioAggregator
+from ibw.portfolio import PositionEvent
+from ibw.portfolio import PositionTracker
+from ibw.portfolio import aiter_positions
+from ibw.portfolio import iter_positions
+from ibw.transport import AsyncIBTransport
+from ibw.transport import IBTransport
+from fake_gateway import FakeGateway
+
+
+def route_positions(gateway: FakeGateway, account_id: str, count: int, pages: int = 6) -> None:
+    """Serves `count` positions for an account, 30 to a page."""
+
+    positions = [
+        {
+            'acctId': account_id,
+            'conid': 1000 + index,
+            'contractDesc': 'SYM{}'.format(index),
+            'assetClass': 'STK',
+            'currency': 'USD',
+            'position': float(index + 1),
+            'mktPrice': 10.0,
+            'mktValue': 10.0 * (index + 1),
+            'avgCost': 9.0,
+            'unrealizedPnl': 1.0 * (index + 1),
+            'realizedPnl': 0.0
+        }
+        for index in range(count)
+    ]
+
+    for page in range(pages):
+        gateway.route(
+            'GET',
+            'portfolio/{}/positions/{}'.format(account_id, page),
+            positions[page * 30:(page + 1) * 30]
+        )
+
+
+def position_pages(gateway: FakeGateway) -> list:
+    return [request.path for request in gateway.requests if '/positions/' in request.path]
+
+
+class IterPositionsTest(TestCase):
+
+    """Will perform a unit test for the paginated position iterator."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway and the Client."""
+
+        self.gateway = FakeGateway(latency=0.05).start()
+        route_positions(gateway=self.gateway, account_id='DU123456', count=75)
+        route_positions(gateway=self.gateway, account_id='DU654321', count=60)
+
+        self.ibw_client = IBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=IBTransport(pacing=False)
+        )
+        self.ibw_client.ib_gateway_path = self.gateway.url
+
+    def test_yields_every_position(self):
+        """Ensure every page is read and the iteration stops at the last one."""
+
+        positions = list(iter_positions(client=self.ibw_client, account_id='DU123456'))
+
+        self.assertEqual(len(positions), 75)
+        self.assertIsInstance(positions[0], Position)
+        self.assertEqual(positions[-1].key, ('DU123456', 1074))
+        self.assertEqual(positions[-1].market_value, 750.0)
+
+    def test_full_last_page(self):
+        """Ensure an account filling its last page stops at the empty page after it."""
+
+        positions = list(iter_positions(client=self.ibw_client, account_id='DU654321', compact=False))
+
+        self.assertEqual(len(positions), 60)
+        self.assertIsInstance(positions[0], dict)
+
+    def test_pages_are_prefetched(self):
+        """Ensure the next pages are requested while the first is read."""
+
+        start = time.perf_counter()
+        positions = iter_positions(client=self.ibw_client, account_id='DU123456', prefetch=2)
+        next(positions)
+        first = time.perf_counter() - start
+
+        list(positions)
+        elapsed = time.perf_counter() - start
+
+        self.assertLess(first, 0.15)
+        self.assertLess(elapsed, 0.15)
+        self.assertLessEqual(len(position_pages(self.gateway)), 5)
+
+    def test_stopping_early(self):
+        """Ensure breaking out of the loop stops requesting pages."""
+
+        for position in iter_positions(client=self.ibw_client, account_id='DU123456', prefetch=1):
+            break
+
+        time.sleep(0.2)
+        self.assertLessEqual(len(position_pages(self.gateway)), 3)
+
+    def tearDown(self) -> None:
+        """Teardown the Client and the Fake Gateway."""
+
+        self.ibw_client.transport.close()
+        self.gateway.stop()
+
+
+class AsyncIterPositionsTest(IsolatedAsyncioTestCase):
+
+    """Will perform a unit test for the async paginated position iterator."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway and the Client."""
+
+        self.gateway = FakeGateway(latency=0.05).start()
+        route_positions(gateway=self.gateway, account_id='DU123456', count=75)
+
+        self.ibw_client = AsyncIBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=AsyncIBTransport(pacing=False)
+        )
+        self.ibw_client.ib_gateway_path = self.gateway.url
+
+    async def test_yields_every_position(self):
+        """Ensure the async iterator reads every page concurrently."""
+
+        start = time.perf_counter()
+        positions = [position async for position in aiter_positions(client=self.ibw_client, account_id='DU123456')]
+
+        self.assertEqual(len(positions), 75)
+        self.assertEqual(positions[0].conid, 1000)
+        self.assertLess(time.perf_counter() - start, 0.15)
+
+    async def asyncTearDown(self) -> None:
+        """Teardown the Client."""
+
+        await self.ibw_client.close()
+
+    def tearDown(self) -> None:
+        """Teardown the Fake Gateway."""
+
+        self.gateway.stop()
+
+
+class PortfolioAggregatorTest(TestCase):
+
+    """Will perform a unit test for the PortfolioAggregator object."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway and the Client."""
+
+        self.gateway = FakeGateway(latency=0.02).start()
+        self.net_liquidation = {'DU000001': 1000.0, 'DU000002': 2000.0, 'DU000003': 3000.0}
+
+        self.gateway.route('GET', 'portfolio/accounts', [{'id': 'DU000001'}])
+        self.gateway.route('GET', 'portfolio/subaccounts', [{'id': 'DU000002'}, {'id': 'DU000003'}])
+
+        for account_id in self.net_liquidation:
+            route_positions(gateway=self.gateway, account_id=account_id, count=2, pages=1)
+            self.gateway.route(
+                'GET',
+                'portfolio/{}/summary'.format(account_id),
+                lambda request, account_id=account_id: {
+                    'netliquidation': {'amount': self.net_liquidation[account_id], 'currency': 'USD', 'timestamp': time.time()}
+                }
+            )
+            self.gateway.route(
+                'GET',
+                'portfolio/{}/ledger'.format(account_id),
+                {'USD': {'cashbalance': 100.0, 'currency': 'USD'}, 'BASE': {'cashbalance': 100.0}}
+            )
+            self.gateway.route(
+                'GET',
+                'portfolio/{}/allocation'.format(account_id),
+                {'assetClass': {'long': {'STK': 30.0}, 'short': {}}}
+            )
+
+        self.ibw_client = IBClient(
+            username='PAPER_USERNAME',
+            account='DU000001',
+            transport=IBTransport(pacing=False)
+        )
+        self.ibw_client.ib_gateway_path = self.gateway.url
+        self.aggregator = PortfolioAggregator(client=self.ibw_client)
+
+    def test_consolidated_view(self):
+        """Ensure every account and sub account is added up."""
+
+        changed = self.aggregator.refresh()
+        view = self.aggregator.view
+
+        self.assertEqual(changed, ['DU000001', 'DU000002', 'DU000003'])
+        self.assertEqual(view.totals['netliquidation'], 6000.0)
+        self.assertEqual(view.cash, {'USD': {'cashbalance': 300.0}})
+        self.assertEqual(view.allocation['assetClass']['long']['STK'], 90.0)
+        self.assertEqual(view.positions[1001]['position'], 6.0)
+        self.assertEqual(view.positions[1001]['accounts'], ['DU000001', 'DU000002', 'DU000003'])
+
+    def test_requests_run_concurrently(self):
+        """Ensure accounts are refreshed at the same time instead of in turn."""
+
+        start = time.perf_counter()
+        self.aggregator.refresh()
+
+        # Discovery, summaries with positions, and details are three rounds, not 3 accounts x 5 calls.
+        self.assertLess(time.perf_counter() - start, 0.2)
+
+    def test_only_changed_accounts_are_refreshed(self):
+        """Ensure only accounts whose positions changed have their details requested."""
+
+        self.aggregator.refresh()
+        self.gateway.requests.clear()
+
+        route_positions(gateway=self.gateway, account_id='DU000002', count=3, pages=1)
+        changed = self.aggregator.refresh()
+
+        paths = sorted(request.path for request in self.gateway.requests)
+
+        self.assertEqual(changed, ['DU000002'])
+        self.assertEqual(self.aggregator.view.positions[1002]['accounts'], ['DU000002'])
+        self.assertEqual([path for path in paths if path.endswith(('/ledger', '/allocation'))], [
+            'portfolio/DU000002/allocation',
+            'portfolio/DU000002/ledger'
+        ])
+
+    def test_market_moves_are_not_changes(self):
+        """Ensure moving values update the view without counting as a change."""
+
+        self.aggregator.refresh()
+        self.gateway.requests.clear()
+
+        self.net_liquidation['DU000002'] = 2500.0
+        changed = self.aggregator.refresh()
+
+        paths = sorted(request.path for request in self.gateway.requests)
+
+        self.assertEqual(changed, [])
+        self.assertEqual(self.aggregator.view.totals['netliquidation'], 6500.0)
+        self.assertEqual(self.aggregator.view.cash, {'USD': {'cashbalance': 300.0}})
+        self.assertEqual(len(paths), 6)
+        self.assertFalse([path for path in paths if path.endswith(('/ledger', '/allocation'))])
+
+    def tearDown(self) -> None:
+        """Teardown the Client and the Fake Gateway."""
+
+        self.ibw_client.transport.close()
+        self.gateway.stop()
+
+
+class PositionTrackerTest(TestCase):
+
+    """Will perform a unit test for the PositionTracker object."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway, the Client and the Tracker."""
+
+        self.gateway = FakeGateway().start()
+        self.held = {
+            'DU000001': {1001: 10.0, 1002: 20.0},
+            'DU000002': {1001: 5.0}
+        }
+
+        for account_id in self.held:
+            self.gateway.route(
+                'GET',
+                'portfolio/{}/positions/0'.format(account_id),
+                lambda request, account_id=account_id: [
+                    {'acctId': account_id, 'conid': conid, 'position': position, 'mktValue': position * 10}
+                    for conid, position in self.held[account_id].items()
+                ]
+            )
+            self.gateway.route('POST', 'portfolio/{}/positions/invalidate'.format(account_id), {'message': 'success'})
+            self.gateway.route(
+                'GET',
+                'portfolio/{}/position/1002'.format(account_id),
+                lambda request, account_id=account_id: [
+                    {'acctId': account_id, 'conid': 1002, 'position': self.held[account_id][1002]}
+                ] if 1002 in self.held[account_id] else []
+            )
+
+        self.ibw_client = IBClient(
+            username='PAPER_USERNAME',
+            account='DU000001',
+            transport=IBTransport(pacing=False)
+        )
+        self.ibw_client.ib_gateway_path = self.gateway.url
+
+        self.events = []
+        self.tracker = PositionTracker(client=self.ibw_client, account_ids=['DU000001', 'DU000002'])
+        self.tracker.add_callback(self.events.append)
+
+    def test_first_refresh_adds_everything(self):
+        """Ensure the first refresh reports every position as added."""
+
+        events = self.tracker.refresh()
+
+        self.assertEqual(sorted(event.key for event in events), [('DU000001', 1001), ('DU000001', 1002), ('DU000002', 1001)])
+        self.assertTrue(all(event.kind == PositionEvent.ADDED for event in events))
+        self.assertEqual(len(self.events), 3)
+        self.assertEqual(self.tracker.get('DU000002', 1001).position, 5.0)
+
+    def test_only_invalidated_accounts_are_fetched(self):
+        """Ensure a refresh skips accounts nothing happened to."""
+
+        self.tracker.refresh()
+        self.gateway.requests.clear()
+
+        self.assertEqual(self.tracker.refresh(), [])
+        self.assertEqual(self.gateway.requests, [])
+
+        self.held['DU000001'][1001] = 15.0
+        del self.held['DU000001'][1002]
+        self.held['DU000001'][1003] = 1.0
+        self.tracker.invalidate(account_id='DU000001')
+
+        events = {event.key: event for event in self.tracker.refresh()}
+        paths = [request.path for request in self.gateway.requests]
+
+        self.assertEqual(paths, ['portfolio/DU000001/positions/invalidate', 'portfolio/DU000001/positions/0'])
+        self.assertEqual(events[('DU000001', 1001)].kind, PositionEvent.CHANGED)
+        self.assertEqual(events[('DU000001', 1001)].old.position, 10.0)
+        self.assertEqual(events[('DU000001', 1002)].kind, PositionEvent.REMOVED)
+        self.assertEqual(events[('DU000001', 1003)].kind, PositionEvent.ADDED)
+        self.assertEqual(len(self.tracker), 3)
+
+    def test_failed_refresh_is_retried(self):
+        """Ensure an account whose fetch failed is fetched again on the next refresh."""
+
+        self.tracker.refresh()
+        self.held['DU000001'][1001] = 15.0
+        self.tracker.invalidate(account_id='DU000001')
+
+        self.gateway.route('POST', 'portfolio/DU000001/positions/invalidate', {'error': 'down'}, status=400)
+        with self.assertRaises(requests.HTTPError):
+            self.tracker.refresh()
+
+        self.gateway.route('POST', 'portfolio/DU000001/positions/invalidate', {'message': 'success'})
+        events = self.tracker.refresh()
+
+        self.assertEqual([(event.kind, event.key) for event in events], [(PositionEvent.CHANGED, ('DU000001', 1001))])
+
+    def test_refresh_single_position(self):
+        """Ensure a known conid is updated with one request."""
+
+        self.tracker.refresh()
+        self.gateway.requests.clear()
+
+        self.held['DU000001'][1002] = 0.0
+        events = self.tracker.refresh_position(account_id='DU000001', conid=1002)
+
+        self.assertEqual(len(self.gateway.requests), 1)
+        self.assertEqual([(event.kind, event.key) for event in events], [(PositionEvent.REMOVED, ('DU000001', 1002))])
+        self.assertIsNotNone(self.tracker.get('DU000001', 1001))
+
+    def tearDown(self) -> None:
+        """Teardown the Client and the Fake Gateway."""
+
+        self.ibw_client.transport.close()
+        self.gateway.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
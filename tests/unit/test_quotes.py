@@ -0,0 +1,64 @@
+"""Unit test module for the columnar quote table."""
+
+import unittest
+
+from unittest import TestCase
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class QuoteTableTest(TestCase):
+
+    """Will perform a unit test for the quote table."""
+
+    def setUp(self) -> None:
+        """Set up the Quote Table."""
+
+        from ibw.quotes import QuoteTable
+
+        self.table = QuoteTable(conids=['265598', '8314', '4815747'], fields=['31', '84', '87'])
+
+    def test_parse_numbers(self):
+        """Ensure prefixes, separators and suffixes are handled."""
+
+        from ibw.quotes import parse_numbers
+
+        numbers, closing, halted = parse_numbers(values=['150.25', 'C149.5', 'H12', '1,234.5', '1.2M', '35K', '-0.5%', 'N/A'])
+
+        np.testing.assert_allclose(numbers[:7], [150.25, 149.5, 12.0, 1234.5, 1.2e6, 35e3, -0.5])
+        self.assertTrue(np.isnan(numbers[7]))
+        self.assertEqual(closing.tolist(), [False, True, False, False, False, False, False, False])
+        self.assertEqual(halted.tolist(), [False, False, True, False, False, False, False, False])
+
+    def test_update_writes_columns(self):
+        """Ensure a snapshot response lands in the right rows and columns."""
+
+        rows = self.table.update(content=[
+            {'conid': 8314, '_updated': 2000, '31': '120.5', '84': '120.4', '87': '2.5M'},
+            {'conid': 265598, '_updated': 1000, '31': 'C150.0'},
+            {'conid': 999, '31': '1.0'},
+        ])
+
+        self.assertEqual(rows.tolist(), [1, 0])
+        np.testing.assert_allclose(self.table['31'][:2], [150.0, 120.5])
+        self.assertTrue(np.isnan(self.table['84'][0]))
+        self.assertTrue(np.isnan(self.table.row('4815747')).all())
+        self.assertEqual(self.table['87'][1], 2.5e6)
+        self.assertTrue(self.table.closing[0, 0])
+        self.assertEqual(self.table.updated.tolist(), [1000, 2000, 0])
+
+    def test_partial_update_keeps_other_values(self):
+        """Ensure fields missing from a delta keep their last value."""
+
+        self.table.update(content=[{'conid': 8314, '31': '120.5', '84': '120.4'}])
+        self.table.update(content=[{'conid': 8314, '31': '121.0'}])
+
+        np.testing.assert_allclose(self.table.row('8314')[:2], [121.0, 120.4])
+
+
+if __name__ == '__main__':
+    unittest.main()
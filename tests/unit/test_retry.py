@@ -0,0 +1,289 @@
+"""Unit test module for the retries and circuit breakers of the transports."""
+
+import socket
+import unittest
+import requests
+
+from unittest import TestCase
+from unittest import mock
+from unittest import IsolatedAsyncioTestCase
+from ibw.client import IBClient
+from ibw.async_client import AsyncIBClient
+from ibw.retry import CircuitOpen
+from ibw.retry import RetryPolicy
+from ibw.retry import breaker_group
+from ibw.retry import retry_after
+from ibw.transport import AsyncIBTransport
+from ibw.transport import IBTransport
+from fake_gateway import FakeGateway
+
+
+class Clock():
+
+    """A clock the tests move forward by hand."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Flaky():
+
+    """A route failing a number of times before it answers."""
+
+    def __init__(self, failures: int, status: int = 503, headers: dict = None) -> None:
+        self.failures = failures
+        self.status = status
+        self.headers = headers
+        self.calls = 0
+
+    def __call__(self, request) -> tuple:
+
+        self.calls += 1
+        if self.calls <= self.failures:
+            return self.status, {'error': 'Service Unavailable'}, self.headers
+
+        return 200, {'netliquidation': {'amount': 1000.0}}, None
+
+
+def closed_port_url() -> str:
+    """Returns the URL of a local port nothing listens on."""
+
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    return 'http://127.0.0.1:{port}'.format(port=port)
+
+
+class RetryPolicyTest(TestCase):
+
+    """Will perform a unit test for the RetryPolicy object."""
+
+    def setUp(self) -> None:
+        """Set up the Policy."""
+
+        self.clock = Clock()
+        self.policy = RetryPolicy(
+            max_retries=3,
+            backoff=0.1,
+            max_backoff=0.3,
+            max_elapsed=5.0,
+            failure_threshold=2,
+            recovery_time=30.0,
+            clock=self.clock,
+            jitter=lambda: 1.0
+        )
+
+    def test_backoff(self):
+        """Ensure the waits double up to the cap and stop after the last retry."""
+
+        delays = [self.policy.next_delay(method='GET', attempt=attempt, elapsed=0.0, status_code=503) for attempt in range(4)]
+
+        self.assertEqual(delays, [0.1, 0.2, 0.3, None])
+
+    def test_what_is_retried(self):
+        """Ensure only idempotent requests failing with a retryable status are retried."""
+
+        self.assertIsNotNone(self.policy.next_delay(method='GET', attempt=0, elapsed=0.0))
+        self.assertIsNone(self.policy.next_delay(method='POST', attempt=0, elapsed=0.0, status_code=503))
+        self.assertIsNone(self.policy.next_delay(method='GET', attempt=0, elapsed=0.0, status_code=404))
+
+    def test_retry_after(self):
+        """Ensure `Retry-After` is honored in seconds and as a date, within the budget."""
+
+        self.assertEqual(self.policy.next_delay(method='GET', attempt=0, elapsed=0.0, status_code=429, retry_after_header='2'), 2.0)
+        self.assertIsNone(self.policy.next_delay(method='GET', attempt=0, elapsed=0.0, status_code=429, retry_after_header='60'))
+        self.assertEqual(retry_after('Wed, 21 Oct 2015 07:28:00 GMT', now=1445412470.0), 10.0)
+        self.assertIsNone(retry_after('soon'))
+
+    def test_breaker_groups(self):
+        """Ensure requests are grouped by the start of their endpoint."""
+
+        self.assertEqual(breaker_group('https://localhost:5000/v1/portal/iserver/marketdata/snapshot'), 'iserver/marketdata')
+        self.assertEqual(breaker_group('https://localhost:5000/v1/portal/portfolio/DU123456/summary'), 'portfolio/{id}')
+
+    def test_circuit(self):
+        """Ensure a circuit opens, lets one trial through after resting, and closes again."""
+
+        breaker = self.policy.breaker(url='https://localhost:5000/v1/portal/iserver/marketdata/snapshot')
+
+        self.policy.after(breaker=breaker, failed=True)
+        self.policy.before(breaker=breaker)
+        self.policy.after(breaker=breaker, failed=True)
+
+        with self.assertRaises(CircuitOpen) as context:
+            self.policy.before(breaker=breaker)
+        self.assertEqual(context.exception.retry_in, 30.0)
+        self.assertEqual(self.policy.open_circuits, ['iserver/marketdata'])
+
+        self.clock.now += 30.0
+        self.policy.before(breaker=breaker)
+        with self.assertRaises(CircuitOpen):
+            self.policy.before(breaker=breaker)
+
+        self.policy.after(breaker=breaker, failed=False)
+        self.policy.before(breaker=breaker)
+        self.assertEqual(self.policy.open_circuits, [])
+        self.assertEqual(self.policy.stats.as_dict()['circuits_opened'], 1)
+
+
+    def test_cancelled_trial(self):
+        """Ensure a cancelled trial lets the next request through instead of opening the circuit."""
+
+        breaker = self.policy.breaker(url='https://localhost:5000/v1/portal/iserver/marketdata/snapshot')
+        self.policy.after(breaker=breaker, failed=True)
+        self.policy.after(breaker=breaker, failed=True)
+
+        self.clock.now += 30.0
+        self.policy.before(breaker=breaker)
+        self.policy.abandon(breaker=breaker, failed=False)
+        self.policy.before(breaker=breaker)
+
+        self.assertEqual(self.policy.stats.circuits_opened, 1)
+
+class RetryTransportTest(TestCase):
+
+    """Will perform a unit test for the retries of the IBTransport object."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway and the Client."""
+
+        self.gateway = FakeGateway().start()
+
+        self.policy = RetryPolicy(backoff=0.01, failure_threshold=3)
+        self.ibw_client = IBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=IBTransport(pacing=False, retry_policy=self.policy)
+        )
+        self.ibw_client.ib_gateway_path = self.gateway.url
+
+        self.events = []
+        self.ibw_client.add_request_hook(self.events.append)
+
+    def test_transient_errors_are_retried(self):
+        """Ensure a GET recovers from a few 5xx responses, and the retries are reported."""
+
+        self.gateway.route('GET', 'portfolio/DU123456/summary', Flaky(failures=2, headers={'Retry-After': '0'}))
+
+        summary = self.ibw_client.portfolio_account_summary(account_id='DU123456')
+
+        self.assertEqual(summary, {'netliquidation': {'amount': 1000.0}})
+        self.assertEqual(len(self.gateway.requests), 3)
+        self.assertEqual(self.events[0].retries, 2)
+        self.assertEqual(self.policy.stats.as_dict()['recovered'], 1)
+
+    def test_orders_are_not_retried(self):
+        """Ensure a POST is sent once, and the error says what failed."""
+
+        self.gateway.route('POST', 'iserver/account/DU123456/order', Flaky(failures=1))
+
+        with self.assertRaises(requests.HTTPError) as context:
+            self.ibw_client.place_order(account_id='DU123456', order={'conid': 265598, 'side': 'BUY', 'quantity': 1})
+
+        self.assertEqual(len(self.gateway.requests), 1)
+        self.assertEqual(context.exception.response.status_code, 503)
+        self.assertIn('503 error from', str(context.exception))
+
+    def test_circuit_opens(self):
+        """Ensure a failing endpoint group is short circuited, and other groups are not."""
+
+        self.gateway.route('GET', 'portfolio/DU123456/summary', Flaky(failures=100))
+        self.gateway.route('GET', 'iserver/accounts', {'accounts': ['DU123456']})
+
+        with self.assertRaises(requests.HTTPError):
+            self.ibw_client.portfolio_account_summary(account_id='DU123456')
+        self.assertEqual(len(self.gateway.requests), 3)
+
+        with self.assertRaises(CircuitOpen):
+            self.ibw_client.portfolio_account_summary(account_id='DU123456')
+        self.assertEqual(len(self.gateway.requests), 3)
+
+        self.assertEqual(self.ibw_client.server_accounts(), {'accounts': ['DU123456']})
+        self.assertEqual(self.policy.stats.short_circuited, 1)
+
+    def test_failed_trial_frees_the_circuit(self):
+        """Ensure a trial request raising an error that isn't retried doesn't wedge the circuit."""
+
+        clock = Clock()
+        policy = RetryPolicy(max_retries=0, failure_threshold=1, recovery_time=30.0, clock=clock)
+        self.ibw_client.transport.retry_policy = policy
+
+        route = Flaky(failures=1)
+        self.gateway.route('GET', 'portfolio/DU123456/summary', route)
+
+        with self.assertRaises(requests.HTTPError):
+            self.ibw_client.portfolio_account_summary(account_id='DU123456')
+
+        clock.now += 30.0
+        with mock.patch.object(self.ibw_client.transport.session, 'request', side_effect=requests.exceptions.ChunkedEncodingError()):
+            with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+                self.ibw_client.portfolio_account_summary(account_id='DU123456')
+
+        with self.assertRaises(CircuitOpen):
+            self.ibw_client.portfolio_account_summary(account_id='DU123456')
+
+        clock.now += 30.0
+        self.assertEqual(self.ibw_client.portfolio_account_summary(account_id='DU123456'), {'netliquidation': {'amount': 1000.0}})
+        self.assertEqual(policy.open_circuits, [])
+
+    def test_connection_errors(self):
+        """Ensure connection errors are retried and raised once the retries run out."""
+
+        self.ibw_client.ib_gateway_path = closed_port_url()
+
+        with self.assertRaises(requests.ConnectionError):
+            self.ibw_client.portfolio_account_summary(account_id='DU123456')
+
+        self.assertEqual(self.policy.stats.as_dict()['retries'], 2)
+        self.assertEqual(self.policy.stats.exhausted, 1)
+
+    def tearDown(self) -> None:
+        """Teardown the Client and the Fake Gateway."""
+
+        self.ibw_client.transport.close()
+        self.gateway.stop()
+
+
+class AsyncRetryTransportTest(IsolatedAsyncioTestCase):
+
+    """Will perform a unit test for the retries of the AsyncIBTransport object."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway and the Client."""
+
+        self.gateway = FakeGateway().start()
+
+        self.ibw_client = AsyncIBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=AsyncIBTransport(pacing=False, retry_policy=RetryPolicy(backoff=0.01))
+        )
+        self.ibw_client.ib_gateway_path = self.gateway.url
+
+    async def test_transient_errors_are_retried(self):
+        """Ensure the async transport retries a GET too."""
+
+        self.gateway.route('GET', 'portfolio/DU123456/summary', Flaky(failures=2, status=502))
+
+        summary = await self.ibw_client.portfolio_account_summary(account_id='DU123456')
+
+        self.assertEqual(summary, {'netliquidation': {'amount': 1000.0}})
+        self.assertEqual(len(self.gateway.requests), 3)
+
+    async def asyncTearDown(self) -> None:
+        """Teardown the Client."""
+
+        await self.ibw_client.close()
+
+    def tearDown(self) -> None:
+        """Teardown the Fake Gateway."""
+
+        self.gateway.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+"""Unit test module for the local security master."""
+
+import tempfile
+import unittest
+
+from unittest import TestCase
+from ibw.client import IBClient
+from ibw.secmaster import SecurityMaster
+from ibw.transport import IBTransport
+from fake_gateway import FakeGateway
+
+LISTINGS = {
+    'AAPL': [{
+        'name': 'APPLE INC',
+        'assetClass': 'STK',
+        'contracts': [
+            {'conid': 265598, 'exchange': 'NASDAQ', 'isUS': True},
+            {'conid': 38708077, 'exchange': 'MEXI', 'isUS': False}
+        ]
+    }],
+    'IBM': [{
+        'name': 'INTL BUSINESS MACHINES CORP',
+        'assetClass': 'STK',
+        'contracts': [{'conid': 8314, 'exchange': 'NYSE', 'isUS': True}]
+    }]
+}
+
+DEFINITIONS = {
+    265598: {'conid': 265598, 'ticker': 'AAPL', 'name': 'APPLE INC', 'assetClass': 'STK', 'listingExchange': 'NASDAQ', 'currency': 'USD'},
+    38708077: {'conid': 38708077, 'ticker': 'AAPL', 'name': 'APPLE INC', 'assetClass': 'STK', 'listingExchange': 'MEXI', 'currency': 'MXN'},
+    8314: {'conid': 8314, 'ticker': 'IBM', 'name': 'INTL BUSINESS MACHINES CORP', 'assetClass': 'STK', 'listingExchange': 'NYSE', 'currency': 'USD'}
+}
+
+
+class Clock():
+
+    """A clock the tests move forward by hand."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class SecurityMasterTest(TestCase):
+
+    """Will perform a unit test for the SecurityMaster object."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway, the Client and the Master."""
+
+        self.gateway = FakeGateway().start()
+        self.gateway.route(
+            'GET',
+            '/trsrv/stocks',
+            lambda request: {
+                symbol: LISTINGS.get(symbol, [])
+                for symbol in request.query['symbols'].split(',')
+            }
+        )
+        self.gateway.route(
+            'POST',
+            '/trsrv/secdef',
+            lambda request: {'secdef': [DEFINITIONS[conid] for conid in request.json['conids'] if conid in DEFINITIONS]}
+        )
+
+        self.ibw_client = IBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=IBTransport(pacing=False, caching=False)
+        )
+        self.ibw_client.ib_gateway_path = self.gateway.url
+
+        self.clock = Clock()
+        self.folder = tempfile.TemporaryDirectory()
+        self.master = SecurityMaster(path=self.folder.name + '/secmaster.sqlite', clock=self.clock)
+
+    def test_bulk_load_then_no_network_calls(self):
+        """Ensure symbols are resolved locally once they are loaded."""
+
+        conids = self.master.resolve_many(client=self.ibw_client, symbols=['AAPL', 'IBM', 'NOPE'])
+        requests = len(self.gateway.requests)
+
+        again = self.master.resolve_many(client=self.ibw_client, symbols=['aapl', 'IBM', 'NOPE'])
+
+        self.assertEqual(conids, {'AAPL': 265598, 'IBM': 8314, 'NOPE': None})
+        self.assertEqual(again, {'aapl': 265598, 'IBM': 8314, 'NOPE': None})
+        self.assertEqual(requests, 2)
+        self.assertEqual(len(self.gateway.requests), 2)
+
+    def test_indexes(self):
+        """Ensure definitions can be found by conid, exchange and asset class."""
+
+        self.master.load(client=self.ibw_client, symbols=['AAPL', 'IBM'])
+
+        self.assertEqual(len(self.master), 3)
+        self.assertEqual(self.master.get(38708077).currency, 'MXN')
+        self.assertEqual(self.master.resolve(symbol='AAPL', exchange='MEXI'), 38708077)
+        self.assertEqual([security.conid for security in self.master.by_exchange('NYSE')], [8314])
+        self.assertEqual(len(self.master.by_sec_type('STK')), 3)
+        self.assertEqual(self.master.lookup(symbol='AAPL', sec_type='OPT'), [])
+
+    def test_index_persists(self):
+        """Ensure a new master on the same file starts filled."""
+
+        self.master.load(client=self.ibw_client, symbols=['AAPL', 'IBM'])
+        self.master.close()
+
+        reopened = SecurityMaster(path=self.folder.name + '/secmaster.sqlite', clock=self.clock)
+        requests = len(self.gateway.requests)
+
+        self.assertEqual(reopened.resolve_many(client=self.ibw_client, symbols=['AAPL', 'IBM']), {'AAPL': 265598, 'IBM': 8314})
+        self.assertEqual(len(self.gateway.requests), requests)
+        reopened.close()
+
+    def test_refresh_only_stale_definitions(self):
+        """Ensure a refresh only asks for definitions older than `max_age`."""
+
+        self.master.load(client=self.ibw_client, symbols=['AAPL'])
+        self.clock.now += self.master.max_age
+        self.master.load(client=self.ibw_client, symbols=['IBM'])
+
+        self.assertEqual(self.master.refresh(client=self.ibw_client), 2)
+        self.assertEqual(sorted(self.gateway.requests[-1].json['conids']), [265598, 38708077])
+        self.assertEqual(self.master.refresh(client=self.ibw_client), 0)
+
+    def test_forced_fetches_skip_the_response_cache(self):
+        """Ensure a forced load and a refresh reach the gateway with the response cache on."""
+
+        ibw_client = IBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=IBTransport(pacing=False)
+        )
+        ibw_client.ib_gateway_path = self.gateway.url
+
+        self.master.load(client=ibw_client, symbols=['AAPL'])
+        self.assertEqual(len(self.gateway.requests), 2)
+
+        self.master.load(client=ibw_client, symbols=['AAPL'], force=True)
+        self.assertEqual(len(self.gateway.requests), 4)
+
+        self.clock.now += self.master.max_age
+        self.assertEqual(self.master.refresh(client=ibw_client), 2)
+        self.assertEqual(len(self.gateway.requests), 5)
+
+        ibw_client.transport.close()
+
+    def tearDown(self) -> None:
+        """Teardown the Master, the Client and the Fake Gateway."""
+
+        self.master.close()
+        self.ibw_client.transport.close()
+        self.gateway.stop()
+        self.folder.cleanup()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,203 @@
+"""Unit test module for the market data stream.
+
+Runs the stream against a local fake websocket server, and checks the quote
+cache serves `market_data` without any HTTP call.
+"""
+
+import time
+import asyncio
+import unittest
+
+from unittest import TestCase
+from unittest import IsolatedAsyncioTestCase
+from ibw.client import IBClient
+from ibw.stream import MarketDataStream
+from ibw.stream import QuoteCache
+from ibw.stream import Tick
+from fake_websocket import FakeWebsocket
+
+
+class QuoteCacheTest(TestCase):
+
+    """Will perform a unit test for the quote cache."""
+
+    def test_snapshot_needs_every_conid_and_field(self):
+        """Ensure partial data isn't served."""
+
+        cache = QuoteCache()
+        cache.update(tick=Tick(conid='265598', fields={'31': '150.1'}, updated=1))
+        cache.update(tick=Tick(conid='265598', fields={'84': '150.0'}, updated=2))
+
+        self.assertEqual(
+            cache.snapshot(conids=['265598'], fields=['31', '84']),
+            [{'conid': 265598, '31': '150.1', '84': '150.0', '_updated': 2}]
+        )
+        self.assertIsNone(cache.snapshot(conids=['265598'], fields=['86']))
+        self.assertIsNone(cache.snapshot(conids=['265598', '8314'], fields=['31']))
+
+    def test_fields_are_required(self):
+        """Ensure a request without fields isn't served, as the gateway would pick them."""
+
+        cache = QuoteCache()
+        cache.update(tick=Tick(conid='265598', fields={'31': '150.1'}))
+
+        self.assertIsNone(cache.snapshot(conids=['265598']))
+        self.assertIsNotNone(cache.max_age)
+
+    def test_max_age(self):
+        """Ensure stale quotes aren't served."""
+
+        cache = QuoteCache(max_age=0.0)
+        cache.update(tick=Tick(conid='8314', fields={'31': '10'}))
+        time.sleep(0.01)
+
+        self.assertIsNone(cache.snapshot(conids='8314', fields=['31']))
+
+
+class MarketDataStreamTest(IsolatedAsyncioTestCase):
+
+    """Will perform a unit test for the async stream."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Websocket."""
+
+        self.server = FakeWebsocket().start()
+
+    async def asyncSetUp(self) -> None:
+        """Start the Stream."""
+
+        self.stream = MarketDataStream(url=self.server.url, reconnect_delay=0.05)
+        self.task = asyncio.ensure_future(self.stream.run())
+
+    async def _next_tick(self, ticks) -> Tick:
+        return await asyncio.wait_for(ticks.__anext__(), timeout=5)
+
+    async def test_subscribe_and_receive_ticks(self):
+        """Ensure subscriptions produce parsed ticks and fill the cache."""
+
+        ticks = self.stream.ticks()
+        received = []
+        self.stream.add_callback(received.append)
+        self.stream.subscribe(conid='265598', fields=['31', '84'])
+
+        tick = await self._next_tick(ticks)
+        self.assertEqual(tick.conid, '265598')
+        self.assertEqual(tick.fields, {'31': '265598.31', '84': '265598.84'})
+        self.assertEqual(received, [tick])
+
+        # Non market data messages are skipped.
+        self.server.push({'topic': 'system', 'hb': 1})
+        self.server.push({'topic': 'smd+265598', 'conid': 265598, '31': '151.0', '_updated': 2000})
+
+        tick = await self._next_tick(ticks)
+        self.assertEqual(tick.fields, {'31': '151.0'})
+        self.assertEqual(self.stream.quote_cache.get('265598')['31'], '151.0')
+        self.assertEqual(self.stream.quote_cache.get('265598')['84'], '265598.84')
+
+        self.stream.unsubscribe(conid='265598')
+        await asyncio.sleep(0.1)
+        self.assertNotIn('265598', self.server.subscriptions)
+        self.assertIsNone(self.stream.quote_cache.get('265598'))
+
+    async def test_reconnects_and_resubscribes(self):
+        """Ensure a dropped connection is reopened with the same subscriptions."""
+
+        ticks = self.stream.ticks()
+        self.stream.subscribe(conid='8314', fields=['31'])
+        await self._next_tick(ticks)
+
+        self.server.drop()
+
+        tick = await self._next_tick(ticks)
+        self.assertEqual(tick.conid, '8314')
+        self.assertEqual(self.server.connections, 2)
+        self.assertEqual(self.stream.reconnects, 1)
+
+    async def asyncTearDown(self) -> None:
+        """Stop the Stream."""
+
+        await self.stream.close()
+        await asyncio.wait_for(self.task, timeout=5)
+
+    def tearDown(self) -> None:
+        """Teardown the Fake Websocket."""
+
+        self.server.stop()
+
+
+class ClientQuoteCacheTest(TestCase):
+
+    """Will perform a unit test for serving `market_data` from the stream."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Websocket, the Client and a background Stream."""
+
+        self.server = FakeWebsocket().start()
+
+        self.ibw_client = IBClient(username='PAPER_USERNAME', account='DU123456')
+        self.ibw_client.ib_gateway_path = self.server.gateway_path
+
+        self.stream = MarketDataStream.from_client(self.ibw_client).start()
+
+    def test_market_data_served_from_stream(self):
+        """Ensure `market_data` is answered from the cache without an HTTP call."""
+
+        self.assertEqual(self.stream.url, self.server.url)
+        self.stream.subscribe(conid='265598', fields=['31', '84'])
+
+        deadline = time.monotonic() + 5
+        while self.stream.quote_cache.get('265598') is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        # The fake server has no HTTP routes, so this only passes if served from the cache.
+        content = self.ibw_client.market_data(conids=['265598'], since=None, fields=['31'])
+        self.assertEqual(content[0]['31'], '265598.31')
+
+    def test_ticks_on_another_loop(self):
+        """Ensure ticks reach an iterator running on another thread's loop."""
+
+        async def first_tick() -> Tick:
+            ticks = self.stream.ticks()
+            waiting = asyncio.ensure_future(ticks.__anext__())
+            await asyncio.sleep(0.05)
+            self.stream.subscribe(conid='8314', fields=['31'])
+            return await asyncio.wait_for(waiting, timeout=5)
+
+        deadline = time.monotonic() + 5
+        while not self.stream.connected and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(asyncio.run(first_tick()).conid, '8314')
+
+    def test_stop_detaches_the_cache(self):
+        """Ensure a stopped stream no longer answers `market_data`."""
+
+        self.stream.subscribe(conid='265598', fields=['31'])
+
+        deadline = time.monotonic() + 5
+        while self.stream.quote_cache.get('265598') is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.stream.stop()
+
+        self.assertIsNone(self.ibw_client.quote_cache)
+        self.assertEqual(len(self.stream.quote_cache), 0)
+
+    def test_stop_right_after_start(self):
+        """Ensure a stream stopped as soon as it's started doesn't keep running."""
+
+        stream = MarketDataStream.from_client(self.ibw_client).start()
+        stream.stop()
+
+        self.assertFalse(stream._thread.is_alive())
+
+    def tearDown(self) -> None:
+        """Teardown the Stream, the Client and the Fake Websocket."""
+
+        self.stream.stop()
+        self.ibw_client.transport.close()
+        self.server.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
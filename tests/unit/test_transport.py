@@ -0,0 +1,63 @@
+"""Unit test module for the pooled HTTP transport.
+
+Runs the client against a local fake gateway to make sure every request
+goes over the same keep-alive connection.
+"""
+
+import unittest
+
+from unittest import TestCase
+from ibw.client import IBClient
+from ibw.transport import IBTransport
+from fake_gateway import FakeGateway
+
+
+class IBTransportTest(TestCase):
+
+    """Will perform a unit test for the pooled transport."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway and the Client."""
+
+        self.gateway = FakeGateway().start()
+        self.gateway.route('GET', 'iserver/accounts', {'accounts': ['DU123456']})
+        self.gateway.route('POST', 'iserver/secdef/search', lambda request: [request.json])
+
+        self.ibw_client = IBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            pool_size=4
+        )
+        self.ibw_client.ib_gateway_path = self.gateway.url
+
+    def test_creates_transport(self):
+        """Ensure the client owns a transport with the requested pool size."""
+
+        self.assertIsInstance(self.ibw_client.transport, IBTransport)
+        self.assertEqual(self.ibw_client.transport.pool_size, 4)
+
+    def test_connection_is_reused(self):
+        """Ensure many calls share one keep-alive connection."""
+
+        for _ in range(10):
+            content = self.ibw_client.server_accounts()
+            self.assertEqual(content, {'accounts': ['DU123456']})
+
+        self.assertEqual(len(self.gateway.requests), 10)
+        self.assertEqual(self.gateway.connections, 1)
+
+    def test_sends_json_payload(self):
+        """Ensure POST payloads are sent through the transport."""
+
+        content = self.ibw_client.symbol_search(symbol='AAPL')
+        self.assertEqual(content, [{'symbol': 'AAPL'}])
+
+    def tearDown(self) -> None:
+        """Teardown the Client and the Fake Gateway."""
+
+        self.ibw_client.transport.close()
+        self.gateway.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
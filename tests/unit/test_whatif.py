@@ -0,0 +1,169 @@
+"""Unit test module for the batch what-if evaluator."""
+
+import time
+import unittest
+
+from unittest import TestCase
+from unittest import IsolatedAsyncioTestCase
+from ibw.client import IBClient
+from ibw.async_client import AsyncIBClient
+from ibw.orders import TEMPLATES
+from ibw.transport import AsyncIBTransport
+from ibw.transport import IBTransport
+from ibw.whatif import WhatIfEvaluator
+from ibw.whatif import order_hash
+from fake_gateway import FakeGateway
+
+
+class Clock():
+
+    """A clock the tests move forward by hand."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def whatif(request) -> dict:
+    """Answers a what-if request like the gateway, pricing every share at 100 USD."""
+
+    order = request.json
+    if order['conid'] == 0:
+        return {'error': 'Unknown contract.'}
+
+    value = order['quantity'] * 100.0
+
+    return {
+        'amount': {'amount': '{:,.0f} USD'.format(value), 'commission': '1.00 USD', 'total': '{:,.2f} USD'.format(value + 1)},
+        'equity': {'current': '100,000', 'change': '-1', 'after': '99,999'},
+        'initial': {'current': '10,000', 'change': '{:,.0f}'.format(value / 4), 'after': '{:,.0f}'.format(10000 + value / 4)},
+        'maintenance': {'current': '8,000', 'change': '{:,.0f}'.format(value / 5), 'after': '{:,.0f}'.format(8000 + value / 5)},
+        'warn': None,
+        'error': None
+    }
+
+
+def rebalance(count: int) -> list:
+    return [TEMPLATES['market'].create(conid=1000 + index, side='BUY', quantity=100) for index in range(count)]
+
+
+class WhatIfEvaluatorTest(TestCase):
+
+    """Will perform a unit test for the WhatIfEvaluator object."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway, the Client and the Evaluator."""
+
+        self.gateway = FakeGateway(latency=0.05).start()
+        self.gateway.route('POST', 'iserver/account/DU123456/order/whatif', whatif)
+
+        self.ibw_client = IBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=IBTransport(pacing=False)
+        )
+        self.ibw_client.ib_gateway_path = self.gateway.url
+
+        self.clock = Clock()
+        self.evaluator = WhatIfEvaluator(client=self.ibw_client, account_id='DU123456', clock=self.clock)
+
+    def test_table(self):
+        """Ensure the amounts are parsed into a table of numbers."""
+
+        table = self.evaluator.evaluate(orders=rebalance(count=2))
+
+        self.assertEqual(table[0].as_tuple()[:7], (1000, 'BUY', 100, 1.0, 2500.0, 2000.0, -1.0))
+        self.assertEqual(table.columns()['conid'], [1000, 1001])
+        self.assertEqual(table.totals(), {'commission': 2.0, 'initial_change': 5000.0, 'maintenance_change': 4000.0, 'equity_change': -2.0})
+
+    def test_orders_are_evaluated_concurrently(self):
+        """Ensure a batch takes about as long as one request per concurrent slot."""
+
+        start = time.perf_counter()
+        table = self.evaluator.evaluate(orders=rebalance(count=20))
+
+        self.assertEqual(len(table), 20)
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_results_are_cached(self):
+        """Ensure the same order is only sent once within the TTL."""
+
+        order = {'conid': 1000, 'side': 'BUY', 'quantity': 100, 'orderType': 'MKT', 'tif': 'DAY', 'cOID': 'a'}
+        twin = {'cOID': 'b', 'tif': 'DAY', 'orderType': 'MKT', 'quantity': 100.0, 'side': 'BUY', 'conid': 1000}
+
+        self.assertEqual(order_hash(account_id='DU123456', order=order), order_hash(account_id='DU123456', order=twin))
+
+        table = self.evaluator.evaluate(orders=[order, twin])
+        self.assertEqual([result.cached for result in table], [False, True])
+        self.assertEqual(len(self.gateway.requests), 1)
+
+        self.clock.now += 1.0
+        self.assertTrue(self.evaluator.evaluate(orders=[order])[0].cached)
+        self.assertEqual(len(self.gateway.requests), 1)
+
+        self.clock.now += 10.0
+        self.assertFalse(self.evaluator.evaluate(orders=[order])[0].cached)
+        self.assertEqual(len(self.gateway.requests), 2)
+        self.assertEqual((self.evaluator.hits, self.evaluator.misses), (2, 2))
+
+    def test_errors_are_not_cached(self):
+        """Ensure an order the gateway refuses is reported and asked again next time."""
+
+        order = {'conid': 0, 'side': 'BUY', 'quantity': 1, 'orderType': 'MKT'}
+
+        table = self.evaluator.evaluate(orders=[order])
+        self.assertEqual(table.errors[0].error, 'Unknown contract.')
+
+        self.evaluator.evaluate(orders=[order])
+        self.assertEqual(len(self.gateway.requests), 2)
+
+    def tearDown(self) -> None:
+        """Teardown the Client and the Fake Gateway."""
+
+        self.ibw_client.transport.close()
+        self.gateway.stop()
+
+
+class AsyncWhatIfEvaluatorTest(IsolatedAsyncioTestCase):
+
+    """Will perform a unit test for the WhatIfEvaluator object with the async client."""
+
+    def setUp(self) -> None:
+        """Set up the Fake Gateway and the Client."""
+
+        self.gateway = FakeGateway(latency=0.05).start()
+        self.gateway.route('POST', 'iserver/account/DU123456/order/whatif', whatif)
+
+        self.ibw_client = AsyncIBClient(
+            username='PAPER_USERNAME',
+            account='DU123456',
+            transport=AsyncIBTransport(pacing=False)
+        )
+        self.ibw_client.ib_gateway_path = self.gateway.url
+
+    async def test_evaluate_async(self):
+        """Ensure the async evaluator returns the rows in order."""
+
+        evaluator = WhatIfEvaluator(client=self.ibw_client, account_id='DU123456')
+
+        start = time.perf_counter()
+        table = await evaluator.evaluate_async(orders=rebalance(count=20))
+
+        self.assertEqual(table.columns()['conid'], [1000 + index for index in range(20)])
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    async def asyncTearDown(self) -> None:
+        """Teardown the Client."""
+
+        await self.ibw_client.close()
+
+    def tearDown(self) -> None:
+        """Teardown the Fake Gateway."""
+
+        self.gateway.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()